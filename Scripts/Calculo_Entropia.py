@@ -1,9 +1,14 @@
+import argparse
+
 import pandas as pd
 import numpy as np
 
+from tablas import escribe_tabla, lee_tabla
+
 # === CONFIGURACIÓN ===
 RUTA_EXCEL = r"C:\Users\Edu\PycharmProjects\Entropía_OK\adjetivos_con_polaridad.xlsx"  # cambia si el archivo se llama distinto
 HOJA = 0  # o el nombre de la hoja, por ejemplo "Hoja1"
+RUTA_SALIDA = r"C:\Users\Edu\PycharmProjects\Entropía_OK\salida_sentimientos_3bins.xlsx"
 
 # Bins semánticos:
 # 0–0.33 → negativo
@@ -26,8 +31,13 @@ def calcular_entropia(p):
 
 
 def main():
-    # === 1. Cargar el Excel original ===
-    df = pd.read_excel(RUTA_EXCEL, sheet_name=HOJA)
+    ap = argparse.ArgumentParser(description="Entropía de 3 bins de la polaridad de cada palabra.")
+    ap.add_argument("--entrada", default=RUTA_EXCEL, help="Excel o Parquet con la palabra (col. A) y la polaridad (col. H).")
+    ap.add_argument("--salida", default=RUTA_SALIDA, help="Excel o Parquet de salida.")
+    args = ap.parse_args()
+
+    # === 1. Cargar la tabla original (Excel o Parquet) ===
+    df = lee_tabla(args.entrada, hoja=HOJA, tipar=False)
 
     # Columna A = palabra, columna H = polaridad continua [0,1]
     col_palabra = df.columns[0]   # columna A
@@ -63,16 +73,16 @@ def main():
         })
 
     # === 3. Calcular entropía (y entropía normalizada) por palabra ===
-    entropias = datos.groupby("palabra").apply(entropia_de_grupo)
+    entropias = datos.groupby("palabra", observed=True).apply(entropia_de_grupo)
 
     # === 4. Añadir las entropías al dataframe original ===
     df_nuevo = df.copy()
     df_nuevo["entropia_3bins"] = df_nuevo[col_palabra].map(entropias["entropia_3bins"])
     df_nuevo["entropia_3bins_norm"] = df_nuevo[col_palabra].map(entropias["entropia_3bins_norm"])
 
-    # === 5. Guardar resultado en un nuevo Excel ===
-    salida = r"C:\Users\Edu\PycharmProjects\Entropía_OK\salida_sentimientos_3bins.xlsx"
-    df_nuevo.to_excel(salida, index=False)
+    # === 5. Guardar resultado (Excel o Parquet, según la extensión) ===
+    salida = args.salida
+    escribe_tabla(df_nuevo, salida)
 
     print(f"Listo. Archivo creado: {salida}")
 
@@ -0,0 +1,409 @@
+# -*- coding: utf-8 -*-
+"""
+Lexicón canónico de SO-CAL (los cuatro archivos de /Lexicons) en un
+almacén compacto basado en arrays, con caché binaria mapeable en memoria.
+
+Los lexicones son archivos .md/.txt con líneas en blanco, tabuladores
+irregulares (atroz\\t\\t-5) y marcas de Markdown. Se analizan una sola vez:
+
+  - cadenas internadas: todas las cadenas distintas (lema tal como aparece
+    en el lexicón y su clave normalizada) en un único bloque UTF-8 con un
+    array de desplazamientos;
+  - por entrada: id del lema y de la clave (int32), categoría (uint8,
+    índice en CATEGORIAS) y puntuación SO-CAL (int8).
+
+El almacén se guarda en Lexicons/.lexicon_cache/lexicones.bin (cabecera
+JSON + arrays alineados a 8 bytes) y las cargas siguientes lo abren con
+mmap: cargarlo no copia los arrays ni vuelve a analizar el texto. La
+cabecera guarda el SHA-256 del contenido de los cuatro archivos de origen;
+si no coincide con el de los archivos actuales (o cambia el formato), se
+vuelve a generar.
+
+indice_formas.py, detector_lexicon.py y el resto de scripts obtienen el
+lexicón con lexicon_por_defecto(), que lo carga una vez por proceso.
+
+USO:
+  python almacen_lexicon.py            # genera (si hace falta) la caché y mide la carga
+  python almacen_lexicon.py --salida lexicon.csv
+
+Requisitos:
+  - numpy (pandas solo para exportar)
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import re
+import sys
+import time
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+# ====== CONFIG ======
+CARPETA_LEXICONES = Path(__file__).resolve().parents[1] / "Lexicons"
+
+LEXICONES = {
+    "adj": "adj_dict_spa.md",
+    "adv": "adv_dict_spa.md",
+    "noun": "noun_dict_spa.md",
+    "verb": "verb_dict_spa.txt",
+}
+
+CATEGORIAS = ("adj", "adv", "noun", "verb")
+
+USAR_CACHE = True
+CARPETA_CACHE = ".lexicon_cache"
+ARCHIVO_CACHE = "lexicones.bin"
+
+MAGIC = b"SOCALLEX"
+VERSION_FORMATO = 1
+ALINEACION = 8
+
+
+class Entrada(NamedTuple):
+    lema: str          # como aparece en el lexicón (con acentos)
+    categoria: str     # adj / adv / noun / verb
+    valor: int         # puntuación SO-CAL (-5..5)
+
+
+# ------------------ análisis del texto ------------------
+LINEA_RE = re.compile(r"^(?P<lema>.*?)\s*(?P<valor>[-+]?\d+)$")
+
+
+def normaliza(texto: str) -> str:
+    """Minúsculas, sin acentos ni diéresis y con espacios simples."""
+    if texto is None:
+        return ""
+    texto = unicodedata.normalize("NFD", str(texto).strip().lower())
+    texto = "".join(ch for ch in texto if unicodedata.category(ch) != "Mn")
+    return " ".join(texto.split())
+
+
+def lee_lexicon(ruta: Path, categoria: str) -> List[Entrada]:
+    """
+    Lee un lexicón de SO-CAL: una entrada por línea, lema y puntuación
+    separados por tabuladores. Los .md llevan marcas de Markdown (**negrita**,
+    \\_ y \\*) que se quitan; '_' separa las palabras de una expresión.
+    """
+    entradas = []
+    with open(ruta, encoding="utf-8-sig") as f:
+        for linea in f:
+            linea = linea.strip().replace("*", "").replace("\\", "")
+            m = LINEA_RE.match(linea)
+            if not m or not m.group("lema"):
+                continue
+            lema = m.group("lema").replace("_", " ")
+            entradas.append(Entrada(" ".join(lema.split()), categoria, int(m.group("valor"))))
+    return entradas
+
+
+def hash_fuentes(carpeta: Path, lexicones: Dict[str, str]) -> str:
+    """SHA-256 del nombre y el contenido de cada archivo de origen, en orden."""
+    digest = hashlib.sha256()
+    for categoria, nombre in lexicones.items():
+        digest.update(f"{categoria}:{nombre}\n".encode("utf-8"))
+        digest.update((Path(carpeta) / nombre).read_bytes())
+    return digest.hexdigest()
+
+
+# ------------------ almacén ------------------
+class AlmacenLexicon:
+    """
+    Arrays (una posición por entrada del lexicón):
+      lema_id, clave_id   int32  -> cadena internada
+      categoria           uint8  -> CATEGORIAS
+      valor               int8   -> puntuación SO-CAL
+    Cadenas internadas: texto (uint8, UTF-8) y desplazamientos (int32, n + 1).
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], hash_origen: str, buffer=None):
+        self.lema_id = arrays["lema_id"]
+        self.clave_id = arrays["clave_id"]
+        self.categoria = arrays["categoria"]
+        self.valor = arrays["valor"]
+        self.texto = arrays["texto"]
+        self.desplazamientos = arrays["desplazamientos"]
+        self.hash_origen = hash_origen
+        self._buffer = buffer          # mmap abierto (si se cargó de la caché)
+        self._cadenas: Optional[List[str]] = None
+        self._por_clave: Optional[Dict[str, List[int]]] = None
+
+    @classmethod
+    def desde_entradas(cls, entradas: List[Entrada], hash_origen: str = "") -> "AlmacenLexicon":
+        ids: Dict[str, int] = {}
+        cadenas: List[str] = []
+
+        def interna(cadena: str) -> int:
+            if cadena not in ids:
+                ids[cadena] = len(cadenas)
+                cadenas.append(cadena)
+            return ids[cadena]
+
+        lema_id = np.array([interna(e.lema) for e in entradas], dtype=np.int32)
+        clave_id = np.array([interna(normaliza(e.lema)) for e in entradas], dtype=np.int32)
+        categoria = np.array([CATEGORIAS.index(e.categoria) for e in entradas], dtype=np.uint8)
+        valor = np.array([e.valor for e in entradas], dtype=np.int8)
+
+        codificadas = [c.encode("utf-8") for c in cadenas]
+        desplazamientos = np.zeros(len(codificadas) + 1, dtype=np.int32)
+        desplazamientos[1:] = np.cumsum([len(c) for c in codificadas], dtype=np.int64)
+        texto = np.frombuffer(b"".join(codificadas), dtype=np.uint8)
+
+        return cls({
+            "lema_id": lema_id,
+            "clave_id": clave_id,
+            "categoria": categoria,
+            "valor": valor,
+            "texto": texto,
+            "desplazamientos": desplazamientos,
+        }, hash_origen)
+
+    # --- acceso ---
+    def __len__(self) -> int:
+        return len(self.valor)
+
+    def cadenas(self) -> List[str]:
+        """Todas las cadenas internadas (se decodifican una vez)."""
+        if self._cadenas is None:
+            datos = self.texto.tobytes()
+            d = self.desplazamientos.tolist()
+            self._cadenas = [datos[d[i]:d[i + 1]].decode("utf-8") for i in range(len(d) - 1)]
+        return self._cadenas
+
+    def lema(self, i: int) -> str:
+        return self.cadenas()[self.lema_id[i]]
+
+    def clave(self, i: int) -> str:
+        return self.cadenas()[self.clave_id[i]]
+
+    def entrada(self, i: int) -> Entrada:
+        return Entrada(self.lema(i), CATEGORIAS[self.categoria[i]], int(self.valor[i]))
+
+    def entradas(self) -> Iterator[Entrada]:
+        cadenas = self.cadenas()
+        for lema, cat, valor in zip(self.lema_id.tolist(), self.categoria.tolist(), self.valor.tolist()):
+            yield Entrada(cadenas[lema], CATEGORIAS[cat], valor)
+
+    def busca(self, palabra: str) -> List[int]:
+        """Posiciones de las entradas cuyo lema normalizado es el de palabra."""
+        if self._por_clave is None:
+            cadenas = self.cadenas()
+            self._por_clave = {}
+            for i, c in enumerate(self.clave_id.tolist()):
+                self._por_clave.setdefault(cadenas[c], []).append(i)
+        return self._por_clave.get(normaliza(palabra), [])
+
+    def a_dataframe(self):
+        import pandas as pd
+        cadenas = self.cadenas()
+        return pd.DataFrame({
+            "lema": [cadenas[i] for i in self.lema_id.tolist()],
+            "clave": [cadenas[i] for i in self.clave_id.tolist()],
+            "categoria": [CATEGORIAS[c] for c in self.categoria.tolist()],
+            "valor": self.valor.astype(int),
+        })
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            "lema_id": self.lema_id,
+            "clave_id": self.clave_id,
+            "categoria": self.categoria,
+            "valor": self.valor,
+            "texto": self.texto,
+            "desplazamientos": self.desplazamientos,
+        }
+
+    # --- caché binaria ---
+    def guarda(self, ruta: Path):
+        guarda_arrays(ruta, MAGIC, {
+            "version": VERSION_FORMATO,
+            "hash_origen": self.hash_origen,
+            "categorias": list(CATEGORIAS),
+        }, self.arrays())
+
+    @classmethod
+    def abre(cls, ruta: Path) -> Tuple[Optional["AlmacenLexicon"], dict]:
+        """
+        Abre la caché con mmap (sin copiar los arrays). Devuelve
+        (almacén, cabecera), o (None, {}) si el archivo no es válido.
+        """
+        arrays, cabecera, buffer = abre_arrays(ruta, MAGIC)
+        if arrays is None:
+            return None, cabecera
+
+        if cabecera.get("version") != VERSION_FORMATO or cabecera.get("categorias") != list(CATEGORIAS):
+            return None, cabecera
+
+        return cls(arrays, cabecera["hash_origen"], buffer), cabecera
+
+
+# ------------------ formato binario ------------------
+def guarda_arrays(ruta: Path, magic: bytes, cabecera: dict, arrays: Dict[str, np.ndarray]):
+    """
+    magic, longitud de la cabecera (uint32 little-endian), cabecera JSON
+    (cabecera + dtype, tamaño y posición de cada array) y los arrays, cada
+    uno alineado a ALINEACION bytes. Se escribe en un temporal y se renombra.
+    """
+    def cabecera_con(posiciones):
+        return json.dumps(dict(cabecera, arrays={
+            nombre: [a.dtype.str, int(a.size), posiciones.get(nombre, 0)]
+            for nombre, a in arrays.items()
+        }), sort_keys=True).encode("utf-8")
+
+    # Las posiciones dependen de la longitud de la cabecera: se reserva
+    # espacio con posiciones de 12 dígitos y se rellena con espacios
+    provisional = cabecera_con({nombre: 10 ** 11 for nombre in arrays})
+    inicio = _alinea(len(magic) + 4 + len(provisional))
+
+    posiciones = {}
+    posicion = inicio
+    for nombre, a in arrays.items():
+        posiciones[nombre] = posicion
+        posicion = _alinea(posicion + a.nbytes)
+
+    cabecera_json = cabecera_con(posiciones).ljust(len(provisional))
+
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    temporal = ruta.with_suffix(ruta.suffix + f".{os.getpid()}.tmp")
+    with open(temporal, "wb") as f:
+        f.write(magic)
+        f.write(len(cabecera_json).to_bytes(4, "little"))
+        f.write(cabecera_json)
+        for nombre, a in arrays.items():
+            f.write(b"\0" * (posiciones[nombre] - f.tell()))
+            f.write(np.ascontiguousarray(a).tobytes())
+    os.replace(temporal, ruta)
+
+
+def abre_arrays(ruta: Path, magic: bytes) -> Tuple[Optional[Dict[str, np.ndarray]], dict, Optional[mmap.mmap]]:
+    """
+    Abre con mmap un archivo de guarda_arrays. Los arrays son vistas de
+    solo lectura sobre el mapa (no se copian). Devuelve (arrays, cabecera,
+    mmap), o (None, {}, None) si el archivo no existe, no es de este tipo o
+    está truncado o corrupto (el que llama lo vuelve a generar).
+    """
+    try:
+        with open(ruta, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None, {}, None
+
+    try:
+        if buffer[:len(magic)] != magic:
+            raise ValueError("magic")
+
+        n = int.from_bytes(buffer[len(magic):len(magic) + 4], "little")
+        if len(magic) + 4 + n > len(buffer):
+            raise ValueError("cabecera truncada")
+        cabecera = json.loads(bytes(buffer[len(magic) + 4:len(magic) + 4 + n]))
+
+        # Se comprueban todos antes de crear ninguna vista (con vistas
+        # abiertas el mmap no se puede cerrar)
+        tipos = {}
+        for nombre, (dtype, tamano, posicion) in cabecera["arrays"].items():
+            dtype = np.dtype(dtype)
+            if posicion < 0 or tamano < 0 or posicion + tamano * dtype.itemsize > len(buffer):
+                raise ValueError(f"array fuera del archivo: {nombre}")
+            tipos[nombre] = (dtype, tamano, posicion)
+    except (ValueError, KeyError, TypeError):
+        # JSONDecodeError y UnicodeDecodeError son ValueError
+        buffer.close()
+        return None, {}, None
+
+    arrays = {
+        nombre: np.frombuffer(buffer, dtype=dtype, count=tamano, offset=posicion)
+        for nombre, (dtype, tamano, posicion) in tipos.items()
+    }
+    return arrays, cabecera, buffer
+
+
+def _alinea(posicion: int) -> int:
+    return -(-posicion // ALINEACION) * ALINEACION
+
+
+# ------------------ carga ------------------
+def ruta_cache(carpeta: Path = CARPETA_LEXICONES) -> Path:
+    return Path(carpeta) / CARPETA_CACHE / ARCHIVO_CACHE
+
+
+def construye_almacen(carpeta: Path = CARPETA_LEXICONES, lexicones: Optional[Dict[str, str]] = None) -> AlmacenLexicon:
+    """Analiza los archivos de texto (sin caché)."""
+    lexicones = lexicones or LEXICONES
+    entradas = []
+    for categoria, nombre in lexicones.items():
+        entradas.extend(lee_lexicon(Path(carpeta) / nombre, categoria))
+    return AlmacenLexicon.desde_entradas(entradas, hash_fuentes(carpeta, lexicones))
+
+
+def carga_lexicon(carpeta: Path = CARPETA_LEXICONES, usar_cache: bool = USAR_CACHE) -> AlmacenLexicon:
+    """
+    Carga el lexicón desde la caché binaria si su hash coincide con el de
+    los archivos de origen; si no, lo analiza y regenera la caché.
+    """
+    carpeta = Path(carpeta)
+    if not usar_cache:
+        return construye_almacen(carpeta)
+
+    ruta = ruta_cache(carpeta)
+    hash_actual = hash_fuentes(carpeta, LEXICONES)
+
+    almacen, _ = AlmacenLexicon.abre(ruta)
+    if almacen is not None and almacen.hash_origen == hash_actual:
+        return almacen
+
+    almacen = construye_almacen(carpeta)
+    try:
+        almacen.guarda(ruta)
+    except OSError as e:
+        print(f"[AVISO] No pude escribir la caché del lexicón ({ruta}): {e}", file=sys.stderr)
+    return almacen
+
+
+_LEXICON: Optional[AlmacenLexicon] = None
+
+
+def lexicon_por_defecto() -> AlmacenLexicon:
+    """Lexicón de /Lexicons (se carga una sola vez por proceso)."""
+    global _LEXICON
+    if _LEXICON is None:
+        _LEXICON = carga_lexicon()
+    return _LEXICON
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Lexicón de SO-CAL en almacén binario con caché.")
+    ap.add_argument("--lexicones", default=str(CARPETA_LEXICONES), help="Carpeta con los lexicones.")
+    ap.add_argument("--salida", default=None, help="CSV de salida (lema;clave;categoria;valor).")
+    args = ap.parse_args()
+
+    carpeta = Path(args.lexicones)
+    if not carpeta.exists():
+        print(f"ERROR: No existe la carpeta: {carpeta}", file=sys.stderr); sys.exit(1)
+
+    t0 = time.perf_counter()
+    texto = construye_almacen(carpeta)
+    t1 = time.perf_counter()
+    almacen = carga_lexicon(carpeta)
+    t2 = time.perf_counter()
+    almacen = carga_lexicon(carpeta)
+    t3 = time.perf_counter()
+
+    iguales = all(np.array_equal(a, b) for a, b in zip(texto.arrays().values(), almacen.arrays().values()))
+    print(f"Entradas: {len(almacen)} | cadenas: {len(almacen.desplazamientos) - 1} | "
+          f"bytes en arrays: {sum(a.nbytes for a in almacen.arrays().values())}")
+    print(f"Análisis del texto: {1000 * (t1 - t0):.1f} ms | primera carga: {1000 * (t2 - t1):.1f} ms | "
+          f"carga desde la caché: {1000 * (t3 - t2):.2f} ms | igual al texto: {iguales}")
+    print(f"Caché: {ruta_cache(carpeta)}")
+
+    if args.salida:
+        almacen.a_dataframe().to_csv(args.salida, sep=";", index=False, encoding="utf-8-sig")
+        print(f"Listo. Archivo creado: {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
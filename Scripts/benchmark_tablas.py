@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark del formato de intercambio entre etapas: XLSX, CSV y Parquet.
+
+Genera un corpus sintético con la forma de un corpus completo de una
+categoría gramatical (por defecto todos los adjetivos del lexicón SO-CAL,
+500 oraciones por ítem, como el corpus extraído de esTenTen) y mide, para
+cada formato:
+
+  - escritura : DataFrame tipado -> archivo (tablas.escribe_tabla)
+  - lectura   : archivo -> DataFrame tipado (tablas.lee_tabla)
+  - lectura_probabilidades : solo palabra + POS / NEU / NEG, lo que leen
+                las etapas de entropía y cuantiles
+  - tamaño del archivo
+
+XLSX y CSV se escriben con las mismas funciones que usan las etapas como
+presentación; la lectura los vuelve a tipar (float32, categorías), así que
+el resultado es el mismo DataFrame en los tres casos. Se comprueba.
+
+USO:
+  python benchmark_tablas.py                          # adjetivos (~731.000 filas)
+  python benchmark_tablas.py --categoria adv --salida benchmark_adv.csv
+  python benchmark_tablas.py --filas 100000 --formatos parquet csv
+
+Requisitos:
+  - pandas, numpy, pyarrow, openpyxl
+"""
+import argparse
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from almacen_lexicon import CATEGORIAS, carga_lexicon
+from tablas import escribe_tabla, lee_tabla, tipa
+
+# ====== CONFIG ======
+RANDOM_SEED = 20260423
+
+CATEGORIA = "adj"
+OCURRENCIAS_POR_ITEM = 500     # como la extracción de Sketch Engine
+
+# Longitud (en tokens) de la oración objetivo y de las de contexto
+TOKENS_OBJETIVO = (8, 40)
+TOKENS_CONTEXTO = (0, 35)
+
+FORMATOS = ("parquet", "csv", "xlsx")
+EXTENSIONES = {"parquet": ".parquet", "csv": ".csv", "xlsx": ".xlsx"}
+
+COLUMNAS_PROBABILIDADES = ["palabra", "POS", "NEU", "NEG"]
+
+CARPETA = Path(".benchmark_tablas")
+SALIDA_CSV = Path("benchmark_tablas.csv")
+
+
+# ------------------ corpus sintético ------------------
+def corpus_sintetico(categoria: str = CATEGORIA, ocurrencias: int = OCURRENCIAS_POR_ITEM,
+                     filas: int = None, semilla: int = RANDOM_SEED) -> pd.DataFrame:
+    """
+    palabra, izquierda, objetivo, derecha (texto hecho con lemas del
+    lexicón), POS / NEU / NEG (probabilidades de Dirichlet) y auto_label.
+    """
+    rng = np.random.default_rng(semilla)
+    lexicon = carga_lexicon()
+    items = sorted({e.lema for e in lexicon.entradas() if e.categoria == categoria})
+    vocabulario = np.array(sorted({e.lema for e in lexicon.entradas()}), dtype=object)
+
+    n = filas if filas is not None else len(items) * ocurrencias
+    palabras = np.array(items, dtype=object)[np.arange(n) % len(items)]
+
+    def oraciones(rango) -> List[str]:
+        longitudes = rng.integers(rango[0], rango[1] + 1, size=n)
+        tokens = rng.choice(vocabulario, size=int(longitudes.sum()))
+        cortes = np.cumsum(longitudes)[:-1]
+        return [" ".join(t) for t in np.split(tokens, cortes)]
+
+    objetivo = [f"{o} {p}." for o, p in zip(oraciones(TOKENS_OBJETIVO), palabras)]
+    probas = rng.dirichlet((1.0, 1.0, 1.0), size=n).astype(np.float32)
+
+    df = pd.DataFrame({
+        "palabra": palabras,
+        "izquierda": oraciones(TOKENS_CONTEXTO),
+        "objetivo": objetivo,
+        "derecha": oraciones(TOKENS_CONTEXTO),
+        "POS": probas[:, 2],
+        "NEU": probas[:, 1],
+        "NEG": probas[:, 0],
+    })
+    df["auto_label"] = np.array(["NEG", "NEU", "POS"])[probas[:, ::-1].argmax(axis=1)]
+    return tipa(df)
+
+
+# ------------------ mediciones ------------------
+def cronometra(funcion, *args, **kwargs):
+    t0 = time.perf_counter()
+    resultado = funcion(*args, **kwargs)
+    return resultado, time.perf_counter() - t0
+
+
+def mismo_contenido(a: pd.DataFrame, b: pd.DataFrame) -> bool:
+    """Mismos valores; los float32 se comparan con la tolerancia de 6 decimales del CSV / XLSX."""
+    if list(a.columns) != list(b.columns) or len(a) != len(b):
+        return False
+    for col in a.columns:
+        x, y = a[col], b[col]
+        if x.dtype == np.float32:
+            if not np.allclose(x.to_numpy(), y.to_numpy(dtype=np.float32), atol=1e-6, equal_nan=True):
+                return False
+        elif not x.astype(object).fillna("").astype(str).equals(y.astype(object).fillna("").astype(str)):
+            return False
+    return True
+
+
+def mide_formato(df: pd.DataFrame, formato: str, carpeta: Path) -> Dict[str, object]:
+    ruta = carpeta / f"corpus{EXTENSIONES[formato]}"
+
+    _, t_escritura = cronometra(escribe_tabla, df, ruta)
+    leido, t_lectura = cronometra(lee_tabla, ruta)
+    parcial, t_parcial = cronometra(lee_tabla, ruta, columnas=COLUMNAS_PROBABILIDADES)
+
+    return {
+        "formato": formato,
+        "filas": len(df),
+        "escritura_s": round(t_escritura, 3),
+        "lectura_s": round(t_lectura, 3),
+        "lectura_probabilidades_s": round(t_parcial, 3),
+        "tamano_mb": round(ruta.stat().st_size / 1024 ** 2, 2),
+        "tipos_ok": all(leido[c].dtype == df[c].dtype for c in ("POS", "NEU", "NEG", "palabra", "auto_label")),
+        "contenido_ok": mismo_contenido(df, leido) and mismo_contenido(df[COLUMNAS_PROBABILIDADES], parcial),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Tiempo de lectura / escritura y tamaño: XLSX vs CSV vs Parquet.")
+    ap.add_argument("--categoria", choices=CATEGORIAS, default=CATEGORIA, help=f"Ítems del corpus (por defecto: {CATEGORIA}).")
+    ap.add_argument("--ocurrencias", type=int, default=OCURRENCIAS_POR_ITEM, help="Oraciones por ítem.")
+    ap.add_argument("--filas", type=int, default=None, help="Número de filas (en lugar de ítems x ocurrencias).")
+    ap.add_argument("--formatos", nargs="+", choices=FORMATOS, default=list(FORMATOS))
+    ap.add_argument("--carpeta", default=str(CARPETA), help="Carpeta temporal para los archivos.")
+    ap.add_argument("--salida", default=str(SALIDA_CSV), help="CSV con los resultados.")
+    ap.add_argument("--conservar", action="store_true", help="No borra los archivos generados.")
+    args = ap.parse_args()
+
+    df, t_generacion = cronometra(corpus_sintetico, args.categoria, args.ocurrencias, args.filas)
+    print(f"Corpus sintético: {len(df)} filas, {df['palabra'].nunique()} ítems ({t_generacion:.1f} s)")
+
+    carpeta = Path(args.carpeta)
+    carpeta.mkdir(parents=True, exist_ok=True)
+
+    filas = []
+    try:
+        for formato in args.formatos:
+            print(f"→ {formato}...", flush=True)
+            filas.append(mide_formato(df, formato, carpeta))
+    finally:
+        if not args.conservar:
+            shutil.rmtree(carpeta, ignore_errors=True)
+
+    resultados = pd.DataFrame(filas)
+    if "xlsx" in set(resultados["formato"]):
+        base = resultados.set_index("formato").loc["xlsx"]
+        for col in ("escritura_s", "lectura_s", "lectura_probabilidades_s", "tamano_mb"):
+            resultados[f"{col}_vs_xlsx"] = (resultados[col] / base[col]).round(3)
+
+    resultados.to_csv(args.salida, sep=";", index=False, encoding="utf-8-sig", decimal=",")
+    print()
+    print(resultados.to_string(index=False))
+    print(f"\nResultados: {args.salida}")
+
+    if not resultados["contenido_ok"].all():
+        print("ERROR: algún formato no devuelve el mismo contenido", file=sys.stderr); sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,403 @@
+# -*- coding: utf-8 -*-
+"""
+Agrega las probabilidades POS / NEU / NEG por palabra evaluativa y calcula
+medianas (y otros cuantiles) por palabra y por clase, sin necesidad de
+guardar en memoria todas las probabilidades de cada oración.
+
+Dos modos:
+  - kll     : sketch de cuantiles KLL (Karnin, Lang y Liberty, 2016) por
+              palabra y clase. Memoria acotada, procesamiento en streaming y
+              sketches fusionables (se pueden calcular por trozos o por
+              archivos y combinar después).
+  - exacto  : guarda todos los valores y calcula los cuantiles exactos
+              (misma interpolación lineal que pandas / numpy). Sirve para
+              validar el modo kll.
+
+La salida es la tabla que usa Orange para el gráfico de medianas
+(mediana POS en el eje x, mediana NEG en el eje y).
+
+USO:
+  python cuantiles_polaridad.py --entrada adj_polarity_entropy_corpus.csv --salida medianas_adj.xlsx
+  python cuantiles_polaridad.py --entrada adjetivos_con_triclase.xlsx --salida medianas.xlsx --modo exacto
+  python cuantiles_polaridad.py --entrada corpus.csv --salida medianas.xlsx --validar
+  python cuantiles_polaridad.py --entrada adj_polarity_entropy_corpus.parquet --salida medianas_adj.parquet
+
+Requisitos:
+  - pandas, numpy, openpyxl (pyarrow para Parquet)
+"""
+import argparse
+import hashlib
+import math
+import random
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from tablas import escribe_tabla, lee_lotes
+
+# ====== CONFIG ======
+RANDOM_SEED = 20260423
+
+# Tamaño del sketch KLL: error de rango aproximado ~ 1.7 / K
+K_SKETCH = 200
+
+COL_PALABRA = "palabra"
+
+# Columnas de probabilidad aceptadas para cada clase (la primera que exista).
+# 'pos_pct' etc. son las columnas que escriben los scripts sentiment_triclass*.
+COLUMNAS_CLASE = {
+    "POS": ("POS", "pos_pct", "POS - Mean"),
+    "NEU": ("NEU", "neu_pct", "NEU - Mean"),
+    "NEG": ("NEG", "neg_pct", "NEG - Mean"),
+}
+
+CUANTILES = (0.25, 0.5, 0.75)
+
+# Lectura por trozos de los CSV del corpus (punto y coma, coma decimal)
+FILAS_POR_TROZO = 100_000
+
+
+# ------------------ sketches ------------------
+class SketchKLL:
+    """
+    Sketch de cuantiles KLL.
+
+    Mantiene una jerarquía de compactores; el nivel h guarda elementos con
+    peso 2**h. Cuando el sketch se llena, el primer compactor lleno se ordena
+    y la mitad de sus elementos (pares o impares, al azar) sube al nivel
+    siguiente. La memoria queda acotada por ~3k elementos.
+    """
+
+    def __init__(self, k: int = K_SKETCH, semilla: Optional[int] = None):
+        self.k = k
+        self.n = 0
+        self.compactores: List[List[float]] = [[]]
+        self._tam = 0
+        self._max_tam = 0
+        self._rng = random.Random(semilla)
+        self._actualiza_max_tam()
+
+    def _capacidad(self, nivel: int) -> int:
+        profundidad = len(self.compactores) - nivel - 1
+        return int(math.ceil(self.k * (2.0 / 3.0) ** profundidad)) + 1
+
+    def _actualiza_max_tam(self):
+        self._max_tam = sum(self._capacidad(h) for h in range(len(self.compactores)))
+
+    def _comprime(self):
+        for h in range(len(self.compactores)):
+            if len(self.compactores[h]) >= self._capacidad(h):
+                if h + 1 >= len(self.compactores):
+                    self.compactores.append([])
+                    self._actualiza_max_tam()
+                nivel = self.compactores[h]
+                nivel.sort()
+                # Solo se compacta un prefijo de longitud par: con un número
+                # impar de elementos, el último se queda en este nivel (si
+                # subiera ceil(n/2) elementos con peso doble, el peso total
+                # crecería en cada compactación)
+                par = len(nivel) - len(nivel) % 2
+                desplazamiento = self._rng.randint(0, 1)
+                self.compactores[h + 1].extend(nivel[desplazamiento:par:2])
+                self.compactores[h] = nivel[par:]
+                self._tam = sum(len(c) for c in self.compactores)
+                if self._tam < self._max_tam:
+                    break
+
+    def agregar(self, valor: float):
+        self.compactores[0].append(float(valor))
+        self.n += 1
+        self._tam += 1
+        if self._tam >= self._max_tam:
+            self._comprime()
+
+    def agregar_muchos(self, valores: Iterable[float]):
+        for v in valores:
+            self.agregar(v)
+
+    def fusionar(self, otro: "SketchKLL") -> "SketchKLL":
+        """Incorpora otro sketch (p. ej. calculado sobre otro archivo)."""
+        while len(self.compactores) < len(otro.compactores):
+            self.compactores.append([])
+        for h, nivel in enumerate(otro.compactores):
+            self.compactores[h].extend(nivel)
+        self.n += otro.n
+        self._actualiza_max_tam()
+        self._tam = sum(len(c) for c in self.compactores)
+        while self._tam >= self._max_tam:
+            self._comprime()
+        return self
+
+    def _pesos_ordenados(self) -> Tuple[np.ndarray, np.ndarray]:
+        valores = []
+        pesos = []
+        for h, nivel in enumerate(self.compactores):
+            valores.extend(nivel)
+            pesos.extend([2 ** h] * len(nivel))
+        valores = np.asarray(valores, dtype=float)
+        pesos = np.asarray(pesos, dtype=float)
+        orden = np.argsort(valores, kind="mergesort")
+        return valores[orden], np.cumsum(pesos[orden])
+
+    def cuantil(self, q: float) -> float:
+        if self.n == 0:
+            return float("nan")
+        valores, acumulado = self._pesos_ordenados()
+        objetivo = q * acumulado[-1]
+        idx = int(np.searchsorted(acumulado, objetivo, side="left"))
+        return float(valores[min(idx, len(valores) - 1)])
+
+    def rango(self, valor: float) -> float:
+        """Fracción estimada de valores <= valor."""
+        if self.n == 0:
+            return float("nan")
+        valores, acumulado = self._pesos_ordenados()
+        idx = int(np.searchsorted(valores, valor, side="right"))
+        return float(acumulado[idx - 1] / acumulado[-1]) if idx > 0 else 0.0
+
+    def __len__(self):
+        return self._tam
+
+
+class CuantilesExactos:
+    """Misma interfaz que SketchKLL, pero guarda todos los valores."""
+
+    def __init__(self, k: int = K_SKETCH, semilla: Optional[int] = None):
+        self.n = 0
+        self.valores: List[float] = []
+
+    def agregar(self, valor: float):
+        self.valores.append(float(valor))
+        self.n += 1
+
+    def agregar_muchos(self, valores: Iterable[float]):
+        antes = len(self.valores)
+        self.valores.extend(float(v) for v in valores)
+        self.n += len(self.valores) - antes
+
+    def fusionar(self, otro: "CuantilesExactos") -> "CuantilesExactos":
+        self.valores.extend(otro.valores)
+        self.n += otro.n
+        return self
+
+    def cuantil(self, q: float) -> float:
+        if self.n == 0:
+            return float("nan")
+        return float(np.quantile(np.asarray(self.valores, dtype=float), q))
+
+    def rango(self, valor: float) -> float:
+        if self.n == 0:
+            return float("nan")
+        return float(np.mean(np.asarray(self.valores, dtype=float) <= valor))
+
+    def __len__(self):
+        return len(self.valores)
+
+
+SKETCHES = {
+    "kll": SketchKLL,
+    "exacto": CuantilesExactos,
+}
+
+
+def semilla_estable(semilla: int, *claves: str) -> int:
+    """
+    Semilla derivada de (semilla, palabra, clase). No depende del orden en
+    que aparecen las palabras ni de PYTHONHASHSEED.
+    """
+    h = hashlib.blake2b(digest_size=8)
+    h.update(str(semilla).encode("utf-8"))
+    for c in claves:
+        h.update(b"\x1f" + str(c).encode("utf-8"))
+    return int.from_bytes(h.digest(), "little")
+
+
+# ------------------ agregador ------------------
+class AgregadorCuantiles:
+    """
+    Un sketch por (palabra, clase). Se alimenta fila a fila o por trozos
+    de DataFrame, y se puede fusionar con otro agregador del mismo modo.
+    """
+
+    def __init__(self, modo: str = "kll", k: int = K_SKETCH, semilla: int = RANDOM_SEED,
+                 clases: Sequence[str] = ("POS", "NEU", "NEG")):
+        if modo not in SKETCHES:
+            raise ValueError(f"Modo desconocido '{modo}'. Opciones: {list(SKETCHES)}")
+        self.modo = modo
+        self.k = k
+        self.semilla = semilla
+        self.clases = tuple(clases)
+        self.sketches: Dict[Tuple[str, str], object] = {}
+        self.orden_palabras: Dict[str, int] = {}
+
+    def _sketch(self, palabra: str, clase: str):
+        clave = (palabra, clase)
+        sk = self.sketches.get(clave)
+        if sk is None:
+            sk = SKETCHES[self.modo](k=self.k, semilla=semilla_estable(self.semilla, palabra, clase))
+            self.sketches[clave] = sk
+            self.orden_palabras.setdefault(palabra, len(self.orden_palabras))
+        return sk
+
+    def agregar(self, palabra: str, clase: str, valor: float):
+        if valor is None or (isinstance(valor, float) and math.isnan(valor)):
+            return
+        self._sketch(palabra, clase).agregar(valor)
+
+    def agregar_trozo(self, df: pd.DataFrame, col_palabra: str, columnas: Dict[str, str]):
+        """Añade un trozo de DataFrame ya con las columnas resueltas."""
+        for palabra, grupo in df.groupby(col_palabra, sort=False, observed=True):
+            for clase, col in columnas.items():
+                vals = pd.to_numeric(grupo[col], errors="coerce").dropna()
+                if len(vals):
+                    self._sketch(str(palabra), clase).agregar_muchos(vals.to_numpy(dtype=float))
+
+    def fusionar(self, otro: "AgregadorCuantiles") -> "AgregadorCuantiles":
+        if otro.modo != self.modo:
+            raise ValueError(f"No se pueden fusionar agregadores '{self.modo}' y '{otro.modo}'")
+        for palabra in otro.orden_palabras:
+            self.orden_palabras.setdefault(palabra, len(self.orden_palabras))
+        for clave, sk in otro.sketches.items():
+            if clave in self.sketches:
+                self.sketches[clave].fusionar(sk)
+            else:
+                self.sketches[clave] = sk
+        return self
+
+    def cuantil(self, palabra: str, clase: str, q: float) -> float:
+        sk = self.sketches.get((palabra, clase))
+        return sk.cuantil(q) if sk is not None else float("nan")
+
+    def resumen(self, cuantiles: Sequence[float] = CUANTILES) -> pd.DataFrame:
+        filas = []
+        for palabra in self.orden_palabras:
+            fila = {"palabra": palabra}
+            n = 0
+            for clase in self.clases:
+                sk = self.sketches.get((palabra, clase))
+                if sk is None:
+                    continue
+                n = max(n, sk.n)
+                for q in cuantiles:
+                    fila[_nombre_columna(clase, q)] = sk.cuantil(q)
+            fila["n_oraciones"] = n
+            filas.append(fila)
+        return pd.DataFrame(filas)
+
+    def elementos_guardados(self) -> int:
+        return sum(len(sk) for sk in self.sketches.values())
+
+
+def _nombre_columna(clase: str, q: float) -> str:
+    if q == 0.5:
+        return f"{clase}_mediana"
+    return f"{clase}_q{int(round(q * 100)):02d}"
+
+
+# ------------------ lectura en streaming ------------------
+def resolver_columnas(columnas: Sequence[str], col_palabra: str = COL_PALABRA) -> Dict[str, str]:
+    if col_palabra not in columnas:
+        raise ValueError(f"No encuentro la columna '{col_palabra}'. Encabezados: {list(columnas)}")
+    m: Dict[str, str] = {}
+    for clase, opciones in COLUMNAS_CLASE.items():
+        for opcion in opciones:
+            if opcion in columnas:
+                m[clase] = opcion
+                break
+        else:
+            raise ValueError(f"No encuentro columna para la clase {clase} ({opciones}). Encabezados: {list(columnas)}")
+    return m
+
+
+def lee_trozos(ruta: Path, hoja: Optional[str] = None, filas_por_trozo: int = FILAS_POR_TROZO) -> Iterator[pd.DataFrame]:
+    """
+    Devuelve el archivo por trozos de DataFrame tipados (tablas.lee_lotes).
+    Parquet: lotes de pyarrow, con las probabilidades ya en float32.
+    CSV: pandas chunksize (sep=';', coma decimal, como el corpus).
+    Excel: openpyxl en modo read_only, sin cargar todo el libro.
+    """
+    yield from lee_lotes(ruta, hoja=hoja, filas_por_lote=filas_por_trozo)
+
+
+def _a_numerico(df: pd.DataFrame, columnas: Dict[str, str]) -> pd.DataFrame:
+    df = df.copy()
+    for col in columnas.values():
+        if not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col].astype(str).str.replace(",", ".", regex=False), errors="coerce")
+    return df
+
+
+def agrega_archivos(rutas: Sequence[Path], modo: str = "kll", k: int = K_SKETCH,
+                    col_palabra: str = COL_PALABRA, hoja: Optional[str] = None,
+                    semilla: int = RANDOM_SEED) -> AgregadorCuantiles:
+    """Un agregador por archivo, fusionados al final (mismo resultado que en paralelo)."""
+    total = None
+    for ruta in rutas:
+        parcial = AgregadorCuantiles(modo=modo, k=k, semilla=semilla)
+        columnas = None
+        for trozo in lee_trozos(ruta, hoja=hoja):
+            if columnas is None:
+                columnas = resolver_columnas(list(trozo.columns), col_palabra)
+            trozo = trozo.dropna(subset=[col_palabra])
+            parcial.agregar_trozo(_a_numerico(trozo, columnas), col_palabra, columnas)
+        total = parcial if total is None else total.fusionar(parcial)
+    return total
+
+
+def valida_contra_exacto(aprox: AgregadorCuantiles, exacto: AgregadorCuantiles,
+                         cuantiles: Sequence[float] = CUANTILES) -> pd.DataFrame:
+    """
+    Error de rango del modo kll frente al exacto: para cada (palabra, clase, q)
+    mide |rango_exacto(cuantil_kll) - q|.
+    """
+    filas = []
+    for (palabra, clase), sk_exacto in exacto.sketches.items():
+        for q in cuantiles:
+            valor_aprox = aprox.cuantil(palabra, clase, q)
+            filas.append({
+                "palabra": palabra,
+                "clase": clase,
+                "q": q,
+                "exacto": sk_exacto.cuantil(q),
+                "kll": valor_aprox,
+                "error_rango": abs(sk_exacto.rango(valor_aprox) - q),
+            })
+    return pd.DataFrame(filas)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Medianas y cuantiles POS/NEU/NEG por palabra (KLL o exacto).")
+    ap.add_argument("--entrada", nargs="+", required=True, help="CSV(s) o Parquet(s) del corpus, o Excel(s) con probabilidades por oración.")
+    ap.add_argument("--salida", required=True, help="Parquet, Excel o CSV de salida con los cuantiles por palabra.")
+    ap.add_argument("--modo", choices=sorted(SKETCHES), default="kll", help="kll (memoria acotada) o exacto.")
+    ap.add_argument("--k", type=int, default=K_SKETCH, help=f"Tamaño del sketch KLL (por defecto: {K_SKETCH}).")
+    ap.add_argument("--col-palabra", default=COL_PALABRA, help=f"Columna con la palabra (por defecto: '{COL_PALABRA}').")
+    ap.add_argument("--hoja", default=None, help="Hoja del Excel (opcional).")
+    ap.add_argument("--validar", action="store_true", help="Calcula también el modo exacto y resume el error del kll.")
+    args = ap.parse_args()
+
+    rutas = [Path(r) for r in args.entrada]
+    for ruta in rutas:
+        if not ruta.exists():
+            print(f"ERROR: No existe el archivo: {ruta}", file=sys.stderr); sys.exit(1)
+
+    agregador = agrega_archivos(rutas, modo=args.modo, k=args.k, col_palabra=args.col_palabra, hoja=args.hoja)
+    resumen = agregador.resumen()
+
+    salida = escribe_tabla(resumen, args.salida)
+
+    print(f"Palabras: {len(resumen)} | modo: {args.modo} | valores guardados: {agregador.elementos_guardados()}")
+    print(f"Listo. Archivo creado: {salida}")
+
+    if args.validar and args.modo == "kll":
+        exacto = agrega_archivos(rutas, modo="exacto", col_palabra=args.col_palabra, hoja=args.hoja)
+        errores = valida_contra_exacto(agregador, exacto)
+        print(f"Error de rango kll vs exacto: medio={errores['error_rango'].mean():.4f} | "
+              f"máximo={errores['error_rango'].max():.4f}")
+
+
+if __name__ == "__main__":
+    main()
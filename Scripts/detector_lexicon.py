@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""
+Detecta en cada oración todos los ítems de los lexicones de SO-CAL
+(adjetivos, adverbios, nombres y verbos de /Lexicons, con sus formas
+flexionadas) y, opcionalmente, negadores. Sirve para saber qué otros ítems
+evaluativos (o negaciones) coinciden con la palabra objetivo en la misma
+ventana de la concordancia.
+
+En lugar de una expresión regular por palabra (como probas_triclase_target),
+todas las formas del índice de indice_formas.py se compilan en un único
+autómata de Aho-Corasick cuyo alfabeto son los tokens normalizados
+(minúsculas, sin acentos). Cada oración se recorre una sola vez, token a
+token: el coste es lineal en la longitud del texto más el número de
+coincidencias, independientemente del número de ítems, y las expresiones de
+varias palabras (hijo de puta, lo mejor) se detectan en la misma pasada,
+solapadas o no con las demás.
+
+Por cada coincidencia se devuelve el id del ítem, su lema, categoría,
+polaridad previa (puntuación SO-CAL), la forma encontrada y su posición
+(inicio, fin) en el texto original.
+
+USO:
+  python detector_lexicon.py --entrada adjetivos_salida.xlsx --salida coocurrencias.csv
+  python detector_lexicon.py --entrada corpus.csv --col-palabra palabra --col-contexto objetivo --ventana 5 --salida coocurrencias.csv
+
+Requisitos:
+  - pandas, openpyxl
+"""
+import argparse
+import sys
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from indice_formas import IndiceFormas, TOKEN_RE, clave, indice_por_defecto
+from cuantiles_polaridad import lee_trozos
+from tablas import escribe_tabla
+
+# ====== CONFIG ======
+COL_PALABRA = "palabra"
+COL_CONTEXTO = "objetivo"
+
+# Negadores que se añaden al autómata (categoría "neg", valor 0). Los
+# lexicones de /Lexicons no incluyen intensificadores ni negadores.
+NEGADORES = ("no", "nunca", "jamás", "nada", "nadie", "ni", "tampoco", "sin", "ningún", "ninguno", "ninguna")
+
+# Ventana (en tokens a cada lado del objetivo) por defecto; None = oración completa
+VENTANA = None
+
+
+class Item(NamedTuple):
+    id: int
+    lema: str          # normalizado
+    categoria: str     # adj / adv / noun / verb / neg
+    valor: int         # polaridad previa SO-CAL
+
+
+class Coincidencia(NamedTuple):
+    item: int
+    lema: str
+    categoria: str
+    valor: int
+    forma: str         # tal como aparece en el texto
+    inicio: int        # posición en el texto original
+    fin: int
+    token: int         # índice del primer token
+
+
+# ------------------ autómata ------------------
+class DetectorLexicon:
+    """
+    Autómata de Aho-Corasick sobre tokens normalizados.
+
+    goto[s]:    token -> estado siguiente
+    fallo[s]:   estado del sufijo propio más largo que también es prefijo
+    salida[s]:  (n_tokens, ids de ítem) de todos los patrones que terminan en s
+                (los del propio estado y los de su cadena de fallos)
+    """
+
+    def __init__(self, indice: Optional[IndiceFormas] = None, negadores: Sequence[str] = NEGADORES):
+        indice = indice if indice is not None else indice_por_defecto()
+
+        self.items: List[Item] = []
+        ids: Dict[Tuple[str, str], int] = {}
+
+        def id_item(lema: str, categoria: str, valor: int) -> int:
+            k = (lema, categoria)
+            if k not in ids:
+                ids[k] = len(self.items)
+                self.items.append(Item(len(self.items), lema, categoria, valor))
+            return ids[k]
+
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fallo: List[int] = [0]
+        self.salida: List[List[Tuple[int, Tuple[int, ...]]]] = [[]]
+        propios: Dict[int, List[int]] = {}
+        longitud: Dict[int, int] = {}
+
+        def agrega_patron(tokens: Sequence[str], items: List[int]):
+            s = 0
+            for token in tokens:
+                siguiente = self.goto[s].get(token)
+                if siguiente is None:
+                    siguiente = len(self.goto)
+                    self.goto[s][token] = siguiente
+                    self.goto.append({})
+                    self.fallo.append(0)
+                    self.salida.append([])
+                s = siguiente
+            propios.setdefault(s, [])
+            for item in items:
+                if item not in propios[s]:
+                    propios[s].append(item)
+            longitud[s] = len(tokens)
+
+        # Solo las entradas cuya categoría genera la forma ("buena" es el
+        # adjetivo bueno, no el adverbio)
+        for forma, pares in indice.formas.items():
+            items = [id_item(lema, e.categoria, e.valor)
+                     for lema, categoria in pares for e in indice.entradas[lema] if e.categoria == categoria]
+            agrega_patron(forma.split(), items)
+
+        for expresiones in indice.multipalabra.values():
+            for tokens in expresiones:
+                lema = " ".join(tokens)
+                agrega_patron(tokens, [id_item(lema, e.categoria, e.valor) for e in indice.entradas[lema]])
+
+        for negador in negadores:
+            lema = clave(negador)
+            agrega_patron(lema.split(), [id_item(lema, "neg", 0)])
+
+        for s, items in propios.items():
+            self.salida[s] = [(longitud[s], tuple(items))]
+
+        # Enlaces de fallo en anchura (BFS)
+        cola = deque(self.goto[0].values())
+        while cola:
+            s = cola.popleft()
+            for token, t in self.goto[s].items():
+                cola.append(t)
+                f = self.fallo[s]
+                while f and token not in self.goto[f]:
+                    f = self.fallo[f]
+                self.fallo[t] = self.goto[f].get(token, 0)
+                self.salida[t] = self.salida[t] + self.salida[self.fallo[t]]
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def detecta(self, texto: str) -> List[Coincidencia]:
+        """Todas las coincidencias del texto, en orden de posición final."""
+        if texto is None:
+            return []
+
+        texto = str(texto)
+        goto, fallo, salida, items = self.goto, self.fallo, self.salida, self.items
+
+        coincidencias = []
+        inicios: List[int] = []
+        s = 0
+
+        for i, m in enumerate(TOKEN_RE.finditer(texto)):
+            inicios.append(m.start())
+            token = clave(m.group())
+
+            while s and token not in goto[s]:
+                s = fallo[s]
+            s = goto[s].get(token, 0)
+
+            for n, ids in salida[s]:
+                primero = i - n + 1
+                inicio, fin = inicios[primero], m.end()
+                for item_id in ids:
+                    item = items[item_id]
+                    coincidencias.append(Coincidencia(
+                        item_id, item.lema, item.categoria, item.valor,
+                        texto[inicio:fin], inicio, fin, primero
+                    ))
+
+        return coincidencias
+
+    def detecta_muchos(self, textos: Iterable[str]) -> Iterator[List[Coincidencia]]:
+        for texto in textos:
+            yield self.detecta(texto)
+
+    def tabla_items(self) -> pd.DataFrame:
+        return pd.DataFrame(self.items)
+
+
+# ------------------ concordancias ------------------
+def posicion_objetivo(texto: str, palabra: str, indice: IndiceFormas) -> Optional[int]:
+    """Índice (en tokens) de la primera forma de la palabra objetivo, o None."""
+    span = indice.localiza(texto, palabra)
+    if span is None:
+        return None
+    return sum(1 for m in TOKEN_RE.finditer(str(texto)[:span[0]]))
+
+
+def coocurrencias(df: pd.DataFrame, detector: DetectorLexicon, col_palabra: str = COL_PALABRA,
+                  col_contexto: str = COL_CONTEXTO, ventana: Optional[int] = VENTANA,
+                  indice: Optional[IndiceFormas] = None, desplazamiento: int = 0) -> pd.DataFrame:
+    """
+    Una fila por ítem detectado en cada oración: fila, palabra objetivo,
+    ítem, forma, posición, distancia en tokens al objetivo (vacía si el
+    objetivo no aparece) y si la coincidencia es el propio objetivo.
+    Con ventana, solo los ítems a esa distancia o menos del objetivo.
+    """
+    indice = indice if indice is not None else indice_por_defecto()
+    filas = []
+
+    for n_fila, (palabra, texto) in enumerate(zip(df[col_palabra], df[col_contexto]), start=desplazamiento):
+        if pd.isna(texto):
+            continue
+        palabra = "" if pd.isna(palabra) else str(palabra)
+        objetivo = posicion_objetivo(texto, palabra, indice) if palabra else None
+        lema_objetivo = clave(palabra)
+
+        for c in detector.detecta(texto):
+            distancia = None if objetivo is None else c.token - objetivo
+            if ventana is not None and (distancia is None or abs(distancia) > ventana):
+                continue
+            filas.append({
+                "fila": n_fila,
+                "palabra": palabra,
+                "item": c.item,
+                "lema": c.lema,
+                "categoria": c.categoria,
+                "valor": c.valor,
+                "forma": c.forma,
+                "inicio": c.inicio,
+                "fin": c.fin,
+                "distancia": distancia,
+                "es_objetivo": distancia == 0 and c.lema == lema_objetivo,
+            })
+
+    return pd.DataFrame(filas, columns=["fila", "palabra", "item", "lema", "categoria", "valor", "forma",
+                                        "inicio", "fin", "distancia", "es_objetivo"])
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Ítems de los lexicones (y negadores) presentes en cada concordancia.")
+    ap.add_argument("--entrada", required=True, help="CSV (;), Parquet o Excel con la palabra y la oración.")
+    ap.add_argument("--salida", required=True, help="CSV, Parquet o Excel de salida (una fila por ítem detectado).")
+    ap.add_argument("--col-palabra", default=COL_PALABRA, help=f"Columna con la palabra objetivo (por defecto: '{COL_PALABRA}').")
+    ap.add_argument("--col-contexto", default=COL_CONTEXTO, help=f"Columna con la oración (por defecto: '{COL_CONTEXTO}').")
+    ap.add_argument("--ventana", type=int, default=VENTANA, help="Tokens a cada lado del objetivo (por defecto: oración completa).")
+    ap.add_argument("--hoja", default=None, help="Hoja del Excel (opcional).")
+    ap.add_argument("--sin-negadores", action="store_true", help="No añade los negadores al autómata.")
+    args = ap.parse_args()
+
+    ruta = Path(args.entrada)
+    if not ruta.exists():
+        print(f"ERROR: No existe el archivo: {ruta}", file=sys.stderr); sys.exit(1)
+
+    detector = DetectorLexicon(negadores=() if args.sin_negadores else NEGADORES)
+    print(f"Ítems en el autómata: {len(detector)} | estados: {len(detector.goto)}")
+
+    partes = []
+    desplazamiento = 0
+    for trozo in lee_trozos(ruta, hoja=args.hoja):
+        for col in (args.col_palabra, args.col_contexto):
+            if col not in trozo.columns:
+                print(f"ERROR: No encuentro la columna '{col}'. Encabezados: {list(trozo.columns)}", file=sys.stderr); sys.exit(1)
+        partes.append(coocurrencias(trozo, detector, args.col_palabra, args.col_contexto, args.ventana,
+                                    desplazamiento=desplazamiento))
+        desplazamiento += len(trozo)
+
+    resultado = pd.concat(partes, ignore_index=True) if partes else coocurrencias(
+        pd.DataFrame(columns=[args.col_palabra, args.col_contexto]), detector)
+
+    salida = Path(args.salida)
+    if salida.suffix.lower() == ".csv":
+        resultado.to_csv(salida, sep=";", index=False, encoding="utf-8-sig")
+    else:
+        escribe_tabla(resultado, salida)
+
+    print(f"Oraciones: {desplazamiento} | ítems detectados: {len(resultado)} "
+          f"(sin contar el objetivo: {int((~resultado['es_objetivo']).sum())})")
+    print(f"Listo. Archivo creado: {salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,472 @@
+# -*- coding: utf-8 -*-
+"""
+Índice precalculado forma superficial -> lema para los ítems de los
+lexicones de /Lexicons (adjetivos, adverbios, nombres y verbos de SO-CAL).
+Las entradas salen del lexicón canónico de almacen_lexicon.py.
+
+Para localizar la palabra evaluativa en una oración, los scripts generaban
+las variantes de la palabra en cada fila (candidate_forms en el script de
+Cardiff) o buscaban con una expresión regular por palabra
+(probas_triclase_target) y normalizaban cada token de cada oración. Con el
+índice, las formas de todos los ítems se generan una sola vez al cargarlo y
+localizar el objetivo es una consulta a un dict por token:
+
+    indice = indice_por_defecto()
+    indice.lemas("buenas")                    # -> ('bueno',)
+    indice.es_forma_de("destruyeron", "destruir")
+    indice.localiza(texto, "bueno")           # -> (inicio, fin) o None
+
+Las claves (formas y lemas) van normalizadas: minúsculas, sin acentos y
+con un solo espacio entre palabras; clave() guarda en caché la
+normalización de cada token, así que en un corpus con vocabulario repetido
+cada token cuesta una consulta a un dict.
+
+Formas generadas:
+  - adjetivos: las mismas variantes que candidate_forms (o/a/os/as y forma
+    apocopada, -e -> -es, -z -> -ces, resto -s/-es);
+  - nombres: singular y plural (-s, -es, -z -> -ces);
+  - adverbios: la forma del lexicón;
+  - verbos: infinitivo, gerundio, participio (o/a/os/as), los tiempos
+    simples de indicativo y subjuntivo e imperativo, con los cambios
+    ortográficos (c/qu, g/gu, z/c, g/j, gu/g, c/zc, -uir -> y), los verbos
+    con diptongo o cierre vocálico del lexicón (IE, UE, IE_I, UE_U, E_I,
+    I_IE) y los irregulares de IRREGULARES (también con prefijo:
+    imponer, abstener, contravenir, atraer, sobresalir...); infinitivo y
+    gerundio también con un pronombre enclítico (quejarse, quejándose).
+
+Las entradas de varias palabras (hijo\\_de\\_puta en el lexicón) se guardan
+aparte, en multipalabra, y localiza() las busca como secuencia de tokens.
+
+USO:
+  python indice_formas.py --salida indice_formas.csv
+
+Requisitos:
+  - pandas (solo para exportar el índice)
+"""
+import argparse
+import re
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from almacen_lexicon import CARPETA_LEXICONES, Entrada, carga_lexicon, lexicon_por_defecto, normaliza
+
+# ====== CONFIG ======
+# Verbos del lexicón con cambio vocálico en la raíz
+IE = {  # e -> ie en las formas con la raíz tónica
+    "acertar", "acrecentar", "desconcertar", "reventar", "temblar", "tropezar",
+    "entender", "desatender", "perder",
+}
+UE = {  # o -> ue (tras g es güe, que normalizado queda gue: avergüenzo -> averguenzo)
+    "acordar", "asolar", "avergonzar", "consolar", "esforzar", "forzar",
+    "conmover", "doler", "morder", "torcer", "resolver", "disolver",
+}
+IE_I = {"advertir", "arrepentir", "divertir", "herir"}  # sentir: siento, sintió
+UE_U = {"morir"}                                        # dormir: duermo, durmió
+E_I = {"impedir", "conseguir"}                          # pedir: pido, pidió
+I_IE = {"adquirir"}                                     # adquiero
+
+# Irregulares (se aplican también a los derivados con prefijo):
+#   yo          raíz de la 1.ª persona del presente y de todo el subjuntivo presente
+#   futuro      raíz del futuro y el condicional
+#   indefinido  raíz del pretérito fuerte (puse, tuve, vine...)
+#   participio  raíz del participio
+#   imperativo  imperativo de tú
+#   cambio      clase de cambio vocálico en el resto del presente
+IRREGULARES: Dict[str, Dict[str, str]] = {
+    "poner": {"yo": "pong", "futuro": "pondr", "indefinido": "pus", "participio": "puest", "imperativo": "pon"},
+    "tener": {"yo": "teng", "futuro": "tendr", "indefinido": "tuv", "imperativo": "ten", "cambio": "IE"},
+    "venir": {"yo": "veng", "futuro": "vendr", "indefinido": "vin", "imperativo": "ven", "cambio": "IE_I"},
+    "traer": {"yo": "traig", "indefinido": "traj"},
+    "querer": {"futuro": "querr", "indefinido": "quis", "cambio": "IE"},
+    "salir": {"yo": "salg", "futuro": "saldr", "imperativo": "sal"},
+    "morir": {"participio": "muert"},
+    "olver": {"participio": "uelt"},  # resolver, disolver, volver
+}
+
+ENCLITICOS = ("me", "te", "se", "nos", "os", "lo", "la", "le", "los", "las", "les")
+
+VOCALES = set("aeiou")
+
+
+# ------------------ normalización ------------------
+@lru_cache(maxsize=1 << 18)
+def clave(token: str) -> str:
+    """normaliza() con caché: cada token distinto se normaliza una sola vez."""
+    return normaliza(token)
+
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+# ------------------ flexión nominal ------------------
+def formas_adjetivo(lema: str) -> Set[str]:
+    """Mismas variantes que candidate_forms en el script de Cardiff."""
+    forms = {lema}
+
+    if lema.endswith("o") and len(lema) > 2:
+        raiz = lema[:-1]
+        forms.update({raiz + "a", raiz + "os", raiz + "as", raiz})  # bueno -> buen
+    elif lema.endswith("e") and len(lema) > 2:
+        forms.add(lema + "s")
+    elif lema.endswith("z") and len(lema) > 2:
+        forms.add(lema[:-1] + "ces")
+    elif len(lema) > 2:
+        forms.add(lema + "s")
+        forms.add(lema + "es")
+
+    return forms
+
+
+def formas_nombre(lema: str) -> Set[str]:
+    forms = {lema}
+
+    if lema[-1] in VOCALES:
+        forms.add(lema + "s")
+    elif lema.endswith("z"):
+        forms.add(lema[:-1] + "ces")
+    elif not lema.endswith(("s", "x")):  # crisis, tórax: invariables
+        forms.add(lema + "es")
+
+    return forms
+
+
+# ------------------ conjugación ------------------
+# Terminaciones sin acentos (las claves del índice no los llevan)
+PRESENTE = {
+    "ar": ("o", "as", "a", "amos", "ais", "an"),
+    "er": ("o", "es", "e", "emos", "eis", "en"),
+    "ir": ("o", "es", "e", "imos", "is", "en"),
+}
+IMPERFECTO = {
+    "ar": ("aba", "abas", "aba", "abamos", "abais", "aban"),
+    "er": ("ia", "ias", "ia", "iamos", "iais", "ian"),
+    "ir": ("ia", "ias", "ia", "iamos", "iais", "ian"),
+}
+INDEFINIDO = {
+    "ar": ("e", "aste", "o", "amos", "asteis", "aron"),
+    "er": ("i", "iste", "io", "imos", "isteis", "ieron"),
+    "ir": ("i", "iste", "io", "imos", "isteis", "ieron"),
+}
+INDEFINIDO_FUERTE = ("e", "iste", "o", "imos", "isteis", "ieron")
+SUBJUNTIVO = {
+    "ar": ("e", "es", "e", "emos", "eis", "en"),
+    "er": ("a", "as", "a", "amos", "ais", "an"),
+    "ir": ("a", "as", "a", "amos", "ais", "an"),
+}
+FUTURO = ("e", "as", "a", "emos", "eis", "an")
+CONDICIONAL = ("ia", "ias", "ia", "iamos", "iais", "ian")
+SUBJUNTIVO_IMPERFECTO = ("ra", "ras", "ra", "ramos", "rais", "ran", "se", "ses", "se", "semos", "seis", "sen")
+
+# Personas (0..5) con la raíz tónica (diptongo) en presente y subjuntivo
+TONICAS = (0, 1, 2, 5)
+
+
+def _ultima_vocal(raiz: str, vocales: str) -> int:
+    for i in range(len(raiz) - 1, -1, -1):
+        if raiz[i] in vocales:
+            # la u de gu / qu no es vocal de la raíz (conseguir)
+            if raiz[i] == "u" and i > 0 and raiz[i - 1] in "gq":
+                continue
+            return i
+    return -1
+
+
+def diptonga(raiz: str, clase: str) -> str:
+    if clase in ("IE", "IE_I", "I_IE"):
+        i = _ultima_vocal(raiz, "ei" if clase == "I_IE" else "e")
+        return raiz[:i] + "ie" + raiz[i + 1:] if i >= 0 else raiz
+    i = _ultima_vocal(raiz, "o")
+    return raiz[:i] + "ue" + raiz[i + 1:] if i >= 0 else raiz
+
+
+def cierra(raiz: str) -> str:
+    """e -> i, o -> u en la última vocal de la raíz (pidió, murió)."""
+    i = _ultima_vocal(raiz, "eo")
+    if i < 0:
+        return raiz
+    return raiz[:i] + ("i" if raiz[i] == "e" else "u") + raiz[i + 1:]
+
+
+def une(raiz: str, terminacion: str, grupo: str) -> str:
+    """Raíz + terminación con los cambios ortográficos del español."""
+    if not terminacion:
+        return raiz
+
+    inicial = terminacion[0]
+
+    if grupo == "ar" and inicial == "e":
+        if raiz.endswith("c"):
+            raiz = raiz[:-1] + "qu"
+        elif raiz.endswith("g"):
+            raiz = raiz[:-1] + "gu"
+        elif raiz.endswith("z"):
+            raiz = raiz[:-1] + "c"
+
+    elif grupo != "ar" and inicial in "ao":
+        if raiz.endswith("gu"):
+            raiz = raiz[:-1]                                   # consigo
+        elif raiz.endswith("g"):
+            raiz = raiz[:-1] + "j"                             # acojo, exijo
+        elif raiz.endswith("c"):
+            if len(raiz) > 1 and raiz[-2] in VOCALES:
+                raiz = raiz[:-1] + "zc"                        # merezco
+            else:
+                raiz = raiz[:-1] + "z"                         # tuerzo
+
+    # -uir: destruyo, destruye, destruya (pero destruimos, destruía)
+    if grupo == "ir" and raiz.endswith("u") and not raiz.endswith(("gu", "qu")) and inicial != "i":
+        raiz = raiz + "y"
+
+    # i átona entre vocales: destruyó, destruyendo, trayendo
+    if grupo != "ar" and raiz[-1:] in VOCALES and terminacion[:2] in ("ie", "io"):
+        if not raiz.endswith(("gu", "qu")):
+            terminacion = "y" + terminacion[1:]
+
+    return raiz + terminacion
+
+
+def _irregular(infinitivo: str) -> Tuple[Dict[str, str], str]:
+    """Datos irregulares (con el prefijo aplicado) y clase de cambio vocálico."""
+    clase = ""
+    for conjunto, nombre in ((IE, "IE"), (UE, "UE"), (IE_I, "IE_I"), (UE_U, "UE_U"), (E_I, "E_I"), (I_IE, "I_IE")):
+        if infinitivo in conjunto:
+            clase = nombre
+
+    for base in sorted(IRREGULARES, key=len, reverse=True):
+        if infinitivo.endswith(base):
+            prefijo = infinitivo[:-len(base)]
+            datos = {k: prefijo + v for k, v in IRREGULARES[base].items() if k != "cambio"}
+            return datos, IRREGULARES[base].get("cambio", clase)
+
+    return {}, clase
+
+
+def conjuga(infinitivo: str) -> Dict[str, List[str]]:
+    """
+    Formas simples del verbo (sin acentos) por tiempo. Con un infinitivo que
+    no termina en -ar / -er / -ir devuelve solo el infinitivo.
+    """
+    infinitivo = normaliza(infinitivo)
+    grupo = infinitivo[-2:]
+    if grupo not in PRESENTE or len(infinitivo) < 3:
+        return {"infinitivo": [infinitivo]}
+
+    raiz = infinitivo[:-2]
+    irr, clase = _irregular(infinitivo)
+
+    tonica = diptonga(raiz, clase) if clase else raiz
+    cerrada = cierra(raiz) if clase in ("IE_I", "UE_U", "E_I") else raiz
+    if clase == "E_I":
+        tonica = cerrada
+
+    presente = [une(tonica if p in TONICAS else raiz, t, grupo) for p, t in enumerate(PRESENTE[grupo])]
+
+    if "yo" in irr:
+        presente[0] = irr["yo"] + "o"
+        subjuntivo = [irr["yo"] + t for t in SUBJUNTIVO[grupo]]
+    else:
+        subjuntivo = []
+        for p, t in enumerate(SUBJUNTIVO[grupo]):
+            if p in TONICAS:
+                r = tonica
+            elif clase in ("IE_I", "UE_U", "E_I"):
+                r = cerrada
+            else:
+                r = raiz
+            subjuntivo.append(une(r, t, grupo))
+
+    if "indefinido" in irr:
+        fuerte = irr["indefinido"]
+        indefinido = [
+            fuerte + ("eron" if t == "ieron" and fuerte.endswith("j") else t)
+            for t in INDEFINIDO_FUERTE
+        ]
+    else:
+        indefinido = [
+            une(cerrada if p in (2, 5) else raiz, t, grupo)
+            for p, t in enumerate(INDEFINIDO[grupo])
+        ]
+
+    # El imperfecto de subjuntivo sale de la 3.ª del plural del indefinido
+    raiz_subj_imp = indefinido[5][:-3]
+    subjuntivo_imperfecto = [raiz_subj_imp + t for t in SUBJUNTIVO_IMPERFECTO]
+
+    raiz_futuro = irr.get("futuro", infinitivo)
+    futuro = [raiz_futuro + t for t in FUTURO]
+    condicional = [raiz_futuro + t for t in CONDICIONAL]
+
+    imperfecto = [une(raiz, t, grupo) for t in IMPERFECTO[grupo]]
+
+    gerundio = une(cerrada, "ando" if grupo == "ar" else "iendo", grupo)
+
+    raiz_participio = irr.get("participio")
+    if raiz_participio:
+        participio = [raiz_participio + t for t in ("o", "a", "os", "as")]
+    else:
+        participio = [une(raiz, t, grupo) for t in (("ado", "ada", "ados", "adas") if grupo == "ar" else ("ido", "ida", "idos", "idas"))]
+
+    imperativo = [irr.get("imperativo", presente[2]), infinitivo[:-1] + "d"]
+
+    return {
+        "infinitivo": [infinitivo] + [infinitivo + c for c in ENCLITICOS],
+        "gerundio": [gerundio] + [gerundio + c for c in ENCLITICOS],
+        "participio": participio,
+        "presente": presente,
+        "imperfecto": imperfecto,
+        "indefinido": indefinido,
+        "futuro": futuro,
+        "condicional": condicional,
+        "subjuntivo": subjuntivo,
+        "subjuntivo_imperfecto": subjuntivo_imperfecto,
+        "imperativo": imperativo,
+    }
+
+
+def formas_verbo(lema: str) -> Set[str]:
+    return {forma for formas in conjuga(lema).values() for forma in formas}
+
+
+FLEXION = {
+    "adj": formas_adjetivo,
+    "noun": formas_nombre,
+    "adv": lambda lema: {lema},
+    "verb": formas_verbo,
+}
+
+
+# ------------------ índice ------------------
+class IndiceFormas:
+    """
+    formas:       forma normalizada -> pares (lema normalizado, categoría)
+                  de las entradas cuya flexión genera la forma
+    entradas:     lema normalizado -> entradas del lexicón (puede estar en
+                  varias categorías)
+    multipalabra: primera palabra -> expresiones de varias palabras (tuplas
+                  de tokens normalizados)
+    """
+
+    def __init__(self):
+        self.formas: Dict[str, Tuple[Tuple[str, str], ...]] = {}
+        self.entradas: Dict[str, List[Entrada]] = {}
+        self.multipalabra: Dict[str, List[Tuple[str, ...]]] = {}
+
+    def agrega(self, entrada: Entrada):
+        lema = normaliza(entrada.lema)
+        if not lema:
+            return
+        self.entradas.setdefault(lema, []).append(entrada)
+
+        if " " in lema:
+            tokens = tuple(lema.split())
+            expresiones = self.multipalabra.setdefault(tokens[0], [])
+            if tokens not in expresiones:
+                expresiones.append(tokens)
+            return
+
+        par = (lema, entrada.categoria)
+        for forma in FLEXION[entrada.categoria](lema):
+            pares = self.formas.get(forma, ())
+            if par not in pares:
+                self.formas[forma] = pares + (par,)
+
+    def lemas(self, token: str) -> Tuple[str, ...]:
+        """Lemas del lexicón de los que token es una forma (() si ninguno)."""
+        return tuple(dict.fromkeys(lema for lema, _ in self.formas.get(clave(token), ())))
+
+    def es_forma_de(self, token: str, lema: str) -> bool:
+        lema = clave(lema)
+        return any(l == lema for l, _ in self.formas.get(clave(token), ()))
+
+    def __contains__(self, lema: str) -> bool:
+        return clave(lema) in self.entradas
+
+    def __len__(self) -> int:
+        return len(self.formas)
+
+    def localiza(self, texto: str, lema: str) -> Optional[Tuple[int, int]]:
+        """
+        Posición (inicio, fin) en texto de la primera forma de lema, o None.
+        Un lema que no está en el lexicón se busca por su forma exacta
+        (sin distinguir mayúsculas ni acentos).
+        """
+        objetivo = clave(lema)
+        if not objetivo or texto is None:
+            return None
+
+        texto = str(texto)
+        tokens = list(TOKEN_RE.finditer(texto))
+
+        if " " in objetivo:
+            palabras = objetivo.split()
+            n = len(palabras)
+            claves = [clave(m.group()) for m in tokens]
+            for i in range(len(tokens) - n + 1):
+                if claves[i:i + n] == palabras:
+                    return tokens[i].start(), tokens[i + n - 1].end()
+            return None
+
+        for m in tokens:
+            token = clave(m.group())
+            if token == objetivo or any(l == objetivo for l, _ in self.formas.get(token, ())):
+                return m.start(), m.end()
+        return None
+
+    def a_filas(self) -> List[Dict[str, str]]:
+        filas = []
+        for forma, pares in sorted(self.formas.items()):
+            categorias: Dict[str, List[str]] = {}
+            for lema, categoria in pares:
+                categorias.setdefault(lema, []).append(categoria)
+            for lema, cats in categorias.items():
+                filas.append({"forma": forma, "lema": lema, "categorias": ",".join(sorted(cats))})
+        return filas
+
+
+def construye_indice(carpeta: Path = CARPETA_LEXICONES) -> IndiceFormas:
+    """Índice de las entradas del lexicón canónico (ver almacen_lexicon.py)."""
+    if Path(carpeta) == CARPETA_LEXICONES:
+        lexicon = lexicon_por_defecto()
+    else:
+        lexicon = carga_lexicon(carpeta)
+
+    indice = IndiceFormas()
+    for entrada in lexicon.entradas():
+        indice.agrega(entrada)
+    return indice
+
+
+_INDICE: Optional[IndiceFormas] = None
+
+
+def indice_por_defecto() -> IndiceFormas:
+    """Índice de los cuatro lexicones de /Lexicons (se construye una sola vez)."""
+    global _INDICE
+    if _INDICE is None:
+        _INDICE = construye_indice()
+    return _INDICE
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Índice forma -> lema de los lexicones de SO-CAL.")
+    ap.add_argument("--lexicones", default=str(CARPETA_LEXICONES), help="Carpeta con los lexicones.")
+    ap.add_argument("--salida", default=None, help="CSV de salida (forma;lema;categorias).")
+    args = ap.parse_args()
+
+    carpeta = Path(args.lexicones)
+    if not carpeta.exists():
+        print(f"ERROR: No existe la carpeta: {carpeta}", file=sys.stderr); sys.exit(1)
+
+    indice = construye_indice(carpeta)
+    n_multi = sum(len(v) for v in indice.multipalabra.values())
+    print(f"Lemas: {len(indice.entradas)} | formas: {len(indice)} | expresiones de varias palabras: {n_multi}")
+
+    if args.salida:
+        import pandas as pd
+        pd.DataFrame(indice.a_filas()).to_csv(args.salida, sep=";", index=False, encoding="utf-8-sig")
+        print(f"Listo. Archivo creado: {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
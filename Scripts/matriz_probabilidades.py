@@ -0,0 +1,448 @@
+# -*- coding: utf-8 -*-
+"""
+Probabilidades NEG / NEU / POS por oración en una matriz binaria mapeable
+en memoria, agrupada por ítem.
+
+Los scripts de puntuación guardan las probabilidades como porcentajes
+(pos_pct, neu_pct, neg_pct) en tablas pensadas para leerse a mano. Para
+calcular entropías, JSD, bootstrap o muestreos sobre todo el corpus se
+convierten una vez a:
+
+  - probabilidades : matriz N x 3 contigua (float32, o float16 con
+                     --float16), columnas en el orden de CLASES, valores
+                     en [0, 1];
+  - offsets        : índice por ítem al estilo CSR (int64, n_items + 1):
+                     las oraciones del ítem i son las filas
+                     offsets[i]:offsets[i + 1];
+  - fila_origen    : fila de la tabla de origen de cada oración (int64,
+                     contando seguidas las filas de todos los archivos);
+  - ítems          : cadenas internadas (texto UTF-8 + desplazamientos),
+                     en orden de primera aparición.
+
+Se guarda con el mismo formato que la caché del lexicón (cabecera JSON +
+arrays alineados a 8 bytes, almacen_lexicon.guarda_arrays) y se abre con
+mmap: abrirla no lee las probabilidades, y filas(i) devuelve una vista de
+la matriz, sin copia. Con float32 son 12 bytes por oración (6 con float16).
+
+Sin --salida, la matriz se guarda en .matriz_cache/, con el SHA-256 de los
+archivos de origen en el nombre: las ejecuciones siguientes la abren
+directamente.
+
+USO:
+  python matriz_probabilidades.py --entrada concordances_VERB_triclase.parquet --salida verbos.bin
+  python matriz_probabilidades.py --entrada adj_polarity_entropy_corpus.csv --resumen resumen_adj.csv --bootstrap 1000
+  python matriz_probabilidades.py --entrada corpus.parquet --float16 --col-palabra keyword
+
+Requisitos:
+  - numpy, pandas (pyarrow para Parquet, openpyxl para Excel)
+"""
+import argparse
+import hashlib
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from almacen_lexicon import abre_arrays, guarda_arrays
+from cuantiles_polaridad import COL_PALABRA, resolver_columnas
+from tablas import escribe_tabla, lee_lotes
+
+# ====== CONFIG ======
+RANDOM_SEED = 20260423
+
+CLASES = ("NEG", "NEU", "POS")
+TIPOS = {"float32": np.float32, "float16": np.float16}
+
+MAGIC = b"MATPROB\0"
+VERSION_FORMATO = 1
+
+USAR_CACHE = True
+CARPETA_CACHE = Path(".matriz_cache")
+
+# Filas por bloque al calcular entropías (acota la memoria intermedia en float64)
+FILAS_POR_BLOQUE = 1_000_000
+
+# Tolerancia al comprobar que las probabilidades están en [0, 1] y suman 1
+# (los porcentajes de origen están redondeados a 6 decimales)
+TOLERANCIA = 1e-3
+
+N_BOOTSTRAP = 1000
+NIVEL_IC = 0.95
+# Índices de remuestreo por bloque en el bootstrap (remuestras x oraciones)
+INDICES_POR_BLOQUE = 2_000_000
+
+
+# ------------------ entropía ------------------
+def entropia_normalizada(p: np.ndarray) -> np.ndarray:
+    """
+    Entropía de Shannon (base 2) de cada fila, dividida por log2(3): 0 si
+    toda la probabilidad está en una clase, 1 si es uniforme. Misma fórmula
+    que cardiff_scorer.normalized_entropy.
+    """
+    p = np.asarray(p, dtype=np.float64)
+    logp = np.log2(p, out=np.zeros_like(p), where=p > 0)
+    return -(p * logp).sum(axis=-1) / np.log2(len(CLASES))
+
+
+# ------------------ matriz ------------------
+class MatrizProbabilidades:
+    """
+    Arrays (ver el docstring del módulo):
+      probabilidades  float32 / float16, N x 3
+      offsets         int64, n_items + 1
+      fila_origen     int64, N
+      texto, desplazamientos  cadenas de los ítems (uint8 UTF-8, int64)
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], cabecera: dict, buffer=None):
+        self.probabilidades = arrays["probabilidades"].reshape(-1, len(CLASES))
+        self.offsets = arrays["offsets"]
+        self.fila_origen = arrays["fila_origen"]
+        self.texto = arrays["texto"]
+        self.desplazamientos = arrays["desplazamientos"]
+        self.cabecera = cabecera
+        self._buffer = buffer          # mmap abierto (si se abrió de un archivo)
+        self._items: Optional[List[str]] = None
+        self._indice: Optional[Dict[str, int]] = None
+        self._entropias: Optional[np.ndarray] = None
+
+    @classmethod
+    def desde_lotes(cls, lotes: Iterable[Tuple[Sequence[str], np.ndarray, np.ndarray]],
+                    tipo: str = "float32", cabecera: Optional[dict] = None) -> "MatrizProbabilidades":
+        """
+        lotes: tríos (ítems, probabilidades n x 3 en el orden de CLASES,
+        fila de origen de cada oración). Las filas se agrupan por ítem con
+        una ordenación estable: dentro de cada ítem se conserva el orden de
+        origen.
+        """
+        ids: Dict[str, int] = {}
+        codigos, probabilidades, origen = [], [], []
+        for items, p, filas in lotes:
+            codigos.append(np.fromiter((ids.setdefault(item, len(ids)) for item in items),
+                                       dtype=np.int64, count=len(items)))
+            probabilidades.append(np.asarray(p, dtype=TIPOS[tipo]).reshape(-1, len(CLASES)))
+            origen.append(np.asarray(filas, dtype=np.int64))
+
+        codigos = np.concatenate(codigos) if codigos else np.zeros(0, dtype=np.int64)
+        orden = np.argsort(codigos, kind="stable")
+
+        offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(codigos, minlength=len(ids)))
+
+        codificadas = [item.encode("utf-8") for item in ids]
+        desplazamientos = np.zeros(len(codificadas) + 1, dtype=np.int64)
+        desplazamientos[1:] = np.cumsum([len(c) for c in codificadas], dtype=np.int64)
+
+        return cls({
+            "probabilidades": (np.concatenate(probabilidades) if probabilidades
+                               else np.zeros((0, len(CLASES)), dtype=TIPOS[tipo]))[orden],
+            "offsets": offsets,
+            "fila_origen": (np.concatenate(origen) if origen else np.zeros(0, dtype=np.int64))[orden],
+            "texto": np.frombuffer(b"".join(codificadas), dtype=np.uint8),
+            "desplazamientos": desplazamientos,
+        }, dict(cabecera or {}, version=VERSION_FORMATO, clases=list(CLASES), tipo=tipo))
+
+    @classmethod
+    def desde_archivos(cls, rutas: Sequence[Path], col_palabra: str = COL_PALABRA,
+                       hoja: Optional[str] = None, tipo: str = "float32",
+                       hash_origen: str = "") -> "MatrizProbabilidades":
+        """
+        Lee las tablas por trozos (tablas.lee_lotes). Las columnas *_pct se
+        dividen por 100. Se descartan las filas sin palabra o sin alguna
+        probabilidad; fila_origen conserva su posición en la tabla.
+        """
+        fuentes: List[list] = []
+
+        def lotes():
+            desfase = 0
+            for ruta in rutas:
+                columnas, filas = None, 0
+                for trozo in lee_lotes(ruta, hoja=hoja):
+                    if columnas is None:
+                        columnas = resolver_columnas(list(trozo.columns), col_palabra)
+                    p = np.column_stack([_a_probabilidad(trozo[columnas[clase]], columnas[clase]) for clase in CLASES])
+                    validas = trozo[col_palabra].notna().to_numpy() & ~np.isnan(p).any(axis=1)
+                    _comprueba(p[validas], ruta)
+
+                    items = trozo[col_palabra].astype(object).to_numpy()[validas]
+                    yield [str(item) for item in items], p[validas], desfase + filas + np.flatnonzero(validas)
+                    filas += len(trozo)
+                fuentes.append([Path(ruta).name, filas])
+                desfase += filas
+
+        matriz = cls.desde_lotes(lotes(), tipo, {"hash_origen": hash_origen, "col_palabra": col_palabra})
+        matriz.cabecera["fuentes"] = fuentes
+        return matriz
+
+    # --- acceso ---
+    def __len__(self) -> int:
+        return len(self.probabilidades)
+
+    @property
+    def n_items(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def hash_origen(self) -> str:
+        return self.cabecera.get("hash_origen", "")
+
+    def items(self) -> List[str]:
+        """Ítems en el orden de la matriz (se decodifican una vez)."""
+        if self._items is None:
+            datos = self.texto.tobytes()
+            d = self.desplazamientos.tolist()
+            self._items = [datos[d[i]:d[i + 1]].decode("utf-8") for i in range(len(d) - 1)]
+        return self._items
+
+    def indice(self, item: str) -> int:
+        if self._indice is None:
+            self._indice = {item: i for i, item in enumerate(self.items())}
+        if item not in self._indice:
+            raise KeyError(f"No está en la matriz: {item}")
+        return self._indice[item]
+
+    def tamanos(self) -> np.ndarray:
+        """Oraciones por ítem."""
+        return np.diff(self.offsets)
+
+    def filas(self, i: int) -> np.ndarray:
+        """Probabilidades de las oraciones del ítem i (vista, sin copia)."""
+        return self.probabilidades[self.offsets[i]:self.offsets[i + 1]]
+
+    def por_item(self, item: str) -> np.ndarray:
+        return self.filas(self.indice(item))
+
+    # --- cálculos ---
+    def entropias(self) -> np.ndarray:
+        """Entropía normalizada de cada oración (float32, se calcula una vez, por bloques)."""
+        if self._entropias is None:
+            h = np.empty(len(self), dtype=np.float32)
+            for inicio in range(0, len(self), FILAS_POR_BLOQUE):
+                fin = inicio + FILAS_POR_BLOQUE
+                h[inicio:fin] = entropia_normalizada(self.probabilidades[inicio:fin])
+            self._entropias = h
+        return self._entropias
+
+    def entropias_item(self, i: int) -> np.ndarray:
+        return self.entropias()[self.offsets[i]:self.offsets[i + 1]]
+
+    def resumen(self) -> pd.DataFrame:
+        """
+        Una fila por ítem: n_oraciones, media y mediana de NEG / NEU / POS,
+        entropia_media, entropia_agregada (de las probabilidades medias) y
+        jsd (agregada - media), como ItemEntropy en cardiff_scorer.
+        """
+        n = self.tamanos()
+        inicios = self.offsets[:-1]
+        con_filas = n > 0
+
+        sumas = np.zeros((self.n_items, len(CLASES)))
+        sumas_h = np.zeros(self.n_items)
+        if con_filas.any():
+            sumas[con_filas] = np.add.reduceat(self.probabilidades, inicios[con_filas], axis=0, dtype=np.float64)
+            sumas_h[con_filas] = np.add.reduceat(self.entropias(), inicios[con_filas], dtype=np.float64)
+
+        divisor = np.maximum(n, 1)
+        medias = sumas / divisor[:, None]
+        entropia_media = sumas_h / divisor
+        entropia_agregada = entropia_normalizada(medias)
+
+        medianas = np.array([np.median(self.filas(i), axis=0) if n[i] else [np.nan] * len(CLASES)
+                             for i in range(self.n_items)], dtype=np.float64).reshape(-1, len(CLASES))
+
+        tabla = pd.DataFrame({"palabra": self.items(), "n_oraciones": n})
+        for j, clase in enumerate(CLASES):
+            tabla[f"{clase}_media"] = medias[:, j]
+            tabla[f"{clase}_mediana"] = medianas[:, j]
+        tabla["entropia_media"] = entropia_media
+        tabla["entropia_agregada"] = entropia_agregada
+        tabla["jsd"] = entropia_agregada - entropia_media
+        return tabla
+
+    def bootstrap(self, i: int, n_remuestras: int = N_BOOTSTRAP, nivel: float = NIVEL_IC,
+                  rng: Optional[np.random.Generator] = None) -> Dict[str, float]:
+        """
+        Intervalo de confianza percentil de la entropía media y de la JSD
+        del ítem i, remuestreando sus oraciones con reemplazo.
+        """
+        rng = rng if rng is not None else np.random.default_rng(RANDOM_SEED)
+        p = self.filas(i)
+        h = self.entropias_item(i)
+        m = len(p)
+        if m == 0:
+            return {"entropia_media_ic_inf": np.nan, "entropia_media_ic_sup": np.nan,
+                    "jsd_ic_inf": np.nan, "jsd_ic_sup": np.nan}
+
+        medias_h = np.empty(n_remuestras)
+        jsd = np.empty(n_remuestras)
+        por_bloque = max(1, INDICES_POR_BLOQUE // m)
+        for inicio in range(0, n_remuestras, por_bloque):
+            fin = min(inicio + por_bloque, n_remuestras)
+            idx = rng.integers(0, m, size=(fin - inicio, m))
+            medias_h[inicio:fin] = h[idx].mean(axis=1, dtype=np.float64)
+            jsd[inicio:fin] = entropia_normalizada(p[idx].mean(axis=1, dtype=np.float64)) - medias_h[inicio:fin]
+
+        cola = (1 - nivel) / 2 * 100
+        return {
+            "entropia_media_ic_inf": float(np.percentile(medias_h, cola)),
+            "entropia_media_ic_sup": float(np.percentile(medias_h, 100 - cola)),
+            "jsd_ic_inf": float(np.percentile(jsd, cola)),
+            "jsd_ic_sup": float(np.percentile(jsd, 100 - cola)),
+        }
+
+    def muestra(self, i: int, n: int, rng: Optional[np.random.Generator] = None,
+                reemplazo: bool = False) -> np.ndarray:
+        """
+        n filas de la matriz (posiciones globales, ordenadas) al azar entre
+        las del ítem i; todas si tiene n o menos y no hay reemplazo. Con
+        fila_origen[filas] se vuelve a la tabla de origen.
+        """
+        rng = rng if rng is not None else np.random.default_rng(RANDOM_SEED)
+        inicio, fin = int(self.offsets[i]), int(self.offsets[i + 1])
+        if not reemplazo and n >= fin - inicio:
+            return np.arange(inicio, fin)
+        return np.sort(inicio + rng.choice(fin - inicio, size=n, replace=reemplazo))
+
+    # --- archivo ---
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            "probabilidades": self.probabilidades,
+            "offsets": self.offsets,
+            "fila_origen": self.fila_origen,
+            "texto": self.texto,
+            "desplazamientos": self.desplazamientos,
+        }
+
+    def guarda(self, ruta: Path):
+        guarda_arrays(ruta, MAGIC, self.cabecera, self.arrays())
+
+    @classmethod
+    def abre(cls, ruta: Path) -> Optional["MatrizProbabilidades"]:
+        """Abre el archivo con mmap (sin copiar los arrays); None si no es válido."""
+        arrays, cabecera, buffer = abre_arrays(ruta, MAGIC)
+        if arrays is None:
+            return None
+        if cabecera.get("version") != VERSION_FORMATO or cabecera.get("clases") != list(CLASES):
+            return None
+        if not _consistentes(arrays):
+            return None
+        return cls(arrays, cabecera, buffer)
+
+
+def _consistentes(arrays: Dict[str, np.ndarray]) -> bool:
+    """Tamaños coherentes entre sí (un archivo corrupto puede tener cabecera válida)."""
+    nombres = ("probabilidades", "offsets", "fila_origen", "texto", "desplazamientos")
+    if any(nombre not in arrays for nombre in nombres):
+        return False
+    n, resto = divmod(arrays["probabilidades"].size, len(CLASES))
+    offsets, desplazamientos = arrays["offsets"], arrays["desplazamientos"]
+    return (resto == 0 and len(arrays["fila_origen"]) == n
+            and len(offsets) >= 1 and offsets[0] == 0 and offsets[-1] == n
+            and len(desplazamientos) == len(offsets) and desplazamientos[0] == 0
+            and desplazamientos[-1] == arrays["texto"].size
+            and bool(np.all(np.diff(offsets) >= 0)) and bool(np.all(np.diff(desplazamientos) >= 0)))
+
+
+def _a_probabilidad(serie: pd.Series, columna: str) -> np.ndarray:
+    p = pd.to_numeric(serie, errors="coerce").to_numpy(dtype=np.float64)
+    return p / 100.0 if columna.endswith("_pct") else p
+
+
+def _comprueba(p: np.ndarray, ruta: Path):
+    if len(p) and (p.min() < -TOLERANCIA or p.max() > 1 + TOLERANCIA
+                   or np.abs(p.sum(axis=1) - 1).max() > TOLERANCIA):
+        raise ValueError(f"{ruta}: las probabilidades no están en [0, 1] o no suman 1 "
+                         f"(¿porcentajes en una columna sin '_pct'?)")
+
+
+# ------------------ carga ------------------
+def hash_fuentes(rutas: Sequence[Path], *opciones) -> str:
+    """SHA-256 del contenido de los archivos y de las opciones de lectura."""
+    digest = hashlib.sha256()
+    for ruta in rutas:
+        with open(ruta, "rb") as f:
+            for bloque in iter(lambda: f.read(1 << 20), b""):
+                digest.update(bloque)
+        digest.update(b"\0")
+    digest.update(repr(opciones).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def ruta_cache(hash_origen: str, carpeta: Path = CARPETA_CACHE) -> Path:
+    return Path(carpeta) / f"{hash_origen[:16]}.bin"
+
+
+def carga_matriz(rutas: Sequence[Path], col_palabra: str = COL_PALABRA, hoja: Optional[str] = None,
+                 tipo: str = "float32", usar_cache: bool = USAR_CACHE,
+                 carpeta_cache: Path = CARPETA_CACHE) -> MatrizProbabilidades:
+    """
+    Abre la matriz de la caché si su hash coincide con el de los archivos
+    de origen; si no, la construye y la guarda.
+    """
+    rutas = [Path(r) for r in rutas]
+    hash_actual = hash_fuentes(rutas, col_palabra, hoja, tipo)
+    ruta = ruta_cache(hash_actual, carpeta_cache)
+
+    if usar_cache:
+        matriz = MatrizProbabilidades.abre(ruta)
+        if matriz is not None and matriz.hash_origen == hash_actual:
+            return matriz
+
+    matriz = MatrizProbabilidades.desde_archivos(rutas, col_palabra, hoja, tipo, hash_actual)
+    if usar_cache:
+        try:
+            matriz.guarda(ruta)
+        except OSError as e:
+            print(f"[AVISO] No pude escribir la caché de la matriz ({ruta}): {e}", file=sys.stderr)
+    return matriz
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Probabilidades por oración en una matriz float32 mapeable, agrupada por ítem.")
+    ap.add_argument("--entrada", nargs="+", required=True, help="Parquet(s), CSV(s) o Excel(s) con probabilidades por oración.")
+    ap.add_argument("--salida", default=None, help="Archivo .bin de la matriz (por defecto, en la caché .matriz_cache/).")
+    ap.add_argument("--float16", action="store_true", help="Guarda las probabilidades en float16 (la mitad de tamaño).")
+    ap.add_argument("--col-palabra", default=COL_PALABRA, help=f"Columna con la palabra (por defecto: '{COL_PALABRA}').")
+    ap.add_argument("--hoja", default=None, help="Hoja del Excel (opcional).")
+    ap.add_argument("--resumen", default=None, help="Parquet, Excel o CSV con el resumen por ítem.")
+    ap.add_argument("--bootstrap", type=int, default=0, help="Remuestras para los IC de entropía media y JSD (0 = sin IC).")
+    args = ap.parse_args()
+
+    rutas = [Path(r) for r in args.entrada]
+    for ruta in rutas:
+        if not ruta.exists():
+            print(f"ERROR: No existe el archivo: {ruta}", file=sys.stderr); sys.exit(1)
+
+    tipo = "float16" if args.float16 else "float32"
+    t0 = time.perf_counter()
+    if args.salida:
+        matriz = MatrizProbabilidades.desde_archivos(rutas, args.col_palabra, args.hoja, tipo,
+                                                     hash_fuentes(rutas, args.col_palabra, args.hoja, tipo))
+        salida = Path(args.salida)
+        matriz.guarda(salida)
+    else:
+        matriz = carga_matriz(rutas, args.col_palabra, args.hoja, tipo)
+        salida = ruta_cache(matriz.hash_origen)
+    t1 = time.perf_counter()
+    matriz = MatrizProbabilidades.abre(salida)
+    t2 = time.perf_counter()
+
+    print(f"Oraciones: {len(matriz)} | ítems: {matriz.n_items} | tipo: {tipo} | "
+          f"tamaño: {salida.stat().st_size / 1024 ** 2:.1f} MB")
+    print(f"Construcción: {t1 - t0:.1f} s | apertura: {1000 * (t2 - t1):.2f} ms")
+    print(f"Matriz: {salida}")
+
+    if args.resumen:
+        resumen = matriz.resumen()
+        if args.bootstrap:
+            rng = np.random.default_rng(RANDOM_SEED)
+            ic = [matriz.bootstrap(i, args.bootstrap, rng=rng) for i in range(matriz.n_items)]
+            resumen = pd.concat([resumen, pd.DataFrame(ic)], axis=1)
+        print(f"Listo. Archivo creado: {escribe_tabla(resumen, args.resumen)}")
+
+
+if __name__ == "__main__":
+    main()
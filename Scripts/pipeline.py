@@ -0,0 +1,595 @@
+# -*- coding: utf-8 -*-
+"""
+Ejecuta la cadena de scripts del proyecto como un grafo de etapas
+(extract → segment → score → entropy → sample → annotate → evaluate).
+
+Cada etapa (ETAPAS) declara su script, sus argumentos y los archivos que lee
+y escribe, relativos a la carpeta de datos (--datos; por defecto
+human-annotation-and-model-comparison/excel_files, donde los scripts de
+anotación esperan sus Excel). Las dependencias salen de esas declaraciones:
+una etapa depende de la que produce alguno de sus archivos de entrada. Los
+archivos que no produce ninguna etapa seleccionada (Adj_entropy.xlsx,
+adj_polarity_entropy_corpus.csv, el libro _Comparsion.xlsx, los Excel de
+los LLM...) son fuentes: se preparan fuera (Orange, a mano) y solo se leen.
+
+Cada etapa tiene una clave: SHA-256 del contenido de su script y de los
+módulos locales que importa (donde está su configuración), sus argumentos,
+las variables de entorno que declara y el contenido de sus entradas. Una
+etapa se salta si la clave coincide con la de su última ejecución correcta
+y sus salidas siguen intactas. Como la clave depende del contenido y no de
+la fecha, si una etapa se repite y produce exactamente los mismos archivos,
+las siguientes no se repiten.
+
+La primera vez, las salidas que ya existen (los Excel publicados en el
+repositorio) se adoptan como punto de partida: se registran con la clave
+actual sin ejecutar la etapa, para no sobrescribir datos que no se pueden
+regenerar igual. Nunca se sobrescribe un archivo que no haya escrito (o
+adoptado) una ejecución anterior de la misma etapa: si una etapa tiene que
+ejecutarse y alguna de sus salidas ya existe sin estar registrada (solo
+están algunas, o una etapa previa acaba de cambiar sus entradas), queda
+bloqueada. --forzar las vuelve a generar.
+
+Las etapas independientes se ejecutan en paralelo (-j), cada una como un
+proceso aparte con la carpeta de datos como directorio de trabajo. La
+salida de cada una queda en .pipeline_cache/logs/<etapa>.log y el estado
+(claves y hashes) en .pipeline_cache/estado.json, dentro de la carpeta de
+datos.
+
+Dos tipos de etapa especiales:
+- protegidas: sus salidas se completan a mano (las columnas de los
+  anotadores en el Excel de 02_auto_label.py). Si la salida ha cambiado
+  desde que la escribió o adoptó la etapa, no se sobrescribe aunque cambien
+  las entradas (salvo con --forzar);
+- bajo demanda: consultan servicios externos con coste (Sketch Engine, API
+  de LLM) o están al otro lado de la anotación manual (02 y 03: el Excel de
+  02 se completa a mano antes de 03), y solo se ejecutan si se piden con
+  --etapas. Sin ellas, el Excel anotado publicado (_entropy_band.xlsx) es
+  una fuente y la fase evaluate trabaja sobre él.
+
+USO:
+  python pipeline.py --plan                      # etapas, dependencias y estado
+  python pipeline.py -j 4                        # todo lo que haya cambiado
+  python pipeline.py --fases annotate evaluate   # solo esas fases
+  python pipeline.py --etapas anotacion_llm multi_modelo
+  python pipeline.py --forzar evaluacion_humana
+
+Requisitos: solo la biblioteca estándar (cada script, los suyos).
+"""
+import argparse
+import ast
+import hashlib
+import heapq
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+# ====== CONFIG ======
+RAIZ = Path(__file__).resolve().parents[1]
+SCRIPTS = RAIZ / "Scripts"
+ANOTACION = RAIZ / "human-annotation-and-model-comparison" / "scripts"
+COMPARACION = ANOTACION / "model_comparison"
+
+CARPETA_DATOS = RAIZ / "human-annotation-and-model-comparison" / "excel_files"
+CARPETA_ESTADO = ".pipeline_cache"
+
+FASES = ("extract", "segment", "score", "entropy", "sample", "annotate", "evaluate")
+
+TRABAJOS = min(4, os.cpu_count() or 1)
+
+# Nombres de los Excel de la muestra (cada script añade un sufijo)
+MUESTRA = "sample_1000_sentences_for_manual_annotation"
+ALEATORIA = f"{MUESTRA}_randomized"
+AUTO = f"{ALEATORIA}_auto_label"
+GOLD = f"{AUTO}_gold"
+BANDAS = f"{GOLD}_entropy_band"
+COMPARACION_XLSX = f"{BANDAS}_Comparsion.xlsx"
+CHATGPT_XLSX = "LLM_prueba_anotation_CHATGPT.xlsx"
+CLAUDE_XLSX = "LLM_prueba_anotation_Claude.xlsx"
+ADJETIVOS_CSV = "selected_200_adjectives.csv"
+
+
+class Etapa(NamedTuple):
+    nombre: str
+    fase: str
+    script: Path
+    entradas: Tuple[str, ...]
+    salidas: Tuple[str, ...]
+    args: Tuple[str, ...] = ()
+    entorno: Tuple[str, ...] = ()      # variables de entorno que forman parte de la clave
+    protegida: bool = False
+    bajo_demanda: bool = False
+
+
+# Los scripts 01, 04, 06, 07 y 08 de anotación escriben los mismos archivos
+# que evaluation_engine.py, que los calcula todos con una sola lectura; 03
+# también escribe gold_human_label_summary.csv, que se declara en
+# evaluacion_humana (la que se ejecuta por defecto).
+# Entre segmentación y puntuación las tablas van en Parquet (ver tablas.py);
+# el Excel de las probabilidades es una exportación final para leerlo a mano.
+ETAPAS: Tuple[Etapa, ...] = (
+    # ---- extract ----
+    Etapa("extraccion", "extract", SCRIPTS / "script_corpus_building_from_Sketch_Engine.py",
+          entradas=("KEYWORD_FILE_VERB.txt",), salidas=("concordances_VERB.xlsx",), bajo_demanda=True),
+
+    # ---- segment ----
+    Etapa("segmentacion", "segment", SCRIPTS / "procesa_excels_contexto.py",
+          entradas=("concordances_VERB.xlsx",), salidas=("concordances_VERB_contexto.parquet",),
+          args=("--excel", "concordances_VERB.xlsx", "--salida", "concordances_VERB_contexto.parquet",
+                "--col-palabra", "keyword", "--col-contexto", "concordance")),
+
+    # ---- score ----
+    Etapa("puntuacion_robertuito", "score", SCRIPTS / "sentiment_triclass_word.py",
+          entradas=("concordances_VERB_contexto.parquet",), salidas=("concordances_VERB_triclase.parquet",),
+          args=("--entrada", "concordances_VERB_contexto.parquet", "--salida", "concordances_VERB_triclase.parquet")),
+    Etapa("exportacion_triclase", "score", SCRIPTS / "tablas.py",
+          entradas=("concordances_VERB_triclase.parquet",), salidas=("concordances_VERB_triclase.xlsx",),
+          args=("concordances_VERB_triclase.parquet", "concordances_VERB_triclase.xlsx")),
+    Etapa("puntuacion_cardiff", "score", COMPARACION / "cardiff_scorer.py",
+          entradas=(COMPARACION_XLSX,), salidas=("cardiff_scores.parquet", "cardiff_item_entropy.csv")),
+
+    # ---- entropy ----
+    Etapa("entropia", "entropy", SCRIPTS / "Calculo_Entropia.py",
+          entradas=("adjetivos_con_polaridad.xlsx",), salidas=("salida_sentimientos_3bins.xlsx",),
+          args=("--entrada", "adjetivos_con_polaridad.xlsx", "--salida", "salida_sentimientos_3bins.xlsx")),
+    Etapa("matriz_triclase", "entropy", SCRIPTS / "matriz_probabilidades.py",
+          entradas=("concordances_VERB_triclase.parquet",),
+          salidas=("concordances_VERB_triclase.bin", "concordances_VERB_entropia.csv"),
+          args=("--entrada", "concordances_VERB_triclase.parquet", "--salida", "concordances_VERB_triclase.bin",
+                "--resumen", "concordances_VERB_entropia.csv")),
+
+    # ---- sample ----
+    Etapa("seleccion_lexica", "sample", ANOTACION / "lexical_sample_selection.py",
+          entradas=("Adj_entropy.xlsx",), salidas=(ADJETIVOS_CSV,)),
+    Etapa("seleccion_oraciones", "sample", ANOTACION / "sentence_sample_selection.py",
+          entradas=(ADJETIVOS_CSV, "adj_polarity_entropy_corpus.csv"), salidas=(f"{MUESTRA}.xlsx",)),
+    Etapa("aleatorizacion", "sample", ANOTACION / "sentence_sample_randomization.py",
+          entradas=(f"{MUESTRA}.xlsx",), salidas=(f"{ALEATORIA}.xlsx",)),
+
+    # ---- annotate ----
+    # Entre 02 y 03 los anotadores completan el Excel a mano: las dos etapas
+    # solo se ejecutan con --etapas
+    Etapa("etiqueta_auto", "annotate", ANOTACION / "02_auto_label.py",
+          entradas=(f"{ALEATORIA}.xlsx",), salidas=(f"{AUTO}.xlsx",), protegida=True, bajo_demanda=True),
+    Etapa("etiqueta_gold", "annotate", ANOTACION / "03_create_gold_human_label.py",
+          entradas=(f"{AUTO}.xlsx",), salidas=(f"{GOLD}.xlsx",), bajo_demanda=True),
+    Etapa("banda_entropia", "annotate", ANOTACION / "05_add_entropy_band_to_sample.py",
+          entradas=(f"{GOLD}.xlsx", ADJETIVOS_CSV), salidas=(f"{BANDAS}.xlsx",)),
+    Etapa("cardiff_contexto", "annotate", COMPARACION / "01_cardiff_context_sentiment.py",
+          entradas=(COMPARACION_XLSX,), salidas=(f"{BANDAS}_Comparsion_cardiff.xlsx",)),
+    Etapa("anotacion_llm", "annotate", COMPARACION / "llm_annotation_runner.py",
+          entradas=(COMPARACION_XLSX,), salidas=("LLM_api_annotation_Claude.xlsx",),
+          entorno=("LLM_ENDPOINT", "LLM_API_FORMAT", "LLM_MODEL", "LLM_OFFLINE"), bajo_demanda=True),
+
+    # ---- evaluate ----
+    Etapa("evaluacion_humana", "evaluate", ANOTACION / "evaluation_engine.py",
+          entradas=(f"{BANDAS}.xlsx",),
+          salidas=("human_raw_agreement_summary.csv", "human_raw_agreement_cases.csv",
+                   "auto_vs_gold_accuracy_summary.csv", "auto_vs_gold_accuracy_cases.csv",
+                   "accuracy_by_entropy_band.csv", "auto_vs_gold_precision_recall_f1.xlsx",
+                   "auto_vs_gold_precision_recall_f1_by_entropy_band.xlsx", "gold_human_label_summary.csv")),
+    Etapa("acuerdo", "evaluate", ANOTACION / "agreement.py",
+          entradas=(f"{BANDAS}.xlsx",), salidas=("human_agreement_summary.csv", "human_agreement_by_item.csv")),
+    Etapa("accuracy_pos_neg", "evaluate", ANOTACION / "09_accuracy_auto_pos_neg_only.py",
+          entradas=(f"{BANDAS}.xlsx",), salidas=()),
+    Etapa("significancia", "evaluate", ANOTACION / "significance.py",
+          entradas=(COMPARACION_XLSX, CHATGPT_XLSX, CLAUDE_XLSX),
+          salidas=("model_bootstrap_ci.csv", "model_pairwise_tests.csv")),
+    Etapa("indice_error", "evaluate", ANOTACION / "item_error_index.py",
+          entradas=(f"{BANDAS}.xlsx", COMPARACION_XLSX, CHATGPT_XLSX, CLAUDE_XLSX, ADJETIVOS_CSV),
+          salidas=("item_error_index.csv", "item_error_correlations.csv")),
+    Etapa("cardiff_accuracy", "evaluate", COMPARACION / "02_cardiff_accuracy_vs_gold.py",
+          entradas=(COMPARACION_XLSX,), salidas=(f"{BANDAS}_Comparsion_cardiff_accuracy.xlsx",)),
+    Etapa("cardiff_prf", "evaluate", COMPARACION / "03_cardiff_precision_recall_f1_vs_gold.py",
+          entradas=(COMPARACION_XLSX,), salidas=("cardiff_vs_gold_precision_recall_f1.xlsx",)),
+    Etapa("cardiff_accuracy_bandas", "evaluate", COMPARACION / "04_Accuracy_by_entropy_band.py",
+          entradas=(COMPARACION_XLSX,), salidas=("cardiff_accuracy_by_entropy_band.xlsx",)),
+    Etapa("cardiff_prf_bandas", "evaluate", COMPARACION / "05_cardiff_precision_recall_f1_by_entropy_band.py",
+          entradas=(COMPARACION_XLSX,), salidas=("cardiff_precision_recall_f1_by_entropy_band.xlsx",)),
+    Etapa("accuracy_chatgpt", "evaluate", COMPARACION / "06_Accuracy_LLM_GPT.py",
+          entradas=(CHATGPT_XLSX,), salidas=("chatgpt_vs_gold_accuracy_summary.xlsx",)),
+    Etapa("accuracy_claude", "evaluate", COMPARACION / "Accuracy_LLM_Claude.py",
+          entradas=(CLAUDE_XLSX,), salidas=("accuracy_summary.xlsx",)),
+    Etapa("multi_modelo", "evaluate", COMPARACION / "multi_model_evaluation.py",
+          entradas=(COMPARACION_XLSX, CHATGPT_XLSX, CLAUDE_XLSX),
+          salidas=("model_comparison_summary.csv", "model_evaluation_metrics.xlsx")),
+)
+
+# Estados de una etapa tras la ejecución
+EJECUTADA = "ejecutada"
+AL_DIA = "al día"
+PROTEGIDA = "protegida"
+ADOPTADA = "adoptada"       # primera vez, con las salidas ya presentes
+EXISTENTE = "existente"     # no se puede ejecutar, pero sus salidas ya están
+FALLIDA = "fallida"
+BLOQUEADA = "bloqueada"
+CORRECTAS = {EJECUTADA, AL_DIA, PROTEGIDA, ADOPTADA, EXISTENTE}
+
+
+# ------------------ grafo ------------------
+def valida(etapas: Sequence[Etapa]):
+    """Nombres únicos, fases conocidas y un solo productor por archivo."""
+    nombres: Set[str] = set()
+    productor: Dict[str, str] = {}
+    for e in etapas:
+        if e.nombre in nombres:
+            raise ValueError(f"Etapa repetida: {e.nombre}")
+        nombres.add(e.nombre)
+        if e.fase not in FASES:
+            raise ValueError(f"Fase desconocida en {e.nombre}: {e.fase}")
+        for salida in e.salidas:
+            if salida in productor:
+                raise ValueError(f"{salida} lo escriben {productor[salida]} y {e.nombre}")
+            productor[salida] = e.nombre
+
+
+def dependencias(etapas: Sequence[Etapa]) -> Dict[str, Set[str]]:
+    productor = {salida: e.nombre for e in etapas for salida in e.salidas}
+    return {
+        e.nombre: {productor[entrada] for entrada in e.entradas if entrada in productor and productor[entrada] != e.nombre}
+        for e in etapas
+    }
+
+
+def orden_topologico(etapas: Sequence[Etapa], deps: Dict[str, Set[str]]) -> List[str]:
+    """Orden de ejecución; a igualdad, el de FASES y el de ETAPAS."""
+    posicion = {e.nombre: (FASES.index(e.fase), i) for i, e in enumerate(etapas)}
+    faltan = {nombre: len(d) for nombre, d in deps.items()}
+    siguientes: Dict[str, List[str]] = {nombre: [] for nombre in deps}
+    for nombre, d in deps.items():
+        for previa in d:
+            siguientes[previa].append(nombre)
+
+    listas = [(posicion[n], n) for n, k in faltan.items() if k == 0]
+    heapq.heapify(listas)
+    orden: List[str] = []
+    while listas:
+        _, nombre = heapq.heappop(listas)
+        orden.append(nombre)
+        for siguiente in siguientes[nombre]:
+            faltan[siguiente] -= 1
+            if faltan[siguiente] == 0:
+                heapq.heappush(listas, (posicion[siguiente], siguiente))
+
+    if len(orden) < len(deps):
+        raise ValueError(f"Hay un ciclo entre las etapas: {sorted(set(deps) - set(orden))}")
+    return orden
+
+
+def selecciona(etapas: Sequence[Etapa], fases: Optional[Iterable[str]] = None,
+               nombres: Optional[Iterable[str]] = None) -> List[Etapa]:
+    """
+    Etapas pedidas por nombre (incluidas las bajo demanda) o, si no se pide
+    ninguna, las de las fases indicadas (todas por defecto) que no sean
+    bajo demanda.
+    """
+    if nombres:
+        nombres = set(nombres)
+        desconocidas = nombres - {e.nombre for e in etapas}
+        if desconocidas:
+            raise ValueError(f"Etapas desconocidas: {sorted(desconocidas)}")
+        return [e for e in etapas if e.nombre in nombres]
+    fases = set(fases) if fases else set(FASES)
+    return [e for e in etapas if e.fase in fases and not e.bajo_demanda]
+
+
+# ------------------ hashes ------------------
+def sha256_archivo(ruta: Path) -> str:
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+class Hashes:
+    """
+    SHA-256 de archivos, recordado por (ruta, mtime, tamaño) entre
+    ejecuciones para no releer los Excel que no han cambiado.
+    """
+
+    def __init__(self, memoria: Optional[Dict[str, list]] = None):
+        self.memoria: Dict[str, list] = memoria or {}
+
+    def __call__(self, ruta: Path) -> Optional[str]:
+        try:
+            st = ruta.stat()
+        except FileNotFoundError:
+            return None
+        clave = str(ruta.resolve())
+        guardado = self.memoria.get(clave)
+        if guardado and guardado[0] == st.st_mtime_ns and guardado[1] == st.st_size:
+            return guardado[2]
+        sha = sha256_archivo(ruta)
+        self.memoria[clave] = [st.st_mtime_ns, st.st_size, sha]
+        return sha
+
+
+def modulos_locales(script: Path) -> List[Path]:
+    """
+    El script y los módulos del repositorio que importa (directa o
+    indirectamente): la configuración de cada etapa vive en sus constantes.
+    """
+    carpetas = (script.parent, ANOTACION, SCRIPTS)
+    vistos: Dict[Path, None] = {}
+    pila = [script]
+    while pila:
+        ruta = pila.pop()
+        if ruta in vistos:
+            continue
+        vistos[ruta] = None
+        try:
+            arbol = ast.parse(ruta.read_text(encoding="utf-8"))
+        except (OSError, SyntaxError, ValueError):
+            continue
+        for nodo in ast.walk(arbol):
+            if isinstance(nodo, ast.Import):
+                modulos = [a.name for a in nodo.names]
+            elif isinstance(nodo, ast.ImportFrom) and nodo.module and not nodo.level:
+                modulos = [nodo.module]
+            else:
+                continue
+            for modulo in modulos:
+                nombre = modulo.split(".")[0] + ".py"
+                for carpeta in (ruta.parent,) + carpetas:
+                    candidato = carpeta / nombre
+                    if candidato.exists():
+                        pila.append(candidato)
+                        break
+    return sorted(vistos)
+
+
+def clave_etapa(etapa: Etapa, datos: Path, hashes: Hashes) -> str:
+    contenido = {
+        "codigo": {str(r.relative_to(RAIZ)): hashes(r) for r in modulos_locales(etapa.script)},
+        "args": list(etapa.args),
+        "entorno": {v: os.environ.get(v) for v in etapa.entorno},
+        "entradas": {e: hashes(datos / e) for e in etapa.entradas},
+    }
+    return hashlib.sha256(json.dumps(contenido, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def literales(script: Path) -> Set[str]:
+    arbol = ast.parse(script.read_text(encoding="utf-8"))
+    return {n.value for n in ast.walk(arbol) if isinstance(n, ast.Constant) and isinstance(n.value, str)}
+
+
+def comprueba_declaraciones(etapas: Sequence[Etapa]) -> List[str]:
+    """
+    Avisos para los archivos declarados que no aparecen ni en el script ni
+    en sus argumentos (la declaración se ha quedado atrás respecto al
+    script).
+    """
+    avisos = []
+    for e in etapas:
+        if not e.script.exists():
+            avisos.append(f"{e.nombre}: no existe {e.script}")
+            continue
+        textos = literales(e.script) | set(e.args)
+        for archivo in e.entradas + e.salidas:
+            if not any(archivo in t for t in textos):
+                avisos.append(f"{e.nombre}: '{archivo}' no aparece en {e.script.name}")
+    return avisos
+
+
+# ------------------ estado ------------------
+def ruta_estado(datos: Path) -> Path:
+    return datos / CARPETA_ESTADO / "estado.json"
+
+
+def lee_estado(datos: Path) -> dict:
+    try:
+        with open(ruta_estado(datos), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"etapas": {}, "archivos": {}}
+
+
+def guarda_estado(datos: Path, estado: dict):
+    ruta = ruta_estado(datos)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    tmp = ruta.with_name(ruta.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(estado, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, ruta)
+
+
+# ------------------ ejecución ------------------
+def decide(etapa: Etapa, datos: Path, estado: dict, hashes: Hashes, forzar: bool,
+           adoptar: bool = True) -> Tuple[str, str, str]:
+    """
+    (acción, clave, motivo). Acción: "ejecutar", AL_DIA, PROTEGIDA,
+    ADOPTADA, EXISTENTE (falta alguna entrada, pero están todas las salidas: se usan
+    las que hay) o BLOQUEADA (falta alguna entrada y alguna salida, o habría
+    que sobrescribir salidas que no ha escrito ninguna ejecución anterior).
+    Con adoptar=False (alguna etapa previa se acaba de ejecutar) no se
+    adoptan las salidas que haya.
+    """
+    faltan = [e for e in etapa.entradas if not (datos / e).exists()]
+    if faltan:
+        if all((datos / s).exists() for s in etapa.salidas):
+            return EXISTENTE, "", f"faltan {', '.join(faltan)}; se usan las salidas que hay"
+        return BLOQUEADA, "", f"faltan {', '.join(faltan)}"
+
+    clave = clave_etapa(etapa, datos, hashes)
+    if forzar:
+        return "ejecutar", clave, "forzada"
+
+    registro = estado["etapas"].get(etapa.nombre)
+    salidas = {s: hashes(datos / s) for s in etapa.salidas}
+
+    if registro and registro["clave"] == clave and registro["salidas"] == salidas:
+        return AL_DIA, clave, "sin cambios"
+
+    if not registro and adoptar and etapa.salidas and all(salidas.values()):
+        return ADOPTADA, clave, "se registran las salidas que hay"
+
+    # Archivos que existen pero no los escribió ni adoptó esta etapa
+    registradas = registro["salidas"] if registro else {}
+    ajenas = [s for s, sha in salidas.items() if sha and not registradas.get(s)]
+    if ajenas:
+        return BLOQUEADA, clave, f"no se sobrescriben {', '.join(ajenas)} (no registradas); --forzar para regenerarlas"
+
+    if not registro:
+        return "ejecutar", clave, "sin ejecuciones previas"
+
+    if etapa.protegida and any(salidas.values()) and registro["salidas"] != salidas:
+        return PROTEGIDA, clave, "salida editada a mano; --forzar para regenerarla"
+
+    if registro["clave"] != clave:
+        return "ejecutar", clave, "han cambiado el código, la configuración o las entradas"
+    return "ejecutar", clave, "faltan salidas o han cambiado"
+
+
+def ejecuta(etapa: Etapa, datos: Path) -> Tuple[int, float]:
+    """Ejecuta el script en la carpeta de datos; devuelve (código, segundos)."""
+    log = datos / CARPETA_ESTADO / "logs" / f"{etapa.nombre}.log"
+    log.parent.mkdir(parents=True, exist_ok=True)
+    inicio = time.perf_counter()
+    with open(log, "w", encoding="utf-8") as f:
+        codigo = subprocess.call([sys.executable, str(etapa.script), *etapa.args],
+                                 cwd=datos, stdout=f, stderr=subprocess.STDOUT)
+    return codigo, time.perf_counter() - inicio
+
+
+def ejecuta_pipeline(etapas: Sequence[Etapa], datos: Path, trabajos: int = TRABAJOS,
+                     forzar: Iterable[str] = ()) -> Dict[str, Tuple[str, float, str]]:
+    """
+    Ejecuta las etapas en orden de dependencias, las independientes en
+    paralelo. Devuelve {etapa: (estado, segundos, motivo)}.
+    """
+    valida(etapas)
+    deps = dependencias(etapas)
+    orden = orden_topologico(etapas, deps)
+    por_nombre = {e.nombre: e for e in etapas}
+    forzar = set(forzar)
+
+    estado = lee_estado(datos)
+    hashes = Hashes(estado.get("archivos"))
+    resultado: Dict[str, Tuple[str, float, str]] = {}
+    pendientes = list(orden)
+    en_curso = {}
+
+    def anota(nombre: str, situacion: str, segundos: float = 0.0, motivo: str = ""):
+        resultado[nombre] = (situacion, segundos, motivo)
+        print(f"[{situacion:>9}] {nombre}" + (f" ({motivo})" if motivo else "")
+              + (f" {segundos:.1f} s" if segundos else ""), flush=True)
+
+    with ThreadPoolExecutor(max_workers=max(1, trabajos)) as ejecutor:
+        while pendientes or en_curso:
+            for nombre in list(pendientes):
+                previas = deps[nombre]
+                if not all(d in resultado for d in previas):
+                    continue
+                pendientes.remove(nombre)
+                fallidas = [d for d in previas if resultado[d][0] not in CORRECTAS]
+                if fallidas:
+                    anota(nombre, BLOQUEADA, motivo=f"no ha terminado {', '.join(sorted(fallidas))}")
+                    continue
+                etapa = por_nombre[nombre]
+                adoptar = not any(resultado[d][0] == EJECUTADA for d in previas)
+                accion, clave, motivo = decide(etapa, datos, estado, hashes, nombre in forzar, adoptar)
+                if accion == "ejecutar":
+                    print(f"[{'inicio':>9}] {nombre} ({motivo})", flush=True)
+                    en_curso[ejecutor.submit(ejecuta, etapa, datos)] = (nombre, clave)
+                    continue
+                if accion == ADOPTADA:
+                    estado["etapas"][nombre] = {
+                        "clave": clave,
+                        "salidas": {s: hashes(datos / s) for s in etapa.salidas},
+                    }
+                anota(nombre, accion, motivo=motivo)
+
+            if not en_curso:
+                continue
+
+            hechos, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+            for futuro in hechos:
+                nombre, clave = en_curso.pop(futuro)
+                etapa = por_nombre[nombre]
+                codigo, segundos = futuro.result()
+                log = datos / CARPETA_ESTADO / "logs" / f"{nombre}.log"
+                faltan = [s for s in etapa.salidas if not (datos / s).exists()]
+                if codigo != 0:
+                    anota(nombre, FALLIDA, segundos, f"código {codigo}, ver {log}")
+                elif faltan:
+                    anota(nombre, FALLIDA, segundos, f"no ha creado {', '.join(faltan)}")
+                else:
+                    estado["etapas"][nombre] = {
+                        "clave": clave,
+                        "salidas": {s: hashes(datos / s) for s in etapa.salidas},
+                    }
+                    anota(nombre, EJECUTADA, segundos)
+                estado["archivos"] = hashes.memoria
+                guarda_estado(datos, estado)
+
+    estado["archivos"] = hashes.memoria
+    guarda_estado(datos, estado)
+    return resultado
+
+
+def plan(etapas: Sequence[Etapa], datos: Path):
+    """Etapas en orden, con sus dependencias y lo que se haría ahora."""
+    valida(etapas)
+    deps = dependencias(etapas)
+    estado = lee_estado(datos)
+    hashes = Hashes(estado.get("archivos"))
+    por_nombre = {e.nombre: e for e in etapas}
+    for nombre in orden_topologico(etapas, deps):
+        etapa = por_nombre[nombre]
+        accion, clave, motivo = decide(etapa, datos, estado, hashes, False)
+        # Sin clave = faltan entradas, que puede crear una etapa previa
+        if deps[nombre] and accion == BLOQUEADA and not clave:
+            motivo = f"tras {', '.join(sorted(deps[nombre]))}"
+            accion = "pendiente"
+        print(f"{etapa.fase:<9} {nombre:<24} {accion:<9} {motivo}")
+        if deps[nombre]:
+            print(f"{'':<9} {'':<24} depende de: {', '.join(sorted(deps[nombre]))}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Ejecuta las etapas del proyecto que hayan cambiado.")
+    ap.add_argument("--datos", default=str(CARPETA_DATOS), help="Carpeta de trabajo con los Excel/CSV.")
+    ap.add_argument("--fases", nargs="+", choices=FASES, help="Solo las etapas de estas fases.")
+    ap.add_argument("--etapas", nargs="+", help="Solo estas etapas (incluidas las bajo demanda).")
+    ap.add_argument("--forzar", nargs="+", default=[], help="Etapas que se ejecutan aunque estén al día.")
+    ap.add_argument("-j", "--trabajos", type=int, default=TRABAJOS, help=f"Etapas en paralelo (por defecto: {TRABAJOS}).")
+    ap.add_argument("--plan", action="store_true", help="Muestra el plan sin ejecutar nada.")
+    args = ap.parse_args()
+
+    datos = Path(args.datos)
+    if not datos.is_dir():
+        print(f"ERROR: No existe la carpeta de datos: {datos}", file=sys.stderr); sys.exit(1)
+
+    for aviso in comprueba_declaraciones(ETAPAS):
+        print(f"[AVISO] {aviso}", file=sys.stderr)
+
+    try:
+        etapas = selecciona(ETAPAS, args.fases, args.etapas)
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr); sys.exit(1)
+
+    if args.plan:
+        plan(etapas, datos)
+        return
+
+    inicio = time.perf_counter()
+    resultado = ejecuta_pipeline(etapas, datos, args.trabajos, args.forzar)
+
+    cuenta: Dict[str, int] = {}
+    for situacion, _, _ in resultado.values():
+        cuenta[situacion] = cuenta.get(situacion, 0) + 1
+    print()
+    print(" | ".join(f"{s}: {n}" for s, n in sorted(cuenta.items()))
+          + f" | total {time.perf_counter() - inicio:.1f} s")
+
+    if cuenta.get(FALLIDA):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,7 @@ Procesa uno o varios archivos Excel (.xlsx/.xls) con DOS columnas:
 
 Para cada fila, segmenta el contexto en oraciones (spaCy, español),
 localiza la oración que contiene la palabra evaluativa y exporta un
-Excel con CUATRO columnas:
+Excel (o Parquet, si la salida termina en .parquet) con CUATRO columnas:
   - palabra        (la evaluativa original)
   - izquierda      (oración anterior si existe, si no, vacío)
   - objetivo       (oración que contiene la evaluativa)
@@ -33,6 +33,9 @@ from typing import Optional, Tuple, List
 import pandas as pd
 import spacy
 
+from indice_formas import indice_por_defecto, clave
+from tablas import escribe_tabla
+
 # ------------------ utilidades ------------------
 def norm(s: str) -> str:
     return unicodedata.normalize("NFC", s).lower() if isinstance(s, str) else s
@@ -46,13 +49,19 @@ def strip_accents(s: str) -> str:
 def contiene_evaluativa(sent_text: str, evaluativa: str, sent_spacy) -> Optional[str]:
     """
     Devuelve la forma encontrada si la oración contiene la evaluativa.
-    Primero por tokens (forma y lema), luego una búsqueda leniente sin acentos.
+    Primero por tokens (forma flexionada según el índice de los lexicones,
+    forma y lema de spaCy), luego una búsqueda leniente sin acentos.
     """
     ev_norm = norm(evaluativa)
     ev_norm_strip = strip_accents(ev_norm)
 
+    indice = indice_por_defecto()
+    ev_clave = clave(evaluativa)
+
     # tokens
     for tok in sent_spacy:
+        if indice.es_forma_de(tok.text, ev_clave):
+            return tok.text
         t = norm(tok.text)
         l = norm(tok.lemma_)
         if t == ev_norm or l == ev_norm:
@@ -129,9 +138,7 @@ def procesa_excel(ruta_excel: Path, salida_xlsx: Path, nlp, col_palabra: str, co
         print(f"[Info] Coincidencias encontradas: {len(out_df)}", flush=True)
 
     salida_xlsx.parent.mkdir(parents=True, exist_ok=True)
-    with pd.ExcelWriter(salida_xlsx, engine="openpyxl") as writer:
-        out_df.to_excel(writer, index=False, sheet_name="salida")
-    return salida_xlsx
+    return escribe_tabla(out_df, salida_xlsx, hoja="salida")
 
 def main():
     import argparse
@@ -139,7 +146,7 @@ def main():
     g = ap.add_mutually_exclusive_group(required=True)
     g.add_argument("--excel", help="Ruta a un archivo Excel (.xlsx/.xls).")
     g.add_argument("--carpeta", help="Carpeta con Excel(s) a procesar (toma todos los .xlsx/.xls).")
-    ap.add_argument("--salida", help="Ruta del Excel de salida (solo si usas --excel).")
+    ap.add_argument("--salida", help="Ruta de la salida, .xlsx o .parquet (solo si usas --excel).")
     ap.add_argument("--salida-carpeta", help="Carpeta donde dejar salidas (obligatorio si usas --carpeta).")
     ap.add_argument("--col-palabra", default="evaluativa", help="Nombre de la columna con la palabra evaluativa (por defecto: 'evaluativa').")
     ap.add_argument("--col-contexto", default="contexto", help="Nombre de la columna con el texto en contexto (por defecto: 'contexto').")
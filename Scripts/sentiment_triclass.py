@@ -1,10 +1,12 @@
 # -*- coding: utf-8 -*-
-import os, warnings
+import argparse, os, warnings
 from typing import Dict, Optional, List
 import pandas as pd
 from unidecode import unidecode
 from tqdm import tqdm
 
+from tablas import escribe_hojas, formato_de, lee_hojas
+
 warnings.filterwarnings("ignore", category=UserWarning)
 
 # ====== CONFIG ======
@@ -101,20 +103,24 @@ def procesa_hoja(df: pd.DataFrame) -> pd.DataFrame:
     df[col_neg] = pd.Series(neg_vals, index=df.index)
     return df
 
-def procesa_archivo(path_xlsx: str):
+def procesa_archivo(path_xlsx: str, out_path: Optional[str] = None):
     print(f"→ Procesando {os.path.basename(path_xlsx)}")
-    xls = pd.ExcelFile(path_xlsx, engine="openpyxl")
+    # Excel: cada hoja como texto (dtype=str); Parquet / CSV: tabla ya tipada
+    hojas_entrada = {}
+    if formato_de(path_xlsx) == "xlsx":
+        xls = pd.ExcelFile(path_xlsx, engine="openpyxl")
+        for hoja in xls.sheet_names:
+            try:
+                hojas_entrada[hoja] = pd.read_excel(xls, sheet_name=hoja, dtype=str)
+            except Exception as e:
+                print(f"   ⚠️ No pude leer la hoja '{hoja}': {e}")
+                hojas_entrada[hoja] = pd.DataFrame()
+    else:
+        hojas_entrada = lee_hojas(path_xlsx)
 
     # Procesamos primero todas las hojas en memoria para evitar dejar el libro vacío si algo falla
     hojas_salida = {}
-    for hoja in xls.sheet_names:
-        try:
-            df = pd.read_excel(xls, sheet_name=hoja, dtype=str)
-        except Exception as e:
-            print(f"   ⚠️ No pude leer la hoja '{hoja}': {e}")
-            hojas_salida[hoja] = pd.DataFrame()
-            continue
-
+    for hoja, df in hojas_entrada.items():
         try:
             hojas_salida[hoja] = procesa_hoja(df)
         except Exception as e:
@@ -122,20 +128,23 @@ def procesa_archivo(path_xlsx: str):
             hojas_salida[hoja] = df  # escribimos tal cual
 
     # Ahora sí, escribimos a disco (siempre habrá al menos una hoja)
-    out_path = os.path.splitext(path_xlsx)[0] + SUFIJO_SALIDA
-    with pd.ExcelWriter(out_path, engine="openpyxl") as writer:
-        for hoja, df_out in hojas_salida.items():
-            df_out.to_excel(writer, sheet_name=hoja, index=False)
+    out_path = out_path or os.path.splitext(path_xlsx)[0] + SUFIJO_SALIDA
+    escribe_hojas(hojas_salida, out_path)
 
     print(f"   ✓ Guardado: {out_path}")
 
 def main():
-    if not os.path.exists(INPUT_XLSX):
-        print("No existe el archivo:", INPUT_XLSX)
+    ap = argparse.ArgumentParser(description="Probabilidades POS/NEU/NEG de cada oración.")
+    ap.add_argument("--entrada", default=INPUT_XLSX, help="Excel, Parquet o CSV de entrada (por defecto: INPUT_XLSX).")
+    ap.add_argument("--salida", default=None, help=f"Excel, Parquet o CSV de salida (por defecto: entrada + '{SUFIJO_SALIDA}').")
+    args = ap.parse_args()
+
+    if not os.path.exists(args.entrada):
+        print("No existe el archivo:", args.entrada)
         return
     # Carga del modelo (descarga la 1ª vez)
     get_analyzer()
-    procesa_archivo(INPUT_XLSX)
+    procesa_archivo(args.entrada, args.salida)
 
 if __name__ == "__main__":
     main()
@@ -1,12 +1,14 @@
 # -*- coding: utf-8 -*-
-import os, warnings
+import argparse, os, warnings
 from typing import Dict, Optional, List
-import re
 
 import pandas as pd
 from unidecode import unidecode
 from tqdm import tqdm
 
+from indice_formas import indice_por_defecto
+from tablas import escribe_hojas, formato_de, lee_hojas
+
 warnings.filterwarnings("ignore", category=UserWarning)
 
 # ====== CONFIG ======
@@ -100,15 +102,15 @@ def probas_triclase_target(palabra: str, contexto: str, ventana_chars: int = 80)
         # Si no hay palabra objetivo, usamos toda la oración como fallback
         texto_snippet = texto
     else:
-        # Buscar la palabra como "token" aproximado (delimitada por bordes de palabra)
-        patron = re.compile(r'\b{}\b'.format(re.escape(objetivo)), re.IGNORECASE)
-        m = patron.search(texto)
+        # Buscar la palabra o cualquiera de sus formas flexionadas
+        # (índice forma -> lema de los lexicones, ver indice_formas.py)
+        m = indice_por_defecto().localiza(texto, objetivo)
 
         if m is None:
             # Si no la encontramos, usamos toda la oración
             texto_snippet = texto
         else:
-            start, end = m.start(), m.end()
+            start, end = m
             left = max(0, start - ventana_chars)
             right = min(len(texto), end + ventana_chars)
             texto_snippet = texto[left:right]
@@ -144,7 +146,7 @@ def procesa_hoja(df: pd.DataFrame) -> pd.DataFrame:
     col_neu = COL_NEU if COL_NEU not in df.columns else COL_NEU + "_nuevo"
     col_neg = COL_NEG if COL_NEG not in df.columns else COL_NEG + "_nuevo"
 
-    palabras = df[col_pal].fillna("").astype(str).tolist()
+    palabras = df[col_pal].astype(object).fillna("").astype(str).tolist()
     contextos = df[col_obj].fillna("").astype(str).tolist()
 
     pos_vals: List[Optional[float]] = []
@@ -168,24 +170,28 @@ def procesa_hoja(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def procesa_archivo(path_xlsx: str):
+def procesa_archivo(path_xlsx: str, out_path: Optional[str] = None):
     """
     Procesa todas las hojas de un archivo Excel y les añade
     las columnas de polaridad triclase (POS/NEU/NEG) target-based.
     """
     print(f"→ Procesando {os.path.basename(path_xlsx)}")
-    xls = pd.ExcelFile(path_xlsx, engine="openpyxl")
+    # Excel: cada hoja como texto (dtype=str); Parquet / CSV: tabla ya tipada
+    hojas_entrada = {}
+    if formato_de(path_xlsx) == "xlsx":
+        xls = pd.ExcelFile(path_xlsx, engine="openpyxl")
+        for hoja in xls.sheet_names:
+            try:
+                hojas_entrada[hoja] = pd.read_excel(xls, sheet_name=hoja, dtype=str)
+            except Exception as e:
+                print(f"   ⚠️ No pude leer la hoja '{hoja}': {e}")
+                hojas_entrada[hoja] = pd.DataFrame()
+    else:
+        hojas_entrada = lee_hojas(path_xlsx)
 
     # Procesamos primero todas las hojas en memoria
     hojas_salida = {}
-    for hoja in xls.sheet_names:
-        try:
-            df = pd.read_excel(xls, sheet_name=hoja, dtype=str)
-        except Exception as e:
-            print(f"   ⚠️ No pude leer la hoja '{hoja}': {e}")
-            hojas_salida[hoja] = pd.DataFrame()
-            continue
-
+    for hoja, df in hojas_entrada.items():
         try:
             hojas_salida[hoja] = procesa_hoja(df)
         except Exception as e:
@@ -193,24 +199,27 @@ def procesa_archivo(path_xlsx: str):
             hojas_salida[hoja] = df  # escribimos tal cual
 
     # Escritura a disco
-    out_path = os.path.splitext(path_xlsx)[0] + SUFIJO_SALIDA
-    with pd.ExcelWriter(out_path, engine="openpyxl") as writer:
-        for hoja, df_out in hojas_salida.items():
-            df_out.to_excel(writer, sheet_name=hoja, index=False)
+    out_path = out_path or os.path.splitext(path_xlsx)[0] + SUFIJO_SALIDA
+    escribe_hojas(hojas_salida, out_path)
 
     print(f"   ✓ Guardado: {out_path}")
 
 
 def main():
-    if not os.path.exists(INPUT_XLSX):
-        print("No existe el archivo:", INPUT_XLSX)
+    ap = argparse.ArgumentParser(description="Probabilidades POS/NEU/NEG de la palabra objetivo en cada oración.")
+    ap.add_argument("--entrada", default=INPUT_XLSX, help="Excel, Parquet o CSV de entrada (por defecto: INPUT_XLSX).")
+    ap.add_argument("--salida", default=None, help=f"Excel, Parquet o CSV de salida (por defecto: entrada + '{SUFIJO_SALIDA}').")
+    args = ap.parse_args()
+
+    if not os.path.exists(args.entrada):
+        print("No existe el archivo:", args.entrada)
         return
 
     # Carga del modelo (descarga la 1ª vez)
     get_analyzer()
 
     # Procesa el archivo de entrada
-    procesa_archivo(INPUT_XLSX)
+    procesa_archivo(args.entrada, args.salida)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,409 @@
+# -*- coding: utf-8 -*-
+"""
+Lectura y escritura tipada de las tablas que se pasan las etapas.
+
+Las etapas se pasaban los datos en XLSX (o en CSV con ';' y coma decimal):
+el formato más lento de leer y escribir, el que más ocupa y el que pierde
+los tipos (de ahí el dtype=str de sentiment_triclass*.py y las comas
+decimales que convierte a mano 02_auto_label.py). Aquí el formato de
+intercambio es Parquet, con un tipo fijo por columna según su encabezado:
+
+  - probabilidades y entropías        -> float32
+  - etiquetas NEG / NEU / POS          -> categoría (diccionario en Arrow)
+  - bandas de entropía low / mid / high -> categoría
+  - palabra / ítem (texto)             -> categoría (se repite en cada oración)
+  - resto                              -> sin cambios (texto como string)
+
+XLSX y CSV quedan como paso final de presentación: escribe_tabla() elige el
+formato por la extensión, y exporta() (o este script desde la línea de
+órdenes) convierte un Parquet en Excel o CSV para abrirlo a mano o en Orange.
+
+USO:
+  python tablas.py adj_polarity_entropy_corpus.csv adj_polarity_entropy_corpus.parquet
+  python tablas.py concordances_VERB_triclase.parquet concordances_VERB_triclase.xlsx
+  python tablas.py concordances_VERB_triclase.parquet      # esquema y tamaño
+
+Requisitos:
+  - pandas, numpy, pyarrow (openpyxl para XLSX)
+"""
+import argparse
+import os
+import sys
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# ====== CONFIG ======
+COMPRESION = "zstd"
+FILAS_POR_GRUPO = 100_000     # row groups del Parquet
+FILAS_POR_LOTE = 100_000      # lectura en streaming (lee_lotes)
+
+ETIQUETAS = ("NEG", "NEU", "POS")
+BANDAS = ("low", "mid", "high")
+
+# Columna que guarda el nombre de la hoja al escribir varias hojas en un
+# solo Parquet o CSV
+COL_HOJA = "hoja"
+
+# Encabezados normalizados (minúsculas, sin acentos, espacios simples)
+COLUMNAS_FLOAT32 = {
+    # probabilidades por oración (sentiment_triclass*, muestras anotadas, Cardiff)
+    "pos", "neu", "neg",
+    "pos_pct", "neu_pct", "neg_pct",
+    "pos - mean", "neu - mean", "neg - mean",
+    "cardiff_pos", "cardiff_neu", "cardiff_neg",
+    "mean_pos", "mean_neu", "mean_neg",
+    # entropías y polaridad continua
+    "entropy", "entropia", "polaridad",
+    "entropia_3bins", "entropia_3bins_norm",
+    "mean_entropy", "aggregate_entropy", "jsd",
+}
+
+COLUMNAS_ETIQUETA = {
+    "auto_label", "pysentimiento_label", "cardiff_label",
+    "chatgpt_label", "claude_label",
+    "gold human label", "gold_human_label", "gold label",
+    "human annotation 1", "human annotation 2", "human annotation 3",
+    "human annotation 4 & 5", "human annotation 4&5",
+}
+
+COLUMNAS_BANDA = {"entropy_band", "entropy band"}
+
+COLUMNAS_CATEGORIA = {
+    "palabra", "word", "item", "keyword", "evaluativa",
+    "lexical item", "selected_adjective",
+}
+
+FORMATOS = {
+    ".parquet": "parquet",
+    ".csv": "csv",
+    ".txt": "csv",
+    ".xlsx": "xlsx",
+    ".xls": "xlsx",
+}
+
+
+# ------------------ tipos ------------------
+def normaliza_encabezado(valor) -> str:
+    valor = unicodedata.normalize("NFD", str(valor))
+    valor = "".join(ch for ch in valor if unicodedata.category(ch) != "Mn")
+    return " ".join(valor.strip().lower().split())
+
+
+def tipo_columna(nombre) -> Optional[str]:
+    """'float32', 'etiqueta', 'banda', 'categoria' o None (sin cambios)."""
+    nrm = normaliza_encabezado(nombre)
+    if nrm in COLUMNAS_FLOAT32:
+        return "float32"
+    if nrm in COLUMNAS_ETIQUETA:
+        return "etiqueta"
+    if nrm in COLUMNAS_BANDA:
+        return "banda"
+    if nrm in COLUMNAS_CATEGORIA:
+        return "categoria"
+    return None
+
+
+def _texto_o_nulo(serie: pd.Series) -> pd.Series:
+    texto = serie.astype(str).str.strip()
+    return texto.where(serie.notna() & (texto != ""))
+
+
+def a_float32(serie: pd.Series) -> pd.Series:
+    """Números con punto o coma decimal; las celdas vacías quedan como NaN."""
+    if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+        return serie.astype(np.float32)
+    texto = _texto_o_nulo(serie).str.replace(",", ".", regex=False)
+    return pd.to_numeric(texto).astype(np.float32)
+
+
+def a_categoria(serie: pd.Series, fijas: Sequence[str] = (), transforma=None) -> pd.Series:
+    """
+    Categoría con las categorías fijas primero (mismos códigos en todos los
+    archivos) y después, ordenados, los demás valores presentes: no se
+    pierde ningún valor aunque no sea una etiqueta válida.
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype) and not fijas and transforma is None:
+        return serie
+    texto = _texto_o_nulo(serie)
+    if transforma is not None:
+        texto = texto.map(transforma, na_action="ignore")
+    otras = sorted(set(texto.dropna()) - set(fijas))
+    return pd.Categorical(texto, categories=list(fijas) + otras)
+
+
+def _texto_mixto(serie: pd.Series) -> pd.Series:
+    """Columnas object con números y texto mezclados (Arrow no las admite)."""
+    if serie.dtype == object and pd.api.types.infer_dtype(serie, skipna=True) not in ("string", "empty", "boolean"):
+        return serie.where(serie.isna(), serie.astype(str))
+    return serie
+
+
+def tipa(df: pd.DataFrame, tipos: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """
+    Devuelve una copia con el tipo de cada columna según su encabezado
+    (tipo_columna) o según tipos {columna: tipo}, que tiene prioridad.
+    """
+    tipos = tipos or {}
+    salida = {}
+    for col in df.columns:
+        serie = df[col]
+        tipo = tipos.get(col, tipo_columna(col))
+        if tipo == "float32":
+            serie = a_float32(serie)
+        elif tipo == "etiqueta":
+            serie = pd.Series(a_categoria(serie, ETIQUETAS, str.upper), index=df.index)
+        elif tipo == "banda":
+            serie = pd.Series(a_categoria(serie, BANDAS, str.lower), index=df.index)
+        elif tipo == "categoria" and not pd.api.types.is_numeric_dtype(serie):
+            serie = pd.Series(a_categoria(serie), index=df.index)
+        else:
+            serie = _texto_mixto(serie)
+        salida[col] = serie
+    return pd.DataFrame(salida, index=df.index)
+
+
+def _necesita_pyarrow():
+    if pa is None:
+        raise ImportError("Leer o escribir Parquet necesita pyarrow")
+
+
+def a_tabla(df: pd.DataFrame, tipos: Optional[Dict[str, str]] = None) -> "pa.Table":
+    """
+    DataFrame -> tabla Arrow tipada. Los índices de los diccionarios son
+    siempre int32, para que trozos con distinto número de categorías tengan
+    el mismo esquema (ParquetWriter).
+    """
+    _necesita_pyarrow()
+    tabla = pa.Table.from_pandas(tipa(df, tipos), preserve_index=False)
+    campos = []
+    for campo in tabla.schema:
+        if pa.types.is_dictionary(campo.type):
+            campo = campo.with_type(pa.dictionary(pa.int32(), campo.type.value_type))
+        campos.append(campo)
+    return tabla.cast(pa.schema(campos, metadata=tabla.schema.metadata))
+
+
+def presentacion(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Copia para XLSX / CSV: float32 -> float64 con el valor decimal más corto
+    (0.53 y no 0.5299999713897705) y categorías -> texto.
+    """
+    df = df.copy()
+    for col in df.columns:
+        serie = df[col]
+        if serie.dtype == np.float32:
+            df[col] = serie.astype(str).astype(np.float64)
+        elif isinstance(serie.dtype, pd.CategoricalDtype):
+            df[col] = serie.astype(object).where(serie.notna(), None)
+    return df
+
+
+# ------------------ escritura ------------------
+def formato_de(ruta: Path) -> str:
+    formato = FORMATOS.get(Path(ruta).suffix.lower())
+    if formato is None:
+        raise ValueError(f"Formato no admitido: {ruta} (usa .parquet, .csv o .xlsx)")
+    return formato
+
+
+def _temporal(ruta: Path) -> Path:
+    """Se escribe al lado y se renombra: nunca queda un archivo a medias."""
+    return ruta.with_name(f".{ruta.stem}.{os.getpid()}.tmp{ruta.suffix}")
+
+
+def escribe_hojas(hojas: Dict[str, pd.DataFrame], ruta, tipos: Optional[Dict[str, str]] = None) -> Path:
+    """
+    XLSX: una hoja por entrada. Parquet / CSV: una sola tabla; si hay varias
+    hojas se concatenan con la columna COL_HOJA (lee_hojas las separa).
+    """
+    ruta = Path(ruta)
+    formato = formato_de(ruta)
+    temporal = _temporal(ruta)
+
+    if formato != "xlsx":
+        if len(hojas) == 1:
+            df = next(iter(hojas.values()))
+        else:
+            df = pd.concat(
+                [h.assign(**{COL_HOJA: nombre}) for nombre, h in hojas.items()],
+                ignore_index=True
+            )
+
+    try:
+        if formato == "parquet":
+            pq.write_table(a_tabla(df, tipos), temporal, compression=COMPRESION, row_group_size=FILAS_POR_GRUPO)
+        elif formato == "csv":
+            presentacion(df).to_csv(temporal, sep=";", index=False, encoding="utf-8-sig", decimal=",")
+        else:
+            with pd.ExcelWriter(temporal, engine="openpyxl") as writer:
+                for nombre, h in hojas.items():
+                    presentacion(h).to_excel(writer, sheet_name=nombre, index=False)
+        os.replace(temporal, ruta)
+    finally:
+        if temporal.exists():
+            temporal.unlink()
+    return ruta
+
+
+def escribe_tabla(df: pd.DataFrame, ruta, hoja: str = "Sheet1", tipos: Optional[Dict[str, str]] = None) -> Path:
+    """Escribe df en el formato que indica la extensión de ruta."""
+    if formato_de(Path(ruta)) == "parquet":
+        _necesita_pyarrow()
+    return escribe_hojas({hoja: df}, ruta, tipos)
+
+
+# ------------------ lectura ------------------
+def lee_arrow(ruta, columnas: Optional[List[str]] = None) -> "pa.Table":
+    _necesita_pyarrow()
+    return pq.read_table(ruta, columns=columnas)
+
+
+def encabezados(ruta) -> List[str]:
+    """Nombres de columna de un Parquet sin leer los datos."""
+    _necesita_pyarrow()
+    return list(pq.read_schema(ruta).names)
+
+
+def lee_tabla(ruta, columnas: Optional[List[str]] = None, hoja=None, tipar: bool = True) -> pd.DataFrame:
+    """
+    Tabla completa como DataFrame tipado. Parquet ya guarda los tipos; CSV
+    (';', coma decimal) y XLSX se leen con pandas y se tipan con tipa().
+    """
+    ruta = Path(ruta)
+    formato = formato_de(ruta)
+    if formato == "parquet":
+        return lee_arrow(ruta, columnas).to_pandas()
+    if formato == "csv":
+        df = pd.read_csv(ruta, sep=";", encoding="utf-8-sig", decimal=",", usecols=columnas)
+    else:
+        df = pd.read_excel(ruta, sheet_name=0 if hoja is None else hoja, usecols=columnas)
+    return tipa(df) if tipar else df
+
+
+def lee_hojas(ruta, tipar: bool = True, **opciones) -> Dict[str, pd.DataFrame]:
+    """
+    {hoja: DataFrame}. XLSX: todas las hojas (opciones se pasan a
+    pd.read_excel, p. ej. dtype=str). Parquet / CSV: una hoja con el nombre
+    del archivo, o una por valor de COL_HOJA si la tabla la tiene.
+    """
+    ruta = Path(ruta)
+    if formato_de(ruta) == "xlsx":
+        hojas = pd.read_excel(ruta, sheet_name=None, **opciones)
+        return {nombre: tipa(df) if tipar else df for nombre, df in hojas.items()}
+
+    df = lee_tabla(ruta, tipar=tipar)
+    if COL_HOJA not in df.columns:
+        return {ruta.stem: df}
+    return {
+        str(nombre): grupo.drop(columns=COL_HOJA).reset_index(drop=True)
+        for nombre, grupo in df.groupby(COL_HOJA, sort=False, observed=True)
+    }
+
+
+def lee_lotes(ruta, columnas: Optional[List[str]] = None, hoja: Optional[str] = None,
+              filas_por_lote: int = FILAS_POR_LOTE) -> Iterator[pd.DataFrame]:
+    """
+    La tabla por trozos de DataFrame tipados, sin cargarla entera.
+    Parquet: lotes de pyarrow (solo las columnas pedidas).
+    CSV: pandas chunksize (';', coma decimal, como el corpus).
+    Excel: openpyxl en modo read_only.
+    """
+    ruta = Path(ruta)
+    formato = formato_de(ruta)
+
+    if formato == "parquet":
+        _necesita_pyarrow()
+        for lote in pq.ParquetFile(ruta).iter_batches(batch_size=filas_por_lote, columns=columnas):
+            yield lote.to_pandas()
+        return
+
+    if formato == "csv":
+        for trozo in pd.read_csv(ruta, sep=";", encoding="utf-8-sig", decimal=",",
+                                 usecols=columnas, chunksize=filas_por_lote):
+            yield tipa(trozo)
+        return
+
+    from openpyxl import load_workbook
+
+    wb = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        ws = wb[hoja] if hoja else wb.active
+        filas = ws.iter_rows(values_only=True)
+        encabezado = [str(c) if c is not None else "" for c in next(filas)]
+        lote = []
+        for fila in filas:
+            lote.append(fila)
+            if len(lote) >= filas_por_lote:
+                yield _trozo_excel(lote, encabezado, columnas)
+                lote = []
+        if lote:
+            yield _trozo_excel(lote, encabezado, columnas)
+    finally:
+        wb.close()
+
+
+def _trozo_excel(filas, encabezado: List[str], columnas: Optional[List[str]]) -> pd.DataFrame:
+    df = pd.DataFrame(filas, columns=encabezado)
+    return tipa(df if columnas is None else df[columnas])
+
+
+def exporta(entrada, salida, hoja=None) -> Path:
+    """
+    Paso final de presentación (Parquet -> XLSX / CSV, con las hojas que
+    guarde COL_HOJA) o conversión de un Excel heredado a Parquet (una hoja:
+    la pedida o la primera).
+    """
+    if formato_de(Path(entrada)) == "xlsx":
+        nombre = hoja if hoja is not None else pd.ExcelFile(entrada).sheet_names[0]
+        hojas = {nombre: lee_tabla(entrada, hoja=nombre)}
+    else:
+        hojas = lee_hojas(entrada)
+    return escribe_hojas(hojas, salida)
+
+
+# ------------------ línea de órdenes ------------------
+def describe(ruta: Path) -> str:
+    tamano = ruta.stat().st_size / 1024 ** 2
+    if formato_de(ruta) != "parquet":
+        return f"{ruta} ({tamano:.2f} MB)"
+    meta = pq.ParquetFile(ruta).metadata
+    return f"{ruta} ({tamano:.2f} MB, {meta.num_rows} filas, {meta.num_row_groups} grupos)"
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Convierte tablas entre Parquet (tipado), CSV y XLSX.")
+    ap.add_argument("entrada", help="Tabla de entrada (.parquet, .csv o .xlsx).")
+    ap.add_argument("salida", nargs="?", default=None, help="Tabla de salida; sin ella, muestra el esquema.")
+    ap.add_argument("--hoja", default=None, help="Hoja del Excel de entrada (por defecto: la primera).")
+    args = ap.parse_args()
+
+    entrada = Path(args.entrada)
+    if not entrada.exists():
+        print(f"ERROR: No existe el archivo: {entrada}", file=sys.stderr); sys.exit(1)
+
+    if args.salida is None:
+        print(describe(entrada))
+        if formato_de(entrada) == "parquet":
+            print(pq.read_schema(entrada).remove_metadata())
+        else:
+            print(lee_tabla(entrada, hoja=args.hoja).dtypes.to_string())
+        return
+
+    salida = exporta(entrada, args.salida, args.hoja)
+    print(f"Entrada: {describe(entrada)}")
+    print(f"Salida:  {describe(salida)}")
+
+
+if __name__ == "__main__":
+    main()
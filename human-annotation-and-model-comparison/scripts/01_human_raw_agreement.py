@@ -1,7 +1,8 @@
 from pathlib import Path
-from openpyxl import load_workbook
 import csv
 
+from annotation_loader import load_columns
+
 
 # =========================
 # CONFIGURACIÓN
@@ -17,9 +18,9 @@ SHEET_NAME = None  # None = usa la hoja activa
 FIRST_DATA_ROW = 2
 LAST_DATA_ROW = 960
 
-ANNOTATOR_1_COL = "J"
-ANNOTATOR_2_COL = "K"
-ANNOTATOR_3_COL = "L"
+# Columnas localizadas por encabezado (ver annotation_schema.VARIANTES):
+# Human Annotation 1 / Human Annotation 2 / Human Annotation 3
+ANNOTATOR_ROLES = ["annotator_1", "annotator_2", "annotator_3"]
 
 
 # =========================
@@ -50,12 +51,13 @@ def percentage(count, total):
 # LECTURA DEL EXCEL
 # =========================
 
-wb = load_workbook(INPUT_FILE, data_only=True)
-
-if SHEET_NAME is None:
-    ws = wb.active
-else:
-    ws = wb[SHEET_NAME]
+columns = load_columns(
+    INPUT_FILE,
+    ANNOTATOR_ROLES,
+    sheet_name=SHEET_NAME,
+    first_data_row=FIRST_DATA_ROW,
+    last_data_row=LAST_DATA_ROW
+)
 
 
 # =========================
@@ -70,18 +72,20 @@ counts = {
 
 case_rows = []
 
-for row in range(FIRST_DATA_ROW, LAST_DATA_ROW + 1):
-
-    ann1 = ws[f"{ANNOTATOR_1_COL}{row}"].value
-    ann2 = ws[f"{ANNOTATOR_2_COL}{row}"].value
-    ann3 = ws[f"{ANNOTATOR_3_COL}{row}"].value
+# Acuerdo bruto: se comparan los valores tal como están en el Excel
+for row, ann1, ann2, ann3 in zip(
+    columns.excel_row,
+    columns.raw("annotator_1"),
+    columns.raw("annotator_2"),
+    columns.raw("annotator_3")
+):
 
     agreement_type = classify_agreement(ann1, ann2, ann3)
 
     counts[agreement_type] += 1
 
     case_rows.append({
-        "excel_row": row,
+        "excel_row": int(row),
         "human_annotation_1": ann1,
         "human_annotation_2": ann2,
         "human_annotation_3": ann3,
@@ -125,7 +129,7 @@ summary_rows = [
 print("ACUERDO BRUTO ENTRE ANOTADORES HUMANOS")
 print("=====================================")
 print(f"Archivo analizado: {INPUT_FILE}")
-print(f"Hoja analizada: {ws.title}")
+print(f"Hoja analizada: {columns.sheet_title}")
 print(f"Filas analizadas: {FIRST_DATA_ROW}-{LAST_DATA_ROW}")
 print(f"Total de casos: {total_cases}")
 print()
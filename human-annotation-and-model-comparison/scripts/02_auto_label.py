@@ -1,6 +1,8 @@
 from pathlib import Path
 from openpyxl import load_workbook
 
+from annotation_schema import read_columns, find_or_add_column
+
 
 # =========================
 # CONFIGURACIÓN
@@ -13,10 +15,10 @@ OUTPUT_FILE = Path("sample_1000_sentences_for_manual_annotation_randomized_auto_
 # Si tu hoja tiene un nombre concreto, escríbelo aquí.
 SHEET_NAME = None
 
-POS_COL = "F"
-NEU_COL = "G"
-NEG_COL = "H"
-AUTO_LABEL_COL = "I"
+# Columnas localizadas por encabezado (ver annotation_schema.VARIANTES):
+# POS / NEU / NEG. La columna auto_label se reutiliza si ya existe;
+# si no, se añade al final de la hoja.
+SCORE_ROLES = ["pos_score", "neu_score", "neg_score"]
 
 FIRST_DATA_ROW = 2
 
@@ -71,20 +73,24 @@ else:
     ws = wb[SHEET_NAME]
 
 
+columns = read_columns(ws, SCORE_ROLES, first_data_row=FIRST_DATA_ROW)
+
+
 # =========================
-# CREAR AUTO_LABEL EN COLUMNA J
+# CREAR AUTO_LABEL
 # =========================
 
-ws[f"{AUTO_LABEL_COL}1"] = "auto_label"
-
-for row in range(FIRST_DATA_ROW, ws.max_row + 1):
-    pos = to_float(ws[f"{POS_COL}{row}"].value)
-    neu = to_float(ws[f"{NEU_COL}{row}"].value)
-    neg = to_float(ws[f"{NEG_COL}{row}"].value)
+auto_label_col = find_or_add_column(ws, "auto_label", "auto_label")
 
-    auto_label = get_auto_label(pos, neu, neg)
+for row, pos, neu, neg in zip(
+    columns.excel_row,
+    columns.raw("pos_score"),
+    columns.raw("neu_score"),
+    columns.raw("neg_score")
+):
+    auto_label = get_auto_label(to_float(pos), to_float(neu), to_float(neg))
 
-    ws[f"{AUTO_LABEL_COL}{row}"] = auto_label
+    ws.cell(row=int(row), column=auto_label_col).value = auto_label
 
 
 # =========================
@@ -95,4 +101,4 @@ wb.save(OUTPUT_FILE)
 
 print(f"Archivo creado correctamente: {OUTPUT_FILE}")
 print(f"Hoja procesada: {ws.title}")
-print("Columna J creada: auto_label")
+print(f"Columna {ws.cell(row=1, column=auto_label_col).column_letter} creada: auto_label")
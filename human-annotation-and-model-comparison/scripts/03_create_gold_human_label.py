@@ -3,6 +3,8 @@ from collections import Counter
 from openpyxl import load_workbook
 import csv
 
+from annotation_schema import read_columns, find_or_add_column
+
 
 # =========================
 # CONFIGURACIÓN
@@ -18,39 +20,23 @@ SHEET_NAME = None  # None = usa la hoja activa
 FIRST_DATA_ROW = 2
 LAST_DATA_ROW = 960
 
-ANNOTATOR_1_COL = "J"
-ANNOTATOR_2_COL = "K"
-ANNOTATOR_3_COL = "L"
-AGREEMENT_TYPE_COL = "M"
-ADJUDICATION_COL = "N"
-GOLD_LABEL_COL = "O"
-
-VALID_LABELS = {"NEG", "NEU", "POS"}
+# Columnas localizadas por encabezado (ver annotation_schema.VARIANTES).
+# Las etiquetas llegan ya limpias (POS / NEU / NEG o None) y Agreement_Type
+# en minúsculas. La columna Gold Human Label se reutiliza si ya existe;
+# si no, se añade al final de la hoja.
+INPUT_ROLES = [
+    "annotator_1",
+    "annotator_2",
+    "annotator_3",
+    "agreement_type",
+    "adjudication",
+]
 
 
 # =========================
 # FUNCIONES AUXILIARES
 # =========================
 
-def clean_label(value):
-    """
-    Limpia una etiqueta POS / NEU / NEG.
-    """
-    if value is None:
-        return None
-    value = str(value).strip().upper()
-    return value if value in VALID_LABELS else None
-
-
-def clean_agreement_type(value):
-    """
-    Limpia el valor de Agreement_Type.
-    """
-    if value is None:
-        return None
-    return str(value).strip().lower()
-
-
 def majority_label(labels):
     """
     Devuelve la etiqueta mayoritaria entre tres anotaciones.
@@ -86,7 +72,7 @@ def create_gold_label(ann1, ann2, ann3, agreement_type, adjudication):
         return majority_label(labels)
 
     if agreement_type == "no_majority":
-        # Se usa la adjudicación adicional de la columna N.
+        # Se usa la adjudicación adicional (Human Annotation 4 & 5).
         return adjudication
 
     return None
@@ -103,12 +89,19 @@ if SHEET_NAME is None:
 else:
     ws = wb[SHEET_NAME]
 
+columns = read_columns(
+    ws,
+    INPUT_ROLES,
+    first_data_row=FIRST_DATA_ROW,
+    last_data_row=LAST_DATA_ROW
+)
+
 
 # =========================
 # CREACIÓN DE GOLD HUMAN LABEL
 # =========================
 
-ws[f"{GOLD_LABEL_COL}1"] = "Gold Human Label"
+gold_label_col = find_or_add_column(ws, "gold_label", "Gold Human Label")
 
 summary_counts = {
     "full_agreement": 0,
@@ -119,14 +112,14 @@ summary_counts = {
 
 problem_rows = []
 
-for row in range(FIRST_DATA_ROW, LAST_DATA_ROW + 1):
-
-    ann1 = clean_label(ws[f"{ANNOTATOR_1_COL}{row}"].value)
-    ann2 = clean_label(ws[f"{ANNOTATOR_2_COL}{row}"].value)
-    ann3 = clean_label(ws[f"{ANNOTATOR_3_COL}{row}"].value)
-
-    agreement_type = clean_agreement_type(ws[f"{AGREEMENT_TYPE_COL}{row}"].value)
-    adjudication = clean_label(ws[f"{ADJUDICATION_COL}{row}"].value)
+for row, ann1, ann2, ann3, agreement_type, adjudication in zip(
+    columns.excel_row,
+    columns["annotator_1"],
+    columns["annotator_2"],
+    columns["annotator_3"],
+    columns["agreement_type"],
+    columns["adjudication"]
+):
 
     gold_label = create_gold_label(
         ann1=ann1,
@@ -139,7 +132,7 @@ for row in range(FIRST_DATA_ROW, LAST_DATA_ROW + 1):
     if gold_label is None:
         summary_counts["invalid_or_missing"] += 1
         problem_rows.append({
-            "excel_row": row,
+            "excel_row": int(row),
             "human_annotation_1": ann1,
             "human_annotation_2": ann2,
             "human_annotation_3": ann3,
@@ -149,7 +142,7 @@ for row in range(FIRST_DATA_ROW, LAST_DATA_ROW + 1):
     else:
         summary_counts[agreement_type] += 1
 
-    ws[f"{GOLD_LABEL_COL}{row}"] = gold_label
+    ws.cell(row=int(row), column=gold_label_col).value = gold_label
 
 
 # =========================
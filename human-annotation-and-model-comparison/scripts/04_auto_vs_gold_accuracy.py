@@ -1,7 +1,8 @@
 from pathlib import Path
-from openpyxl import load_workbook
 import csv
 
+from annotation_loader import load_columns
+
 
 # =========================
 # CONFIGURACIÓN
@@ -17,31 +18,15 @@ SHEET_NAME = None  # None = usa la hoja activa
 FIRST_DATA_ROW = 2
 LAST_DATA_ROW = 960
 
-AUTO_LABEL_COL = "I"
-GOLD_LABEL_COL = "O"
-
-VALID_LABELS = {"NEG", "NEU", "POS"}
+# Columnas localizadas por encabezado (ver annotation_schema.VARIANTES):
+# auto_label y Gold Human Label, ya limpias (POS / NEU / NEG o None).
+INPUT_ROLES = ["auto_label", "gold_label"]
 
 
 # =========================
 # FUNCIONES
 # =========================
 
-def clean_label(value):
-    """
-    Limpia etiquetas POS / NEU / NEG.
-    """
-    if value is None:
-        return None
-
-    value = str(value).strip().upper()
-
-    if value in VALID_LABELS:
-        return value
-
-    return None
-
-
 def percentage(count, total):
     return (count / total) * 100 if total > 0 else 0
 
@@ -50,12 +35,13 @@ def percentage(count, total):
 # LECTURA DEL EXCEL
 # =========================
 
-wb = load_workbook(INPUT_FILE, data_only=True)
-
-if SHEET_NAME is None:
-    ws = wb.active
-else:
-    ws = wb[SHEET_NAME]
+columns = load_columns(
+    INPUT_FILE,
+    INPUT_ROLES,
+    sheet_name=SHEET_NAME,
+    first_data_row=FIRST_DATA_ROW,
+    last_data_row=LAST_DATA_ROW
+)
 
 
 # =========================
@@ -68,15 +54,16 @@ correct_count = 0
 incorrect_count = 0
 invalid_count = 0
 
-for row in range(FIRST_DATA_ROW, LAST_DATA_ROW + 1):
-
-    auto_label = clean_label(ws[f"{AUTO_LABEL_COL}{row}"].value)
-    gold_label = clean_label(ws[f"{GOLD_LABEL_COL}{row}"].value)
+for row, auto_label, gold_label in zip(
+    columns.excel_row,
+    columns["auto_label"],
+    columns["gold_label"]
+):
 
     if auto_label is None or gold_label is None:
         invalid_count += 1
         case_rows.append({
-            "excel_row": row,
+            "excel_row": int(row),
             "auto_label": auto_label,
             "gold_human_label": gold_label,
             "match": "INVALID_OR_MISSING",
@@ -93,7 +80,7 @@ for row in range(FIRST_DATA_ROW, LAST_DATA_ROW + 1):
         match_value = "FALSE"
 
     case_rows.append({
-        "excel_row": row,
+        "excel_row": int(row),
         "auto_label": auto_label,
         "gold_human_label": gold_label,
         "match": match_value,
@@ -143,7 +130,7 @@ summary_rows = [
 print("ACCURACY: AUTO_LABEL VS GOLD HUMAN LABEL")
 print("========================================")
 print(f"Archivo analizado: {INPUT_FILE}")
-print(f"Hoja analizada: {ws.title}")
+print(f"Hoja analizada: {columns.sheet_title}")
 print(f"Filas analizadas: {FIRST_DATA_ROW}-{LAST_DATA_ROW}")
 print()
 print(f"Casos válidos: {valid_total}")
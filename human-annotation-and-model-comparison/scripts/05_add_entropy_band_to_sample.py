@@ -2,6 +2,8 @@ from pathlib import Path
 from openpyxl import load_workbook
 import csv
 
+from annotation_schema import find_columns, read_columns, find_or_add_column
+
 
 # =========================
 # CONFIGURACIÓN
@@ -17,16 +19,10 @@ SHEET_NAME = None  # None = usa la hoja activa
 FIRST_DATA_ROW = 2
 LAST_DATA_ROW = 960
 
-# Archivo principal
-SAMPLE_WORD_COL = "C"
-OUTPUT_ENTROPY_BAND_COL = "Q"
-
-# Archivo selected_200_adjectives
-# Usamos índices porque es CSV:
-# columna B = índice 1
-# columna I = índice 8
-SELECTED_WORD_INDEX = 1
-SELECTED_ENTROPY_BAND_INDEX = 8
+# Las columnas se localizan por encabezado en ambos archivos
+# (ver annotation_schema.VARIANTES):
+# - muestra: Word; entropy_band se reutiliza si ya existe o se añade al final
+# - selected_200_adjectives: Lexical item y Entropy_band
 
 VALID_ENTROPY_BANDS = {"low", "mid", "high"}
 
@@ -86,16 +82,20 @@ def load_entropy_band_mapping(path):
 
         rows = list(reader)
 
+    indices = find_columns(rows[0], ["word", "entropy_band"])
+    word_index = indices["word"]
+    entropy_band_index = indices["entropy_band"]
+
     # Saltamos la primera fila porque contiene encabezados
     for row_number, row in enumerate(rows[1:], start=2):
 
-        if len(row) <= max(SELECTED_WORD_INDEX, SELECTED_ENTROPY_BAND_INDEX):
+        if len(row) <= max(word_index, entropy_band_index):
             raise ValueError(
                 f"La fila {row_number} de {path} no tiene suficientes columnas: {row}"
             )
 
-        word = normalize_word(row[SELECTED_WORD_INDEX])
-        entropy_band = normalize_entropy_band(row[SELECTED_ENTROPY_BAND_INDEX])
+        word = normalize_word(row[word_index])
+        entropy_band = normalize_entropy_band(row[entropy_band_index])
 
         if not word:
             continue
@@ -103,7 +103,7 @@ def load_entropy_band_mapping(path):
         if entropy_band is None:
             raise ValueError(
                 f"Valor entropy_band no válido en fila {row_number}: "
-                f"{row[SELECTED_ENTROPY_BAND_INDEX]}"
+                f"{row[entropy_band_index]}"
             )
 
         mapping[word] = entropy_band
@@ -133,17 +133,25 @@ else:
 
 
 # =========================
-# AÑADIR ENTROPY_BAND EN COLUMNA Q
+# AÑADIR ENTROPY_BAND
 # =========================
 
-ws[f"{OUTPUT_ENTROPY_BAND_COL}1"] = "entropy_band"
+columns = read_columns(
+    ws,
+    ["word"],
+    first_data_row=FIRST_DATA_ROW,
+    last_data_row=LAST_DATA_ROW
+)
+
+entropy_band_col = find_or_add_column(ws, "entropy_band", "entropy_band")
+entropy_band_letter = ws.cell(row=1, column=entropy_band_col).column_letter
 
 matched_count = 0
 missing_words = []
 
-for row in range(FIRST_DATA_ROW, LAST_DATA_ROW + 1):
+for row, word_raw in zip(columns.excel_row, columns.raw("word")):
 
-    word_raw = ws[f"{SAMPLE_WORD_COL}{row}"].value
+    row = int(row)
     word_key = normalize_word(word_raw)
 
     entropy_band = entropy_band_by_word.get(word_key)
@@ -153,9 +161,9 @@ for row in range(FIRST_DATA_ROW, LAST_DATA_ROW + 1):
             "excel_row": row,
             "word": word_raw,
         })
-        ws[f"{OUTPUT_ENTROPY_BAND_COL}{row}"] = None
+        ws.cell(row=row, column=entropy_band_col).value = None
     else:
-        ws[f"{OUTPUT_ENTROPY_BAND_COL}{row}"] = entropy_band
+        ws.cell(row=row, column=entropy_band_col).value = entropy_band
         matched_count += 1
 
 
@@ -173,7 +181,7 @@ if missing_words:
 
     raise ValueError(
         f"No se encontró entropy_band para {len(missing_words)} filas. "
-        "Revisa que las palabras de la columna C coincidan con las de selected_200_adjectives."
+        f"Revisa que las palabras de la columna {columns.header('word')} coincidan con las de selected_200_adjectives."
     )
 
 
@@ -192,4 +200,4 @@ print(f"Archivo de salida: {OUTPUT_FILE}")
 print(f"Hoja procesada: {ws.title}")
 print(f"Filas procesadas: {FIRST_DATA_ROW}-{LAST_DATA_ROW}")
 print(f"Filas con entropy_band asignado: {matched_count}")
-print(f"Columna creada: {OUTPUT_ENTROPY_BAND_COL} = entropy_band")
\ No newline at end of file
+print(f"Columna creada: {entropy_band_letter} = entropy_band")
\ No newline at end of file
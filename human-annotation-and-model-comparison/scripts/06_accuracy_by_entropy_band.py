@@ -1,7 +1,8 @@
 from pathlib import Path
-from openpyxl import load_workbook
 import csv
 
+from annotation_loader import load_columns
+
 
 # =========================
 # CONFIGURACIÓN
@@ -15,8 +16,9 @@ SHEET_NAME = None  # None = usa la hoja activa
 FIRST_DATA_ROW = 2
 LAST_DATA_ROW = 960
 
-ACCURACY_COL = "P"
-ENTROPY_BAND_COL = "Q"
+# Columnas localizadas por encabezado (ver annotation_schema.VARIANTES):
+# Accuracy (TRUE / FALSE) y entropy_band.
+INPUT_ROLES = ["accuracy", "entropy_band"]
 
 VALID_BANDS = ["low", "mid", "high"]
 
@@ -25,40 +27,6 @@ VALID_BANDS = ["low", "mid", "high"]
 # FUNCIONES
 # =========================
 
-def normalize_entropy_band(value):
-    if value is None:
-        return None
-
-    value = str(value).strip().lower()
-
-    if value in VALID_BANDS:
-        return value
-
-    return None
-
-
-def normalize_accuracy(value):
-    """
-    Convierte TRUE / FALSE a booleano.
-    """
-
-    if value is None:
-        return None
-
-    if isinstance(value, bool):
-        return value
-
-    value = str(value).strip().upper()
-
-    if value == "TRUE":
-        return True
-
-    if value == "FALSE":
-        return False
-
-    return None
-
-
 def percentage(count, total):
     return (count / total) * 100 if total > 0 else 0
 
@@ -67,12 +35,13 @@ def percentage(count, total):
 # LECTURA DEL EXCEL
 # =========================
 
-wb = load_workbook(INPUT_FILE, data_only=True)
-
-if SHEET_NAME is None:
-    ws = wb.active
-else:
-    ws = wb[SHEET_NAME]
+columns = load_columns(
+    INPUT_FILE,
+    INPUT_ROLES,
+    sheet_name=SHEET_NAME,
+    first_data_row=FIRST_DATA_ROW,
+    last_data_row=LAST_DATA_ROW
+)
 
 
 # =========================
@@ -90,16 +59,16 @@ results = {
 
 invalid_rows = []
 
-for row in range(FIRST_DATA_ROW, LAST_DATA_ROW + 1):
+for i, row in enumerate(columns.excel_row):
 
-    accuracy_value = normalize_accuracy(ws[f"{ACCURACY_COL}{row}"].value)
-    entropy_band = normalize_entropy_band(ws[f"{ENTROPY_BAND_COL}{row}"].value)
+    accuracy_value = columns["accuracy"][i]
+    entropy_band = columns["entropy_band"][i]
 
     if accuracy_value is None or entropy_band is None:
         invalid_rows.append({
-            "excel_row": row,
-            "accuracy_value": ws[f"{ACCURACY_COL}{row}"].value,
-            "entropy_band": ws[f"{ENTROPY_BAND_COL}{row}"].value,
+            "excel_row": int(row),
+            "accuracy_value": columns.raw("accuracy")[i],
+            "entropy_band": columns.raw("entropy_band")[i],
         })
         continue
 
@@ -139,7 +108,7 @@ for band in VALID_BANDS:
 print("ACCURACY POR ENTROPY_BAND")
 print("=========================")
 print(f"Archivo analizado: {INPUT_FILE}")
-print(f"Hoja analizada: {ws.title}")
+print(f"Hoja analizada: {columns.sheet_title}")
 print(f"Filas analizadas: {FIRST_DATA_ROW}-{LAST_DATA_ROW}")
 print()
 
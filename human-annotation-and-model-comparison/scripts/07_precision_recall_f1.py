@@ -1,6 +1,8 @@
 from pathlib import Path
-from openpyxl import load_workbook, Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+
+from annotation_loader import load_columns
+from report_writer import ReportWriter
+from metrics_kernel import encode_labels, confusion_counts, metric_rows, confusion_dict
 
 
 # =========================
@@ -15,8 +17,9 @@ SHEET_NAME = None  # None = usa la hoja activa
 FIRST_DATA_ROW = 2
 LAST_DATA_ROW = 960
 
-AUTO_LABEL_COL = "I"
-GOLD_LABEL_COL = "O"
+# Columnas localizadas por encabezado (ver annotation_schema.VARIANTES):
+# auto_label y Gold Human Label, ya limpias (POS / NEU / NEG o None).
+INPUT_ROLES = ["auto_label", "gold_label"]
 
 LABELS = ["NEG", "NEU", "POS"]
 
@@ -25,120 +28,23 @@ LABELS = ["NEG", "NEU", "POS"]
 # FUNCIONES
 # =========================
 
-def clean_label(value):
-    if value is None:
-        return None
-
-    value = str(value).strip().upper()
-
-    if value in LABELS:
-        return value
-
-    return None
-
-
 def safe_divide(numerator, denominator):
     if denominator == 0:
         return 0.0
     return numerator / denominator
 
 
-def compute_metrics_for_label(gold_labels, auto_labels, target_label):
-    """
-    Calcula TP, FP, FN, TN, precision, recall y F1 para una etiqueta.
-    """
-
-    tp = fp = fn = tn = 0
-
-    for gold, auto in zip(gold_labels, auto_labels):
-
-        if gold == target_label and auto == target_label:
-            tp += 1
-        elif gold != target_label and auto == target_label:
-            fp += 1
-        elif gold == target_label and auto != target_label:
-            fn += 1
-        else:
-            tn += 1
-
-    precision = safe_divide(tp, tp + fp)
-    recall = safe_divide(tp, tp + fn)
-
-    if precision + recall == 0:
-        f1 = 0.0
-    else:
-        f1 = 2 * (precision * recall) / (precision + recall)
-
-    return {
-        "label": target_label,
-        "true_positives": tp,
-        "false_positives": fp,
-        "false_negatives": fn,
-        "true_negatives": tn,
-        "gold_support": tp + fn,
-        "auto_predicted": tp + fp,
-        "precision": precision,
-        "recall": recall,
-        "f1": f1,
-    }
-
-
-def build_confusion_matrix(gold_labels, auto_labels):
-    """
-    Matriz de confusión:
-    filas = Gold Human Label
-    columnas = auto_label
-    """
-
-    matrix = {
-        gold_label: {auto_label: 0 for auto_label in LABELS}
-        for gold_label in LABELS
-    }
-
-    for gold, auto in zip(gold_labels, auto_labels):
-        matrix[gold][auto] += 1
-
-    return matrix
-
-
-def style_header(row):
-    for cell in row:
-        cell.font = Font(bold=True)
-        cell.fill = PatternFill("solid", fgColor="D9EAF7")
-        cell.alignment = Alignment(horizontal="center")
-
-
-def apply_basic_style(ws):
-    thin = Side(style="thin", color="CCCCCC")
-    border = Border(left=thin, right=thin, top=thin, bottom=thin)
-
-    for row in ws.iter_rows():
-        for cell in row:
-            cell.border = border
-            cell.alignment = Alignment(vertical="center")
-
-    for column_cells in ws.columns:
-        max_length = 0
-        column_letter = column_cells[0].column_letter
-
-        for cell in column_cells:
-            value = cell.value
-            if value is not None:
-                max_length = max(max_length, len(str(value)))
-
-        ws.column_dimensions[column_letter].width = min(max_length + 3, 28)
-
-
 # =========================
 # LECTURA DEL EXCEL
 # =========================
 
-wb_input = load_workbook(INPUT_FILE, data_only=True)
-
-if SHEET_NAME is None:
-    ws_input = wb_input.active
-else:
-    ws_input = wb_input[SHEET_NAME]
+columns = load_columns(
+    INPUT_FILE,
+    INPUT_ROLES,
+    sheet_name=SHEET_NAME,
+    first_data_row=FIRST_DATA_ROW,
+    last_data_row=LAST_DATA_ROW
+)
 
 
 # =========================
@@ -149,16 +55,16 @@ gold_labels = []
 auto_labels = []
 invalid_rows = []
 
-for row in range(FIRST_DATA_ROW, LAST_DATA_ROW + 1):
+for i, row in enumerate(columns.excel_row):
 
-    auto_label = clean_label(ws_input[f"{AUTO_LABEL_COL}{row}"].value)
-    gold_label = clean_label(ws_input[f"{GOLD_LABEL_COL}{row}"].value)
+    auto_label = columns["auto_label"][i]
+    gold_label = columns["gold_label"][i]
 
     if auto_label is None or gold_label is None:
         invalid_rows.append({
-            "excel_row": row,
-            "auto_label": ws_input[f"{AUTO_LABEL_COL}{row}"].value,
-            "gold_label": ws_input[f"{GOLD_LABEL_COL}{row}"].value,
+            "excel_row": int(row),
+            "auto_label": columns.raw("auto_label")[i],
+            "gold_label": columns.raw("gold_label")[i],
         })
         continue
 
@@ -179,28 +85,30 @@ accuracy = safe_divide(correct_total, valid_total)
 # CALCULAR MÉTRICAS
 # =========================
 
-metrics = [
-    compute_metrics_for_label(gold_labels, auto_labels, label)
-    for label in LABELS
-]
+# Una sola matriz de confusión (filas = Gold Human Label, columnas =
+# auto_label); TP/FP/FN/TN y las métricas por clase salen de ella
+confusion = confusion_counts(
+    encode_labels(gold_labels, LABELS),
+    encode_labels(auto_labels, LABELS),
+    n_labels=len(LABELS)
+)
+
+metrics = metric_rows(confusion, LABELS)
 
 macro_precision = sum(item["precision"] for item in metrics) / len(LABELS)
 macro_recall = sum(item["recall"] for item in metrics) / len(LABELS)
 macro_f1 = sum(item["f1"] for item in metrics) / len(LABELS)
 
-confusion_matrix = build_confusion_matrix(gold_labels, auto_labels)
+confusion_matrix = confusion_dict(confusion, LABELS)
 
 
 # =========================
 # CREAR EXCEL DE SALIDA
 # =========================
 
-wb_output = Workbook()
+report = ReportWriter()
 
 # Hoja 1: métricas por clase
-ws_metrics = wb_output.active
-ws_metrics.title = "per_label_metrics"
-
 headers = [
     "label",
     "gold_support",
@@ -214,11 +122,10 @@ headers = [
     "f1",
 ]
 
-ws_metrics.append(headers)
-style_header(ws_metrics[1])
+metric_sheet_rows = [headers]
 
 for item in metrics:
-    ws_metrics.append([
+    metric_sheet_rows.append([
         item["label"],
         item["gold_support"],
         item["auto_predicted"],
@@ -231,8 +138,8 @@ for item in metrics:
         item["f1"],
     ])
 
-ws_metrics.append([])
-ws_metrics.append([
+metric_sheet_rows.append([])
+metric_sheet_rows.append([
     "MACRO_AVERAGE",
     "",
     "",
@@ -245,33 +152,28 @@ ws_metrics.append([
     macro_f1,
 ])
 
-for row in range(2, ws_metrics.max_row + 1):
-    for col in ["H", "I", "J"]:
-        ws_metrics[f"{col}{row}"].number_format = "0.0000"
-
-apply_basic_style(ws_metrics)
+report.add_sheet(
+    "per_label_metrics",
+    metric_sheet_rows,
+    number_formats={"H": "0.0000", "I": "0.0000", "J": "0.0000"}
+)
 
 
 # Hoja 2: matriz de confusión
-ws_confusion = wb_output.create_sheet("confusion_matrix")
-
-ws_confusion.append(["Gold \\ Auto"] + LABELS)
-style_header(ws_confusion[1])
+confusion_sheet_rows = [["Gold \\ Auto"] + LABELS]
 
 for gold_label in LABELS:
-    ws_confusion.append(
+    confusion_sheet_rows.append(
         [gold_label] + [confusion_matrix[gold_label][auto_label] for auto_label in LABELS]
     )
 
-apply_basic_style(ws_confusion)
+report.add_sheet("confusion_matrix", confusion_sheet_rows)
 
 
 # Hoja 3: resumen global
-ws_summary = wb_output.create_sheet("summary")
-
 summary_rows = [
     ["input_file", str(INPUT_FILE)],
-    ["input_sheet", ws_input.title],
+    ["input_sheet", columns.sheet_title],
     ["rows_checked", LAST_DATA_ROW - FIRST_DATA_ROW + 1],
     ["valid_cases", valid_total],
     ["invalid_or_missing_cases", len(invalid_rows)],
@@ -283,39 +185,33 @@ summary_rows = [
     ["macro_f1", macro_f1],
 ]
 
-for row in summary_rows:
-    ws_summary.append(row)
-
-ws_summary["A1"].font = Font(bold=True)
-ws_summary["B1"].font = Font(bold=True)
-
-for row in range(8, 12):
-    ws_summary[f"B{row}"].number_format = "0.0000"
-
-apply_basic_style(ws_summary)
+report.add_sheet(
+    "summary",
+    summary_rows,
+    header_rows=[],
+    bold_cells=["A1", "B1"],
+    number_formats={f"B{row}": "0.0000" for row in range(8, 12)}
+)
 
 
 # Hoja 4: filas inválidas, si las hay
-ws_invalid = wb_output.create_sheet("invalid_rows")
-
-ws_invalid.append(["excel_row", "auto_label_raw", "gold_label_raw"])
-style_header(ws_invalid[1])
+invalid_sheet_rows = [["excel_row", "auto_label_raw", "gold_label_raw"]]
 
 for item in invalid_rows:
-    ws_invalid.append([
+    invalid_sheet_rows.append([
         item["excel_row"],
         item["auto_label"],
         item["gold_label"],
     ])
 
-apply_basic_style(ws_invalid)
+report.add_sheet("invalid_rows", invalid_sheet_rows)
 
 
 # =========================
 # GUARDAR EXCEL
 # =========================
 
-wb_output.save(OUTPUT_FILE)
+report.save(OUTPUT_FILE)
 
 
 # =========================
@@ -325,7 +221,7 @@ wb_output.save(OUTPUT_FILE)
 print("PRECISION, RECALL, F1 Y MACRO-F1")
 print("================================")
 print(f"Archivo analizado: {INPUT_FILE}")
-print(f"Hoja analizada: {ws_input.title}")
+print(f"Hoja analizada: {columns.sheet_title}")
 print(f"Filas analizadas: {FIRST_DATA_ROW}-{LAST_DATA_ROW}")
 print(f"Casos válidos: {valid_total}")
 print(f"Casos correctos: {correct_total}")
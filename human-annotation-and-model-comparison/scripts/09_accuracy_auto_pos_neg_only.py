@@ -1,5 +1,6 @@
 from pathlib import Path
-from openpyxl import load_workbook
+
+from annotation_loader import load_columns
 
 
 # =========================
@@ -13,10 +14,9 @@ SHEET_NAME = None  # None = usa la hoja activa
 FIRST_DATA_ROW = 2
 LAST_DATA_ROW = 960
 
-AUTO_LABEL_COL = "I"
-GOLD_LABEL_COL = "O"
-
-VALID_LABELS = {"NEG", "NEU", "POS"}
+# Columnas localizadas por encabezado (ver annotation_schema.VARIANTES):
+# auto_label y Gold Human Label, ya limpias (POS / NEU / NEG o None).
+INPUT_ROLES = ["auto_label", "gold_label"]
 EVALUATED_AUTO_LABELS = {"NEG", "POS"}
 
 
@@ -24,18 +24,6 @@ EVALUATED_AUTO_LABELS = {"NEG", "POS"}
 # FUNCIONES
 # =========================
 
-def clean_label(value):
-    if value is None:
-        return None
-
-    value = str(value).strip().upper()
-
-    if value in VALID_LABELS:
-        return value
-
-    return None
-
-
 def percentage(count, total):
     return (count / total) * 100 if total > 0 else 0
 
@@ -44,12 +32,13 @@ def percentage(count, total):
 # LECTURA DEL EXCEL
 # =========================
 
-wb = load_workbook(INPUT_FILE, data_only=True)
-
-if SHEET_NAME is None:
-    ws = wb.active
-else:
-    ws = wb[SHEET_NAME]
+columns = load_columns(
+    INPUT_FILE,
+    INPUT_ROLES,
+    sheet_name=SHEET_NAME,
+    first_data_row=FIRST_DATA_ROW,
+    last_data_row=LAST_DATA_ROW
+)
 
 
 # =========================
@@ -65,13 +54,10 @@ invalid_or_missing_cases = 0
 correct_cases = 0
 incorrect_cases = 0
 
-for row in range(FIRST_DATA_ROW, LAST_DATA_ROW + 1):
+for auto_label, gold_label in zip(columns["auto_label"], columns["gold_label"]):
 
     total_rows_checked += 1
 
-    auto_label = clean_label(ws[f"{AUTO_LABEL_COL}{row}"].value)
-    gold_label = clean_label(ws[f"{GOLD_LABEL_COL}{row}"].value)
-
     if auto_label is None or gold_label is None:
         invalid_or_missing_cases += 1
         continue
@@ -101,7 +87,7 @@ accuracy = percentage(correct_cases, included_cases)
 print("ACCURACY AUTO_LABEL POS/NEG ONLY")
 print("================================")
 print(f"Archivo analizado: {INPUT_FILE}")
-print(f"Hoja analizada: {ws.title}")
+print(f"Hoja analizada: {columns.sheet_title}")
 print(f"Filas analizadas: {FIRST_DATA_ROW}-{LAST_DATA_ROW}")
 print()
 print(f"Total de filas revisadas: {total_rows_checked}")
@@ -0,0 +1,464 @@
+"""
+Acuerdo entre anotadores corregido por azar.
+
+01_human_raw_agreement.py solo clasifica cada oración como acuerdo total /
+parcial / sin mayoría. Este script calcula, para los anotadores de
+ANNOTATOR_ROLES (Human Annotation 1-3 en la muestra):
+
+- kappa de Fleiss y alfa de Krippendorff (nominal), con todos los
+  anotadores a la vez;
+- kappa de Cohen para cada par de anotadores;
+- intervalos bootstrap (percentil) de todos ellos, estratificados por
+  entropy_band y por conglomerados de palabra, como en significance.py;
+- los mismos estadísticos por entropy_band y por palabra (ítem léxico).
+
+Todo sale de la matriz unidades x categorías (cuántos anotadores eligieron
+cada etiqueta en cada oración), que se obtiene con un solo bincount. Fleiss
+y Krippendorff son funciones de sumas por unidad (unidades con al menos dos
+anotaciones, pares coincidentes y totales por categoría) y Cohen de la
+matriz de confusión de cada par, así que cada estimación (general, por
+banda, por palabra o por réplica bootstrap) es una suma de esas columnas:
+las réplicas son un producto pesos x sumas por conglomerado.
+
+Las anotaciones vacías o inválidas cuentan como ausentes: Fleiss usa la
+versión con número variable de anotadores por unidad y Krippendorff las
+unidades con al menos dos anotaciones. Para rondas con muchos anotadores
+basta con añadir sus columnas a ANNOTATOR_ROLES (papel de
+annotation_schema o encabezado literal).
+"""
+
+from pathlib import Path
+from itertools import combinations
+import time
+
+import numpy as np
+
+from annotation_loader import load_columns
+from annotation_schema import normalize_header
+from metrics_kernel import encode_labels, encode_groups, confusion_counts
+from significance import (
+    bootstrap_weights,
+    run_chunks,
+    chunk_sizes,
+    chunk_seeds,
+    percentile_interval,
+    write_csv,
+)
+
+
+# =========================
+# CONFIGURACIÓN
+# =========================
+
+INPUT_FILE = Path("sample_1000_sentences_for_manual_annotation_randomized_auto_label_gold_entropy_band.xlsx")
+
+OUTPUT_SUMMARY_CSV = Path("human_agreement_summary.csv")
+OUTPUT_ITEMS_CSV = Path("human_agreement_by_item.csv")
+
+SHEET_NAME = None  # None = usa la hoja activa
+
+FIRST_DATA_ROW = 2
+LAST_DATA_ROW = 960
+
+ANNOTATOR_ROLES = ["annotator_1", "annotator_2", "annotator_3"]
+
+LABELS = ["NEG", "NEU", "POS"]
+ENTROPY_BANDS = ["low", "mid", "high"]
+
+# Kappa de Cohen por pares (con muchos anotadores hay n * (n - 1) / 2 pares).
+# Cada par añade a la matriz por unidad un bloque unidades x 9 (K x K
+# celdas de su matriz de confusión) en float64: con 50.000 oraciones y 20
+# anotadores son 190 pares y ~700 MB, así que en rondas grandes de
+# anotación colectiva hay que ponerlo a False
+PAIRWISE_COHEN = True
+
+N_BOOTSTRAP = 10_000
+CONFIDENCE = 0.95
+
+# Conglomerados del bootstrap: "word" = palabra, None = cada oración
+CLUSTER_ROLE = "word"
+
+RANDOM_SEED = 20260423
+
+# Réplicas por bloque y límite de la matriz de pesos de un bloque
+# (réplicas x conglomerados), para que con decenas de miles de
+# conglomerados los bloques se hagan más pequeños
+CHUNK_SIZE = 1_000
+MAX_WEIGHT_CELLS = 20_000_000
+
+# Procesos para los bloques (1 = sin procesos, None = todos los núcleos)
+N_JOBS = 1
+
+
+# =========================
+# MATRIZ UNIDADES X CATEGORÍAS
+# =========================
+
+def rating_counts(codes, n_categories):
+    """
+    codes: (unidades, anotadores) con el índice de la etiqueta o -1 si falta.
+    Devuelve (unidades, categorías): anotadores que eligieron cada etiqueta.
+    """
+    codes = np.asarray(codes, dtype=np.int64)
+    n_units = codes.shape[0]
+
+    valid = codes >= 0
+    keys = (np.arange(n_units)[:, None] * n_categories + codes)[valid]
+
+    counts = np.bincount(keys, minlength=n_units * n_categories)
+    return counts.reshape(n_units, n_categories)
+
+
+def unit_terms(counts):
+    """
+    Términos por unidad de los que salen Fleiss y Krippendorff:
+    (unidades, 3 + categorías) con [unidad emparejable, proporción de pares
+    coincidentes, pares coincidentes / (m - 1), anotaciones por categoría].
+    Las unidades con menos de dos anotaciones valen 0 en todas las columnas.
+    """
+    m = counts.sum(axis=1)
+    pairable = m >= 2
+
+    same_pairs = (counts * (counts - 1)).sum(axis=1)
+
+    terms = np.zeros((len(counts), 3 + counts.shape[1]), dtype=np.float64)
+    terms[pairable, 0] = 1
+    terms[pairable, 1] = same_pairs[pairable] / (m[pairable] * (m[pairable] - 1))
+    terms[pairable, 2] = same_pairs[pairable] / (m[pairable] - 1)
+    terms[pairable, 3:] = counts[pairable]
+
+    return terms
+
+
+def group_sums(values, group_codes, n_groups):
+    """
+    Suma de las filas de values (unidades, columnas) por grupo; las
+    unidades con grupo -1 no se cuentan. Devuelve (grupos, columnas).
+    """
+    valid = group_codes >= 0
+    n_columns = values.shape[1]
+
+    keys = (group_codes[valid][:, None] * n_columns + np.arange(n_columns)).ravel()
+    sums = np.bincount(keys, weights=values[valid].ravel(), minlength=n_groups * n_columns)
+
+    return sums.reshape(n_groups, n_columns)
+
+
+# =========================
+# ESTADÍSTICOS
+# =========================
+
+def ratio_or_nan(numerator, denominator):
+    """
+    numerator / denominator elemento a elemento, NaN donde el denominador es
+    0 (p. ej. kappa de un ítem en el que todos eligen la misma etiqueta).
+    """
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+
+    return np.divide(
+        numerator,
+        denominator,
+        out=np.full(np.broadcast(numerator, denominator).shape, np.nan),
+        where=denominator != 0
+    )
+
+
+def agreement_from_terms(sums):
+    """
+    Fleiss y Krippendorff a partir de sumas de unit_terms (..., 3 + K).
+    """
+    units = sums[..., 0]
+    pair_share = sums[..., 1]
+    coincidences = sums[..., 2]
+    category_totals = sums[..., 3:]
+
+    n = category_totals.sum(axis=-1)
+
+    observed = ratio_or_nan(pair_share, units)
+    expected = (ratio_or_nan(category_totals, n[..., None]) ** 2).sum(axis=-1)
+
+    fleiss_kappa = ratio_or_nan(observed - expected, 1 - expected)
+
+    # Alfa nominal: 1 - (n - 1) * (n - suma de la diagonal de la matriz de
+    # coincidencias) / (n^2 - suma de n_c^2)
+    krippendorff_alpha = 1 - ratio_or_nan(
+        (n - 1) * (n - coincidences),
+        n ** 2 - (category_totals ** 2).sum(axis=-1)
+    )
+
+    return {
+        "n_units": units,
+        "observed_agreement": observed,
+        "expected_agreement": expected,
+        "fleiss_kappa": fleiss_kappa,
+        "krippendorff_alpha": krippendorff_alpha,
+    }
+
+
+def cohen_kappa(confusion):
+    """
+    Kappa de Cohen de matrices de confusión (..., K, K) entre dos anotadores.
+    """
+    confusion = np.asarray(confusion, dtype=np.float64)
+
+    total = confusion.sum(axis=(-2, -1))
+    observed = ratio_or_nan(np.trace(confusion, axis1=-2, axis2=-1), total)
+    expected = ratio_or_nan(
+        (confusion.sum(axis=-1) * confusion.sum(axis=-2)).sum(axis=-1),
+        total ** 2
+    )
+
+    return total, ratio_or_nan(observed - expected, 1 - expected)
+
+
+def statistics_from_sums(sums, n_labels, pairs):
+    """
+    Todos los estadísticos a partir de sumas (..., columnas): primero los
+    términos de unit_terms y después K * K celdas por cada par de Cohen.
+    Devuelve {(estadístico, anotadores): (n_unidades, valor)}.
+    """
+    n_terms = 3 + n_labels
+    group = agreement_from_terms(sums[..., :n_terms])
+
+    results = {
+        (statistic, "all"): (group["n_units"], group[statistic])
+        for statistic in ["observed_agreement", "fleiss_kappa", "krippendorff_alpha"]
+    }
+
+    for p, pair in enumerate(pairs):
+        start = n_terms + p * n_labels * n_labels
+        cells = sums[..., start:start + n_labels * n_labels]
+        total, kappa = cohen_kappa(cells.reshape(cells.shape[:-1] + (n_labels, n_labels)))
+        results[("cohen_kappa", pair)] = (total, kappa)
+
+    return results
+
+
+# =========================
+# BOOTSTRAP
+# =========================
+
+def bootstrap_chunk(seed, n_replicates, cluster_strata, cluster_sums, scope_masks):
+    """
+    Un bloque de réplicas: pesos (réplicas, conglomerados) x sumas por
+    conglomerado. Devuelve {ámbito: sumas (réplicas, columnas)}.
+    """
+    rng = np.random.default_rng(seed)
+    weights = bootstrap_weights(cluster_strata, n_replicates, rng)
+
+    return {
+        scope: weights[:, mask] @ cluster_sums[mask]
+        for scope, mask in scope_masks.items()
+    }
+
+
+def bootstrap_sums(unit_columns, band_codes, cluster_codes, n_replicates=N_BOOTSTRAP, seed=RANDOM_SEED, n_jobs=N_JOBS):
+    """
+    Sumas por réplica de unit_columns, con réplicas estratificadas por banda
+    y por conglomerados. Las unidades sin entropy_band válida forman su
+    propio estrato: entran en "overall" (como en la estimación) pero en
+    ninguna banda. Devuelve {ámbito: (réplicas, columnas)}.
+    """
+    # Conglomerado = (estrato, palabra): cada conglomerado cae en un solo estrato
+    strata = np.where(band_codes >= 0, band_codes, len(ENTROPY_BANDS))
+    n_cluster_codes = int(cluster_codes.max()) + 1
+
+    cluster_keys, unit_cluster = np.unique(
+        strata * n_cluster_codes + cluster_codes,
+        return_inverse=True
+    )
+    unit_cluster = unit_cluster.reshape(-1).astype(np.int64)
+
+    n_clusters = len(cluster_keys)
+    cluster_strata = cluster_keys // n_cluster_codes
+    cluster_sums = group_sums(unit_columns, unit_cluster, n_clusters)
+
+    scope_masks = {"overall": np.ones(n_clusters, dtype=bool)}
+    for band_index, band in enumerate(ENTROPY_BANDS):
+        scope_masks[band] = cluster_strata == band_index
+
+    chunk_size = max(1, min(CHUNK_SIZE, MAX_WEIGHT_CELLS // n_clusters))
+    sizes = chunk_sizes(n_replicates, chunk_size)
+    seeds = chunk_seeds(seed, len(sizes))
+
+    chunks = run_chunks(
+        bootstrap_chunk,
+        [(s, size, cluster_strata, cluster_sums, scope_masks) for s, size in zip(seeds, sizes)],
+        n_jobs=n_jobs
+    )
+
+    return {
+        scope: np.concatenate([chunk[scope] for chunk in chunks])
+        for scope in scope_masks
+    }
+
+
+# =========================
+# TIPOS DE ACUERDO
+# =========================
+
+def agreement_types(counts):
+    """
+    Tipo de acuerdo de cada unidad con al menos dos anotaciones:
+    full_agreement (todos coinciden), partial_agreement (una etiqueta tiene
+    mayoría absoluta) o no_majority; "" si hay menos de dos anotaciones.
+    Con tres anotadores equivale a classify_agreement() de 01.
+    """
+    m = counts.sum(axis=1)
+    top = counts.max(axis=1)
+
+    return np.select(
+        [m < 2, top == m, 2 * top > m],
+        ["", "full_agreement", "partial_agreement"],
+        default="no_majority"
+    )
+
+
+# =========================
+# EJECUCIÓN
+# =========================
+
+def main():
+    start = time.perf_counter()
+
+    columns = load_columns(
+        INPUT_FILE,
+        ANNOTATOR_ROLES + ["entropy_band", "word"],
+        sheet_name=SHEET_NAME,
+        first_data_row=FIRST_DATA_ROW,
+        last_data_row=LAST_DATA_ROW
+    )
+
+    n_labels = len(LABELS)
+
+    codes = np.column_stack([encode_labels(columns[role], LABELS) for role in ANNOTATOR_ROLES])
+    band_codes = encode_labels(columns["entropy_band"], ENTROPY_BANDS)
+    word_codes, words = encode_groups([normalize_header(word) for word in columns.raw("word")])
+
+    counts = rating_counts(codes, n_labels)
+
+    # Columnas por unidad: términos de Fleiss / Krippendorff y, si se
+    # pide, la celda de la matriz de confusión de cada par de anotadores
+    unit_blocks = [unit_terms(counts)]
+    pairs = []
+
+    if PAIRWISE_COHEN:
+        units = np.arange(len(codes))
+
+        for a, b in combinations(range(len(ANNOTATOR_ROLES)), 2):
+            cells = confusion_counts(
+                codes[:, a],
+                codes[:, b],
+                n_labels,
+                group_codes=units,
+                n_groups=len(units)
+            ).reshape(len(units), n_labels * n_labels)
+
+            unit_blocks.append(cells)
+            pairs.append(f"{ANNOTATOR_ROLES[a]}-{ANNOTATOR_ROLES[b]}")
+
+    unit_columns = np.hstack(unit_blocks).astype(np.float64)
+
+    # Estimaciones: general y por banda
+    scopes = ["overall"] + ENTROPY_BANDS
+    scope_sums = np.vstack([
+        unit_columns.sum(axis=0),
+        group_sums(unit_columns, band_codes, len(ENTROPY_BANDS)),
+    ])
+    estimates = statistics_from_sums(scope_sums, n_labels, pairs)
+
+    # Réplicas bootstrap
+    if CLUSTER_ROLE is None:
+        cluster_codes = np.arange(len(codes))
+    else:
+        cluster_codes = word_codes
+
+    replicate_sums = bootstrap_sums(unit_columns, band_codes, cluster_codes)
+    replicates = {
+        scope: statistics_from_sums(replicate_sums[scope], n_labels, pairs)
+        for scope in scopes
+    }
+
+    summary_rows = []
+
+    for scope_index, scope in enumerate(scopes):
+        for key, (n_units, estimate) in estimates.items():
+            statistic, annotators = key
+            values = replicates[scope][key][1]
+            values = values[~np.isnan(values)]
+
+            low, high = percentile_interval(values) if len(values) else (np.nan, np.nan)
+
+            summary_rows.append({
+                "scope": scope,
+                "statistic": statistic,
+                "annotators": annotators,
+                "n_units": int(n_units[scope_index]),
+                "estimate": float(estimate[scope_index]),
+                "ci_low": float(low),
+                "ci_high": float(high),
+                "bootstrap_se": float(np.std(values, ddof=1)) if len(values) > 1 else np.nan,
+            })
+
+    # Desglose por palabra (una pasada agrupada sobre las unidades)
+    word_sums = group_sums(unit_columns[:, :3 + n_labels], word_codes, len(words))
+    word_statistics = agreement_from_terms(word_sums)
+
+    types = agreement_types(counts)
+    type_counts = {
+        agreement_type: np.bincount(word_codes[types == agreement_type], minlength=len(words))
+        for agreement_type in ["full_agreement", "partial_agreement", "no_majority"]
+    }
+
+    sentences_per_word = np.bincount(word_codes, minlength=len(words))
+    band_by_word = {}
+    for word_code, band in zip(word_codes, columns["entropy_band"]):
+        band_by_word.setdefault(word_code, set()).add(band)
+
+    item_rows = []
+
+    for w, word in enumerate(words):
+        bands = band_by_word.get(w, set()) - {None}
+
+        item_rows.append({
+            "word": word,
+            "entropy_band": bands.pop() if len(bands) == 1 else ", ".join(sorted(bands)),
+            "n_sentences": int(sentences_per_word[w]),
+            "full_agreement": int(type_counts["full_agreement"][w]),
+            "partial_agreement": int(type_counts["partial_agreement"][w]),
+            "no_majority": int(type_counts["no_majority"][w]),
+            "observed_agreement": float(word_statistics["observed_agreement"][w]),
+            "expected_agreement": float(word_statistics["expected_agreement"][w]),
+            "fleiss_kappa": float(word_statistics["fleiss_kappa"][w]),
+            "krippendorff_alpha": float(word_statistics["krippendorff_alpha"][w]),
+        })
+
+    write_csv(OUTPUT_SUMMARY_CSV, list(summary_rows[0]), summary_rows)
+    write_csv(OUTPUT_ITEMS_CSV, list(item_rows[0]), item_rows)
+
+    print("ACUERDO ENTRE ANOTADORES CORREGIDO POR AZAR")
+    print("===========================================")
+    print(f"Archivo analizado: {INPUT_FILE}")
+    print(f"Hoja analizada: {columns.sheet_title}")
+    print(f"Filas analizadas: {FIRST_DATA_ROW}-{LAST_DATA_ROW}")
+    print(f"Anotadores: {', '.join(ANNOTATOR_ROLES)}")
+    print(f"Réplicas bootstrap: {N_BOOTSTRAP} (estratos: entropy_band; conglomerados: {CLUSTER_ROLE or 'oración'})")
+    print()
+
+    for item in summary_rows:
+        if item["statistic"] == "observed_agreement":
+            continue
+
+        print(
+            f"{item['scope']} - {item['statistic']} ({item['annotators']}): "
+            f"{item['estimate']:.4f} [{item['ci_low']:.4f}, {item['ci_high']:.4f}]"
+        )
+
+    print()
+    print(f"Tiempo total: {time.perf_counter() - start:.1f} s")
+    print(f"Archivos creados: {OUTPUT_SUMMARY_CSV}, {OUTPUT_ITEMS_CSV}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,388 @@
+"""
+Caché en Parquet de los Excel de anotación.
+
+La primera vez que se lee un Excel, sus valores (todas las columnas, filas
+de datos a partir de la 2) se guardan en .annotation_cache/, junto al
+archivo de origen. Las lecturas siguientes cargan el Parquet en lugar de
+volver a analizar el XLSX, que es lo que domina el tiempo de cada script
+de métricas.
+
+La caché se invalida con el archivo de origen:
+- si coinciden mtime y tamaño, se usa directamente;
+- si no, se calcula el SHA-256 del archivo: si coincide con el guardado (el
+  archivo solo se ha tocado o copiado) se actualiza el mtime y se usa; si
+  no, se vuelve a generar.
+
+pyarrow es opcional: si no está instalado, cached_sheet_meta() devuelve None
+y annotation_loader lee el XLSX directamente.
+
+Cada columna del Excel se guarda como cinco columnas Parquet (tipo de valor,
+float, entero, fecha y texto), de modo que los valores se recuperan con el
+mismo tipo que devuelve openpyxl (texto, float, int, bool, datetime, date,
+time, timedelta o vacío) aunque una columna mezcle tipos. Los enteros van en
+una columna int64, sin pasar por float64 (que pierde precisión por encima de
+2**53); un entero fuera del rango de int64, que Excel no puede guardar como
+número, se guarda como float.
+"""
+
+from pathlib import Path
+import datetime
+import hashlib
+import json
+import os
+
+import numpy as np
+from openpyxl import load_workbook
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+# =========================
+# CONFIGURACIÓN
+# =========================
+
+USE_CACHE = True
+
+CACHE_DIR_NAME = ".annotation_cache"
+
+CACHE_FORMAT_VERSION = 2
+
+# Filas del Excel que se convierten y escriben de una vez (grupo de filas
+# del Parquet). La conversión no necesita tener el Excel entero en memoria.
+BLOCK_SIZE = 50_000
+
+KIND_NONE = 0
+KIND_STR = 1
+KIND_FLOAT = 2
+KIND_INT = 3
+KIND_BOOL = 4
+KIND_DATETIME = 5
+KIND_DATE = 6
+KIND_TIME = 7
+KIND_TIMEDELTA = 8
+
+INT64_MIN = -(2 ** 63)
+INT64_MAX = 2 ** 63 - 1
+
+COLUMN_PARTS = ("kind", "num", "int", "dt", "str")
+
+
+# =========================
+# FUNCIONES AUXILIARES
+# =========================
+
+def cache_available():
+    return USE_CACHE and pq is not None
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+
+    with open(path, mode="rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def cache_paths(path, sheet_name=None):
+    path = Path(path)
+    cache_dir = path.parent / CACHE_DIR_NAME
+    stem = f"{path.name}.{sheet_name or 'active'}"
+    return cache_dir / f"{stem}.parquet", cache_dir / f"{stem}.json"
+
+
+def temporary_path(path):
+    """
+    Archivo temporal junto a path, distinto en cada proceso: varios scripts
+    pueden crear a la vez la caché del mismo Excel (pipeline.py ejecuta
+    etapas en paralelo).
+    """
+    return path.with_name(f"{path.name}.{os.getpid()}.tmp")
+
+
+def write_json_atomic(path, data):
+    tmp_path = temporary_path(path)
+
+    with open(tmp_path, mode="w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+    os.replace(tmp_path, path)
+
+
+# =========================
+# CODIFICACIÓN DE VALORES
+# =========================
+
+def time_to_microseconds(value):
+    return ((value.hour * 60 + value.minute) * 60 + value.second) * 1_000_000 + value.microsecond
+
+
+def microseconds_to_time(value):
+    seconds, microsecond = divmod(value, 1_000_000)
+    minutes, second = divmod(seconds, 60)
+    hour, minute = divmod(minutes, 60)
+    return datetime.time(hour, minute, second, microsecond)
+
+
+def encode_value(value):
+    """
+    Devuelve (tipo, float, entero, fecha, texto) para un valor de celda; solo
+    se rellena el campo que corresponde al tipo. time y timedelta se guardan
+    como microsegundos en el campo entero.
+    """
+    if value is None:
+        return KIND_NONE, None, None, None, None
+
+    if isinstance(value, bool):
+        return KIND_BOOL, None, int(value), None, None
+
+    if isinstance(value, int):
+        if INT64_MIN <= value <= INT64_MAX:
+            return KIND_INT, None, value, None, None
+        return KIND_FLOAT, float(value), None, None, None
+
+    if isinstance(value, float):
+        return KIND_FLOAT, value, None, None, None
+
+    # datetime es subclase de date: se comprueba antes
+    if isinstance(value, datetime.datetime):
+        return KIND_DATETIME, None, None, value, None
+
+    if isinstance(value, datetime.date):
+        return KIND_DATE, None, None, datetime.datetime.combine(value, datetime.time()), None
+
+    if isinstance(value, datetime.time):
+        return KIND_TIME, None, time_to_microseconds(value), None, None
+
+    if isinstance(value, datetime.timedelta):
+        return KIND_TIMEDELTA, None, value // datetime.timedelta(microseconds=1), None, None
+
+    return KIND_STR, None, None, None, str(value)
+
+
+def encode_block(rows, n_columns):
+    arrays = {}
+
+    for index in range(n_columns):
+        kinds = []
+        numbers = []
+        integers = []
+        dates = []
+        texts = []
+
+        for row in rows:
+            value = row[index] if index < len(row) else None
+            kind, number, integer, date, text = encode_value(value)
+            kinds.append(kind)
+            numbers.append(number)
+            integers.append(integer)
+            dates.append(date)
+            texts.append(text)
+
+        arrays[f"c{index}_kind"] = pa.array(kinds, type=pa.int8())
+        arrays[f"c{index}_num"] = pa.array(numbers, type=pa.float64())
+        arrays[f"c{index}_int"] = pa.array(integers, type=pa.int64())
+        arrays[f"c{index}_dt"] = pa.array(dates, type=pa.timestamp("us"))
+        arrays[f"c{index}_str"] = pa.array(texts, type=pa.string())
+
+    return pa.table(arrays)
+
+
+def decode_column(table, index):
+    """
+    Reconstruye los valores originales (array de objetos) de una columna.
+    """
+    kinds = table.column(f"c{index}_kind").to_numpy(zero_copy_only=False)
+    numbers = table.column(f"c{index}_num").to_numpy(zero_copy_only=False)
+    # Sin nulos, para que to_numpy no pase los enteros a float64
+    integers = table.column(f"c{index}_int").fill_null(0).to_numpy(zero_copy_only=False)
+    values = np.array(table.column(f"c{index}_str").to_pylist(), dtype=object)
+
+    for kind, source, convert in [
+        (KIND_FLOAT, numbers, float),
+        (KIND_INT, integers, int),
+        (KIND_BOOL, integers, bool),
+        (KIND_TIME, integers, microseconds_to_time),
+        (KIND_TIMEDELTA, integers, lambda v: datetime.timedelta(microseconds=v)),
+    ]:
+        mask = kinds == kind
+
+        if mask.any():
+            converted = np.empty(int(mask.sum()), dtype=object)
+            converted[:] = [convert(v) for v in source[mask].tolist()]
+            values[mask] = converted
+
+    date_mask = (kinds == KIND_DATETIME) | (kinds == KIND_DATE)
+
+    if date_mask.any():
+        dates = table.column(f"c{index}_dt").filter(pa.array(date_mask)).to_pylist()
+        converted = np.empty(len(dates), dtype=object)
+        converted[:] = [
+            date.date() if kind == KIND_DATE else date
+            for kind, date in zip(kinds[date_mask].tolist(), dates)
+        ]
+        values[date_mask] = converted
+
+    return values
+
+
+# =========================
+# CREACIÓN Y VALIDACIÓN
+# =========================
+
+def build_cache(path, sheet_name, parquet_path, meta_path):
+    """
+    Lee el Excel en modo read_only y escribe el Parquet por bloques.
+    """
+    parquet_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = temporary_path(parquet_path)
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+
+    try:
+        ws = wb.active if sheet_name is None else wb[sheet_name]
+        sheet_title = ws.title
+
+        rows = ws.iter_rows(values_only=True)
+        headers = list(next(rows, ()))
+        n_columns = len(headers)
+
+        writer = None
+        n_rows = 0
+        block = []
+
+        try:
+            for row in rows:
+                block.append(row)
+
+                if len(block) == BLOCK_SIZE:
+                    table = encode_block(block, n_columns)
+                    if writer is None:
+                        writer = pq.ParquetWriter(tmp_path, table.schema)
+                    writer.write_table(table)
+                    n_rows += len(block)
+                    block = []
+
+            if block or writer is None:
+                table = encode_block(block, n_columns)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, table.schema)
+                writer.write_table(table)
+                n_rows += len(block)
+        finally:
+            if writer is not None:
+                writer.close()
+    finally:
+        wb.close()
+
+    os.replace(tmp_path, parquet_path)
+
+    stat = Path(path).stat()
+
+    meta = {
+        "format_version": CACHE_FORMAT_VERSION,
+        "source_file": str(Path(path).resolve()),
+        "source_mtime_ns": stat.st_mtime_ns,
+        "source_size": stat.st_size,
+        "source_sha256": file_sha256(path),
+        "sheet_title": sheet_title,
+        "headers": [None if h is None else str(h) for h in headers],
+        "n_rows": n_rows,
+    }
+
+    write_json_atomic(meta_path, meta)
+
+    return meta
+
+
+def valid_meta(path, parquet_path, meta_path):
+    """
+    Devuelve los metadatos de la caché si sigue siendo válida; si no, None.
+    """
+    if not parquet_path.exists() or not meta_path.exists():
+        return None
+
+    try:
+        with open(meta_path, mode="r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if meta.get("format_version") != CACHE_FORMAT_VERSION:
+        return None
+
+    stat = Path(path).stat()
+
+    if meta["source_mtime_ns"] == stat.st_mtime_ns and meta["source_size"] == stat.st_size:
+        return meta
+
+    if meta["source_size"] != stat.st_size or meta["source_sha256"] != file_sha256(path):
+        return None
+
+    # Mismo contenido con otra fecha de modificación
+    meta["source_mtime_ns"] = stat.st_mtime_ns
+    write_json_atomic(meta_path, meta)
+
+    return meta
+
+
+def cached_sheet_meta(path, sheet_name=None):
+    """
+    Comprueba (y si hace falta regenera) la caché de una hoja.
+    Devuelve (ruta del Parquet, metadatos) o None si no hay pyarrow.
+    """
+    if not cache_available():
+        return None
+
+    parquet_path, meta_path = cache_paths(path, sheet_name)
+    meta = valid_meta(path, parquet_path, meta_path)
+
+    if meta is None:
+        meta = build_cache(path, sheet_name, parquet_path, meta_path)
+
+    return parquet_path, meta
+
+
+# =========================
+# LECTURA
+# =========================
+
+def parquet_column_names(column_indices):
+    return [
+        f"c{index}_{part}"
+        for index in column_indices
+        for part in COLUMN_PARTS
+    ]
+
+
+def read_cached_columns(parquet_path, column_indices, offset=0, length=None):
+    """
+    Lee del Parquet solo las columnas pedidas (índices base 0 del Excel) y
+    devuelve {índice: array de valores}. offset/length seleccionan filas de
+    datos (offset 0 = fila 2 del Excel).
+    """
+    table = pq.read_table(parquet_path, columns=parquet_column_names(column_indices))
+    table = table.slice(offset, length)
+
+    return {index: decode_column(table, index) for index in column_indices}
+
+
+def iter_cached_columns(parquet_path, column_indices, batch_size=BLOCK_SIZE):
+    """
+    Recorre el Parquet por lotes sin cargarlo entero; cada lote es un
+    {índice: array de valores}.
+    """
+    parquet_file = pq.ParquetFile(parquet_path)
+
+    for batch in parquet_file.iter_batches(
+        batch_size=batch_size,
+        columns=parquet_column_names(column_indices)
+    ):
+        table = pa.Table.from_batches([batch])
+        yield {index: decode_column(table, index) for index in column_indices}
@@ -0,0 +1,327 @@
+"""
+Lectura en streaming de los Excel de anotación.
+
+load_workbook(INPUT_FILE, data_only=True) en modo normal construye un objeto
+Cell por cada celda de la hoja antes de devolver nada; con la muestra de 959
+oraciones no se nota, pero con cientos de miles de filas anotadas el tiempo y
+la memoria crecen con el tamaño total de la hoja. Aquí el libro se abre con
+read_only=True y las filas se recorren con iter_rows(values_only=True), de
+modo que solo se guardan los valores de las columnas pedidas.
+
+- iter_annotation_rows(): genera una fila tipada (namedtuple) cada vez, sin
+  acumular nada en memoria.
+- load_columns(): lee las columnas pedidas en una sola pasada y las devuelve
+  como annotation_schema.AnnotationColumns (arrays tipados por papel).
+- load_frame(): la hoja entera como DataFrame de pandas, equivalente a
+  pd.read_excel (para los scripts que trabajan con pandas).
+
+Si pyarrow está instalado, las dos funciones leen la caché Parquet de
+annotation_cache (que se crea en la primera lectura y se regenera cuando
+cambia el Excel) en lugar de volver a analizar el XLSX.
+
+También aceptan directamente una tabla .parquet escrita con
+Scripts/tablas.py (el formato tipado que se pasan las etapas): las columnas
+se buscan por encabezado igual que en el Excel, y la fila 2 del "Excel"
+corresponde a la primera fila de la tabla.
+
+Los scripts que modifican la hoja (02, 03, 05, Cardiff 01/02) siguen usando
+el modo normal, porque read_only no permite escribir.
+"""
+
+from collections import namedtuple
+from contextlib import contextmanager
+from pathlib import Path
+import sys
+
+import numpy as np
+from openpyxl import load_workbook
+
+from annotation_schema import (
+    find_columns,
+    header_row,
+    read_columns,
+    converter_for,
+    AnnotationColumns,
+)
+from annotation_cache import cached_sheet_meta, read_cached_columns, iter_cached_columns
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "Scripts"))
+
+from tablas import encabezados, lee_arrow, lee_tabla
+
+
+# =========================
+# APERTURA DEL LIBRO
+# =========================
+
+@contextmanager
+def open_sheet(path, sheet_name=None):
+    """
+    Abre el libro en modo read_only y devuelve la hoja pedida (o la activa).
+    El archivo se cierra al salir del bloque with.
+    """
+    wb = load_workbook(path, read_only=True, data_only=True)
+
+    try:
+        yield wb.active if sheet_name is None else wb[sheet_name]
+    finally:
+        wb.close()
+
+
+def is_parquet(path):
+    return Path(path).suffix.lower() == ".parquet"
+
+
+def sheet_cache(path, sheet_name=None, header_row_number=1, first_data_row=2):
+    """
+    (ruta del Parquet, metadatos) si la lectura puede servirse desde la
+    caché; None si no hay pyarrow o el encabezado no está en la fila 1.
+    """
+    if header_row_number != 1 or first_data_row < 2:
+        return None
+
+    return cached_sheet_meta(path, sheet_name)
+
+
+# =========================
+# FILAS TIPADAS
+# =========================
+
+def iter_annotation_rows(
+    path,
+    roles,
+    optional_roles=(),
+    sheet_name=None,
+    first_data_row=2,
+    last_data_row=None,
+    header_row_number=1
+):
+    """
+    Genera una fila por cada fila de datos del Excel, como namedtuple con
+    el campo excel_row y un campo por papel encontrado, ya tipado
+    (etiquetas limpias, probabilidades float, TRUE/FALSE booleanos...).
+    """
+    if is_parquet(path):
+        yield from iter_parquet_rows(path, roles, optional_roles, first_data_row, last_data_row)
+        return
+
+    cached = sheet_cache(path, sheet_name, header_row_number, first_data_row)
+
+    if cached is not None:
+        yield from iter_cached_rows(cached, roles, optional_roles, first_data_row, last_data_row)
+        return
+
+    with open_sheet(path, sheet_name) as ws:
+        indices = find_columns(header_row(ws, header_row_number), roles, optional_roles)
+
+        Row = namedtuple("AnnotationRow", ["excel_row"] + list(indices), rename=True)
+
+        converters = [
+            (index, converter_for(role))
+            for role, index in indices.items()
+        ]
+
+        excel_row = first_data_row
+
+        for values in ws.iter_rows(
+            min_row=first_data_row,
+            max_row=last_data_row,
+            values_only=True
+        ):
+            n_values = len(values)
+            fields = [excel_row]
+
+            for index, converter in converters:
+                value = values[index] if index < n_values else None
+                fields.append(value if converter is None else converter(value))
+
+            yield Row(*fields)
+            excel_row += 1
+
+
+def iter_cached_rows(cached, roles, optional_roles, first_data_row, last_data_row):
+    parquet_path, meta = cached
+    indices = find_columns(meta["headers"], roles, optional_roles)
+
+    Row = namedtuple("AnnotationRow", ["excel_row"] + list(indices), rename=True)
+
+    column_indices = sorted(set(indices.values()))
+    converters = [
+        (role, index, converter_for(role))
+        for role, index in indices.items()
+    ]
+
+    excel_row = 2
+
+    for block in iter_cached_columns(parquet_path, column_indices):
+        n_block = len(block[column_indices[0]]) if column_indices else 0
+
+        typed = [
+            block[index] if converter is None else [converter(v) for v in block[index]]
+            for role, index, converter in converters
+        ]
+
+        for i in range(n_block):
+            if last_data_row is not None and excel_row > last_data_row:
+                return
+
+            if excel_row >= first_data_row:
+                yield Row(excel_row, *[column[i] for column in typed])
+
+            excel_row += 1
+
+
+# =========================
+# COLUMNAS TIPADAS
+# =========================
+
+def load_columns(
+    path,
+    roles,
+    optional_roles=(),
+    sheet_name=None,
+    first_data_row=2,
+    last_data_row=None,
+    header_row_number=1
+):
+    """
+    Lee en una sola pasada las columnas pedidas de un Excel de anotación y
+    devuelve un AnnotationColumns (ver annotation_schema).
+    """
+    if is_parquet(path):
+        return load_parquet_columns(path, roles, optional_roles, first_data_row, last_data_row)
+
+    cached = sheet_cache(path, sheet_name, header_row_number, first_data_row)
+
+    if cached is not None:
+        return load_cached_columns(cached, roles, optional_roles, first_data_row, last_data_row)
+
+    with open_sheet(path, sheet_name) as ws:
+        return read_columns(
+            ws,
+            roles,
+            optional_roles,
+            first_data_row=first_data_row,
+            last_data_row=last_data_row,
+            header_row_number=header_row_number
+        )
+
+
+def load_cached_columns(cached, roles, optional_roles, first_data_row, last_data_row):
+    parquet_path, meta = cached
+    headers = meta["headers"]
+    indices = find_columns(headers, roles, optional_roles)
+
+    offset = first_data_row - 2
+    length = None if last_data_row is None else max(last_data_row - first_data_row + 1, 0)
+
+    values = read_cached_columns(
+        parquet_path,
+        sorted(set(indices.values())),
+        offset=offset,
+        length=length
+    )
+
+    raw_columns = {role: values[index] for role, index in indices.items()}
+
+    n_rows = meta["n_rows"] - offset if length is None else length
+
+    return build_columns(meta["sheet_title"], headers, indices, raw_columns, n_rows, first_data_row)
+
+
+def build_columns(sheet_title, headers, indices, raw_columns, n_rows, first_data_row):
+    n_rows = max(n_rows, 0)
+
+    # Filas vacías al final del rango pedido (como en read_columns)
+    for role, column in raw_columns.items():
+        if len(column) < n_rows:
+            raw_columns[role] = np.concatenate([
+                column,
+                np.full(n_rows - len(column), None, dtype=object)
+            ])
+
+    excel_row = np.arange(first_data_row, first_data_row + n_rows)
+
+    return AnnotationColumns(sheet_title, list(headers), indices, raw_columns, excel_row)
+
+
+# =========================
+# TABLAS PARQUET
+# =========================
+
+def load_parquet_columns(path, roles, optional_roles=(), first_data_row=2, last_data_row=None):
+    headers = encabezados(path)
+    indices = find_columns(headers, roles, optional_roles)
+
+    offset = max(first_data_row - 2, 0)
+    length = None if last_data_row is None else max(last_data_row - first_data_row + 1, 0)
+
+    table = lee_arrow(path, [headers[index] for index in sorted(set(indices.values()))])
+    n_rows = table.num_rows - offset if length is None else length
+    table = table.slice(offset, length)
+
+    # Mismos valores que daría la celda: None = vacío, categorías como texto
+    raw_columns = {
+        role: np.array(table.column(headers[index]).to_pylist(), dtype=object)
+        for role, index in indices.items()
+    }
+
+    return build_columns(Path(path).stem, headers, indices, raw_columns, n_rows, first_data_row)
+
+
+def iter_parquet_rows(path, roles, optional_roles, first_data_row, last_data_row):
+    columns = load_parquet_columns(path, roles, optional_roles, first_data_row, last_data_row)
+
+    Row = namedtuple("AnnotationRow", ["excel_row"] + list(columns.indices), rename=True)
+    typed = [columns[role] for role in columns.indices]
+
+    for i, excel_row in enumerate(columns.excel_row):
+        yield Row(int(excel_row), *[column[i] for column in typed])
+
+
+# =========================
+# HOJA COMPLETA (PANDAS)
+# =========================
+
+def load_frame(path, sheet_name=None):
+    """
+    Devuelve la hoja como DataFrame con los encabezados originales, igual
+    que pd.read_excel(path, sheet_name=...), pero leyendo la caché Parquet
+    cuando está disponible. Una tabla .parquet se devuelve con sus tipos
+    (probabilidades float32, etiquetas como categoría).
+    """
+    import pandas as pd
+
+    if is_parquet(path):
+        return lee_tabla(path)
+
+    cached = sheet_cache(path, sheet_name)
+
+    if cached is None:
+        return pd.read_excel(path, sheet_name=0 if sheet_name is None else sheet_name)
+
+    parquet_path, meta = cached
+    headers = meta["headers"]
+    values = read_cached_columns(parquet_path, list(range(len(headers))))
+
+    # Mismas conversiones de celda que el lector openpyxl de pandas: vacío
+    # -> "", float entero -> int; TextParser aplica después los valores NA
+    # y TRUE/FALSE de read_excel
+    def convert_cell(value):
+        if value is None:
+            return ""
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        return value
+
+    data = [[convert_cell(h) for h in headers]]
+    data.extend(
+        [convert_cell(values[index][i]) for index in range(len(headers))]
+        for i in range(meta["n_rows"])
+    )
+
+    # pd.read_excel no devuelve las filas vacías del final de la hoja
+    while len(data) > 1 and all(v == "" for v in data[-1]):
+        data.pop()
+
+    return pd.io.parsers.TextParser(data, header=0).read()
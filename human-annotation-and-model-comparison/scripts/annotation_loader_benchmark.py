@@ -0,0 +1,370 @@
+"""
+Benchmark de lectura de los Excel de anotación.
+
+Compara, sobre la muestra anotada de 959 oraciones y sobre un archivo
+sintético de 1.000.000 de filas con los mismos encabezados:
+
+- legacy:         load_workbook(data_only=True) en modo normal y lectura
+                  celda a celda por letra (como hacían los scripts 01-09)
+- loader_columns: annotation_loader.load_columns (read_only, una pasada,
+                  columnas tipadas)
+- loader_rows:    annotation_loader.iter_annotation_rows (read_only, fila a
+                  fila, sin acumular)
+- cache_build:    conversión del Excel a la caché Parquet (annotation_cache),
+                  lo que paga la primera lectura
+- cache_columns:  load_columns con la caché ya creada
+- cache_rows:     iter_annotation_rows con la caché ya creada
+
+Los tres primeros métodos se miden con la caché desactivada.
+
+Cada medición se ejecuta en un proceso nuevo para que el pico de memoria
+(RSS máximo del proceso) no arrastre lo reservado por la anterior.
+"""
+
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import csv
+import multiprocessing
+import sys
+import time
+
+import numpy as np
+from openpyxl import load_workbook, Workbook
+from openpyxl.utils import get_column_letter
+
+from annotation_schema import find_columns, header_row
+from annotation_loader import load_columns, iter_annotation_rows
+import annotation_cache
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# =========================
+# CONFIGURACIÓN
+# =========================
+
+ANNOTATED_FILE = Path("sample_1000_sentences_for_manual_annotation_randomized_auto_label_gold_entropy_band.xlsx")
+
+SYNTHETIC_ROWS = 1_000_000
+SYNTHETIC_FILE = Path(f"synthetic_annotation_{SYNTHETIC_ROWS}_rows.xlsx")
+
+OUTPUT_CSV = Path("annotation_loader_benchmark.csv")
+
+RANDOM_SEED = 20260423
+
+# Columnas que se leen en cada medición (las del motor de evaluación)
+ROLES = [
+    "pos_score",
+    "neu_score",
+    "neg_score",
+    "auto_label",
+    "annotator_1",
+    "annotator_2",
+    "annotator_3",
+    "agreement_type",
+    "adjudication",
+    "gold_label",
+    "accuracy",
+    "entropy_band",
+]
+
+METHODS = [
+    "legacy",
+    "loader_columns",
+    "loader_rows",
+    "cache_build",
+    "cache_columns",
+    "cache_rows",
+]
+
+# Métodos que leen el XLSX directamente (caché desactivada)
+XLSX_METHODS = {"legacy", "loader_columns", "loader_rows"}
+
+# El modo normal de openpyxl guarda un objeto Cell por celda: con 1M de
+# filas necesita varios GB. Por encima de este número de filas se omite
+# la medición legacy (None = medir siempre).
+LEGACY_MAX_ROWS = 250_000
+
+SYNTHETIC_HEADERS = [
+    "sample_sentence_id",
+    "source_corpus_row",
+    "Word",
+    "Sentence",
+    "Entropy",
+    "POS",
+    "NEU",
+    "NEG",
+    "auto_label",
+    "Human Annotation 1",
+    "Human Annotation 2",
+    "Human Annotation 3",
+    "Agreement_Type",
+    "Human Annotation 4 & 5",
+    "Gold Human Label",
+    "Accuracy",
+    "entropy_band",
+]
+
+
+# =========================
+# ARCHIVO SINTÉTICO
+# =========================
+
+def write_synthetic_file(path, n_rows, seed=RANDOM_SEED):
+    """
+    Escribe (en modo write_only) un Excel con los encabezados de la muestra
+    anotada y n_rows filas de valores aleatorios.
+    """
+    rng = np.random.default_rng(seed)
+    labels = np.array(["NEG", "NEU", "POS"], dtype=object)
+    bands = np.array(["low", "mid", "high"], dtype=object)
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("randomized_sample")
+    ws.append(SYNTHETIC_HEADERS)
+
+    block_size = 50_000
+
+    for start in range(0, n_rows, block_size):
+        size = min(block_size, n_rows - start)
+
+        probs = rng.dirichlet(np.ones(3), size=size)
+        auto = labels[probs[:, [2, 1, 0]].argmax(axis=1)]
+        annotations = labels[rng.integers(0, 3, size=(size, 4))]
+        gold = annotations[:, 0]
+        band = bands[rng.integers(0, 3, size=size)]
+        entropy = rng.random(size)
+
+        for i in range(size):
+            row_number = start + i + 1
+            ann1, ann2, ann3, ann45 = annotations[i]
+            n_distinct = len({ann1, ann2, ann3})
+
+            ws.append([
+                f"S{row_number:07d}",
+                row_number + 1,
+                f"adjetivo{row_number % 200}",
+                "Oración sintética para medir la lectura del archivo.",
+                float(entropy[i]),
+                float(probs[i, 0]),
+                float(probs[i, 1]),
+                float(probs[i, 2]),
+                auto[i],
+                ann1,
+                ann2,
+                ann3,
+                ["full_agreement", "partial_agreement", "no_majority"][n_distinct - 1],
+                ann45 if n_distinct == 3 else None,
+                gold[i],
+                bool(auto[i] == gold[i]),
+                band[i],
+            ])
+
+    wb.save(path)
+
+
+# =========================
+# MÉTODOS DE LECTURA
+# =========================
+
+def read_legacy(path):
+    """
+    Lectura como en los scripts originales: libro en modo normal y acceso
+    ws[f"{COL}{row}"] por cada celda.
+    """
+    wb = load_workbook(path, data_only=True)
+    ws = wb.active
+
+    indices = find_columns(header_row(ws), ROLES)
+    letters = {role: get_column_letter(index + 1) for role, index in indices.items()}
+
+    values = {role: [] for role in ROLES}
+
+    for row in range(2, ws.max_row + 1):
+        for role, letter in letters.items():
+            values[role].append(ws[f"{letter}{row}"].value)
+
+    return len(values["gold_label"])
+
+
+def read_loader_columns(path):
+    columns = load_columns(path, ROLES)
+    return len(columns)
+
+
+def read_loader_rows(path):
+    n_rows = 0
+    n_correct = 0
+
+    for row in iter_annotation_rows(path, ROLES):
+        n_rows += 1
+        n_correct += row.auto_label == row.gold_label
+
+    return n_rows
+
+
+def read_cache_build(path):
+    for cache_file in annotation_cache.cache_paths(path):
+        if cache_file.exists():
+            cache_file.unlink()
+
+    parquet_path, meta = annotation_cache.cached_sheet_meta(path)
+    return meta["n_rows"]
+
+
+READERS = {
+    "legacy": read_legacy,
+    "loader_columns": read_loader_columns,
+    "loader_rows": read_loader_rows,
+    "cache_build": read_cache_build,
+    "cache_columns": read_loader_columns,
+    "cache_rows": read_loader_rows,
+}
+
+
+# =========================
+# MEDICIÓN
+# =========================
+
+def peak_memory_mb():
+    """
+    RSS máximo del proceso en MB (ru_maxrss está en KB en Linux y en bytes
+    en macOS).
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+
+    return peak / 1024
+
+
+def measure(method, path):
+    """
+    Se ejecuta en un proceso nuevo. Sin el módulo resource (Windows) se
+    usa el pico de tracemalloc, que solo cuenta la memoria de Python.
+    """
+    annotation_cache.USE_CACHE = method not in XLSX_METHODS
+
+    if resource is None:
+        import tracemalloc
+        tracemalloc.start()
+        baseline_mb = 0.0
+    else:
+        baseline_mb = peak_memory_mb()
+
+    start = time.perf_counter()
+    n_rows = READERS[method](path)
+    seconds = time.perf_counter() - start
+
+    if resource is None:
+        peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        memory_metric = "tracemalloc_peak"
+    else:
+        peak_mb = peak_memory_mb()
+        memory_metric = "peak_rss"
+
+    return {
+        "n_rows": n_rows,
+        "seconds": seconds,
+        "peak_memory_mb": peak_mb,
+        "baseline_memory_mb": baseline_mb,
+        "memory_metric": memory_metric,
+    }
+
+
+def measure_in_new_process(method, path):
+    context = multiprocessing.get_context("spawn")
+
+    try:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            return executor.submit(measure, method, str(path)).result()
+    except BrokenProcessPool:
+        # Normalmente el sistema ha matado el proceso por falta de memoria
+        return None
+
+
+# =========================
+# EJECUCIÓN
+# =========================
+
+def main():
+    if not SYNTHETIC_FILE.exists():
+        print(f"Creando archivo sintético de {SYNTHETIC_ROWS} filas: {SYNTHETIC_FILE}")
+        start = time.perf_counter()
+        write_synthetic_file(SYNTHETIC_FILE, SYNTHETIC_ROWS)
+        print(f"Creado en {time.perf_counter() - start:.1f} s")
+        print()
+
+    if not annotation_cache.cache_available():
+        print("pyarrow no está instalado: se omiten las mediciones de la caché")
+        print()
+
+    files = [
+        (ANNOTATED_FILE, 959),
+        (SYNTHETIC_FILE, SYNTHETIC_ROWS),
+    ]
+
+    result_rows = []
+
+    for path, expected_rows in files:
+        for method in METHODS:
+
+            if method == "legacy" and LEGACY_MAX_ROWS is not None and expected_rows > LEGACY_MAX_ROWS:
+                print(f"{path.name} - {method}: omitido (más de {LEGACY_MAX_ROWS} filas)")
+                continue
+
+            if method not in XLSX_METHODS and not annotation_cache.cache_available():
+                continue
+
+            result = measure_in_new_process(method, path)
+
+            if result is None:
+                print(f"{path.name} - {method}: el proceso terminó sin resultado (¿memoria insuficiente?)")
+                continue
+
+            result_rows.append({
+                "file": path.name,
+                "method": method,
+                "n_rows": result["n_rows"],
+                "seconds": result["seconds"],
+                "peak_memory_mb": result["peak_memory_mb"],
+                "baseline_memory_mb": result["baseline_memory_mb"],
+                "memory_metric": result["memory_metric"],
+            })
+
+            print(
+                f"{path.name} - {method}: "
+                f"{result['n_rows']} filas, "
+                f"{result['seconds']:.2f} s, "
+                f"{result['memory_metric']}={result['peak_memory_mb']:.1f} MB "
+                f"(tras importar: {result['baseline_memory_mb']:.1f} MB)"
+            )
+
+    with open(OUTPUT_CSV, mode="w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.DictWriter(
+            f,
+            fieldnames=[
+                "file",
+                "method",
+                "n_rows",
+                "seconds",
+                "peak_memory_mb",
+                "baseline_memory_mb",
+                "memory_metric",
+            ],
+            delimiter=";"
+        )
+        writer.writeheader()
+        writer.writerows(result_rows)
+
+    print()
+    print(f"Resultados guardados en: {OUTPUT_CSV}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""
+Resolución de columnas por nombre de encabezado para los Excel de anotación.
+
+Los scripts de evaluación leían las columnas por letra (AUTO_LABEL_COL = "I",
+GOLD_LABEL_COL = "O"...), y cualquier columna insertada o reordenada en el
+Excel desplazaba todas las letras. Aquí cada columna se identifica por su
+papel ("auto_label", "gold_label", "entropy_band"...) y se busca una sola vez
+en la fila de encabezados, como encontrar_columnas / VARIANTES en
+Scripts/sentiment_triclass.py.
+
+read_columns() recorre la hoja una vez y devuelve las columnas pedidas como
+arrays ya tipados (etiquetas limpias, probabilidades float, TRUE/FALSE
+booleanos), de modo que una sola lectura sirve para todas las métricas.
+"""
+
+import unicodedata
+
+import numpy as np
+from openpyxl.utils import get_column_letter
+
+
+# =========================
+# VARIANTES DE ENCABEZADO
+# =========================
+
+# Papel -> encabezados aceptados (normalizados: minúsculas, sin acentos,
+# espacios simples). El orden indica la preferencia si hay varios.
+VARIANTES = {
+    "sample_sentence_id": ("sample_sentence_id",),
+    "source_corpus_row": ("source_corpus_row",),
+    "word": ("word", "palabra", "lexical item", "selected_adjective"),
+    "sentence": ("sentence", "oracion"),
+    "context": ("context",),
+    "entropy": ("entropy",),
+    "pos_score": ("pos",),
+    "neu_score": ("neu",),
+    "neg_score": ("neg",),
+    "auto_label": ("auto_label", "pysentimiento_label"),
+    "annotator_1": ("human annotation 1",),
+    "annotator_2": ("human annotation 2",),
+    "annotator_3": ("human annotation 3",),
+    "agreement_type": ("agreement_type", "agreement type"),
+    "adjudication": ("human annotation 4 & 5", "human annotation 4&5"),
+    "gold_label": ("gold human label", "gold_human_label", "gold label"),
+    "accuracy": ("accuracy", "accuracy_pysentimiento"),
+    "entropy_band": ("entropy_band", "entropy band"),
+    "cardiff_label": ("cardiff_label",),
+    "cardiff_neg": ("cardiff_neg",),
+    "cardiff_neu": ("cardiff_neu",),
+    "cardiff_pos": ("cardiff_pos",),
+    "cardiff_context_window": ("cardiff_context_window",),
+    "cardiff_target_found": ("cardiff_target_found",),
+    "cardiff_accuracy": ("accuracy_cardiff", "cardiff_vs_gold_match"),
+    "chatgpt_label": ("chatgpt_label",),
+    "claude_label": ("claude_label",),
+}
+
+LABELS = ("NEG", "NEU", "POS")
+ENTROPY_BANDS = ("low", "mid", "high")
+
+LABEL_ROLES = {
+    "auto_label",
+    "annotator_1",
+    "annotator_2",
+    "annotator_3",
+    "adjudication",
+    "gold_label",
+    "cardiff_label",
+    "chatgpt_label",
+    "claude_label",
+}
+
+FLOAT_ROLES = {
+    "entropy",
+    "pos_score",
+    "neu_score",
+    "neg_score",
+    "cardiff_neg",
+    "cardiff_neu",
+    "cardiff_pos",
+}
+
+BOOL_ROLES = {
+    "accuracy",
+    "cardiff_accuracy",
+    "cardiff_target_found",
+}
+
+
+# =========================
+# LIMPIEZA DE VALORES
+# =========================
+
+def normalize_header(value):
+    """
+    Normaliza un encabezado: minúsculas, sin acentos y con espacios simples.
+    """
+    if value is None:
+        return ""
+
+    value = unicodedata.normalize("NFD", str(value))
+    value = "".join(ch for ch in value if unicodedata.category(ch) != "Mn")
+    return " ".join(value.strip().lower().split())
+
+
+def clean_label(value):
+    if value is None:
+        return None
+
+    value = str(value).strip().upper()
+
+    if value in LABELS:
+        return value
+
+    return None
+
+
+def clean_entropy_band(value):
+    if value is None:
+        return None
+
+    value = str(value).strip().lower()
+
+    if value in ENTROPY_BANDS:
+        return value
+
+    return None
+
+
+def clean_bool(value):
+    """
+    TRUE / FALSE como booleanos reales de Excel o como texto.
+    """
+    if value is None:
+        return None
+
+    if isinstance(value, bool):
+        return value
+
+    value = str(value).strip().upper()
+
+    if value == "TRUE":
+        return True
+
+    if value == "FALSE":
+        return False
+
+    return None
+
+
+def to_float(value):
+    """
+    Convierte a número valores escritos con punto o coma decimal
+    (NaN si la celda está vacía).
+    """
+    if value is None:
+        return np.nan
+
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    value = str(value).strip().replace(",", ".")
+
+    if value == "":
+        return np.nan
+
+    return float(value)
+
+
+def clean_agreement_type(value):
+    if value is None:
+        return None
+    return str(value).strip().lower()
+
+
+def converter_for(role):
+    """
+    Función de limpieza que corresponde a un papel (None = valor crudo).
+    """
+    if role in FLOAT_ROLES:
+        return to_float
+
+    if role in LABEL_ROLES:
+        return clean_label
+
+    if role in BOOL_ROLES:
+        return clean_bool
+
+    if role == "entropy_band":
+        return clean_entropy_band
+
+    if role == "agreement_type":
+        return clean_agreement_type
+
+    return None
+
+
+def typed_value(role, value):
+    converter = converter_for(role)
+    return value if converter is None else converter(value)
+
+
+def typed_array(role, values):
+    """
+    Convierte los valores crudos de una columna al tipo de su papel.
+    """
+    converter = converter_for(role)
+
+    if converter is None:
+        return np.array(values, dtype=object)
+
+    dtype = np.float64 if role in FLOAT_ROLES else object
+    return np.array([converter(v) for v in values], dtype=dtype)
+
+
+# =========================
+# RESOLUCIÓN DE ENCABEZADOS
+# =========================
+
+def find_columns(headers, roles, optional_roles=()):
+    """
+    Devuelve papel -> índice de columna (base 0) según la fila de encabezados.
+
+    Solo se aceptan coincidencias exactas (tras normalizar) con VARIANTES:
+    una coincidencia parcial haría que "accuracy" encontrase también
+    "Accuracy_Cardiff". Un papel que no está en VARIANTES se busca como
+    encabezado literal (p. ej. la columna de etiquetas de un modelo nuevo).
+    Lanza ValueError si falta un papel obligatorio.
+    """
+    normalized = [normalize_header(h) for h in headers]
+    found = {}
+
+    for role in list(roles) + list(optional_roles):
+        chosen = None
+        variants = VARIANTES.get(role, (normalize_header(role),))
+
+        for variant in variants:
+            if variant in normalized:
+                chosen = normalized.index(variant)
+                break
+
+        if chosen is None:
+            if role in optional_roles:
+                continue
+            raise ValueError(
+                f"No encuentro columna '{role}' (variantes: {list(variants)}). "
+                f"Encabezados: {list(headers)}"
+            )
+
+        found[role] = chosen
+
+    return found
+
+
+def header_row(ws, header_row_number=1):
+    return list(next(ws.iter_rows(
+        min_row=header_row_number,
+        max_row=header_row_number,
+        values_only=True
+    ), ()))
+
+
+def find_or_add_column(ws, role, header, header_row_number=1):
+    """
+    Para los scripts que escriben en la hoja: devuelve el número de columna
+    (base 1) de un papel. Si la columna aún no existe se añade al final con
+    el encabezado indicado, sin desplazar las columnas existentes.
+    """
+    headers = header_row(ws, header_row_number)
+    found = find_columns(headers, (), optional_roles=(role,))
+
+    if role in found:
+        return found[role] + 1
+
+    column = len(headers) + 1
+
+    while column > 1 and headers[column - 2] is None:
+        column -= 1
+
+    ws.cell(row=header_row_number, column=column).value = header
+    return column
+
+
+# =========================
+# COLUMNAS TIPADAS
+# =========================
+
+class AnnotationColumns:
+    """
+    Columnas de una hoja de anotación, indexadas por papel.
+
+    columns["gold_label"]      -> array tipado
+    columns.raw("gold_label")  -> valores tal como están en el Excel
+    columns.letter("gold_label") -> letra de la columna en la hoja
+    columns.excel_row          -> número de fila de Excel de cada valor
+    """
+
+    def __init__(self, sheet_title, headers, indices, raw_columns, excel_row):
+        self.sheet_title = sheet_title
+        self.headers = headers
+        self.indices = indices
+        self.excel_row = excel_row
+        self._raw = raw_columns
+        self._typed = {}
+
+    def __contains__(self, role):
+        return role in self._raw
+
+    def __len__(self):
+        return len(self.excel_row)
+
+    def __getitem__(self, role):
+        if role not in self._typed:
+            self._typed[role] = typed_array(role, self._raw[role])
+        return self._typed[role]
+
+    def raw(self, role):
+        return self._raw[role]
+
+    def header(self, role):
+        return self.headers[self.indices[role]]
+
+    def letter(self, role):
+        return get_column_letter(self.indices[role] + 1)
+
+
+def columns_from_rows(headers, rows, roles, optional_roles=(), first_data_row=2, sheet_title=None):
+    """
+    Construye AnnotationColumns a partir de la fila de encabezados y de un
+    iterable de filas de valores (tuplas), empezando en first_data_row.
+    """
+    indices = find_columns(headers, roles, optional_roles)
+    values = {role: [] for role in indices}
+
+    n_rows = 0
+
+    for row in rows:
+        for role, index in indices.items():
+            values[role].append(row[index] if index < len(row) else None)
+        n_rows += 1
+
+    raw_columns = {role: np.array(column, dtype=object) for role, column in values.items()}
+    excel_row = np.arange(first_data_row, first_data_row + n_rows)
+
+    return AnnotationColumns(sheet_title, list(headers), indices, raw_columns, excel_row)
+
+
+def read_columns(ws, roles, optional_roles=(), first_data_row=2, last_data_row=None, header_row_number=1):
+    """
+    Lee de una sola pasada las columnas pedidas de una hoja de openpyxl
+    (en modo normal o read_only). last_data_row=None lee hasta la última
+    fila de la hoja.
+    """
+    headers = header_row(ws, header_row_number)
+
+    rows = ws.iter_rows(
+        min_row=first_data_row,
+        max_row=last_data_row,
+        values_only=True
+    )
+
+    columns = columns_from_rows(
+        headers,
+        rows,
+        roles,
+        optional_roles,
+        first_data_row=first_data_row,
+        sheet_title=ws.title
+    )
+
+    # Filas vacías al final del rango (read_only no las devuelve)
+    if last_data_row is None:
+        return columns
+
+    missing = (last_data_row - first_data_row + 1) - len(columns)
+
+    if missing > 0:
+        for role in columns._raw:
+            columns._raw[role] = np.concatenate([
+                columns._raw[role],
+                np.full(missing, None, dtype=object)
+            ])
+        columns.excel_row = np.arange(first_data_row, last_data_row + 1)
+
+    return columns
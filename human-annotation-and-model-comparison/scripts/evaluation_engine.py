@@ -0,0 +1,748 @@
+"""
+Motor de evaluación en una sola pasada.
+
+Lee una sola vez la muestra anotada (auto_label, anotaciones humanas,
+Gold Human Label y entropy_band) en columnas y calcula en la misma ejecución
+todo lo que calculan los scripts 01-09:
+
+- 01 acuerdo bruto entre anotadores       -> human_raw_agreement_*.csv
+- 02 auto_label (argmax POS/NEU/NEG)      -> comprobación contra la columna guardada
+- 03 Gold Human Label                     -> gold_human_label_summary.csv
+- 04 accuracy auto vs gold                -> auto_vs_gold_accuracy_*.csv
+- 05 entropy_band                         -> comprobación de valores válidos
+- 06 accuracy por entropy_band            -> accuracy_by_entropy_band.csv
+- 07 precision / recall / F1              -> auto_vs_gold_precision_recall_f1.xlsx
+- 08 precision / recall / F1 por banda    -> auto_vs_gold_precision_recall_f1_by_entropy_band.xlsx
+- 09 accuracy solo POS/NEG                -> consola
+
+Los archivos de salida tienen el mismo formato que los de cada script.
+"""
+
+from pathlib import Path
+from collections import Counter
+import csv
+
+import numpy as np
+
+from annotation_loader import load_columns
+from annotation_schema import typed_array
+from report_writer import ReportWriter
+from metrics_kernel import encode_labels, confusion_counts, summarize
+
+
+# =========================
+# CONFIGURACIÓN
+# =========================
+
+INPUT_FILE = Path("sample_1000_sentences_for_manual_annotation_randomized_auto_label_gold_entropy_band.xlsx")
+
+OUTPUT_DIR = Path(".")
+
+SHEET_NAME = None  # None = usa la hoja activa
+
+FIRST_DATA_ROW = 2
+LAST_DATA_ROW = 960
+
+# Columnas localizadas por encabezado (ver annotation_schema.VARIANTES)
+INPUT_ROLES = [
+    "pos_score",
+    "neu_score",
+    "neg_score",
+    "auto_label",
+    "annotator_1",
+    "annotator_2",
+    "annotator_3",
+    "agreement_type",
+    "adjudication",
+    "gold_label",
+    "accuracy",
+    "entropy_band",
+]
+
+# False = evalúa auto_label y Gold Human Label tal como están en el Excel
+#         (mismos resultados que los scripts 04-09).
+# True  = evalúa las etiquetas recalculadas aquí a partir de POS/NEU/NEG y
+#         de las anotaciones humanas (útil tras reetiquetar sin rehacer 02-05).
+RECOMPUTE_DERIVED_LABELS = False
+
+LABELS = ["NEG", "NEU", "POS"]
+ENTROPY_BANDS = ["low", "mid", "high"]
+EVALUATED_AUTO_LABELS = {"NEG", "POS"}
+
+AGREEMENT_TYPES = ["full_agreement", "partial_agreement", "no_majority"]
+
+
+# =========================
+# UTILIDADES
+# =========================
+
+def percentage(count, total):
+    return (count / total) * 100 if total > 0 else 0
+
+
+def safe_divide(numerator, denominator):
+    if denominator == 0:
+        return 0.0
+    return numerator / denominator
+
+
+# =========================
+# LECTURA EN COLUMNAS
+# =========================
+
+def load_sample(path):
+    """
+    Lee el Excel una sola vez (modo read_only, por filas) y devuelve un
+    diccionario papel -> array con los valores crudos de FIRST_DATA_ROW a
+    LAST_DATA_ROW, junto con las columnas resueltas (columns[papel] da los
+    valores ya limpios y tipados según annotation_schema).
+    """
+
+    columns = load_columns(
+        path,
+        INPUT_ROLES,
+        sheet_name=SHEET_NAME,
+        first_data_row=FIRST_DATA_ROW,
+        last_data_row=LAST_DATA_ROW
+    )
+
+    sample = {role: columns.raw(role) for role in INPUT_ROLES}
+    sample["excel_row"] = columns.excel_row
+
+    return sample, columns
+
+
+# =========================
+# 01 - ACUERDO BRUTO
+# =========================
+
+def classify_agreement(label1, label2, label3):
+    labels = {label1, label2, label3}
+
+    if len(labels) == 1:
+        return "full_agreement"
+
+    if len(labels) == 2:
+        return "partial_agreement"
+
+    return "no_majority"
+
+
+def compute_raw_agreement(sample):
+    agreement = np.array([
+        classify_agreement(a1, a2, a3)
+        for a1, a2, a3 in zip(sample["annotator_1"], sample["annotator_2"], sample["annotator_3"])
+    ], dtype=object)
+
+    counts = {agreement_type: int(np.sum(agreement == agreement_type)) for agreement_type in AGREEMENT_TYPES}
+    total_cases = len(agreement)
+
+    descriptions = {
+        "full_agreement": "Los 3 anotadores coinciden",
+        "partial_agreement": "2 de 3 anotadores coinciden",
+        "no_majority": "Los 3 anotadores difieren",
+    }
+
+    summary_rows = [
+        {
+            "agreement_type": agreement_type,
+            "description": descriptions[agreement_type],
+            "count": counts[agreement_type],
+            "percentage": percentage(counts[agreement_type], total_cases),
+        }
+        for agreement_type in AGREEMENT_TYPES
+    ]
+
+    case_rows = [
+        {
+            "excel_row": int(row),
+            "human_annotation_1": a1,
+            "human_annotation_2": a2,
+            "human_annotation_3": a3,
+            "agreement_type": agreement_type,
+        }
+        for row, a1, a2, a3, agreement_type in zip(
+            sample["excel_row"],
+            sample["annotator_1"],
+            sample["annotator_2"],
+            sample["annotator_3"],
+            agreement
+        )
+    ]
+
+    return agreement, summary_rows, case_rows
+
+
+# =========================
+# 02 - AUTO_LABEL
+# =========================
+
+def compute_auto_labels(columns):
+    """
+    Argmax de POS / NEU / NEG (en ese orden si hay empate); None si falta
+    alguna probabilidad.
+    """
+    order = np.array(["POS", "NEU", "NEG"], dtype=object)
+    scores = np.column_stack([columns["pos_score"], columns["neu_score"], columns["neg_score"]])
+
+    complete = ~np.isnan(scores).any(axis=1)
+    auto_labels = np.full(len(scores), None, dtype=object)
+    auto_labels[complete] = order[np.argmax(scores[complete], axis=1)]
+
+    return auto_labels
+
+
+# =========================
+# 03 - GOLD HUMAN LABEL
+# =========================
+
+def majority_label(labels):
+    counts = Counter(labels)
+    most_common = counts.most_common()
+
+    if len(most_common) == 0:
+        return None
+
+    top_label, top_count = most_common[0]
+
+    if top_count >= 2:
+        return top_label
+
+    return None
+
+
+def create_gold_label(ann1, ann2, ann3, agreement_type, adjudication):
+    if agreement_type == "full_agreement":
+        return ann1
+
+    if agreement_type == "partial_agreement":
+        return majority_label([ann1, ann2, ann3])
+
+    if agreement_type == "no_majority":
+        return adjudication
+
+    return None
+
+
+def compute_gold_labels(columns):
+    summary_counts = {agreement_type: 0 for agreement_type in AGREEMENT_TYPES}
+    summary_counts["invalid_or_missing"] = 0
+
+    gold_labels = []
+
+    for ann1, ann2, ann3, agreement_type, adjudication in zip(
+        columns["annotator_1"],
+        columns["annotator_2"],
+        columns["annotator_3"],
+        columns["agreement_type"],
+        columns["adjudication"]
+    ):
+        gold_label = create_gold_label(ann1, ann2, ann3, agreement_type, adjudication)
+
+        if gold_label is None:
+            summary_counts["invalid_or_missing"] += 1
+        else:
+            summary_counts[agreement_type] += 1
+
+        gold_labels.append(gold_label)
+
+    total_rows = len(gold_labels)
+
+    descriptions = {
+        "full_agreement": "Gold label taken from the common label in Human Annotation 1, 2 and 3",
+        "partial_agreement": "Gold label taken from the majority label among Human Annotation 1, 2 and 3",
+        "no_majority": "Gold label taken from Human Annotation 4 & 5",
+        "invalid_or_missing": "Rows with missing or invalid labels",
+    }
+
+    summary_rows = [
+        {
+            "category": category,
+            "description": description,
+            "count": summary_counts[category],
+            "percentage": (summary_counts[category] / total_rows) * 100,
+        }
+        for category, description in descriptions.items()
+    ]
+
+    return np.array(gold_labels, dtype=object), summary_rows
+
+
+# =========================
+# 04-09 - MÉTRICAS
+# =========================
+
+def evaluate(sample, columns, auto_raw, gold_raw):
+    """
+    Calcula todas las métricas de 04-09 a partir de las columnas ya cargadas.
+    auto_raw / gold_raw se limpian con las mismas reglas que las columnas
+    auto_label / gold_label del esquema.
+    """
+
+    auto_labels = typed_array("auto_label", auto_raw)
+    gold_labels = typed_array("gold_label", gold_raw)
+    entropy_bands = columns["entropy_band"]
+
+    valid = (auto_labels != None) & (gold_labels != None)  # noqa: E711
+    correct = valid & (auto_labels == gold_labels)
+
+    # 04
+    match = np.where(valid, np.where(correct, "TRUE", "FALSE"), "INVALID_OR_MISSING")
+    accuracy_cases = [
+        {
+            "excel_row": int(row),
+            "auto_label": auto,
+            "gold_human_label": gold,
+            "match": value,
+        }
+        for row, auto, gold, value in zip(sample["excel_row"], auto_labels, gold_labels, match)
+    ]
+
+    n_valid = int(valid.sum())
+    n_correct = int(correct.sum())
+
+    accuracy_summary = [
+        {"metric": "total_rows_checked", "value": len(auto_labels)},
+        {"metric": "valid_cases", "value": n_valid},
+        {"metric": "correct_cases", "value": n_correct},
+        {"metric": "incorrect_cases", "value": n_valid - n_correct},
+        {"metric": "invalid_or_missing_cases", "value": len(auto_labels) - n_valid},
+        {"metric": "accuracy", "value": percentage(n_correct, n_valid)},
+    ]
+
+    # 06
+    band_valid = valid & (entropy_bands != None)  # noqa: E711
+    accuracy_by_band = []
+    for band in ENTROPY_BANDS:
+        in_band = band_valid & (entropy_bands == band)
+        total = int(in_band.sum())
+        band_correct = int((in_band & correct).sum())
+        accuracy_by_band.append({
+            "entropy_band": band,
+            "total_cases": total,
+            "correct_cases": band_correct,
+            "incorrect_cases": total - band_correct,
+            "accuracy_percent": percentage(band_correct, total),
+        })
+
+    # 07 / 08: una matriz de confusión global y una por banda, cada una
+    # con un solo bincount (las filas inválidas llevan código -1)
+    gold_codes = encode_labels(gold_labels, LABELS)
+    auto_codes = encode_labels(auto_labels, LABELS)
+    band_codes = encode_labels(entropy_bands, ENTROPY_BANDS)
+
+    # 07
+    overall = summarize(confusion_counts(gold_codes, auto_codes, len(LABELS)), LABELS)
+    overall_invalid_rows = [
+        {
+            "excel_row": int(row),
+            "auto_label": auto,
+            "gold_label": gold,
+        }
+        for row, auto, gold, ok in zip(sample["excel_row"], auto_raw, gold_raw, valid)
+        if not ok
+    ]
+
+    # 08
+    confusion_by_band = confusion_counts(
+        gold_codes,
+        auto_codes,
+        len(LABELS),
+        group_codes=band_codes,
+        n_groups=len(ENTROPY_BANDS)
+    )
+    by_band = {
+        band: summarize(confusion_by_band[i], LABELS)
+        for i, band in enumerate(ENTROPY_BANDS)
+    }
+    band_invalid_rows = [
+        {
+            "excel_row": int(row),
+            "auto_label_raw": auto,
+            "gold_label_raw": gold,
+            "entropy_band_raw": band,
+        }
+        for row, auto, gold, band, ok in zip(
+            sample["excel_row"], auto_raw, gold_raw, sample["entropy_band"], band_valid
+        )
+        if not ok
+    ]
+
+    # 09
+    included = valid & np.isin(auto_labels, list(EVALUATED_AUTO_LABELS))
+    pos_neg_only = {
+        "total_rows_checked": len(auto_labels),
+        "included_cases": int(included.sum()),
+        "excluded_neu_cases": int((valid & (auto_labels == "NEU")).sum()),
+        "invalid_or_missing_cases": len(auto_labels) - n_valid,
+        "correct_cases": int((included & correct).sum()),
+        "incorrect_cases": int((included & ~correct).sum()),
+    }
+    pos_neg_only["accuracy"] = percentage(pos_neg_only["correct_cases"], pos_neg_only["included_cases"])
+
+    return {
+        "accuracy_cases": accuracy_cases,
+        "accuracy_summary": accuracy_summary,
+        "accuracy": percentage(n_correct, n_valid),
+        "accuracy_by_band": accuracy_by_band,
+        "overall": overall,
+        "overall_invalid_rows": overall_invalid_rows,
+        "by_band": by_band,
+        "band_invalid_rows": band_invalid_rows,
+        "pos_neg_only": pos_neg_only,
+    }
+
+
+# =========================
+# ESCRITURA DE RESULTADOS
+# =========================
+
+def write_csv(path, fieldnames, rows):
+    with open(path, mode="w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, delimiter=";")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+METRIC_HEADERS = [
+    "gold_support",
+    "auto_predicted",
+    "true_positives",
+    "false_positives",
+    "false_negatives",
+    "true_negatives",
+    "precision",
+    "recall",
+    "f1",
+]
+
+
+def write_precision_recall_f1(path, results, columns):
+    """
+    Mismo libro que 07_precision_recall_f1.py.
+    """
+
+    overall = results["overall"]
+
+    report = ReportWriter()
+
+    metric_sheet_rows = [["label"] + METRIC_HEADERS]
+
+    for item in overall["metrics"]:
+        metric_sheet_rows.append([item["label"]] + [item[header] for header in METRIC_HEADERS])
+
+    metric_sheet_rows.append([])
+    metric_sheet_rows.append([
+        "MACRO_AVERAGE", "", "", "", "", "", "",
+        overall["macro_precision"],
+        overall["macro_recall"],
+        overall["macro_f1"],
+    ])
+
+    report.add_sheet(
+        "per_label_metrics",
+        metric_sheet_rows,
+        number_formats={"H": "0.0000", "I": "0.0000", "J": "0.0000"}
+    )
+
+    confusion_sheet_rows = [["Gold \\ Auto"] + LABELS]
+
+    for gold_label in LABELS:
+        confusion_sheet_rows.append(
+            [gold_label] + [overall["confusion_matrix"][gold_label][auto_label] for auto_label in LABELS]
+        )
+
+    report.add_sheet("confusion_matrix", confusion_sheet_rows)
+
+    valid_total = overall["total_cases"]
+    correct_total = overall["correct_cases"]
+
+    report.add_sheet(
+        "summary",
+        [
+            ["input_file", str(INPUT_FILE)],
+            ["input_sheet", columns.sheet_title],
+            ["rows_checked", LAST_DATA_ROW - FIRST_DATA_ROW + 1],
+            ["valid_cases", valid_total],
+            ["invalid_or_missing_cases", len(results["overall_invalid_rows"])],
+            ["correct_cases", correct_total],
+            ["incorrect_cases", valid_total - correct_total],
+            ["accuracy", safe_divide(correct_total, valid_total)],
+            ["macro_precision", overall["macro_precision"]],
+            ["macro_recall", overall["macro_recall"]],
+            ["macro_f1", overall["macro_f1"]],
+        ],
+        header_rows=[],
+        bold_cells=["A1", "B1"],
+        number_formats={f"B{row}": "0.0000" for row in range(8, 12)}
+    )
+
+    invalid_sheet_rows = [["excel_row", "auto_label_raw", "gold_label_raw"]]
+
+    for item in results["overall_invalid_rows"]:
+        invalid_sheet_rows.append([item["excel_row"], item["auto_label"], item["gold_label"]])
+
+    report.add_sheet("invalid_rows", invalid_sheet_rows)
+
+    report.save(path)
+
+
+def write_precision_recall_f1_by_band(path, results, columns):
+    """
+    Mismo libro que 08_precision_recall_f1_by_entropy_band.py.
+    """
+
+    report = ReportWriter()
+
+    metric_sheet_rows = [["entropy_band", "label"] + METRIC_HEADERS]
+
+    for band in ENTROPY_BANDS:
+        for item in results["by_band"][band]["metrics"]:
+            metric_sheet_rows.append([band, item["label"]] + [item[header] for header in METRIC_HEADERS])
+
+    report.add_sheet(
+        "per_band_label_metrics",
+        metric_sheet_rows,
+        number_formats={"I": "0.0000", "J": "0.0000", "K": "0.0000"},
+        max_width=32
+    )
+
+    summary_sheet_rows = [[
+        "entropy_band",
+        "total_cases",
+        "correct_cases",
+        "incorrect_cases",
+        "accuracy",
+        "macro_precision",
+        "macro_recall",
+        "macro_f1",
+    ]]
+
+    for band in ENTROPY_BANDS:
+        item = results["by_band"][band]
+        summary_sheet_rows.append([
+            band,
+            item["total_cases"],
+            item["correct_cases"],
+            item["total_cases"] - item["correct_cases"],
+            safe_divide(item["correct_cases"], item["total_cases"]),
+            item["macro_precision"],
+            item["macro_recall"],
+            item["macro_f1"],
+        ])
+
+    report.add_sheet(
+        "summary_by_entropy_band",
+        summary_sheet_rows,
+        number_formats={"E": "0.0000", "F": "0.0000", "G": "0.0000", "H": "0.0000"},
+        max_width=32
+    )
+
+    confusion_sheet_rows = []
+    confusion_header_rows = []
+    confusion_title_cells = []
+
+    for band in ENTROPY_BANDS:
+        if confusion_sheet_rows:
+            confusion_sheet_rows += [[], []]
+
+        confusion_sheet_rows.append([f"entropy_band = {band}"])
+        confusion_title_cells.append(f"A{len(confusion_sheet_rows)}")
+
+        confusion_sheet_rows.append(["Gold \\ Auto"] + LABELS)
+        confusion_header_rows.append(len(confusion_sheet_rows))
+
+        matrix = results["by_band"][band]["confusion_matrix"]
+
+        for gold_label in LABELS:
+            confusion_sheet_rows.append([gold_label] + [matrix[gold_label][auto_label] for auto_label in LABELS])
+
+    report.add_sheet(
+        "confusion_matrices",
+        confusion_sheet_rows,
+        header_rows=confusion_header_rows,
+        bold_cells=confusion_title_cells,
+        max_width=32
+    )
+
+    invalid_sheet_rows = [["excel_row", "auto_label_raw", "gold_label_raw", "entropy_band_raw"]]
+
+    for item in results["band_invalid_rows"]:
+        invalid_sheet_rows.append([
+            item["excel_row"],
+            item["auto_label_raw"],
+            item["gold_label_raw"],
+            item["entropy_band_raw"],
+        ])
+
+    report.add_sheet("invalid_rows", invalid_sheet_rows, max_width=32)
+
+    report.add_sheet(
+        "method_info",
+        [
+            ["input_file", str(INPUT_FILE)],
+            ["input_sheet", columns.sheet_title],
+            ["rows_checked", f"{FIRST_DATA_ROW}-{LAST_DATA_ROW}"],
+            ["auto_label_column", columns.letter("auto_label")],
+            ["gold_label_column", columns.letter("gold_label")],
+            ["entropy_band_column", columns.letter("entropy_band")],
+            ["labels", ", ".join(LABELS)],
+            ["entropy_bands", ", ".join(ENTROPY_BANDS)],
+            ["evaluation_reference", "Gold Human Label"],
+            ["evaluated_prediction", "auto_label"],
+            ["macro_f1_definition", "Mean of F1_NEG, F1_NEU and F1_POS within each entropy band"],
+        ],
+        header_rows=[],
+        max_width=32
+    )
+
+    report.save(path)
+
+
+# =========================
+# EJECUCIÓN
+# =========================
+
+def count_mismatches(computed, stored):
+    return int(np.sum(computed != stored))
+
+
+def main():
+    sample, columns = load_sample(INPUT_FILE)
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+
+    # 01
+    agreement, agreement_summary, agreement_cases = compute_raw_agreement(sample)
+
+    write_csv(
+        OUTPUT_DIR / "human_raw_agreement_summary.csv",
+        ["agreement_type", "description", "count", "percentage"],
+        agreement_summary
+    )
+    write_csv(
+        OUTPUT_DIR / "human_raw_agreement_cases.csv",
+        ["excel_row", "human_annotation_1", "human_annotation_2", "human_annotation_3", "agreement_type"],
+        agreement_cases
+    )
+
+    # 02
+    auto_labels = compute_auto_labels(columns)
+
+    # 03
+    gold_labels, gold_summary = compute_gold_labels(columns)
+
+    write_csv(
+        OUTPUT_DIR / "gold_human_label_summary.csv",
+        ["category", "description", "count", "percentage"],
+        gold_summary
+    )
+
+    # 04-09
+    if RECOMPUTE_DERIVED_LABELS:
+        results = evaluate(sample, columns, auto_labels, gold_labels)
+    else:
+        results = evaluate(sample, columns, sample["auto_label"], sample["gold_label"])
+
+    write_csv(
+        OUTPUT_DIR / "auto_vs_gold_accuracy_summary.csv",
+        ["metric", "value"],
+        results["accuracy_summary"]
+    )
+    write_csv(
+        OUTPUT_DIR / "auto_vs_gold_accuracy_cases.csv",
+        ["excel_row", "auto_label", "gold_human_label", "match"],
+        results["accuracy_cases"]
+    )
+    write_csv(
+        OUTPUT_DIR / "accuracy_by_entropy_band.csv",
+        ["entropy_band", "total_cases", "correct_cases", "incorrect_cases", "accuracy_percent"],
+        results["accuracy_by_band"]
+    )
+
+    write_precision_recall_f1(
+        OUTPUT_DIR / "auto_vs_gold_precision_recall_f1.xlsx",
+        results,
+        columns
+    )
+    write_precision_recall_f1_by_band(
+        OUTPUT_DIR / "auto_vs_gold_precision_recall_f1_by_entropy_band.xlsx",
+        results,
+        columns
+    )
+
+    # =========================
+    # CONTROL DE CONSISTENCIA
+    # =========================
+
+    stored_accuracy = columns["accuracy"]
+    computed_accuracy = np.array([item["match"] == "TRUE" for item in results["accuracy_cases"]], dtype=object)
+
+    checks = {
+        "auto_label (02) distinto del guardado": count_mismatches(auto_labels, columns["auto_label"]),
+        "Gold Human Label (03) distinta de la guardada": count_mismatches(gold_labels, columns["gold_label"]),
+        "Agreement_Type distinto del acuerdo bruto (01)": count_mismatches(agreement, columns["agreement_type"]),
+        "Accuracy distinta de auto_label == gold": int(np.sum(stored_accuracy != computed_accuracy)),
+        "entropy_band (05) vacía o no válida": int(sum(band is None for band in columns["entropy_band"])),
+    }
+
+    # =========================
+    # RESULTADOS EN CONSOLA
+    # =========================
+
+    overall = results["overall"]
+    pos_neg_only = results["pos_neg_only"]
+
+    print("MOTOR DE EVALUACIÓN (01-09)")
+    print("===========================")
+    print(f"Archivo analizado: {INPUT_FILE}")
+    print(f"Hoja analizada: {columns.sheet_title}")
+    print(f"Filas analizadas: {FIRST_DATA_ROW}-{LAST_DATA_ROW}")
+    print(f"Etiquetas recalculadas: {RECOMPUTE_DERIVED_LABELS}")
+    print()
+
+    print("Acuerdo bruto:")
+    for item in agreement_summary:
+        print(f"  {item['description']}: {item['count']} casos ({item['percentage']:.2f}%)")
+
+    print()
+    print(f"Accuracy: {results['accuracy']:.2f}%")
+
+    for item in results["accuracy_by_band"]:
+        print(
+            f"  {item['entropy_band']}: "
+            f"{item['correct_cases']}/{item['total_cases']} correctos "
+            f"({item['accuracy_percent']:.2f}%)"
+        )
+
+    print()
+    for item in overall["metrics"]:
+        print(
+            f"{item['label']}: "
+            f"Precision={item['precision']:.4f}, "
+            f"Recall={item['recall']:.4f}, "
+            f"F1={item['f1']:.4f}"
+        )
+    print(f"Macro-F1: {overall['macro_f1']:.4f}")
+
+    for band in ENTROPY_BANDS:
+        print(f"  {band}: macro-F1={results['by_band'][band]['macro_f1']:.4f}")
+
+    print()
+    print(
+        f"Accuracy POS/NEG only: {pos_neg_only['accuracy']:.2f}% "
+        f"({pos_neg_only['correct_cases']}/{pos_neg_only['included_cases']}, "
+        f"excluidos NEU: {pos_neg_only['excluded_neu_cases']})"
+    )
+
+    print()
+    print("Comprobaciones:")
+    for description, count in checks.items():
+        print(f"  {description}: {count}")
+
+    print()
+    print(f"Resultados guardados en: {OUTPUT_DIR.resolve()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,405 @@
+"""
+Índice de errores por ítem léxico.
+
+Los scripts de evaluación solo dan cifras globales y por entropy_band. Este
+script reúne, para cada modelo y cada adjetivo:
+
+- predicciones y Gold Human Label (model_predictions: un solo Excel por
+  archivo, filas alineadas con la muestra);
+- los metadatos del adjetivo en selected_200_adjectives.csv (Word_id,
+  Dominant_class, Entropy - Mean, Entropy_band);
+- las probabilidades por oración del clasificador de referencia
+  (pysentimiento: NEG / NEU / POS y la entropía de la oración).
+
+Todas las cifras por ítem salen de una sola pasada agrupada: la matriz de
+confusión de cada (modelo, palabra) con un bincount sobre la clave
+combinada (metrics_kernel) y las medias de probabilidad con otro bincount
+ponderado, sin recorrer los ítems uno a uno. Con esa tabla se calcula la
+correlación (Pearson y Spearman, entre ítems) de la tasa de error con la
+entropía media del ítem, en general y dentro de cada banda.
+
+Salidas:
+- item_error_index.csv: una fila por (modelo, entropy_band, palabra), en
+  ese orden; load_item_index() la devuelve indexada por esas tres claves y
+  query_items() filtra por modelo, banda o palabra.
+- item_error_correlations.csv: correlación error / entropía por modelo y
+  banda.
+"""
+
+from pathlib import Path
+import csv
+
+import numpy as np
+import pandas as pd
+
+from annotation_schema import find_columns, to_float
+from metrics_kernel import encode_labels, encode_groups, confusion_counts, class_metrics
+from model_predictions import load_model_predictions
+
+
+# =========================
+# CONFIGURACIÓN
+# =========================
+
+SAMPLE_FILE = Path("sample_1000_sentences_for_manual_annotation_randomized_auto_label_gold_entropy_band.xlsx")
+COMPARISON_FILE = Path("sample_1000_sentences_for_manual_annotation_randomized_auto_label_gold_entropy_band_Comparsion.xlsx")
+CHATGPT_FILE = Path("LLM_prueba_anotation_CHATGPT.xlsx")
+CLAUDE_FILE = Path("LLM_prueba_anotation_Claude.xlsx")
+SELECTED_ADJECTIVES_FILE = Path("selected_200_adjectives.csv")
+
+OUTPUT_INDEX_CSV = Path("item_error_index.csv")
+OUTPUT_CORRELATIONS_CSV = Path("item_error_correlations.csv")
+
+FIRST_DATA_ROW = 2
+LAST_DATA_ROW = 960
+
+# (nombre, archivo, columna de predicción). El primer archivo es la
+# referencia: aporta Word, Gold Human Label, entropy_band y las
+# probabilidades de PROBABILITY_ROLES.
+MODELS = [
+    ("pysentimiento", SAMPLE_FILE, "auto_label"),
+    ("cardiff", COMPARISON_FILE, "cardiff_label"),
+    ("chatgpt", CHATGPT_FILE, "chatgpt_label"),
+    ("claude", CLAUDE_FILE, "claude_label"),
+]
+
+LABELS = ["NEG", "NEU", "POS"]
+ENTROPY_BANDS = ["low", "mid", "high"]
+
+# Probabilidades por oración del clasificador de referencia, en el orden
+# de LABELS, y entropía de la oración
+PROBABILITY_ROLES = ["neg_score", "neu_score", "pos_score"]
+SENTENCE_ENTROPY_ROLE = "entropy"
+
+# Columnas de selected_200_adjectives.csv (papel o encabezado literal)
+METADATA_ROLES = {
+    "word": "word",
+    "word_id": "Word_id",
+    "dominant_class": "Dominant_class",
+    "entropy_mean": "Entropy - Mean",
+    "entropy_band": "entropy_band",
+}
+
+INDEX_KEYS = ["model", "entropy_band", "word"]
+
+
+# =========================
+# METADATOS DE LOS ADJETIVOS
+# =========================
+
+def normalize_word(value):
+    """
+    Normaliza la palabra para hacer el cruce entre archivos (conserva los
+    acentos, como en 05_add_entropy_band_to_sample.py).
+    """
+    if value is None:
+        return ""
+    return str(value).strip().lower()
+
+
+def detect_delimiter(path):
+    """
+    Detecta si el CSV usa punto y coma o coma.
+    """
+    with open(path, mode="r", encoding="utf-8-sig", newline="") as f:
+        sample = f.read(2048)
+        dialect = csv.Sniffer().sniff(sample, delimiters=";,")
+        return dialect.delimiter
+
+
+def load_item_metadata(path):
+    """
+    palabra normalizada -> {word_id, dominant_class, entropy_mean, entropy_band}.
+    """
+    with open(path, mode="r", encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.reader(f, delimiter=detect_delimiter(path)))
+
+    indices = find_columns(rows[0], list(METADATA_ROLES.values()))
+    metadata = {}
+
+    for row in rows[1:]:
+        values = {key: row[indices[role]] for key, role in METADATA_ROLES.items()}
+        word = normalize_word(values.pop("word"))
+
+        if not word:
+            continue
+
+        values["entropy_mean"] = to_float(values["entropy_mean"])
+        values["entropy_band"] = values["entropy_band"].strip().lower()
+        metadata[word] = values
+
+    return metadata
+
+
+# =========================
+# AGREGACIÓN POR ÍTEM
+# =========================
+
+def grouped_means(values, group_codes, n_groups):
+    """
+    Media de cada columna de values (filas, columnas) por grupo, ignorando
+    NaN y grupos -1. Devuelve (grupos, columnas).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    valid = (group_codes >= 0)[:, None] & ~np.isnan(values)
+
+    n_columns = values.shape[1]
+    keys = (np.where(group_codes >= 0, group_codes, 0)[:, None] * n_columns + np.arange(n_columns))
+
+    sums = np.bincount(keys[valid], weights=values[valid], minlength=n_groups * n_columns)
+    counts = np.bincount(keys[valid], minlength=n_groups * n_columns)
+
+    return np.divide(
+        sums,
+        counts,
+        out=np.full(n_groups * n_columns, np.nan),
+        where=counts > 0
+    ).reshape(n_groups, n_columns)
+
+
+def item_confusions(gold_codes, pred_codes, word_codes, n_words):
+    """
+    Matrices de confusión (modelos, palabras, L, L) con un solo bincount
+    sobre la clave modelo / palabra.
+    """
+    n_models, n_rows = pred_codes.shape
+    n_labels = len(LABELS)
+
+    model_codes = np.repeat(np.arange(n_models), n_rows)
+    words = np.tile(word_codes, n_models)
+    keys = np.where(words >= 0, model_codes * n_words + words, -1)
+
+    return confusion_counts(
+        np.tile(gold_codes, n_models),
+        pred_codes.ravel(),
+        n_labels,
+        group_codes=keys,
+        n_groups=n_models * n_words
+    ).reshape(n_models, n_words, n_labels, n_labels)
+
+
+def build_item_index(reference, predictions, metadata):
+    """
+    DataFrame con una fila por (modelo, palabra): aciertos, matriz de
+    confusión, macro-F1, medias de probabilidad y metadatos del ítem,
+    indexado por INDEX_KEYS.
+    """
+    model_names = list(predictions)
+    n_labels = len(LABELS)
+
+    word_codes, words = encode_groups([normalize_word(w) or None for w in reference.raw("word")])
+    n_words = len(words)
+
+    gold_codes = encode_labels(reference["gold_label"], LABELS)
+    pred_codes = np.stack([encode_labels(predictions[name], LABELS) for name in model_names])
+
+    confusion = item_confusions(gold_codes, pred_codes, word_codes, n_words)
+    metrics = class_metrics(confusion)
+
+    # Probabilidades del clasificador de referencia: medias por palabra de
+    # NEG / NEU / POS, de la probabilidad asignada a la etiqueta gold y de
+    # la entropía de la oración
+    probabilities = np.column_stack([reference[role] for role in PROBABILITY_ROLES])
+    gold_probability = np.full(len(gold_codes), np.nan)
+    has_gold = gold_codes >= 0
+    gold_probability[has_gold] = probabilities[has_gold, gold_codes[has_gold]]
+
+    probability_means = grouped_means(
+        np.column_stack([probabilities, gold_probability, reference[SENTENCE_ENTROPY_ROLE]]),
+        word_codes,
+        n_words
+    )
+
+    sentences = np.bincount(word_codes[word_codes >= 0], minlength=n_words)
+
+    # Banda de cada palabra en la muestra (las palabras están anidadas en
+    # una sola banda)
+    band_codes = encode_labels(reference["entropy_band"], ENTROPY_BANDS)
+    word_band = np.full(n_words, -1)
+    known = (word_codes >= 0) & (band_codes >= 0)
+    word_band[word_codes[known]] = band_codes[known]
+
+    columns = {
+        "model": np.repeat(model_names, n_words),
+        "word": np.tile(words, len(model_names)),
+        "entropy_band": np.tile(
+            [ENTROPY_BANDS[b] if b >= 0 else "" for b in word_band],
+            len(model_names)
+        ),
+        "word_id": np.tile([metadata.get(w, {}).get("word_id", "") for w in words], len(model_names)),
+        "dominant_class": np.tile([metadata.get(w, {}).get("dominant_class", "") for w in words], len(model_names)),
+        "entropy_mean": np.tile([metadata.get(w, {}).get("entropy_mean", np.nan) for w in words], len(model_names)),
+        "n_sentences": np.tile(sentences, len(model_names)),
+        "valid_cases": metrics["total_cases"].ravel(),
+        "correct_cases": metrics["correct_cases"].ravel(),
+        "incorrect_cases": (metrics["total_cases"] - metrics["correct_cases"]).ravel(),
+    }
+
+    columns["accuracy"] = np.divide(
+        columns["correct_cases"],
+        columns["valid_cases"],
+        out=np.full(len(columns["model"]), np.nan),
+        where=columns["valid_cases"] > 0
+    )
+    columns["error_rate"] = 1 - columns["accuracy"]
+
+    # Macro-F1 del ítem sobre las etiquetas que aparecen en él (gold o
+    # predicción): un adjetivo con cinco NEG acertados vale 1, no 1/3
+    present = (metrics["gold_support"] + metrics["predicted"]) > 0
+    columns["macro_f1"] = np.divide(
+        (metrics["f1"] * present).sum(axis=-1),
+        present.sum(axis=-1),
+        out=np.full(present.shape[:-1], np.nan),
+        where=present.any(axis=-1)
+    ).ravel()
+
+    flat_confusion = confusion.reshape(len(model_names) * n_words, n_labels * n_labels)
+    for i, gold_label in enumerate(LABELS):
+        for j, pred_label in enumerate(LABELS):
+            columns[f"gold_{gold_label}_pred_{pred_label}"] = flat_confusion[:, i * n_labels + j]
+
+    probability_columns = [f"mean_p_{label}" for label in LABELS] + ["mean_p_gold", "mean_sentence_entropy"]
+    for k, name in enumerate(probability_columns):
+        columns[name] = np.tile(probability_means[:, k], len(model_names))
+
+    return pd.DataFrame(columns).set_index(INDEX_KEYS).sort_index()
+
+
+# =========================
+# CORRELACIONES
+# =========================
+
+def pearson(x, y):
+    x = x - x.mean()
+    y = y - y.mean()
+    denominator = np.sqrt((x * x).sum() * (y * y).sum())
+    return float((x * y).sum() / denominator) if denominator > 0 else np.nan
+
+
+def average_ranks(values):
+    """
+    Rangos (1..n) con empates promediados, para Spearman.
+    """
+    return pd.Series(values).rank(method="average").to_numpy()
+
+
+def error_entropy_correlations(index, entropy_column="entropy_mean"):
+    """
+    Correlación entre ítems de error_rate con la entropía del ítem, por
+    modelo, en general y dentro de cada banda.
+    """
+    rows = []
+
+    for model, table in index.groupby(level="model", sort=False):
+        bands = table.index.get_level_values("entropy_band")
+
+        for scope in ["overall"] + ENTROPY_BANDS:
+            subset = table if scope == "overall" else table[bands == scope]
+            subset = subset[subset["valid_cases"] > 0].dropna(subset=[entropy_column])
+
+            error = subset["error_rate"].to_numpy(dtype=np.float64)
+            entropy = subset[entropy_column].to_numpy(dtype=np.float64)
+
+            rows.append({
+                "model": model,
+                "scope": scope,
+                "entropy_column": entropy_column,
+                "n_items": len(subset),
+                "pearson_r": pearson(error, entropy) if len(subset) > 2 else np.nan,
+                "spearman_rho": pearson(average_ranks(error), average_ranks(entropy)) if len(subset) > 2 else np.nan,
+            })
+
+    return rows
+
+
+# =========================
+# CONSULTA
+# =========================
+
+def load_item_index(path=OUTPUT_INDEX_CSV):
+    """
+    Lee item_error_index.csv indexado por (model, entropy_band, word).
+    """
+    index = pd.read_csv(path, sep=";", encoding="utf-8-sig", keep_default_na=False, na_values=[""])
+    return index.set_index(INDEX_KEYS).sort_index()
+
+
+def query_items(index, model=None, band=None, word=None):
+    """
+    Filas del índice para un modelo, una banda y / o una palabra (None =
+    todas). La palabra se compara normalizada.
+    """
+    selector = (
+        slice(None) if model is None else model,
+        slice(None) if band is None else band,
+        slice(None) if word is None else normalize_word(word),
+    )
+    return index.loc[selector, :]
+
+
+# =========================
+# EJECUCIÓN
+# =========================
+
+def main():
+    reference, predictions = load_model_predictions(
+        MODELS,
+        first_data_row=FIRST_DATA_ROW,
+        last_data_row=LAST_DATA_ROW,
+        extra_roles=PROBABILITY_ROLES + [SENTENCE_ENTROPY_ROLE]
+    )
+
+    metadata = load_item_metadata(SELECTED_ADJECTIVES_FILE)
+
+    index = build_item_index(reference, predictions, metadata)
+    correlations = error_entropy_correlations(index)
+
+    index.to_csv(OUTPUT_INDEX_CSV, sep=";", encoding="utf-8-sig")
+
+    with open(OUTPUT_CORRELATIONS_CSV, mode="w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.DictWriter(f, fieldnames=list(correlations[0]), delimiter=";")
+        writer.writeheader()
+        writer.writerows(correlations)
+
+    missing_metadata = sorted(
+        set(index.index.get_level_values("word")) - set(metadata)
+    )
+
+    print("ÍNDICE DE ERRORES POR ÍTEM LÉXICO")
+    print("=================================")
+    print(f"Archivo de referencia: {SAMPLE_FILE}")
+    print(f"Modelos: {', '.join(predictions)}")
+    print(f"Ítems: {index.index.get_level_values('word').nunique()}")
+    print()
+
+    for item in correlations:
+        if item["scope"] == "overall":
+            print(
+                f"{item['model']}: error vs Entropy - Mean "
+                f"(n={item['n_items']}): Pearson r={item['pearson_r']:.3f}, "
+                f"Spearman rho={item['spearman_rho']:.3f}"
+            )
+
+    print()
+    for model in predictions:
+        worst = query_items(index, model=model).sort_values(
+            ["error_rate", "valid_cases"],
+            ascending=False
+        ).head(5)
+        words = ", ".join(
+            f"{word} ({row.incorrect_cases}/{row.valid_cases})"
+            for (_, _, word), row in worst.iterrows()
+        )
+        print(f"{model} - ítems con más error: {words}")
+
+    if missing_metadata:
+        print()
+        print(f"ADVERTENCIA: {len(missing_metadata)} palabras sin metadatos en {SELECTED_ADJECTIVES_FILE}")
+        print(missing_metadata[:20])
+
+    print()
+    print(f"Archivos creados: {OUTPUT_INDEX_CSV}, {OUTPUT_CORRELATIONS_CSV}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,32 @@
 import pandas as pd
 import numpy as np
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
 
 
 # =========================
 # CONFIGURACIÓN
 # =========================
 
-INPUT_FILE = Path("Adj_entropy.xlsx")
-OUTPUT_FILE = Path("selected_200_adjectives.csv")
+# Un archivo de entropías por categoría gramatical.
+# Se pueden muestrear las cuatro a la vez, por ejemplo:
+# INPUT_FILES = {
+#     "adj": Path("Adj_entropy.xlsx"),
+#     "adv": Path("Adv_entropy.xlsx"),
+#     "noun": Path("Noun_entropy.xlsx"),
+#     "verb": Path("Verb_entropy.xlsx"),
+# }
+INPUT_FILES = {
+    "adj": Path("Adj_entropy.xlsx"),
+}
+
+OUTPUT_FILES = {
+    "adj": Path("selected_200_adjectives.csv"),
+}
+
+# Archivo de salida para las categorías que no estén en OUTPUT_FILES
+OUTPUT_FILE_PATTERN = "selected_{pos}.csv"
 
 RANDOM_SEED = 20260423
 N_TOTAL = 200
@@ -20,6 +38,28 @@ CLASS_QUOTAS = {
     "POS": 66,
 }
 
+ENTROPY_BANDS = ["low", "mid", "high"]
+
+# Tabla de cuotas por estrato (dominant_class, entropy_band).
+# None = se reparte CLASS_QUOTAS entre las bandas como en el muestreo original.
+# Ejemplo de tabla arbitraria:
+# QUOTA_TABLE = {("NEG", "low"): 30, ("NEG", "high"): 10, ("POS", "mid"): 25}
+QUOTA_TABLE = None
+
+# Tablas distintas por categoría gramatical (si no, se usa QUOTA_TABLE)
+QUOTA_TABLE_BY_POS = {}
+
+# "sequential": un único generador recorre los estratos en orden
+#               (reproduce selected_200_adjectives.csv).
+# "per_stratum": cada estrato usa una semilla derivada de
+#               (RANDOM_SEED, categoría, clase, banda); añadir o quitar un
+#               estrato no cambia las palabras elegidas en los demás, y los
+#               estratos se pueden muestrear en paralelo.
+SAMPLING_MODE = "sequential"
+
+# Procesos para el modo per_stratum (1 = sin paralelismo)
+N_WORKERS = 1
+
 # Columna de entropía que se usará para crear bandas baja/media/alta.
 # Si has añadido la nueva columna "Entropy_of_mean", puedes cambiarlo aquí.
 ENTROPY_COL = "Entropy - Mean"
@@ -30,23 +70,6 @@ NEU_COL = "NEU - Mean"
 NEG_COL = "NEG - Mean"
 
 
-# =========================
-# LECTURA DEL ARCHIVO
-# =========================
-
-df = pd.read_excel(INPUT_FILE)
-
-required_columns = [WORD_COL, POS_COL, NEU_COL, NEG_COL, ENTROPY_COL]
-
-missing = [col for col in required_columns if col not in df.columns]
-
-if missing:
-    raise ValueError(
-        f"Faltan columnas en el archivo: {missing}\n"
-        f"Columnas disponibles: {list(df.columns)}"
-    )
-
-
 # =========================
 # CONVERSIÓN SEGURA A NÚMEROS
 # =========================
@@ -65,154 +88,285 @@ def to_numeric_safe(series):
     )
 
 
-for col in [POS_COL, NEU_COL, NEG_COL, ENTROPY_COL]:
-    df[col] = to_numeric_safe(df[col])
-
-
 # =========================
-# IDENTIFICADOR DE FILA ORIGINAL
+# LECTURA Y PREPARACIÓN
 # =========================
 
-# +2 porque en Excel la fila 1 es el encabezado y los datos empiezan en la fila 2.
-df["source_excel_row"] = df.index + 2
+def read_entropy_file(path):
+    df = pd.read_excel(path)
 
+    required_columns = [WORD_COL, POS_COL, NEU_COL, NEG_COL, ENTROPY_COL]
 
-# =========================
-# POLARIDAD DOMINANTE
-# =========================
+    missing = [col for col in required_columns if col not in df.columns]
 
-polarity_columns = {
-    POS_COL: "POS",
-    NEU_COL: "NEU",
-    NEG_COL: "NEG",
-}
+    if missing:
+        raise ValueError(
+            f"Faltan columnas en el archivo {path}: {missing}\n"
+            f"Columnas disponibles: {list(df.columns)}"
+        )
 
-df["dominant_class"] = df[[POS_COL, NEU_COL, NEG_COL]].idxmax(axis=1)
-df["dominant_class"] = df["dominant_class"].map(polarity_columns)
+    for col in [POS_COL, NEU_COL, NEG_COL, ENTROPY_COL]:
+        df[col] = to_numeric_safe(df[col])
 
+    # +2 porque en Excel la fila 1 es el encabezado y los datos empiezan en la fila 2.
+    df["source_excel_row"] = df.index + 2
 
-# =========================
-# BANDAS DE ENTROPÍA
-# =========================
+    return df
+
+
+def add_strata(df):
+    """
+    Añade dominant_class y entropy_band.
+    """
+
+    polarity_columns = {
+        POS_COL: "POS",
+        NEU_COL: "NEU",
+        NEG_COL: "NEG",
+    }
 
-# Crea tres bandas de entropía dentro de cada polaridad dominante:
-# low, mid, high.
-df["entropy_band"] = (
-    df
-    .groupby("dominant_class")[ENTROPY_COL]
-    .transform(
-        lambda s: pd.qcut(
-            s.rank(method="first"),
-            q=3,
-            labels=["low", "mid", "high"]
+    df["dominant_class"] = df[[POS_COL, NEU_COL, NEG_COL]].idxmax(axis=1)
+    df["dominant_class"] = df["dominant_class"].map(polarity_columns)
+
+    # Crea tres bandas de entropía dentro de cada polaridad dominante:
+    # low, mid, high.
+    df["entropy_band"] = (
+        df
+        .groupby("dominant_class")[ENTROPY_COL]
+        .transform(
+            lambda s: pd.qcut(
+                s.rank(method="first"),
+                q=len(ENTROPY_BANDS),
+                labels=ENTROPY_BANDS
+            )
         )
     )
-)
+
+    return df
 
 
 # =========================
-# COMPROBACIÓN DE DISPONIBILIDAD
+# CUOTAS
 # =========================
 
-available_by_class = df["dominant_class"].value_counts().to_dict()
+def build_quota_table(class_quotas, entropy_bands=ENTROPY_BANDS):
+    """
+    Reparte la cuota de cada clase entre las bandas de entropía.
+    El sobrante se reparte de forma determinista.
+    """
+
+    quota_table = {}
+
+    for cls, class_quota in class_quotas.items():
+        base = class_quota // len(entropy_bands)
+        remainder = class_quota % len(entropy_bands)
+
+        for i, band in enumerate(entropy_bands):
+            quota_table[(cls, band)] = base + (1 if i < remainder else 0)
+
+    return quota_table
+
+
+def quota_table_for(pos):
+    quota_table = QUOTA_TABLE_BY_POS.get(pos, QUOTA_TABLE)
+
+    if quota_table is None:
+        quota_table = build_quota_table(CLASS_QUOTAS)
+
+    return quota_table
+
+
+def check_availability(df, quota_table, pos):
+    available_by_class = df["dominant_class"].value_counts().to_dict()
+
+    class_totals = {}
+    for (cls, band), quota in quota_table.items():
+        class_totals[cls] = class_totals.get(cls, 0) + quota
+
+    for cls, quota in class_totals.items():
+        available = available_by_class.get(cls, 0)
+        if available < quota:
+            raise ValueError(
+                f"[{pos}] No hay suficientes palabras de la clase {cls}: "
+                f"se necesitan {quota}, pero solo hay {available}."
+            )
 
-for cls, quota in CLASS_QUOTAS.items():
-    available = available_by_class.get(cls, 0)
-    if available < quota:
+
+def stratum_candidates(df, cls, band, n_to_select, pos):
+    band_df = df[(df["dominant_class"] == cls) & (df["entropy_band"] == band)]
+
+    # Orden estable para que el proceso no dependa del orden original del Excel.
+    band_df = band_df.sort_values(WORD_COL, kind="mergesort")
+
+    if len(band_df) < n_to_select:
         raise ValueError(
-            f"No hay suficientes palabras de la clase {cls}: "
-            f"se necesitan {quota}, pero solo hay {available}."
+            f"[{pos}] No hay suficientes palabras en el estrato {cls}-{band}: "
+            f"se necesitan {n_to_select}, pero solo hay {len(band_df)}."
         )
 
+    return band_df.index.to_numpy()
+
 
 # =========================
-# MUESTREO ESTRATIFICADO
+# SEMILLAS POR ESTRATO
 # =========================
 
-rng = np.random.default_rng(RANDOM_SEED)
+def stratum_seed(random_seed, pos, cls, band):
+    """
+    SeedSequence derivada de un hash de (categoría, clase, banda).
 
-selected_parts = []
+    No depende del orden ni del número de estratos (a diferencia de
+    SeedSequence.spawn), así que cada estrato se puede muestrear por
+    separado o en otro proceso y da siempre las mismas palabras.
+    """
 
-entropy_bands = ["low", "mid", "high"]
+    digest = hashlib.sha256(f"{pos}|{cls}|{band}".encode("utf-8")).digest()
+    words = np.frombuffer(digest[:16], dtype="<u4").tolist()
 
-for cls, class_quota in CLASS_QUOTAS.items():
+    return np.random.SeedSequence([random_seed, *words])
 
-    class_df = df[df["dominant_class"] == cls].copy()
 
-    # Repartimos la cuota de cada clase entre low/mid/high.
-    base = class_quota // len(entropy_bands)
-    remainder = class_quota % len(entropy_bands)
+def sample_stratum(candidates, n_to_select, seed_sequence):
+    rng = np.random.default_rng(seed_sequence)
 
-    band_quotas = {
-        band: base for band in entropy_bands
-    }
+    return rng.choice(candidates, size=n_to_select, replace=False)
 
-    # El sobrante se reparte de forma determinista.
-    for band in entropy_bands[:remainder]:
-        band_quotas[band] += 1
 
-    selected_indices = []
+# =========================
+# MUESTREO ESTRATIFICADO
+# =========================
 
-    for band in entropy_bands:
-        band_df = class_df[class_df["entropy_band"] == band].copy()
+def sample_sequential(df, quota_table, pos):
+    """
+    Un único generador recorre los estratos en el orden de la tabla de cuotas.
+    """
 
-        # Orden estable para que el proceso no dependa del orden original del Excel.
-        band_df = band_df.sort_values(WORD_COL, kind="mergesort")
+    rng = np.random.default_rng(RANDOM_SEED)
 
-        n_to_select = band_quotas[band]
+    selected_indices = []
 
-        if len(band_df) < n_to_select:
-            raise ValueError(
-                f"No hay suficientes palabras en el estrato {cls}-{band}: "
-                f"se necesitan {n_to_select}, pero solo hay {len(band_df)}."
-            )
+    for (cls, band), n_to_select in quota_table.items():
+        candidates = stratum_candidates(df, cls, band, n_to_select, pos)
 
         chosen = rng.choice(
-            band_df.index.to_numpy(),
+            candidates,
             size=n_to_select,
             replace=False
         )
 
         selected_indices.extend(chosen)
 
-    selected_parts.append(df.loc[selected_indices])
+    return selected_indices
 
 
-selected = pd.concat(selected_parts, axis=0)
+def sample_per_stratum(df, quota_table, pos, executor=None):
+    """
+    Cada estrato con su propia semilla; opcionalmente en paralelo.
+    """
 
-# Orden final estable y legible
-selected = selected.sort_values(
-    ["dominant_class", "entropy_band", WORD_COL],
-    kind="mergesort"
-).reset_index(drop=True)
+    tasks = []
 
-selected.insert(
-    0,
-    "sample_word_id",
-    [f"W{i:03d}" for i in range(1, len(selected) + 1)]
-)
+    for (cls, band), n_to_select in quota_table.items():
+        candidates = stratum_candidates(df, cls, band, n_to_select, pos)
+        tasks.append((candidates, n_to_select, stratum_seed(RANDOM_SEED, pos, cls, band)))
 
+    if executor is None:
+        results = [sample_stratum(*task) for task in tasks]
+    else:
+        results = list(executor.map(sample_stratum, *zip(*tasks)))
 
-# =========================
-# EXPORTACIÓN
-# =========================
+    selected_indices = []
+    for chosen in results:
+        selected_indices.extend(chosen)
 
-selected.to_csv(
-    OUTPUT_FILE,
-    sep=";",
-    index=False,
-    encoding="utf-8-sig"
-)
+    return selected_indices
 
 
-# =========================
-# RESUMEN DE CONTROL
-# =========================
+def select_words(df, quota_table, pos, executor=None):
+    df = add_strata(df)
+
+    check_availability(df, quota_table, pos)
+
+    if SAMPLING_MODE == "sequential":
+        selected_indices = sample_sequential(df, quota_table, pos)
+    elif SAMPLING_MODE == "per_stratum":
+        selected_indices = sample_per_stratum(df, quota_table, pos, executor)
+    else:
+        raise ValueError(f"SAMPLING_MODE no válido: {SAMPLING_MODE}")
+
+    selected = df.loc[selected_indices]
+
+    # Orden final estable y legible
+    selected = selected.sort_values(
+        ["dominant_class", "entropy_band", WORD_COL],
+        kind="mergesort"
+    ).reset_index(drop=True)
+
+    selected.insert(
+        0,
+        "sample_word_id",
+        [f"W{i:03d}" for i in range(1, len(selected) + 1)]
+    )
+
+    return selected
+
+
+def output_file_for(pos):
+    return OUTPUT_FILES.get(pos, Path(OUTPUT_FILE_PATTERN.format(pos=pos)))
+
+
+def main():
+    executor = None
+
+    if SAMPLING_MODE == "per_stratum" and N_WORKERS > 1:
+        executor = ProcessPoolExecutor(max_workers=N_WORKERS)
+
+    try:
+        for pos, input_file in INPUT_FILES.items():
+
+            # =========================
+            # LECTURA Y MUESTREO
+            # =========================
+
+            selected = select_words(
+                read_entropy_file(input_file),
+                quota_table_for(pos),
+                pos,
+                executor
+            )
+
+            output_file = output_file_for(pos)
+
+
+            # =========================
+            # EXPORTACIÓN
+            # =========================
+
+            selected.to_csv(
+                output_file,
+                sep=";",
+                index=False,
+                encoding="utf-8-sig"
+            )
+
+
+            # =========================
+            # RESUMEN DE CONTROL
+            # =========================
+
+            print(f"[{pos}] Archivo creado:", output_file)
+            print(f"Modo de muestreo: {SAMPLING_MODE}")
+            print()
+            print("Distribución por polaridad dominante:")
+            print(selected["dominant_class"].value_counts())
+            print()
+            print("Distribución por polaridad y banda de entropía:")
+            print(pd.crosstab(selected["dominant_class"], selected["entropy_band"]))
+            print()
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
 
-print("Archivo creado:", OUTPUT_FILE)
-print()
-print("Distribución por polaridad dominante:")
-print(selected["dominant_class"].value_counts())
-print()
-print("Distribución por polaridad y banda de entropía:")
-print(pd.crosstab(selected["dominant_class"], selected["entropy_band"]))
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Matriz de confusión y precision / recall / F1 vectorizados.
+
+Los scripts 07, 08, Cardiff 03/05 y evaluation_engine recorrían todos los
+pares (gold, predicción) una vez por etiqueta para contar TP/FP/FN/TN, y otra
+vez más para la matriz de confusión. Aquí las etiquetas se codifican como
+enteros pequeños (índice en LABELS) y la matriz se obtiene con un solo
+np.bincount(gold * n_labels + pred). TP, FP, FN, TN, precision, recall, F1 y
+las medias macro salen de esa matriz.
+
+Con una clave de grupo (entropy_band, clase dominante, palabra...) todas las
+matrices por grupo salen del mismo bincount sobre la clave combinada
+(grupo * n_labels + gold) * n_labels + pred.
+
+Las funciones de métricas aceptan matrices con dimensiones delanteras
+(..., n_labels, n_labels), de modo que también sirven para miles de
+réplicas bootstrap a la vez.
+"""
+
+import numpy as np
+
+
+# =========================
+# CONFIGURACIÓN
+# =========================
+
+LABELS = ("NEG", "NEU", "POS")
+
+METRIC_KEYS = (
+    "true_positives",
+    "false_positives",
+    "false_negatives",
+    "true_negatives",
+    "gold_support",
+    "predicted",
+    "precision",
+    "recall",
+    "f1",
+)
+
+
+# =========================
+# CODIFICACIÓN
+# =========================
+
+def encode_labels(values, labels=LABELS):
+    """
+    Índice de cada valor en labels (-1 si es None o no está en labels).
+    """
+    index = {label: i for i, label in enumerate(labels)}
+
+    return np.fromiter(
+        (index.get(value, -1) for value in values),
+        dtype=np.int64,
+        count=len(values)
+    )
+
+
+def encode_groups(values, groups=None):
+    """
+    Codifica una clave de grupo. Devuelve (códigos, grupos); si no se dan
+    los grupos se usan los valores distintos no vacíos, ordenados.
+    """
+    if groups is None:
+        groups = sorted({value for value in values if value is not None})
+
+    return encode_labels(values, groups), list(groups)
+
+
+# =========================
+# MATRIZ DE CONFUSIÓN
+# =========================
+
+def confusion_counts(gold_codes, pred_codes, n_labels=len(LABELS), group_codes=None, n_groups=None):
+    """
+    Matriz de confusión (filas = gold, columnas = predicción) con un solo
+    bincount. Las filas con algún código -1 no se cuentan.
+
+    Sin grupos devuelve (n_labels, n_labels); con group_codes devuelve
+    (n_groups, n_labels, n_labels).
+    """
+    gold_codes = np.asarray(gold_codes, dtype=np.int64)
+    pred_codes = np.asarray(pred_codes, dtype=np.int64)
+
+    valid = (gold_codes >= 0) & (pred_codes >= 0)
+    keys = gold_codes * n_labels + pred_codes
+
+    if group_codes is None:
+        counts = np.bincount(keys[valid], minlength=n_labels * n_labels)
+        return counts.reshape(n_labels, n_labels)
+
+    group_codes = np.asarray(group_codes, dtype=np.int64)
+
+    if n_groups is None:
+        n_groups = int(group_codes.max()) + 1 if len(group_codes) else 0
+
+    valid &= group_codes >= 0
+    keys = group_codes * (n_labels * n_labels) + keys
+
+    counts = np.bincount(keys[valid], minlength=n_groups * n_labels * n_labels)
+    return counts.reshape(n_groups, n_labels, n_labels)
+
+
+# =========================
+# MÉTRICAS
+# =========================
+
+def safe_ratio(numerator, denominator):
+    """
+    numerator / denominator elemento a elemento, 0.0 donde el denominador
+    es 0 (como safe_divide en los scripts).
+    """
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+
+    return np.divide(
+        numerator,
+        denominator,
+        out=np.zeros(np.broadcast(numerator, denominator).shape),
+        where=denominator != 0
+    )
+
+
+def class_metrics(confusion):
+    """
+    Métricas one-vs-rest por clase a partir de matrices (..., L, L).
+    Devuelve un dict de arrays (..., L) con METRIC_KEYS, más arrays (...)
+    con total_cases, correct_cases, accuracy y las medias macro.
+    """
+    confusion = np.asarray(confusion)
+
+    tp = np.diagonal(confusion, axis1=-2, axis2=-1)
+    gold_support = confusion.sum(axis=-1)
+    predicted = confusion.sum(axis=-2)
+    total = confusion.sum(axis=(-2, -1))
+
+    fp = predicted - tp
+    fn = gold_support - tp
+    tn = total[..., None] - tp - fp - fn
+
+    precision = safe_ratio(tp, predicted)
+    recall = safe_ratio(tp, gold_support)
+    f1 = safe_ratio(2 * precision * recall, precision + recall)
+
+    correct = tp.sum(axis=-1)
+
+    return {
+        "true_positives": tp,
+        "false_positives": fp,
+        "false_negatives": fn,
+        "true_negatives": tn,
+        "gold_support": gold_support,
+        "predicted": predicted,
+        "precision": precision,
+        "recall": recall,
+        "f1": f1,
+        "total_cases": total,
+        "correct_cases": correct,
+        "accuracy": safe_ratio(correct, total),
+        "macro_precision": precision.mean(axis=-1),
+        "macro_recall": recall.mean(axis=-1),
+        "macro_f1": f1.mean(axis=-1),
+    }
+
+
+# =========================
+# FORMATO DE LOS SCRIPTS
+# =========================
+
+def metric_rows(confusion, labels, predicted_key="auto_predicted"):
+    """
+    Lista de dicts por etiqueta con las claves que escriben los scripts
+    (label, gold_support, <predicted_key>, true_positives..., f1), con
+    tipos de Python.
+    """
+    metrics = class_metrics(confusion)
+    rows = []
+
+    for i, label in enumerate(labels):
+        rows.append({
+            "label": label,
+            "gold_support": int(metrics["gold_support"][i]),
+            predicted_key: int(metrics["predicted"][i]),
+            "true_positives": int(metrics["true_positives"][i]),
+            "false_positives": int(metrics["false_positives"][i]),
+            "false_negatives": int(metrics["false_negatives"][i]),
+            "true_negatives": int(metrics["true_negatives"][i]),
+            "precision": float(metrics["precision"][i]),
+            "recall": float(metrics["recall"][i]),
+            "f1": float(metrics["f1"][i]),
+        })
+
+    return rows
+
+
+def confusion_dict(confusion, labels):
+    """
+    {gold: {predicción: n}}, como build_confusion_matrix en los scripts.
+    """
+    return {
+        gold_label: {
+            pred_label: int(confusion[i, j])
+            for j, pred_label in enumerate(labels)
+        }
+        for i, gold_label in enumerate(labels)
+    }
+
+
+def summarize(confusion, labels, predicted_key="auto_predicted"):
+    """
+    Métricas por etiqueta, totales, medias macro y matriz de confusión de
+    una matriz (L, L).
+    """
+    metrics = metric_rows(confusion, labels, predicted_key)
+    n_labels = len(labels)
+
+    return {
+        "metrics": metrics,
+        "total_cases": int(confusion.sum()),
+        "correct_cases": int(np.trace(confusion)),
+        "macro_precision": sum(item["precision"] for item in metrics) / n_labels,
+        "macro_recall": sum(item["recall"] for item in metrics) / n_labels,
+        "macro_f1": sum(item["f1"] for item in metrics) / n_labels,
+        "confusion_matrix": confusion_dict(confusion, labels),
+    }
@@ -0,0 +1,270 @@
+"""
+Caché de predicciones de modelos en SQLite.
+
+Un único archivo (.model_cache/model_cache.sqlite, en el directorio de
+trabajo) guarda, con clave de contenido, los dos tipos de predicción que
+son caros de repetir:
+
+- etiquetas de LLM (llm_annotation_runner.py): clave (modelo, hash de la
+  plantilla del prompt, hash de palabra + fragmento). Se guarda la etiqueta
+  extraída y la respuesta en bruto de la que sale; cada respuesta se guarda
+  una sola vez (tabla llm_responses) aunque etiquete un lote entero;
+- probabilidades NEG / NEU / POS de un clasificador (CardiffScorer): clave
+  (modelo, hash del texto puntuado), como 3 float32.
+
+Como la clave es la oración y no el lote, las oraciones repetidas se piden
+una sola vez, da igual en qué lote caigan, y cambiar el tamaño de lote no
+invalida nada. Cambiar la plantilla del prompt o el modelo sí: sus
+etiquetas se guardan aparte, junto a las anteriores.
+
+Cada consulta suma aciertos y fallos por tipo y modelo en la tabla lookups;
+stats() devuelve el número de entradas y la tasa de aciertos acumulada.
+Ejecutado como script, imprime ese resumen.
+"""
+
+from pathlib import Path
+import hashlib
+import sqlite3
+import sys
+
+import numpy as np
+import pandas as pd
+
+
+# =========================
+# CONFIGURACIÓN
+# =========================
+
+USE_MODEL_CACHE = True
+
+CACHE_FILE = Path(".model_cache") / "model_cache.sqlite"
+
+# Segundos de espera si otro proceso está escribiendo
+BUSY_TIMEOUT = 60
+
+# Claves por consulta (límite de parámetros de SQLite)
+QUERY_CHUNK = 500
+
+KIND_LLM = "llm"
+KIND_PROBABILITIES = "probabilities"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_responses (
+    response_hash TEXT PRIMARY KEY,
+    response TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS llm_labels (
+    model TEXT NOT NULL,
+    template_hash TEXT NOT NULL,
+    item_hash TEXT NOT NULL,
+    label TEXT NOT NULL,
+    response_hash TEXT NOT NULL,
+    PRIMARY KEY (model, template_hash, item_hash)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS probabilities (
+    model TEXT NOT NULL,
+    text_hash TEXT NOT NULL,
+    scores BLOB NOT NULL,
+    PRIMARY KEY (model, text_hash)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS lookups (
+    kind TEXT NOT NULL,
+    model TEXT NOT NULL,
+    hits INTEGER NOT NULL,
+    misses INTEGER NOT NULL,
+    PRIMARY KEY (kind, model)
+) WITHOUT ROWID;
+"""
+
+
+# =========================
+# CLAVES
+# =========================
+
+def content_hash(*parts):
+    """
+    SHA-256 (hex) de las partes, con espacios normalizados, separadas por
+    un tabulador.
+    """
+    text = "\t".join(" ".join(str(part).split()) for part in parts)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def template_hash(template):
+    return hashlib.sha256(str(template).encode("utf-8")).hexdigest()
+
+
+def chunks(values, size=QUERY_CHUNK):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+# =========================
+# CACHÉ
+# =========================
+
+class ModelCache:
+    """
+    Acceso a la caché. Se usa desde un solo hilo (el del bucle asyncio en
+    llm_annotation_runner.py).
+    """
+
+    def __init__(self, path=CACHE_FILE):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def record_lookup(self, kind, model, hits, misses):
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO lookups (kind, model, hits, misses) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (kind, model) DO UPDATE SET hits = hits + excluded.hits, misses = misses + excluded.misses",
+                (kind, model, hits, misses)
+            )
+
+    # ---- etiquetas de LLM ----
+
+    def get_labels(self, model, template, item_hashes):
+        """{hash de ítem: etiqueta} de los ítems que ya están en la caché."""
+        template = template_hash(template)
+        item_hashes = list(dict.fromkeys(item_hashes))
+        found = {}
+
+        for chunk in chunks(item_hashes):
+            placeholders = ", ".join("?" * len(chunk))
+            rows = self.connection.execute(
+                f"SELECT item_hash, label FROM llm_labels "
+                f"WHERE model = ? AND template_hash = ? AND item_hash IN ({placeholders})",
+                (model, template, *chunk)
+            )
+            found.update(rows)
+
+        self.record_lookup(KIND_LLM, model, len(found), len(item_hashes) - len(found))
+        return found
+
+    def put_labels(self, model, template, labels, response):
+        """
+        labels: {hash de ítem: etiqueta} extraídas de response (texto en
+        bruto de la respuesta).
+        """
+        template = template_hash(template)
+        response_hash = hashlib.sha256(response.encode("utf-8")).hexdigest()
+
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO llm_responses (response_hash, response) VALUES (?, ?)",
+                (response_hash, response)
+            )
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO llm_labels (model, template_hash, item_hash, label, response_hash) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(model, template, item_hash, label, response_hash) for item_hash, label in labels.items()]
+            )
+
+    def get_response(self, model, template, item_hash):
+        """Respuesta en bruto de la que salió la etiqueta de un ítem, o None."""
+        row = self.connection.execute(
+            "SELECT r.response FROM llm_labels l JOIN llm_responses r USING (response_hash) "
+            "WHERE l.model = ? AND l.template_hash = ? AND l.item_hash = ?",
+            (model, template_hash(template), item_hash)
+        ).fetchone()
+        return row[0] if row else None
+
+    # ---- probabilidades de clasificadores ----
+
+    def get_probabilities(self, model, text_hashes):
+        """{hash de texto: array float32 (3,)} de los textos ya puntuados."""
+        text_hashes = list(dict.fromkeys(text_hashes))
+        found = {}
+
+        for chunk in chunks(text_hashes):
+            placeholders = ", ".join("?" * len(chunk))
+            rows = self.connection.execute(
+                f"SELECT text_hash, scores FROM probabilities WHERE model = ? AND text_hash IN ({placeholders})",
+                (model, *chunk)
+            )
+            for text_hash, scores in rows:
+                found[text_hash] = np.frombuffer(scores, dtype=np.float32)
+
+        self.record_lookup(KIND_PROBABILITIES, model, len(found), len(text_hashes) - len(found))
+        return found
+
+    def put_probabilities(self, model, text_hashes, probabilities):
+        probabilities = np.ascontiguousarray(probabilities, dtype=np.float32)
+
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO probabilities (model, text_hash, scores) VALUES (?, ?, ?)",
+                [(model, text_hash, row.tobytes()) for text_hash, row in zip(text_hashes, probabilities)]
+            )
+
+    # ---- resumen ----
+
+    def stats(self):
+        """
+        Una fila por tipo y modelo: entradas guardadas, aciertos y fallos
+        acumulados y tasa de aciertos.
+        """
+        entries = {}
+        for model, n in self.connection.execute("SELECT model, COUNT(*) FROM llm_labels GROUP BY model"):
+            entries[(KIND_LLM, model)] = n
+        for model, n in self.connection.execute("SELECT model, COUNT(*) FROM probabilities GROUP BY model"):
+            entries[(KIND_PROBABILITIES, model)] = n
+
+        lookups = {
+            (kind, model): (hits, misses)
+            for kind, model, hits, misses in self.connection.execute("SELECT kind, model, hits, misses FROM lookups")
+        }
+
+        rows = []
+        for kind, model in sorted(set(entries) | set(lookups)):
+            hits, misses = lookups.get((kind, model), (0, 0))
+            total = hits + misses
+            rows.append({
+                "kind": kind,
+                "model": model,
+                "entries": entries.get((kind, model), 0),
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / total if total else float("nan"),
+            })
+
+        return pd.DataFrame(rows, columns=["kind", "model", "entries", "hits", "misses", "hit_rate"])
+
+
+# =========================
+# EJECUCIÓN
+# =========================
+
+def main():
+    path = Path(sys.argv[1]) if len(sys.argv) > 1 else CACHE_FILE
+
+    if not path.exists():
+        print(f"No existe la caché: {path}")
+        return
+
+    with ModelCache(path) as cache:
+        stats = cache.stats()
+        n_responses = cache.connection.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+
+    print(f"Caché: {path} ({path.stat().st_size / 1024:.0f} KB)")
+    print(f"Respuestas de LLM guardadas: {n_responses}")
+    print()
+    print(stats.to_string(index=False) if len(stats) else "(vacía)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,12 @@
 from pathlib import Path
+import sys
+
 from openpyxl import load_workbook
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from annotation_schema import read_columns, find_or_add_column
+
 
 # =========================
 # CONFIGURACIÓN
@@ -19,32 +25,17 @@ SHEET_NAME = None  # None = usa la hoja activa
 FIRST_DATA_ROW = 2
 LAST_DATA_ROW = 960
 
-CARDIFF_LABEL_COL = "G"
-GOLD_LABEL_COL = "H"
-OUTPUT_MATCH_COL = "J"
-
-VALID_LABELS = {"NEG", "NEU", "POS"}
+# Columnas localizadas por encabezado (ver annotation_schema.VARIANTES):
+# Cardiff_label y Gold Human Label, ya limpias (POS / NEU / NEG o None).
+# El resultado se escribe en Accuracy_Cardiff / Cardiff_vs_Gold_Match si ya
+# existe; si no, en una columna nueva al final de la hoja.
+INPUT_ROLES = ["cardiff_label", "gold_label"]
 
 
 # =========================
 # FUNCIONES
 # =========================
 
-def clean_label(value):
-    """
-    Normaliza etiquetas POS / NEU / NEG.
-    """
-    if value is None:
-        return None
-
-    value = str(value).strip().upper()
-
-    if value in VALID_LABELS:
-        return value
-
-    return None
-
-
 def percentage(count, total):
     return (count / total) * 100 if total > 0 else 0
 
@@ -60,32 +51,41 @@ if SHEET_NAME is None:
 else:
     ws = wb[SHEET_NAME]
 
+columns = read_columns(
+    ws,
+    INPUT_ROLES,
+    first_data_row=FIRST_DATA_ROW,
+    last_data_row=LAST_DATA_ROW
+)
+
 
 # =========================
 # COMPARAR CARDIFF_LABEL VS GOLD HUMAN LABEL
 # =========================
 
-ws[f"{OUTPUT_MATCH_COL}1"] = "Cardiff_vs_Gold_Match"
+match_col = find_or_add_column(ws, "cardiff_accuracy", "Cardiff_vs_Gold_Match")
 
 true_count = 0
 false_count = 0
 invalid_or_missing_count = 0
 
-for row in range(FIRST_DATA_ROW, LAST_DATA_ROW + 1):
-
-    cardiff_label = clean_label(ws[f"{CARDIFF_LABEL_COL}{row}"].value)
-    gold_label = clean_label(ws[f"{GOLD_LABEL_COL}{row}"].value)
+for row, cardiff_label, gold_label in zip(
+    columns.excel_row,
+    columns["cardiff_label"],
+    columns["gold_label"]
+):
+    match_cell = ws.cell(row=int(row), column=match_col)
 
     if cardiff_label is None or gold_label is None:
-        ws[f"{OUTPUT_MATCH_COL}{row}"] = "INVALID_OR_MISSING"
+        match_cell.value = "INVALID_OR_MISSING"
         invalid_or_missing_count += 1
         continue
 
     if cardiff_label == gold_label:
-        ws[f"{OUTPUT_MATCH_COL}{row}"] = "TRUE"
+        match_cell.value = "TRUE"
         true_count += 1
     else:
-        ws[f"{OUTPUT_MATCH_COL}{row}"] = "FALSE"
+        match_cell.value = "FALSE"
         false_count += 1
 
 
@@ -1,6 +1,11 @@
 from pathlib import Path
-from openpyxl import load_workbook, Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from annotation_loader import load_columns
+from report_writer import ReportWriter
+from metrics_kernel import encode_labels, confusion_counts, metric_rows, confusion_dict
 
 
 # =========================
@@ -20,8 +25,9 @@ SHEET_NAME = None  # None = usa la hoja activa
 FIRST_DATA_ROW = 2
 LAST_DATA_ROW = 960
 
-CARDIFF_LABEL_COL = "G"
-GOLD_LABEL_COL = "I"
+# Columnas localizadas por encabezado (ver annotation_schema.VARIANTES):
+# Cardiff_label y Gold Human Label, ya limpias (POS / NEU / NEG o None).
+INPUT_ROLES = ["cardiff_label", "gold_label"]
 
 LABELS = ["POS", "NEU", "NEG"]
 
@@ -30,129 +36,23 @@ LABELS = ["POS", "NEU", "NEG"]
 # FUNCIONES
 # =========================
 
-def clean_label(value):
-    """
-    Normaliza etiquetas POS / NEU / NEG.
-    """
-    if value is None:
-        return None
-
-    value = str(value).strip().upper()
-
-    if value in LABELS:
-        return value
-
-    return None
-
-
 def safe_divide(numerator, denominator):
     if denominator == 0:
         return 0.0
     return numerator / denominator
 
 
-def compute_metrics_for_label(gold_labels, pred_labels, target_label):
-    """
-    Calcula TP, FP, FN, TN, precision, recall y F1
-    para una etiqueta concreta mediante esquema one-vs-rest.
-    """
-
-    tp = 0
-    fp = 0
-    fn = 0
-    tn = 0
-
-    for gold, pred in zip(gold_labels, pred_labels):
-
-        if gold == target_label and pred == target_label:
-            tp += 1
-
-        elif gold != target_label and pred == target_label:
-            fp += 1
-
-        elif gold == target_label and pred != target_label:
-            fn += 1
-
-        else:
-            tn += 1
-
-    precision = safe_divide(tp, tp + fp)
-    recall = safe_divide(tp, tp + fn)
-
-    if precision + recall == 0:
-        f1 = 0.0
-    else:
-        f1 = 2 * precision * recall / (precision + recall)
-
-    return {
-        "label": target_label,
-        "gold_support": tp + fn,
-        "cardiff_predicted": tp + fp,
-        "true_positives": tp,
-        "false_positives": fp,
-        "false_negatives": fn,
-        "true_negatives": tn,
-        "precision": precision,
-        "recall": recall,
-        "f1": f1,
-    }
-
-
-def build_confusion_matrix(gold_labels, pred_labels):
-    """
-    Matriz de confusión:
-    filas = Gold Human Label
-    columnas = Cardiff_label
-    """
-
-    matrix = {
-        gold_label: {pred_label: 0 for pred_label in LABELS}
-        for gold_label in LABELS
-    }
-
-    for gold, pred in zip(gold_labels, pred_labels):
-        matrix[gold][pred] += 1
-
-    return matrix
-
-
-def style_header(row):
-    for cell in row:
-        cell.font = Font(bold=True)
-        cell.fill = PatternFill("solid", fgColor="D9EAF7")
-        cell.alignment = Alignment(horizontal="center")
-
-
-def apply_basic_style(ws):
-    thin = Side(style="thin", color="CCCCCC")
-    border = Border(left=thin, right=thin, top=thin, bottom=thin)
-
-    for row in ws.iter_rows():
-        for cell in row:
-            cell.border = border
-            cell.alignment = Alignment(vertical="center")
-
-    for column_cells in ws.columns:
-        max_length = 0
-        column_letter = column_cells[0].column_letter
-
-        for cell in column_cells:
-            if cell.value is not None:
-                max_length = max(max_length, len(str(cell.value)))
-
-        ws.column_dimensions[column_letter].width = min(max_length + 3, 32)
-
-
 # =========================
 # LEER EXCEL
 # =========================
 
-wb_input = load_workbook(INPUT_FILE, data_only=True)
-
-if SHEET_NAME is None:
-    ws_input = wb_input.active
-else:
-    ws_input = wb_input[SHEET_NAME]
+columns = load_columns(
+    INPUT_FILE,
+    INPUT_ROLES,
+    sheet_name=SHEET_NAME,
+    first_data_row=FIRST_DATA_ROW,
+    last_data_row=LAST_DATA_ROW
+)
 
 
 # =========================
@@ -163,16 +63,16 @@ gold_labels = []
 cardiff_labels = []
 invalid_rows = []
 
-for row in range(FIRST_DATA_ROW, LAST_DATA_ROW + 1):
+for i, row in enumerate(columns.excel_row):
 
-    cardiff_label = clean_label(ws_input[f"{CARDIFF_LABEL_COL}{row}"].value)
-    gold_label = clean_label(ws_input[f"{GOLD_LABEL_COL}{row}"].value)
+    cardiff_label = columns["cardiff_label"][i]
+    gold_label = columns["gold_label"][i]
 
     if cardiff_label is None or gold_label is None:
         invalid_rows.append({
-            "excel_row": row,
-            "cardiff_label_raw": ws_input[f"{CARDIFF_LABEL_COL}{row}"].value,
-            "gold_label_raw": ws_input[f"{GOLD_LABEL_COL}{row}"].value,
+            "excel_row": int(row),
+            "cardiff_label_raw": columns.raw("cardiff_label")[i],
+            "gold_label_raw": columns.raw("gold_label")[i],
         })
         continue
 
@@ -195,28 +95,31 @@ accuracy = safe_divide(correct_total, valid_total)
 # CALCULAR MÉTRICAS
 # =========================
 
-metrics = [
-    compute_metrics_for_label(gold_labels, cardiff_labels, label)
-    for label in LABELS
-]
+# Una sola matriz de confusión (filas = Gold Human Label, columnas =
+# Cardiff_label); TP/FP/FN/TN y las métricas one-vs-rest salen de ella
+confusion = confusion_counts(
+    encode_labels(gold_labels, LABELS),
+    encode_labels(cardiff_labels, LABELS),
+    n_labels=len(LABELS)
+)
+
+metrics = metric_rows(confusion, LABELS, predicted_key="cardiff_predicted")
 
 macro_precision = sum(item["precision"] for item in metrics) / len(LABELS)
 macro_recall = sum(item["recall"] for item in metrics) / len(LABELS)
 macro_f1 = sum(item["f1"] for item in metrics) / len(LABELS)
 
-confusion_matrix = build_confusion_matrix(gold_labels, cardiff_labels)
+confusion_matrix = confusion_dict(confusion, LABELS)
 
 
 # =========================
 # CREAR EXCEL DE SALIDA
 # =========================
 
-wb_output = Workbook()
+report = ReportWriter()
 
 
 # Hoja 1: métricas por etiqueta
-ws_metrics = wb_output.active
-ws_metrics.title = "per_label_metrics"
 
 headers = [
     "label",
@@ -231,11 +134,10 @@ headers = [
     "f1",
 ]
 
-ws_metrics.append(headers)
-style_header(ws_metrics[1])
+metric_sheet_rows = [headers]
 
 for item in metrics:
-    ws_metrics.append([
+    metric_sheet_rows.append([
         item["label"],
         item["gold_support"],
         item["cardiff_predicted"],
@@ -248,9 +150,9 @@ for item in metrics:
         item["f1"],
     ])
 
-ws_metrics.append([])
+metric_sheet_rows.append([])
 
-ws_metrics.append([
+metric_sheet_rows.append([
     "MACRO_AVERAGE",
     "",
     "",
@@ -263,36 +165,33 @@ ws_metrics.append([
     macro_f1,
 ])
 
-for row in range(2, ws_metrics.max_row + 1):
-    for col in ["H", "I", "J"]:
-        ws_metrics[f"{col}{row}"].number_format = "0.0000"
-
-apply_basic_style(ws_metrics)
+report.add_sheet(
+    "per_label_metrics",
+    metric_sheet_rows,
+    number_formats={"H": "0.0000", "I": "0.0000", "J": "0.0000"},
+    max_width=32
+)
 
 
 # Hoja 2: matriz de confusión
-ws_confusion = wb_output.create_sheet("confusion_matrix")
-
-ws_confusion.append(["Gold \\ Cardiff"] + LABELS)
-style_header(ws_confusion[1])
+confusion_sheet_rows = [["Gold \\ Cardiff"] + LABELS]
 
 for gold_label in LABELS:
-    ws_confusion.append(
+    confusion_sheet_rows.append(
         [gold_label] + [
             confusion_matrix[gold_label][pred_label]
             for pred_label in LABELS
         ]
     )
 
-apply_basic_style(ws_confusion)
+report.add_sheet("confusion_matrix", confusion_sheet_rows, max_width=32)
 
 
 # Hoja 3: resumen global
-ws_summary = wb_output.create_sheet("summary")
 
 summary_rows = [
     ["input_file", str(INPUT_FILE)],
-    ["input_sheet", ws_input.title],
+    ["input_sheet", columns.sheet_title],
     ["rows_checked", LAST_DATA_ROW - FIRST_DATA_ROW + 1],
     ["valid_cases", valid_total],
     ["invalid_or_missing_cases", len(invalid_rows)],
@@ -306,40 +205,37 @@ summary_rows = [
     ["prediction_label", "Cardiff_label"],
 ]
 
-for row in summary_rows:
-    ws_summary.append(row)
-
-for row in range(8, 12):
-    ws_summary[f"B{row}"].number_format = "0.0000"
-
-apply_basic_style(ws_summary)
+report.add_sheet(
+    "summary",
+    summary_rows,
+    header_rows=[],
+    number_formats={f"B{row}": "0.0000" for row in range(8, 12)},
+    max_width=32
+)
 
 
 # Hoja 4: filas inválidas
-ws_invalid = wb_output.create_sheet("invalid_rows")
-
-ws_invalid.append([
+invalid_sheet_rows = [[
     "excel_row",
     "cardiff_label_raw",
     "gold_label_raw",
-])
-style_header(ws_invalid[1])
+]]
 
 for item in invalid_rows:
-    ws_invalid.append([
+    invalid_sheet_rows.append([
         item["excel_row"],
         item["cardiff_label_raw"],
         item["gold_label_raw"],
     ])
 
-apply_basic_style(ws_invalid)
+report.add_sheet("invalid_rows", invalid_sheet_rows, max_width=32)
 
 
 # =========================
 # GUARDAR EXCEL
 # =========================
 
-wb_output.save(OUTPUT_FILE)
+report.save(OUTPUT_FILE)
 
 
 # =========================
@@ -349,7 +245,7 @@ wb_output.save(OUTPUT_FILE)
 print("CARDIFF_LABEL VS GOLD HUMAN LABEL")
 print("=================================")
 print(f"Archivo analizado: {INPUT_FILE}")
-print(f"Hoja analizada: {ws_input.title}")
+print(f"Hoja analizada: {columns.sheet_title}")
 print(f"Filas analizadas: {FIRST_DATA_ROW}-{LAST_DATA_ROW}")
 print()
 print(f"Casos válidos: {valid_total}")
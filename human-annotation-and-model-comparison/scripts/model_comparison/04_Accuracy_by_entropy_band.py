@@ -1,6 +1,10 @@
 from pathlib import Path
-from openpyxl import load_workbook, Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from annotation_loader import load_columns
+from report_writer import ReportWriter
 
 
 # =========================
@@ -20,8 +24,9 @@ SHEET_NAME = None  # None = usa la hoja activa
 FIRST_DATA_ROW = 2
 LAST_DATA_ROW = 960
 
-ACCURACY_COL = "H"       # Accuracy_Cardiff
-ENTROPY_BAND_COL = "J"   # entropy_band
+# Columnas localizadas por encabezado (ver annotation_schema.VARIANTES):
+# Accuracy_Cardiff (TRUE / FALSE) y entropy_band.
+INPUT_ROLES = ["cardiff_accuracy", "entropy_band"]
 
 ENTROPY_BANDS = ["low", "mid", "high"]
 
@@ -30,86 +35,23 @@ ENTROPY_BANDS = ["low", "mid", "high"]
 # FUNCIONES
 # =========================
 
-def clean_accuracy(value):
-    """
-    Normaliza valores TRUE / FALSE de la columna Accuracy_Cardiff.
-    Acepta booleanos reales de Excel o texto TRUE/FALSE.
-    """
-    if value is None:
-        return None
-
-    if isinstance(value, bool):
-        return value
-
-    value = str(value).strip().upper()
-
-    if value == "TRUE":
-        return True
-
-    if value == "FALSE":
-        return False
-
-    return None
-
-
-def clean_entropy_band(value):
-    """
-    Normaliza entropy_band a low / mid / high.
-    """
-    if value is None:
-        return None
-
-    value = str(value).strip().lower()
-
-    if value in ENTROPY_BANDS:
-        return value
-
-    return None
-
-
 def percentage(correct, total):
     if total == 0:
         return 0.0
     return (correct / total) * 100
 
 
-def style_header(row):
-    for cell in row:
-        cell.font = Font(bold=True)
-        cell.fill = PatternFill("solid", fgColor="D9EAF7")
-        cell.alignment = Alignment(horizontal="center")
-
-
-def apply_basic_style(ws):
-    thin = Side(style="thin", color="CCCCCC")
-    border = Border(left=thin, right=thin, top=thin, bottom=thin)
-
-    for row in ws.iter_rows():
-        for cell in row:
-            cell.border = border
-            cell.alignment = Alignment(vertical="center")
-
-    for column_cells in ws.columns:
-        max_length = 0
-        column_letter = column_cells[0].column_letter
-
-        for cell in column_cells:
-            if cell.value is not None:
-                max_length = max(max_length, len(str(cell.value)))
-
-        ws.column_dimensions[column_letter].width = min(max_length + 3, 28)
-
-
 # =========================
 # LEER EXCEL
 # =========================
 
-wb_input = load_workbook(INPUT_FILE, data_only=True)
-
-if SHEET_NAME is None:
-    ws_input = wb_input.active
-else:
-    ws_input = wb_input[SHEET_NAME]
+columns = load_columns(
+    INPUT_FILE,
+    INPUT_ROLES,
+    sheet_name=SHEET_NAME,
+    first_data_row=FIRST_DATA_ROW,
+    last_data_row=LAST_DATA_ROW
+)
 
 
 # =========================
@@ -127,16 +69,16 @@ results = {
 
 invalid_rows = []
 
-for row in range(FIRST_DATA_ROW, LAST_DATA_ROW + 1):
+for i, row in enumerate(columns.excel_row):
 
-    accuracy_value = clean_accuracy(ws_input[f"{ACCURACY_COL}{row}"].value)
-    entropy_band = clean_entropy_band(ws_input[f"{ENTROPY_BAND_COL}{row}"].value)
+    accuracy_value = columns["cardiff_accuracy"][i]
+    entropy_band = columns["entropy_band"][i]
 
     if accuracy_value is None or entropy_band is None:
         invalid_rows.append({
-            "excel_row": row,
-            "accuracy_raw": ws_input[f"{ACCURACY_COL}{row}"].value,
-            "entropy_band_raw": ws_input[f"{ENTROPY_BAND_COL}{row}"].value,
+            "excel_row": int(row),
+            "accuracy_raw": columns.raw("cardiff_accuracy")[i],
+            "entropy_band_raw": columns.raw("entropy_band")[i],
         })
         continue
 
@@ -152,9 +94,7 @@ for row in range(FIRST_DATA_ROW, LAST_DATA_ROW + 1):
 # CREAR EXCEL DE SALIDA
 # =========================
 
-wb_output = Workbook()
-ws_output = wb_output.active
-ws_output.title = "accuracy_by_entropy_band"
+report = ReportWriter()
 
 headers = [
     "entropy_band",
@@ -164,8 +104,7 @@ headers = [
     "accuracy_percent %",
 ]
 
-ws_output.append(headers)
-style_header(ws_output[1])
+output_rows = [headers]
 
 for band in ENTROPY_BANDS:
     total_cases = results[band]["total_cases"]
@@ -173,7 +112,7 @@ for band in ENTROPY_BANDS:
     incorrect_cases = results[band]["incorrect_cases"]
     accuracy_percent = percentage(correct_cases, total_cases)
 
-    ws_output.append([
+    output_rows.append([
         band,
         total_cases,
         correct_cases,
@@ -181,41 +120,34 @@ for band in ENTROPY_BANDS:
         accuracy_percent,
     ])
 
-for row in range(2, ws_output.max_row + 1):
-    ws_output[f"E{row}"].number_format = "0.00"
-
-apply_basic_style(ws_output)
+report.add_sheet("accuracy_by_entropy_band", output_rows, number_formats={"E": "0.00"})
 
 
 # =========================
 # HOJA CON FILAS INVÁLIDAS
 # =========================
 
-ws_invalid = wb_output.create_sheet("invalid_rows")
-
-ws_invalid.append([
+invalid_sheet_rows = [[
     "excel_row",
     "accuracy_raw",
     "entropy_band_raw",
-])
-
-style_header(ws_invalid[1])
+]]
 
 for item in invalid_rows:
-    ws_invalid.append([
+    invalid_sheet_rows.append([
         item["excel_row"],
         item["accuracy_raw"],
         item["entropy_band_raw"],
     ])
 
-apply_basic_style(ws_invalid)
+report.add_sheet("invalid_rows", invalid_sheet_rows)
 
 
 # =========================
 # GUARDAR EXCEL
 # =========================
 
-wb_output.save(OUTPUT_FILE)
+report.save(OUTPUT_FILE)
 
 
 # =========================
@@ -225,7 +157,7 @@ wb_output.save(OUTPUT_FILE)
 print("CARDIFF ACCURACY BY ENTROPY_BAND")
 print("================================")
 print(f"Archivo analizado: {INPUT_FILE}")
-print(f"Hoja analizada: {ws_input.title}")
+print(f"Hoja analizada: {columns.sheet_title}")
 print(f"Filas analizadas: {FIRST_DATA_ROW}-{LAST_DATA_ROW}")
 print()
 
@@ -1,6 +1,11 @@
 from pathlib import Path
-from openpyxl import load_workbook, Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from annotation_loader import load_columns
+from report_writer import ReportWriter
+from metrics_kernel import encode_labels, confusion_counts, metric_rows
 
 
 # =========================
@@ -20,9 +25,9 @@ SHEET_NAME = None  # None = usa la hoja activa
 FIRST_DATA_ROW = 2
 LAST_DATA_ROW = 960
 
-CARDIFF_LABEL_COL = "G"
-GOLD_LABEL_COL = "I"
-ENTROPY_BAND_COL = "J"
+# Columnas localizadas por encabezado (ver annotation_schema.VARIANTES):
+# Cardiff_label, Gold Human Label y entropy_band, ya limpias.
+INPUT_ROLES = ["cardiff_label", "gold_label", "entropy_band"]
 
 LABELS = ["POS", "NEU", "NEG"]
 ENTROPY_BANDS = ["low", "mid", "high"]
@@ -32,171 +37,72 @@ ENTROPY_BANDS = ["low", "mid", "high"]
 # FUNCIONES
 # =========================
 
-def clean_label(value):
-    if value is None:
-        return None
-
-    value = str(value).strip().upper()
-
-    if value in LABELS:
-        return value
-
-    return None
-
-
-def clean_entropy_band(value):
-    if value is None:
-        return None
-
-    value = str(value).strip().lower()
-
-    if value in ENTROPY_BANDS:
-        return value
-
-    return None
-
-
-def safe_divide(numerator, denominator):
-    if denominator == 0:
-        return 0.0
-    return numerator / denominator
-
-
-def compute_metrics_for_label(gold_labels, predicted_labels, target_label):
-    tp = 0
-    fp = 0
-    fn = 0
-    tn = 0
-
-    for gold, pred in zip(gold_labels, predicted_labels):
-
-        if gold == target_label and pred == target_label:
-            tp += 1
-
-        elif gold != target_label and pred == target_label:
-            fp += 1
-
-        elif gold == target_label and pred != target_label:
-            fn += 1
-
-        else:
-            tn += 1
-
-    precision = safe_divide(tp, tp + fp)
-    recall = safe_divide(tp, tp + fn)
-
-    if precision + recall == 0:
-        f1 = 0.0
-    else:
-        f1 = 2 * precision * recall / (precision + recall)
-
-    return {
-        "gold_support": tp + fn,
-        "auto_predicted": tp + fp,
-        "true_positives": tp,
-        "false_positives": fp,
-        "false_negatives": fn,
-        "true_negatives": tn,
-        "precision": precision,
-        "recall": recall,
-        "f1": f1,
-    }
-
-
-def style_header(row):
-    for cell in row:
-        cell.font = Font(bold=True)
-        cell.fill = PatternFill("solid", fgColor="D9EAF7")
-        cell.alignment = Alignment(horizontal="center")
-
-
-def apply_basic_style(ws):
-    thin = Side(style="thin", color="CCCCCC")
-    border = Border(left=thin, right=thin, top=thin, bottom=thin)
-
-    for row in ws.iter_rows():
-        for cell in row:
-            cell.border = border
-            cell.alignment = Alignment(vertical="center")
-
-    for column_cells in ws.columns:
-        max_length = 0
-        column_letter = column_cells[0].column_letter
-
-        for cell in column_cells:
-            if cell.value is not None:
-                max_length = max(max_length, len(str(cell.value)))
-
-        ws.column_dimensions[column_letter].width = min(max_length + 3, 30)
-
-
 # =========================
 # LEER EXCEL
 # =========================
 
-wb_input = load_workbook(INPUT_FILE, data_only=True)
-
-if SHEET_NAME is None:
-    ws_input = wb_input.active
-else:
-    ws_input = wb_input[SHEET_NAME]
+columns = load_columns(
+    INPUT_FILE,
+    INPUT_ROLES,
+    sheet_name=SHEET_NAME,
+    first_data_row=FIRST_DATA_ROW,
+    last_data_row=LAST_DATA_ROW
+)
 
 
 # =========================
 # AGRUPAR DATOS POR ENTROPY_BAND
 # =========================
 
-data_by_band = {
-    band: {
-        "gold_labels": [],
-        "cardiff_labels": [],
-    }
-    for band in ENTROPY_BANDS
-}
+gold_labels = []
+cardiff_labels = []
+entropy_bands = []
 
 invalid_rows = []
 
-for row in range(FIRST_DATA_ROW, LAST_DATA_ROW + 1):
+for i, row in enumerate(columns.excel_row):
 
-    cardiff_label = clean_label(ws_input[f"{CARDIFF_LABEL_COL}{row}"].value)
-    gold_label = clean_label(ws_input[f"{GOLD_LABEL_COL}{row}"].value)
-    entropy_band = clean_entropy_band(ws_input[f"{ENTROPY_BAND_COL}{row}"].value)
+    cardiff_label = columns["cardiff_label"][i]
+    gold_label = columns["gold_label"][i]
+    entropy_band = columns["entropy_band"][i]
 
     if cardiff_label is None or gold_label is None or entropy_band is None:
         invalid_rows.append({
-            "excel_row": row,
-            "cardiff_label_raw": ws_input[f"{CARDIFF_LABEL_COL}{row}"].value,
-            "gold_label_raw": ws_input[f"{GOLD_LABEL_COL}{row}"].value,
-            "entropy_band_raw": ws_input[f"{ENTROPY_BAND_COL}{row}"].value,
+            "excel_row": int(row),
+            "cardiff_label_raw": columns.raw("cardiff_label")[i],
+            "gold_label_raw": columns.raw("gold_label")[i],
+            "entropy_band_raw": columns.raw("entropy_band")[i],
         })
         continue
 
-    data_by_band[entropy_band]["gold_labels"].append(gold_label)
-    data_by_band[entropy_band]["cardiff_labels"].append(cardiff_label)
+    gold_labels.append(gold_label)
+    cardiff_labels.append(cardiff_label)
+    entropy_bands.append(entropy_band)
 
 
 # =========================
 # CALCULAR MÉTRICAS
 # =========================
 
-result_rows = []
-
-for band in ENTROPY_BANDS:
+# Las matrices de confusión de las tres bandas salen de un solo bincount
+# sobre la clave combinada banda / gold / Cardiff_label
+confusion_by_band = confusion_counts(
+    encode_labels(gold_labels, LABELS),
+    encode_labels(cardiff_labels, LABELS),
+    n_labels=len(LABELS),
+    group_codes=encode_labels(entropy_bands, ENTROPY_BANDS),
+    n_groups=len(ENTROPY_BANDS)
+)
 
-    gold_labels = data_by_band[band]["gold_labels"]
-    cardiff_labels = data_by_band[band]["cardiff_labels"]
+result_rows = []
 
-    for label in LABELS:
+for band_index, band in enumerate(ENTROPY_BANDS):
 
-        metrics = compute_metrics_for_label(
-            gold_labels=gold_labels,
-            predicted_labels=cardiff_labels,
-            target_label=label
-        )
+    for metrics in metric_rows(confusion_by_band[band_index], LABELS):
 
         result_rows.append({
             "entropy_band": band,
-            "label": label,
+            "label": metrics["label"],
             "gold_support": metrics["gold_support"],
             "auto_predicted": metrics["auto_predicted"],
             "true_positives": metrics["true_positives"],
@@ -213,9 +119,7 @@ for band in ENTROPY_BANDS:
 # CREAR EXCEL DE SALIDA
 # =========================
 
-wb_output = Workbook()
-ws_output = wb_output.active
-ws_output.title = "metrics_by_entropy_band"
+report = ReportWriter()
 
 headers = [
     "entropy_band",
@@ -231,11 +135,10 @@ headers = [
     "f1",
 ]
 
-ws_output.append(headers)
-style_header(ws_output[1])
+output_rows = [headers]
 
 for item in result_rows:
-    ws_output.append([
+    output_rows.append([
         item["entropy_band"],
         item["label"],
         item["gold_support"],
@@ -249,45 +152,41 @@ for item in result_rows:
         item["f1"],
     ])
 
-for row in range(2, ws_output.max_row + 1):
-    ws_output[f"I{row}"].number_format = "0.0000"
-    ws_output[f"J{row}"].number_format = "0.0000"
-    ws_output[f"K{row}"].number_format = "0.0000"
-
-apply_basic_style(ws_output)
+report.add_sheet(
+    "metrics_by_entropy_band",
+    output_rows,
+    number_formats={"I": "0.0000", "J": "0.0000", "K": "0.0000"},
+    max_width=30
+)
 
 
 # =========================
 # HOJA DE FILAS INVÁLIDAS
 # =========================
 
-ws_invalid = wb_output.create_sheet("invalid_rows")
-
-ws_invalid.append([
+invalid_sheet_rows = [[
     "excel_row",
     "cardiff_label_raw",
     "gold_label_raw",
     "entropy_band_raw",
-])
-
-style_header(ws_invalid[1])
+]]
 
 for item in invalid_rows:
-    ws_invalid.append([
+    invalid_sheet_rows.append([
         item["excel_row"],
         item["cardiff_label_raw"],
         item["gold_label_raw"],
         item["entropy_band_raw"],
     ])
 
-apply_basic_style(ws_invalid)
+report.add_sheet("invalid_rows", invalid_sheet_rows, max_width=30)
 
 
 # =========================
 # GUARDAR EXCEL
 # =========================
 
-wb_output.save(OUTPUT_FILE)
+report.save(OUTPUT_FILE)
 
 
 # =========================
@@ -297,12 +196,12 @@ wb_output.save(OUTPUT_FILE)
 print("CARDIFF PRECISION, RECALL Y F1 BY ENTROPY_BAND")
 print("==============================================")
 print(f"Archivo analizado: {INPUT_FILE}")
-print(f"Hoja analizada: {ws_input.title}")
+print(f"Hoja analizada: {columns.sheet_title}")
 print(f"Filas analizadas: {FIRST_DATA_ROW}-{LAST_DATA_ROW}")
 print()
 
-for band in ENTROPY_BANDS:
-    total_cases = len(data_by_band[band]["gold_labels"])
+for band_index, band in enumerate(ENTROPY_BANDS):
+    total_cases = int(confusion_by_band[band_index].sum())
     print(f"{band}: {total_cases} casos")
 
 print()
@@ -1,6 +1,10 @@
 from pathlib import Path
-from openpyxl import load_workbook, Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from annotation_loader import load_columns
+from report_writer import ReportWriter
 
 
 # =========================
@@ -15,11 +19,9 @@ SHEET_NAME = None  # None = usa la hoja activa
 FIRST_DATA_ROW = 2
 LAST_DATA_ROW = 960
 
-CHATGPT_LABEL_COL = "C"
-GOLD_LABEL_COL = "D"
-ENTROPY_BAND_COL = "E"  # Cambia esta letra si entropy_band está en otra columna
-
-VALID_LABELS = {"NEG", "NEU", "POS"}
+# Columnas localizadas por encabezado (ver annotation_schema.VARIANTES):
+# ChatGPT_label, Gold Human Label y entropy_band, ya limpias.
+INPUT_ROLES = ["chatgpt_label", "gold_label", "entropy_band"]
 ENTROPY_BANDS = ["low", "mid", "high"]
 
 
@@ -27,73 +29,23 @@ ENTROPY_BANDS = ["low", "mid", "high"]
 # FUNCIONES
 # =========================
 
-def clean_label(value):
-    if value is None:
-        return None
-
-    value = str(value).strip().upper()
-
-    if value in VALID_LABELS:
-        return value
-
-    return None
-
-
-def clean_entropy_band(value):
-    if value is None:
-        return None
-
-    value = str(value).strip().lower()
-
-    if value in ENTROPY_BANDS:
-        return value
-
-    return None
-
-
 def percentage(correct, total):
     if total == 0:
         return 0.0
     return (correct / total) * 100
 
 
-def style_header(row):
-    for cell in row:
-        cell.font = Font(bold=True)
-        cell.fill = PatternFill("solid", fgColor="D9EAF7")
-        cell.alignment = Alignment(horizontal="center")
-
-
-def apply_basic_style(ws):
-    thin = Side(style="thin", color="CCCCCC")
-    border = Border(left=thin, right=thin, top=thin, bottom=thin)
-
-    for row in ws.iter_rows():
-        for cell in row:
-            cell.border = border
-            cell.alignment = Alignment(vertical="center")
-
-    for column_cells in ws.columns:
-        max_length = 0
-        column_letter = column_cells[0].column_letter
-
-        for cell in column_cells:
-            if cell.value is not None:
-                max_length = max(max_length, len(str(cell.value)))
-
-        ws.column_dimensions[column_letter].width = min(max_length + 3, 30)
-
-
 # =========================
 # LEER EXCEL
 # =========================
 
-wb_input = load_workbook(INPUT_FILE, data_only=True)
-
-if SHEET_NAME is None:
-    ws_input = wb_input.active
-else:
-    ws_input = wb_input[SHEET_NAME]
+columns = load_columns(
+    INPUT_FILE,
+    INPUT_ROLES,
+    sheet_name=SHEET_NAME,
+    first_data_row=FIRST_DATA_ROW,
+    last_data_row=LAST_DATA_ROW
+)
 
 
 # =========================
@@ -122,18 +74,18 @@ invalid_rows = []
 # CALCULAR ACCURACY
 # =========================
 
-for row in range(FIRST_DATA_ROW, LAST_DATA_ROW + 1):
+for i, row in enumerate(columns.excel_row):
 
-    claude_label = clean_label(ws_input[f"{CHATGPT_LABEL_COL}{row}"].value)
-    gold_label = clean_label(ws_input[f"{GOLD_LABEL_COL}{row}"].value)
-    entropy_band = clean_entropy_band(ws_input[f"{ENTROPY_BAND_COL}{row}"].value)
+    chatgpt_label = columns["chatgpt_label"][i]
+    gold_label = columns["gold_label"][i]
+    entropy_band = columns["entropy_band"][i]
 
-    if claude_label is None or gold_label is None:
+    if chatgpt_label is None or gold_label is None:
         invalid_rows.append({
-            "excel_row": row,
-            "chatgpt_label_raw": ws_input[f"{CHATGPT_LABEL_COL}{row}"].value,
-            "gold_label_raw": ws_input[f"{GOLD_LABEL_COL}{row}"].value,
-            "entropy_band_raw": ws_input[f"{ENTROPY_BAND_COL}{row}"].value,
+            "excel_row": int(row),
+            "chatgpt_label_raw": columns.raw("chatgpt_label")[i],
+            "gold_label_raw": columns.raw("gold_label")[i],
+            "entropy_band_raw": columns.raw("entropy_band")[i],
             "reason": "missing_or_invalid_label",
         })
         continue
@@ -149,10 +101,10 @@ for row in range(FIRST_DATA_ROW, LAST_DATA_ROW + 1):
 
     if entropy_band is None:
         invalid_rows.append({
-            "excel_row": row,
-            "chatgpt_label_raw": ws_input[f"{CHATGPT_LABEL_COL}{row}"].value,
-            "gold_label_raw": ws_input[f"{GOLD_LABEL_COL}{row}"].value,
-            "entropy_band_raw": ws_input[f"{ENTROPY_BAND_COL}{row}"].value,
+            "excel_row": int(row),
+            "chatgpt_label_raw": columns.raw("chatgpt_label")[i],
+            "gold_label_raw": columns.raw("gold_label")[i],
+            "entropy_band_raw": columns.raw("entropy_band")[i],
             "reason": "missing_or_invalid_entropy_band",
         })
         continue
@@ -169,9 +121,7 @@ for row in range(FIRST_DATA_ROW, LAST_DATA_ROW + 1):
 # CREAR EXCEL DE SALIDA
 # =========================
 
-wb_output = Workbook()
-ws_summary = wb_output.active
-ws_summary.title = "accuracy_summary"
+report = ReportWriter()
 
 headers = [
     "set",
@@ -182,10 +132,9 @@ headers = [
     "accuracy_percent",
 ]
 
-ws_summary.append(headers)
-style_header(ws_summary[1])
+summary_rows = [headers]
 
-ws_summary.append([
+summary_rows.append([
     "overall",
     "all",
     overall["total_cases"],
@@ -199,7 +148,7 @@ for band in ENTROPY_BANDS:
     correct_cases = by_entropy_band[band]["correct_cases"]
     incorrect_cases = by_entropy_band[band]["incorrect_cases"]
 
-    ws_summary.append([
+    summary_rows.append([
         "by_entropy_band",
         band,
         total_cases,
@@ -208,30 +157,23 @@ for band in ENTROPY_BANDS:
         percentage(correct_cases, total_cases),
     ])
 
-for row in range(2, ws_summary.max_row + 1):
-    ws_summary[f"F{row}"].number_format = "0.00"
-
-apply_basic_style(ws_summary)
+report.add_sheet("accuracy_summary", summary_rows, number_formats={"F": "0.00"}, max_width=30)
 
 
 # =========================
 # HOJA DE FILAS INVÁLIDAS
 # =========================
 
-ws_invalid = wb_output.create_sheet("invalid_rows")
-
-ws_invalid.append([
+invalid_sheet_rows = [[
     "excel_row",
     "chatgpt_label_raw",
     "gold_label_raw",
     "entropy_band_raw",
     "reason",
-])
-
-style_header(ws_invalid[1])
+]]
 
 for item in invalid_rows:
-    ws_invalid.append([
+    invalid_sheet_rows.append([
         item["excel_row"],
         item["chatgpt_label_raw"],
         item["gold_label_raw"],
@@ -239,14 +181,14 @@ for item in invalid_rows:
         item["reason"],
     ])
 
-apply_basic_style(ws_invalid)
+report.add_sheet("invalid_rows", invalid_sheet_rows, max_width=30)
 
 
 # =========================
 # GUARDAR EXCEL
 # =========================
 
-wb_output.save(OUTPUT_FILE)
+report.save(OUTPUT_FILE)
 
 
 # =========================
@@ -256,7 +198,7 @@ wb_output.save(OUTPUT_FILE)
 print("CHATGPT_LABEL VS GOLD HUMAN LABEL")
 print("=================================")
 print(f"Archivo analizado: {INPUT_FILE}")
-print(f"Hoja analizada: {ws_input.title}")
+print(f"Hoja analizada: {columns.sheet_title}")
 print(f"Filas analizadas: {FIRST_DATA_ROW}-{LAST_DATA_ROW}")
 print()
 
@@ -19,6 +19,10 @@ import pandas as pd
 from openpyxl.styles import Font, Alignment, PatternFill
 from openpyxl.utils import get_column_letter
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from annotation_loader import load_frame
+
 # ----------------------- CONFIGURACIÓN -----------------------
 INPUT_FILE = "LLM_prueba_anotation_Claude.xlsx"   # archivo de entrada
 OUTPUT_FILE = "accuracy_summary.xlsx"             # archivo de salida
@@ -48,7 +52,7 @@ def main():
     if not Path(INPUT_FILE).exists():
         sys.exit(f"No se encontró el archivo de entrada: {INPUT_FILE}")
 
-    df = pd.read_excel(INPUT_FILE)
+    df = load_frame(INPUT_FILE)
 
     resolved = {}
     missing = []
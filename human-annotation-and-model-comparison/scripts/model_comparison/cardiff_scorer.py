@@ -0,0 +1,693 @@
+"""
+Clasificador Cardiff (cardiffnlp/twitter-xlm-roberta-base-sentiment) como
+módulo reutilizable.
+
+01_cardiff_context_sentiment.py lo usa para la muestra anotada; cualquier
+otro script puede importarlo para puntuar textos sin pasar por el Excel:
+
+    scorer = CardiffScorer()
+    probabilities = scorer.score(texts)          # ndarray (N, 3): NEG, NEU, POS
+
+    for chunk in scorer.score_frames("corpus.parquet", word_column="Word"):
+        ...                                        # DataFrame por bloque
+
+Contenido:
+- ventana de contexto alrededor del adjetivo (extract_context_window,
+  candidate_forms): 5 palabras a cada lado, con variantes de género y
+  número;
+- mapeo de las etiquetas del modelo a NEG / NEU / POS;
+- CardiffScorer: tokenización rápida de cada bloque de una vez, lotes
+  ordenados por longitud e inferencia en torch.inference_mode(), con
+  tiempos por etapa;
+- entrada como lista de textos, DataFrame o Parquet, procesada por bloques
+  (score_frames) para que el corpus completo no tenga que caber en memoria;
+- caché de probabilidades opcional (model_cache.py, el mismo archivo
+  SQLite que las etiquetas de LLM): con cache=ModelCache(), cada texto
+  distinto se puntúa una sola vez y los ya puntuados no pasan por el
+  modelo;
+- ItemEntropy: entropía media, entropía agregada y JSD por ítem (como en
+  el README principal, sección 5.5) acumuladas bloque a bloque, para tener
+  una segunda entropía por ítem junto a la de RoBERTuito.
+
+torch y transformers solo hacen falta para CardiffScorer; la ventana de
+contexto y las entropías funcionan sin ellos. pyarrow solo para Parquet.
+
+Ejecutado como script, puntúa CORPUS_FILE (Parquet, CSV o Excel con las
+columnas Word y Sentence) y escribe las probabilidades por oración y las
+entropías por ítem.
+"""
+
+from pathlib import Path
+import csv
+import math
+import re
+import sys
+import time
+import unicodedata
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+try:
+    import torch
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+except ImportError:
+    torch = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "Scripts"))
+
+from annotation_loader import load_frame
+from model_cache import ModelCache, USE_MODEL_CACHE, content_hash
+from indice_formas import indice_por_defecto, clave
+from tablas import a_tabla
+
+
+# =========================
+# CONFIGURACIÓN
+# =========================
+
+MODEL_NAME = "cardiffnlp/twitter-xlm-roberta-base-sentiment"
+
+LABELS = ["NEG", "NEU", "POS"]
+
+LEFT_WINDOW = 5
+RIGHT_WINDOW = 5
+
+USE_FULL_SENTENCE_IF_TARGET_NOT_FOUND = True
+
+BATCH_SIZE = 64
+MAX_LENGTH = 128
+
+USE_FAST_TOKENIZER = True
+SORT_BY_LENGTH = True
+
+# Textos por bloque al procesar listas, DataFrames o Parquet grandes
+CHUNK_SIZE = 10_000
+
+# Ejecución como script
+CORPUS_FILE = Path(
+    "sample_1000_sentences_for_manual_annotation_randomized_auto_label_gold_entropy_band_Comparsion.xlsx"
+)
+WORD_COLUMN = "Word"
+SENTENCE_COLUMN = "Sentence"
+
+OUTPUT_SCORES_FILE = Path("cardiff_scores.parquet")
+OUTPUT_ITEMS_CSV = Path("cardiff_item_entropy.csv")
+
+
+# =========================
+# FUNCIONES DE NORMALIZACIÓN
+# =========================
+
+def normalize_text(value):
+    """
+    Normaliza texto para comparar palabras:
+    - minúsculas
+    - sin espacios externos
+    - sin acentos
+    """
+    if value is None:
+        return ""
+
+    value = str(value).strip().lower()
+    value = unicodedata.normalize("NFD", value)
+    value = "".join(ch for ch in value if unicodedata.category(ch) != "Mn")
+    return value
+
+
+def candidate_forms(target):
+    """
+    Genera algunas variantes morfológicas simples para adjetivos españoles.
+    Esto ayuda si la columna Word contiene el lema, pero en la oración aparece
+    una forma flexionada: bueno/buena/buenos/buenas, alto/alta/altos/altas, etc.
+
+    extract_context_window solo la usa para palabras que no están en los
+    lexicones; las demás se buscan en el índice de Scripts/indice_formas.py,
+    que para los adjetivos genera estas mismas variantes.
+    """
+    target = normalize_text(target)
+    forms = {target}
+
+    if target.endswith("o") and len(target) > 2:
+        stem = target[:-1]
+        forms.update({
+            stem + "a",
+            stem + "os",
+            stem + "as",
+            stem,        # posible forma apocopada: bueno -> buen
+        })
+
+    elif target.endswith("e") and len(target) > 2:
+        forms.add(target + "s")
+
+    elif target.endswith("z") and len(target) > 2:
+        forms.add(target[:-1] + "ces")
+
+    elif len(target) > 2:
+        forms.add(target + "s")
+        forms.add(target + "es")
+
+    return forms
+
+
+# =========================
+# TOKENIZACIÓN LOCAL PARA VENTANA
+# =========================
+
+TOKEN_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+WORD_RE = re.compile(r"^\w+$", re.UNICODE)
+
+
+def tokenize_with_punctuation(text):
+    if text is None:
+        return []
+    return TOKEN_RE.findall(str(text))
+
+
+def is_word_token(token):
+    return bool(WORD_RE.match(token))
+
+
+def detokenize(tokens):
+    """
+    Reconstruye un fragmento evitando espacios antes de puntuación.
+    """
+    text = ""
+
+    no_space_before = {".", ",", ";", ":", "!", "?", "%", ")", "]", "}", "»", "”"}
+    no_space_after = {"¿", "¡", "(", "[", "{", "«", "“"}
+
+    for token in tokens:
+        if not text:
+            text = token
+        elif token in no_space_before:
+            text += token
+        elif text[-1] in no_space_after:
+            text += token
+        else:
+            text += " " + token
+
+    return text
+
+
+def extract_context_window(
+    sentence,
+    target_word,
+    left_window=LEFT_WINDOW,
+    right_window=RIGHT_WINDOW,
+    use_full_sentence=USE_FULL_SENTENCE_IF_TARGET_NOT_FOUND
+):
+    """
+    Busca la palabra objetivo en la oración y devuelve una ventana de:
+    5 palabras a la izquierda + target + 5 palabras a la derecha.
+
+    Si no encuentra el target, puede devolver la oración completa como fallback.
+
+    Cada token se compara con una consulta al índice forma -> lema de los
+    lexicones (la normalización de cada token distinto se guarda en caché).
+    """
+    tokens = tokenize_with_punctuation(sentence)
+
+    index = indice_por_defecto()
+    target = clave(target_word)
+
+    if target in index:
+        def is_target(token):
+            return index.es_forma_de(token, target)
+    else:
+        target_forms = candidate_forms(target_word)
+
+        def is_target(token):
+            return clave(token) in target_forms
+
+    word_token_indices = [
+        i for i, token in enumerate(tokens)
+        if is_word_token(token)
+    ]
+
+    target_word_position = None
+
+    for word_position, token_index in enumerate(word_token_indices):
+        if is_target(tokens[token_index]):
+            target_word_position = word_position
+            break
+
+    if target_word_position is None:
+        if use_full_sentence:
+            return str(sentence), False
+        else:
+            return "", False
+
+    left_word_position = max(0, target_word_position - left_window)
+    right_word_position = min(
+        len(word_token_indices) - 1,
+        target_word_position + right_window
+    )
+
+    left_token_index = word_token_indices[left_word_position]
+    right_token_index = word_token_indices[right_word_position]
+
+    context_tokens = tokens[left_token_index:right_token_index + 1]
+    context_text = detokenize(context_tokens)
+
+    return context_text, True
+
+
+def context_windows(words, sentences, left_window=LEFT_WINDOW, right_window=RIGHT_WINDOW):
+    """
+    Ventanas de contexto de varias oraciones. Devuelve (contextos, target
+    encontrado) como listas.
+    """
+    contexts = []
+    found = []
+
+    for word, sentence in zip(words, sentences):
+        context, target_found = extract_context_window(
+            sentence=sentence,
+            target_word=word,
+            left_window=left_window,
+            right_window=right_window
+        )
+        contexts.append(context)
+        found.append(target_found)
+
+    return contexts, found
+
+
+# =========================
+# MAPEO DE ETIQUETAS DEL MODELO
+# =========================
+
+def map_cardiff_label(label):
+    """
+    Cardiff suele devolver:
+    negative / neutral / positive
+
+    También dejamos contemplado el caso:
+    LABEL_0 / LABEL_1 / LABEL_2
+    """
+    label = str(label).strip().lower()
+
+    mapping = {
+        "negative": "NEG",
+        "neutral": "NEU",
+        "positive": "POS",
+        "neg": "NEG",
+        "neu": "NEU",
+        "pos": "POS",
+        "label_0": "NEG",
+        "label_1": "NEU",
+        "label_2": "POS",
+    }
+
+    if label not in mapping:
+        raise ValueError(f"No sé mapear esta etiqueta del modelo: {label}")
+
+    return mapping[label]
+
+
+def predicted_labels(probabilities):
+    """
+    Etiqueta con más probabilidad de cada fila (en empate, la primera de
+    NEG / NEU / POS).
+    """
+    return [LABELS[i] for i in np.asarray(probabilities).argmax(axis=1)]
+
+
+# =========================
+# ENTROPÍA
+# =========================
+
+def normalized_entropy(probabilities):
+    """
+    Entropía de Shannon (base 2) de cada fila, dividida por log2(3):
+    H en [0, 1], con 0 * log 0 = 0.
+    """
+    p = np.asarray(probabilities, dtype=np.float64)
+    terms = np.zeros_like(p)
+    np.log2(p, out=terms, where=p > 0)
+    return 0.0 - (p * terms).sum(axis=-1) / math.log2(len(LABELS))
+
+
+class ItemEntropy:
+    """
+    Acumula, bloque a bloque, la entropía media, la entropía agregada y la
+    JSD (agregada - media) de cada ítem a partir de las probabilidades por
+    oración.
+    """
+
+    def __init__(self):
+        self.items = {}
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.entropy_sums = np.zeros(0, dtype=np.float64)
+        self.probability_sums = np.zeros((0, len(LABELS)), dtype=np.float64)
+
+    def add(self, items, probabilities):
+        codes = np.fromiter(
+            (self.items.setdefault(item, len(self.items)) for item in items),
+            dtype=np.int64,
+            count=len(items)
+        )
+
+        n_items = len(self.items)
+        if n_items > len(self.counts):
+            grow = n_items - len(self.counts)
+            self.counts = np.concatenate([self.counts, np.zeros(grow, dtype=np.int64)])
+            self.entropy_sums = np.concatenate([self.entropy_sums, np.zeros(grow)])
+            self.probability_sums = np.vstack([self.probability_sums, np.zeros((grow, len(LABELS)))])
+
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+
+        self.counts += np.bincount(codes, minlength=n_items)
+        self.entropy_sums += np.bincount(codes, weights=normalized_entropy(probabilities), minlength=n_items)
+        for j in range(len(LABELS)):
+            self.probability_sums[:, j] += np.bincount(codes, weights=probabilities[:, j], minlength=n_items)
+
+    def result(self):
+        """
+        DataFrame con una fila por ítem: n_sentences, media de NEG / NEU /
+        POS, mean_entropy, aggregate_entropy y jsd.
+        """
+        counts = np.maximum(self.counts, 1)[:, None]
+        mean_probabilities = self.probability_sums / counts
+        mean_entropy = self.entropy_sums / counts[:, 0]
+        aggregate_entropy = normalized_entropy(mean_probabilities)
+
+        table = pd.DataFrame({"item": list(self.items), "n_sentences": self.counts})
+        for j, label in enumerate(LABELS):
+            table[f"mean_{label}"] = mean_probabilities[:, j]
+        table["mean_entropy"] = mean_entropy
+        table["aggregate_entropy"] = aggregate_entropy
+        table["jsd"] = aggregate_entropy - mean_entropy
+
+        return table
+
+
+# =========================
+# ENTRADA POR BLOQUES
+# =========================
+
+def iter_frames(source, chunk_size=CHUNK_SIZE, columns=None):
+    """
+    Recorre source por bloques de DataFrame:
+    - lista (o iterable) de textos -> columna "text";
+    - DataFrame -> porciones de chunk_size filas;
+    - ruta .parquet -> lotes de pyarrow (solo las columnas pedidas);
+    - ruta .csv (;) o .xlsx -> se lee entera y se divide.
+    """
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, len(source), chunk_size):
+            yield source.iloc[start:start + chunk_size]
+        return
+
+    if isinstance(source, (str, Path)):
+        path = Path(source)
+        suffix = path.suffix.lower()
+
+        if suffix == ".parquet":
+            if pq is None:
+                raise ImportError("Leer Parquet necesita pyarrow")
+
+            parquet_file = pq.ParquetFile(path)
+            for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+                yield batch.to_pandas()
+            return
+
+        if suffix == ".csv":
+            frame = pd.read_csv(path, sep=";", encoding="utf-8-sig", usecols=columns)
+        else:
+            frame = load_frame(path)
+
+        yield from iter_frames(frame, chunk_size)
+        return
+
+    texts = []
+    for text in source:
+        texts.append(text)
+        if len(texts) == chunk_size:
+            yield pd.DataFrame({"text": texts})
+            texts = []
+
+    if texts:
+        yield pd.DataFrame({"text": texts})
+
+
+# =========================
+# CLASIFICADOR
+# =========================
+
+class CardiffScorer:
+    """
+    Carga el modelo una vez y devuelve probabilidades NEG / NEU / POS.
+    self.timings acumula los segundos de tokenize / forward / postprocess.
+
+    Con cache (ModelCache), las probabilidades se guardan con clave
+    (modelo y MAX_LENGTH, hash del texto).
+    """
+
+    def __init__(
+        self,
+        model_name=MODEL_NAME,
+        device=None,
+        batch_size=BATCH_SIZE,
+        max_length=MAX_LENGTH,
+        use_fast=USE_FAST_TOKENIZER,
+        sort_by_length=SORT_BY_LENGTH,
+        progress=True,
+        cache=None
+    ):
+        if torch is None:
+            raise ImportError("CardiffScorer necesita torch y transformers")
+
+        if device is None:
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+
+        self.model_name = model_name
+        self.device = torch.device(device)
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.sort_by_length = sort_by_length
+        self.progress = progress
+        self.cache = cache
+        self.cache_key = f"{model_name}|max_length={max_length}"
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=use_fast)
+        self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        self.model.to(self.device)
+        self.model.eval()
+
+        # Columna de salida del modelo que corresponde a NEG / NEU / POS
+        id2label = self.model.config.id2label
+        class_by_label = {map_cardiff_label(label): class_id for class_id, label in id2label.items()}
+        self.label_columns = [class_by_label[label] for label in LABELS]
+
+        self.timings = {"tokenize": 0.0, "forward": 0.0, "postprocess": 0.0}
+        self.n_scored = 0
+        self.n_cached = 0
+
+    def score(self, texts):
+        """
+        Probabilidades (N, 3) en float32, columnas NEG / NEU / POS, en el
+        orden de texts. Con caché, solo pasan por el modelo los textos
+        distintos que no estén en ella.
+        """
+        texts = ["" if text is None else str(text) for text in texts]
+
+        if self.cache is None:
+            return self.infer(texts)
+
+        hashes = [content_hash(text) for text in texts]
+        found = self.cache.get_probabilities(self.cache_key, hashes)
+
+        pending = {}
+        for text, text_hash in zip(texts, hashes):
+            if text_hash not in found and text_hash not in pending:
+                pending[text_hash] = text
+
+        if pending:
+            scored = self.infer(list(pending.values()))
+            self.cache.put_probabilities(self.cache_key, list(pending), scored)
+            found.update(zip(pending, scored))
+
+        self.n_cached += len(texts) - len(pending)
+
+        probabilities = np.zeros((len(texts), len(LABELS)), dtype=np.float32)
+        for i, text_hash in enumerate(hashes):
+            probabilities[i] = found[text_hash]
+        return probabilities
+
+    def infer(self, texts):
+        """
+        Probabilidades de texts con el modelo, sin caché. Los textos se
+        tokenizan de una vez y se procesan en lotes ordenados por longitud.
+        """
+        probabilities = np.zeros((len(texts), len(LABELS)), dtype=np.float32)
+
+        if not texts:
+            return probabilities
+
+        stage_start = time.perf_counter()
+        input_ids = self.tokenizer(
+            texts,
+            truncation=True,
+            max_length=self.max_length
+        )["input_ids"]
+
+        if self.sort_by_length:
+            order = np.argsort([len(ids) for ids in input_ids], kind="stable")
+        else:
+            order = np.arange(len(input_ids))
+        self.timings["tokenize"] += time.perf_counter() - stage_start
+
+        batches = range(0, len(order), self.batch_size)
+
+        with torch.inference_mode():
+            for start in tqdm(batches, disable=not self.progress):
+                batch_index = order[start:start + self.batch_size]
+
+                stage_start = time.perf_counter()
+                encoded = self.tokenizer.pad(
+                    {"input_ids": [input_ids[i] for i in batch_index]},
+                    padding=True,
+                    return_tensors="pt"
+                )
+                encoded = {
+                    key: value.to(self.device)
+                    for key, value in encoded.items()
+                }
+                self.timings["tokenize"] += time.perf_counter() - stage_start
+
+                stage_start = time.perf_counter()
+                logits = self.model(**encoded).logits
+                batch_probabilities = torch.softmax(logits, dim=-1).cpu().numpy()
+                self.timings["forward"] += time.perf_counter() - stage_start
+
+                stage_start = time.perf_counter()
+                probabilities[batch_index] = batch_probabilities[:, self.label_columns]
+                self.timings["postprocess"] += time.perf_counter() - stage_start
+
+        self.n_scored += len(texts)
+        return probabilities
+
+    def iter_scores(self, texts, chunk_size=CHUNK_SIZE):
+        """
+        Igual que score() pero por bloques de chunk_size textos: devuelve un
+        array (n, 3) por bloque, sin tener todos los textos en memoria.
+        """
+        for frame in iter_frames(texts, chunk_size):
+            yield self.score(frame["text"].tolist())
+
+    def score_frames(
+        self,
+        source,
+        word_column=None,
+        sentence_column=SENTENCE_COLUMN,
+        chunk_size=CHUNK_SIZE
+    ):
+        """
+        Recorre source (lista, DataFrame o ruta Parquet / CSV / Excel) por
+        bloques y devuelve cada bloque como DataFrame con las columnas de
+        entrada más cardiff_neg / cardiff_neu / cardiff_pos / cardiff_label.
+
+        Con word_column, se puntúa la ventana de contexto alrededor de la
+        palabra (y se añaden cardiff_context_window y cardiff_target_found);
+        sin ella, el texto completo de sentence_column ("text" para listas).
+        """
+        columns = None
+        if isinstance(source, (str, Path)) and word_column is not None:
+            columns = [word_column, sentence_column]
+
+        for frame in iter_frames(source, chunk_size, columns=columns):
+            frame = frame.copy()
+
+            if "text" in frame.columns and sentence_column not in frame.columns:
+                text_column = "text"
+            else:
+                text_column = sentence_column
+
+            stage_start = time.perf_counter()
+            if word_column is None:
+                texts = frame[text_column].tolist()
+            else:
+                texts, found = context_windows(frame[word_column].tolist(), frame[text_column].tolist())
+                frame["cardiff_context_window"] = texts
+                frame["cardiff_target_found"] = found
+            self.timings["postprocess"] += time.perf_counter() - stage_start
+
+            probabilities = self.score(texts)
+
+            for j, label in enumerate(LABELS):
+                frame[f"cardiff_{label.lower()}"] = probabilities[:, j]
+            frame["cardiff_label"] = predicted_labels(probabilities)
+
+            yield frame
+
+    def timing_summary(self):
+        total = sum(self.timings.values())
+        rate = self.n_scored / total if total > 0 else 0.0
+
+        return (
+            f"tokenización {self.timings['tokenize']:.2f} s, "
+            f"forward {self.timings['forward']:.2f} s, "
+            f"postproceso {self.timings['postprocess']:.2f} s "
+            f"({self.n_scored} textos, {rate:.1f} por segundo; {self.n_cached} desde la caché)"
+        )
+
+
+# =========================
+# EJECUCIÓN
+# =========================
+
+def main():
+    if pq is None:
+        raise ImportError("Escribir las puntuaciones en Parquet necesita pyarrow")
+
+    print("Cargando modelo...")
+    print(f"Modelo: {MODEL_NAME}")
+
+    scorer = CardiffScorer(cache=ModelCache() if USE_MODEL_CACHE else None)
+    print(f"Dispositivo: {scorer.device}")
+    print(f"Corpus: {CORPUS_FILE}")
+
+    entropy = ItemEntropy()
+    writer = None
+
+    try:
+        for frame in scorer.score_frames(CORPUS_FILE, word_column=WORD_COLUMN, sentence_column=SENTENCE_COLUMN):
+            entropy.add(
+                [str(word).strip().lower() for word in frame[WORD_COLUMN]],
+                frame[[f"cardiff_{label.lower()}" for label in LABELS]].to_numpy()
+            )
+
+            # Probabilidades float32 y etiqueta / palabra como categoría
+            table = a_tabla(frame)
+            if writer is None:
+                writer = pq.ParquetWriter(OUTPUT_SCORES_FILE, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    items = entropy.result()
+    items.to_csv(OUTPUT_ITEMS_CSV, sep=";", index=False, encoding="utf-8-sig", quoting=csv.QUOTE_MINIMAL)
+
+    print()
+    print("ANÁLISIS COMPLETADO")
+    print("===================")
+    print(f"Oraciones puntuadas: {scorer.n_scored + scorer.n_cached} ({scorer.n_cached} desde la caché)")
+    print(f"Ítems: {len(items)}")
+    print(f"Tiempos: {scorer.timing_summary()}")
+    print(f"Archivos creados: {OUTPUT_SCORES_FILE}, {OUTPUT_ITEMS_CSV}")
+
+
+if __name__ == "__main__":
+    main()
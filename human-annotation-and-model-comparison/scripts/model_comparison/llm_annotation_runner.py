@@ -0,0 +1,423 @@
+"""
+Anotación de la muestra con un LLM a través de una API HTTP.
+
+Las etiquetas de ChatGPT y Claude de LLM_prueba_anotation_*.xlsx se
+obtuvieron en las interfaces web (README, sección del protocolo LLM). Este
+script repite la anotación por API para poder rehacerla o ampliarla al
+corpus completo:
+
+- las oraciones se envían por lotes (BATCH_SIZE por petición), numeradas,
+  con la misma instrucción que el prompt original adaptada a una lista;
+- las peticiones se lanzan en paralelo con asyncio, como mucho
+  MAX_CONCURRENCY a la vez;
+- los errores transitorios (429, 5xx, timeouts, conexión) y las respuestas
+  mal formadas (cuerpo que no es JSON o sin el texto esperado) se
+  reintentan con espera exponencial (o la de Retry-After, si es un número
+  de segundos); un lote que agota los reintentos cuenta como fallido y el
+  libro de salida se escribe igualmente;
+- cada oración distinta (palabra + fragmento) se pide una sola vez, y
+  solo si no está ya en la caché de model_cache.py para este modelo y esta
+  plantilla de prompt. La caché guarda la etiqueta y la respuesta en bruto,
+  así que volver a ejecutar no repite ninguna petición ya respondida;
+- si en una respuesta faltan oraciones o la etiqueta no es válida, esas
+  oraciones se vuelven a pedir en un lote nuevo (hasta MAX_RETRIES veces).
+
+El punto de acceso es configurable (ENDPOINT_URL y API_FORMAT: "anthropic",
+"openai" o "simple"). mock_llm_server.py levanta un servidor local que
+responde en los tres formatos, para probar el script sin API real.
+
+Con OFFLINE (LLM_OFFLINE=1) no se hace ninguna petición: el libro de
+salida se reconstruye solo con las etiquetas de la caché.
+
+La salida tiene el mismo esquema que LLM_prueba_anotation_Claude.xlsx
+(Word, Context, <LABEL_HEADER>, Gold Human Label, entropy_band), así que
+Accuracy_LLM_Claude.py / 06_Accuracy_LLM_GPT.py y multi_model_evaluation.py
+pueden evaluarla directamente.
+"""
+
+from pathlib import Path
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import time
+import urllib.error
+import urllib.request
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from annotation_loader import load_columns
+from annotation_schema import clean_label, LABELS
+from model_cache import ModelCache, USE_MODEL_CACHE, content_hash, template_hash
+
+
+# =========================
+# CONFIGURACIÓN
+# =========================
+
+INPUT_FILE = Path(
+    "sample_1000_sentences_for_manual_annotation_randomized_auto_label_gold_entropy_band_Comparsion.xlsx"
+)
+
+FIRST_DATA_ROW = 2
+LAST_DATA_ROW = 960
+
+INPUT_ROLES = ["word", "sentence", "gold_label", "entropy_band"]
+
+LABEL_HEADER = "Claude_label"
+OUTPUT_FILE = Path("LLM_api_annotation_Claude.xlsx")
+
+# Punto de acceso. Por defecto, el servidor local de mock_llm_server.py
+ENDPOINT_URL = os.environ.get("LLM_ENDPOINT", "http://127.0.0.1:8765/v1/messages")
+API_FORMAT = os.environ.get("LLM_API_FORMAT", "anthropic")   # anthropic / openai / simple
+MODEL_NAME = os.environ.get("LLM_MODEL", "mock-model")
+API_KEY_ENV = "LLM_API_KEY"
+
+BATCH_SIZE = 40
+MAX_CONCURRENCY = 4
+MAX_RETRIES = 5
+BACKOFF_SECONDS = 1.0
+TIMEOUT_SECONDS = 120
+MAX_TOKENS = 1024
+
+# Reconstruye la salida solo desde la caché, sin peticiones
+OFFLINE = os.environ.get("LLM_OFFLINE", "") == "1"
+
+PROMPT_TEMPLATE = (
+    "En esta lista tienes {n} fragmentos de expresiones humanas en lengua española. "
+    "Cada línea tiene un número, una palabra y, tras \" | \", un fragmento con esa palabra "
+    "contextualizada. Indica qué tipo de sentimiento crees que tiene la palabra en el contexto "
+    "del fragmento según tu criterio. Debes elegir una de estas 3 etiquetas: POS (de positivo) / "
+    "NEU (de neutro) / NEG (de negativo). Responde solo con una línea por fragmento, con el número "
+    "y la etiqueta separados por un tabulador, sin ningún otro texto.\n\n{items}"
+)
+
+LABEL_LINE_RE = re.compile(r"^\W*(\d+)\W+(POS|NEU|NEG)\b", re.IGNORECASE | re.MULTILINE)
+
+
+# =========================
+# PROMPT Y RESPUESTA
+# =========================
+
+def build_prompt(items):
+    """items: lista de (palabra, fragmento). Numeración desde 1."""
+    lines = [
+        f"{i}. {' '.join(str(word).split())} | {' '.join(str(context).split())}"
+        for i, (word, context) in enumerate(items, start=1)
+    ]
+    return PROMPT_TEMPLATE.format(n=len(items), items="\n".join(lines))
+
+
+def parse_labels(text, n_items):
+    """
+    {número de línea: etiqueta} de las líneas válidas de la respuesta.
+    Si un número aparece varias veces, cuenta la primera.
+    """
+    labels = {}
+    for match in LABEL_LINE_RE.finditer(text or ""):
+        number = int(match.group(1))
+        if 1 <= number <= n_items and number not in labels:
+            labels[number] = clean_label(match.group(2))
+    return labels
+
+
+def request_body(prompt, api_format=API_FORMAT, model=MODEL_NAME):
+    if api_format in ("anthropic", "openai"):
+        return {
+            "model": model,
+            "max_tokens": MAX_TOKENS,
+            "messages": [{"role": "user", "content": prompt}],
+        }
+    if api_format == "simple":
+        return {"model": model, "prompt": prompt}
+    raise ValueError(f"API_FORMAT desconocido: {api_format}")
+
+
+def request_headers(api_format=API_FORMAT, api_key=None):
+    headers = {"content-type": "application/json"}
+    if api_key:
+        if api_format == "anthropic":
+            headers["x-api-key"] = api_key
+            headers["anthropic-version"] = "2023-06-01"
+        else:
+            headers["authorization"] = f"Bearer {api_key}"
+    return headers
+
+
+def response_text(data, api_format=API_FORMAT):
+    """Texto de la respuesta y tokens (entrada, salida) si la API los da."""
+    usage = data.get("usage") or {}
+
+    if api_format == "anthropic":
+        text = "".join(block.get("text", "") for block in data.get("content", []) if block.get("type") == "text")
+        return text, (usage.get("input_tokens", 0), usage.get("output_tokens", 0))
+
+    if api_format == "openai":
+        text = data["choices"][0]["message"]["content"]
+        return text, (usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0))
+
+    return data.get("text", ""), (usage.get("input_tokens", 0), usage.get("output_tokens", 0))
+
+
+# =========================
+# PUNTO DE ACCESO HTTP
+# =========================
+
+class RetryableError(Exception):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value):
+    """
+    Segundos de espera de una cabecera Retry-After, o None si no es un
+    número de segundos (p. ej. una fecha HTTP): entonces ask() usa la espera
+    exponencial.
+    """
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        return None
+    return seconds if seconds >= 0 else None
+
+
+class HttpEndpoint:
+    """
+    POST síncrono con urllib (se ejecuta en un hilo desde asyncio).
+    429, 5xx, timeouts, errores de conexión y respuestas mal formadas ->
+    RetryableError; el resto de errores HTTP se propaga.
+    """
+
+    def __init__(self, url=ENDPOINT_URL, api_format=API_FORMAT, model=MODEL_NAME,
+                 api_key=None, timeout=TIMEOUT_SECONDS):
+        self.url = url
+        self.api_format = api_format
+        self.model = model
+        self.api_key = api_key if api_key is not None else os.environ.get(API_KEY_ENV)
+        self.timeout = timeout
+
+    def post(self, prompt):
+        body = json.dumps(request_body(prompt, self.api_format, self.model)).encode("utf-8")
+        request = urllib.request.Request(
+            self.url,
+            data=body,
+            headers=request_headers(self.api_format, self.api_key),
+            method="POST"
+        )
+
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                raw = response.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 429 or e.code >= 500:
+                retry_after = e.headers.get("retry-after") if e.headers else None
+                raise RetryableError(f"HTTP {e.code}", parse_retry_after(retry_after))
+            raise
+        except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+            raise RetryableError(str(e))
+
+        # Un 200 con un cuerpo que no es JSON o sin el campo del texto (p. ej.
+        # "choices" en formato openai) se trata como un error transitorio
+        try:
+            return response_text(json.loads(raw.decode("utf-8")), self.api_format)
+        except (ValueError, KeyError, IndexError, TypeError, AttributeError) as e:
+            raise RetryableError(f"Respuesta mal formada: {type(e).__name__}: {e}")
+
+
+# =========================
+# ANOTACIÓN ASÍNCRONA
+# =========================
+
+def new_stats():
+    return {
+        "items": 0,
+        "unique_items": 0,
+        "cache_hits": 0,
+        "batches": 0,
+        "requests": 0,
+        "retries": 0,
+        "reasked_items": 0,
+        "failed_batches": 0,
+        "input_tokens": 0,
+        "output_tokens": 0,
+    }
+
+
+def item_hashes(items):
+    return [content_hash(word, context) for word, context in items]
+
+
+async def ask(prompt, endpoint, semaphore, stats, max_retries=MAX_RETRIES, backoff=BACKOFF_SECONDS):
+    """Texto de la respuesta del punto de acceso a prompt, con reintentos."""
+    for attempt in range(max_retries + 1):
+        try:
+            async with semaphore:
+                stats["requests"] += 1
+                text, (input_tokens, output_tokens) = await asyncio.to_thread(endpoint.post, prompt)
+            break
+        except RetryableError as e:
+            if attempt == max_retries:
+                raise
+            stats["retries"] += 1
+            delay = e.retry_after if e.retry_after is not None else backoff * 2 ** attempt
+            await asyncio.sleep(delay * (1 + 0.25 * random.random()))
+
+    stats["input_tokens"] += input_tokens
+    stats["output_tokens"] += output_tokens
+    return text
+
+
+async def annotate_batch(indices, items, hashes, labels, endpoint, cache, semaphore, stats,
+                         max_retries=MAX_RETRIES):
+    """
+    Etiqueta items[indices] (labels: hash de ítem -> etiqueta) y vuelve a
+    pedir, en un lote nuevo, los que falten en la respuesta.
+    """
+    for attempt in range(max_retries + 1):
+        if not indices:
+            return
+
+        stats["batches"] += 1
+        prompt = build_prompt([items[i] for i in indices])
+
+        try:
+            text = await ask(prompt, endpoint, semaphore, stats, max_retries)
+        except (RetryableError, urllib.error.HTTPError) as e:
+            stats["failed_batches"] += 1
+            print(f"[AVISO] Lote de {len(indices)} oraciones sin respuesta: {e}", file=sys.stderr)
+            return
+
+        parsed = parse_labels(text, len(indices))
+        answered = {}
+        missing = []
+
+        for position, index in enumerate(indices, start=1):
+            if position in parsed:
+                answered[hashes[index]] = parsed[position]
+            else:
+                missing.append(index)
+
+        labels.update(answered)
+        if cache is not None and answered:
+            cache.put_labels(endpoint.model, PROMPT_TEMPLATE, answered, text)
+
+        if missing and attempt < max_retries:
+            stats["reasked_items"] += len(missing)
+        indices = missing
+
+
+async def annotate(items, endpoint, cache=None, batch_size=BATCH_SIZE, max_concurrency=MAX_CONCURRENCY,
+                   max_retries=MAX_RETRIES):
+    """
+    Etiquetas (NEG / NEU / POS, o None si no se obtuvo) para cada
+    (palabra, fragmento) de items, y estadísticas de la ejecución.
+
+    Cada oración distinta se pide una sola vez, y solo si no está en la
+    caché para este modelo y plantilla.
+    """
+    hashes = item_hashes(items)
+    first_index = {}
+    for index, item_hash in enumerate(hashes):
+        first_index.setdefault(item_hash, index)
+
+    labels = cache.get_labels(endpoint.model, PROMPT_TEMPLATE, hashes) if cache is not None else {}
+
+    stats = new_stats()
+    stats["items"] = len(items)
+    stats["unique_items"] = len(first_index)
+    stats["cache_hits"] = len(labels)
+
+    pending = [index for item_hash, index in first_index.items() if item_hash not in labels]
+    batches = [pending[start:start + batch_size] for start in range(0, len(pending), batch_size)]
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    await asyncio.gather(*(
+        annotate_batch(batch, items, hashes, labels, endpoint, cache, semaphore, stats, max_retries)
+        for batch in batches
+    ))
+
+    return [labels.get(item_hash) for item_hash in hashes], stats
+
+
+def replay(items, cache, model=MODEL_NAME):
+    """
+    Etiquetas de items solo desde la caché, sin ninguna petición (None si
+    la oración no está).
+    """
+    hashes = item_hashes(items)
+    labels = cache.get_labels(model, PROMPT_TEMPLATE, hashes)
+
+    stats = new_stats()
+    stats["items"] = len(items)
+    stats["unique_items"] = len(set(hashes))
+    stats["cache_hits"] = len(labels)
+
+    return [labels.get(item_hash) for item_hash in hashes], stats
+
+
+# =========================
+# EJECUCIÓN
+# =========================
+
+def main():
+    columns = load_columns(INPUT_FILE, INPUT_ROLES, first_data_row=FIRST_DATA_ROW, last_data_row=LAST_DATA_ROW)
+
+    words = list(columns.raw("word"))
+    sentences = list(columns.raw("sentence"))
+    items = list(zip(words, sentences))
+
+    endpoint = HttpEndpoint()
+    cache = ModelCache() if USE_MODEL_CACHE or OFFLINE else None
+
+    print(f"Archivo de entrada: {INPUT_FILE}")
+    print(f"Oraciones: {len(items)} | lotes de {BATCH_SIZE} | concurrencia: {MAX_CONCURRENCY}")
+    print(f"Modelo: {MODEL_NAME} | plantilla: {template_hash(PROMPT_TEMPLATE)[:12]}")
+    if OFFLINE:
+        print(f"Modo sin conexión: solo etiquetas de {cache.path}")
+    else:
+        print(f"Punto de acceso: {endpoint.url} ({endpoint.api_format})")
+
+    start = time.perf_counter()
+    if OFFLINE:
+        labels, stats = replay(items, cache)
+    else:
+        labels, stats = asyncio.run(annotate(items, endpoint, cache))
+    elapsed = time.perf_counter() - start
+
+    output = pd.DataFrame({
+        "Word": words,
+        "Context": sentences,
+        LABEL_HEADER: labels,
+        "Gold Human Label": list(columns.raw("gold_label")),
+        "entropy_band": list(columns.raw("entropy_band")),
+    })
+    output.to_excel(OUTPUT_FILE, index=False)
+
+    labeled = sum(1 for label in labels if label in LABELS)
+    hit_rate = stats["cache_hits"] / stats["unique_items"] if stats["unique_items"] else 0.0
+
+    print()
+    print("ANOTACIÓN COMPLETADA")
+    print("====================")
+    print(f"Archivo de salida: {OUTPUT_FILE}")
+    print(f"Etiquetadas: {labeled} / {len(items)}")
+    print(f"Oraciones distintas: {stats['unique_items']} | en caché: {stats['cache_hits']} ({hit_rate:.1%})")
+    print(f"Lotes: {stats['batches']} | peticiones: {stats['requests']} | reintentos: {stats['retries']} | "
+          f"oraciones repetidas: {stats['reasked_items']} | lotes fallidos: {stats['failed_batches']}")
+    print(f"Tokens: {stats['input_tokens']} de entrada, {stats['output_tokens']} de salida")
+    print(f"Tiempo: {elapsed:.2f} s ({len(items) / elapsed:.1f} oraciones por segundo)")
+
+    if cache is not None:
+        print()
+        print("Caché acumulada:")
+        print(cache.stats().to_string(index=False))
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
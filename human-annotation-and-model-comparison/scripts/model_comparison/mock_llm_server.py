@@ -0,0 +1,197 @@
+"""
+Servidor HTTP local que imita una API de LLM, para probar
+llm_annotation_runner.py sin coste ni conexión.
+
+Responde en tres formatos según la ruta:
+
+- /v1/messages          -> formato "anthropic"
+- /v1/chat/completions  -> formato "openai"
+- cualquier otra        -> formato "simple" ({"text": ...})
+
+Lee del prompt las líneas numeradas "n. palabra | fragmento" y devuelve
+"n<TAB>ETIQUETA" por cada una. La etiqueta es determinista (hash de la
+palabra y el fragmento), no una predicción real.
+
+Para probar reintentos y respuestas incompletas se puede añadir un retardo
+por petición, una proporción de peticiones fallidas (429 con Retry-After o
+503) y una proporción de líneas omitidas en la respuesta.
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from annotation_schema import LABELS
+
+
+# =========================
+# CONFIGURACIÓN
+# =========================
+
+HOST = "127.0.0.1"
+PORT = 8765
+
+DELAY_SECONDS = 0.0     # retardo de cada respuesta
+FAIL_RATE = 0.0         # proporción de peticiones con 429 / 503
+DROP_RATE = 0.0         # proporción de líneas que se omiten en la respuesta
+SEED = 0
+
+ITEM_LINE_RE = re.compile(r"^(\d+)\. (.*?) \| (.*)$", re.MULTILINE)
+
+
+# =========================
+# RESPUESTAS
+# =========================
+
+def mock_label(word, context):
+    digest = hashlib.sha256(f"{word}\t{context}".encode("utf-8")).digest()
+    return LABELS[digest[0] % len(LABELS)]
+
+
+def prompt_text(body):
+    if "prompt" in body:
+        return str(body["prompt"])
+
+    parts = []
+    for message in body.get("messages", []):
+        content = message.get("content", "")
+        if isinstance(content, list):
+            content = "".join(block.get("text", "") for block in content if isinstance(block, dict))
+        parts.append(str(content))
+    return "\n".join(parts)
+
+
+def answer(prompt, drop_rate=0.0, rng=random):
+    lines = []
+    for match in ITEM_LINE_RE.finditer(prompt):
+        if drop_rate and rng.random() < drop_rate:
+            continue
+        lines.append(f"{match.group(1)}\t{mock_label(match.group(2), match.group(3))}")
+    return "\n".join(lines)
+
+
+def response_body(path, model, text, input_tokens, output_tokens):
+    if path.endswith("/messages"):
+        return {
+            "id": "msg_mock",
+            "type": "message",
+            "role": "assistant",
+            "model": model,
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "usage": {"input_tokens": input_tokens, "output_tokens": output_tokens},
+        }
+
+    if path.endswith("/chat/completions"):
+        return {
+            "id": "chatcmpl_mock",
+            "object": "chat.completion",
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": input_tokens, "completion_tokens": output_tokens},
+        }
+
+    return {"text": text, "usage": {"input_tokens": input_tokens, "output_tokens": output_tokens}}
+
+
+# =========================
+# SERVIDOR
+# =========================
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        server = self.server
+        with server.lock:
+            server.stats["requests"] += 1
+            fail = server.fail_rate and server.rng.random() < server.fail_rate
+            status = server.rng.choice((429, 503)) if fail else 200
+
+        if server.delay:
+            time.sleep(server.delay)
+
+        length = int(self.headers.get("content-length", 0))
+        try:
+            body = json.loads(self.rfile.read(length).decode("utf-8"))
+        except ValueError:
+            self.send_json(400, {"error": "JSON no válido"})
+            return
+
+        if status != 200:
+            with server.lock:
+                server.stats["failures"] += 1
+            self.send_json(status, {"error": "fallo simulado"}, {"retry-after": "0"} if status == 429 else None)
+            return
+
+        prompt = prompt_text(body)
+        with server.lock:
+            text = answer(prompt, server.drop_rate, server.rng)
+
+        # Tokens aproximados: una palabra ~ un token
+        payload = response_body(self.path, body.get("model", "mock-model"), text, len(prompt.split()), len(text.split()))
+        self.send_json(200, payload)
+
+    def send_json(self, status, payload, headers=None):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(host=HOST, port=PORT, delay=DELAY_SECONDS, fail_rate=FAIL_RATE, drop_rate=DROP_RATE, seed=SEED):
+    server = ThreadingHTTPServer((host, port), MockLLMHandler)
+    server.daemon_threads = True
+    server.delay = delay
+    server.fail_rate = fail_rate
+    server.drop_rate = drop_rate
+    server.rng = random.Random(seed)
+    server.lock = threading.Lock()
+    server.stats = {"requests": 0, "failures": 0}
+    return server
+
+
+def start_mock_server(host=HOST, port=0, **options):
+    """
+    Arranca el servidor en un hilo. Con port=0 se usa un puerto libre.
+    Devuelve el servidor (server.server_address, server.stats,
+    server.shutdown()).
+    """
+    server = make_server(host, port, **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    server = make_server()
+    host, port = server.server_address
+
+    print(f"Servidor de prueba en http://{host}:{port}")
+    print(f"Retardo: {DELAY_SECONDS} s | fallos: {FAIL_RATE:.0%} | líneas omitidas: {DROP_RATE:.0%}")
+    print("Ctrl+C para terminar")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Peticiones: {server.stats['requests']} | fallos simulados: {server.stats['failures']}")
+
+
+if __name__ == "__main__":
+    main()
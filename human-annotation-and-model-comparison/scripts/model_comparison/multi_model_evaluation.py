@@ -0,0 +1,373 @@
+"""
+Evaluación de varios modelos frente a Gold Human Label en una sola pasada.
+
+Sustituye, para el resumen conjunto, a ejecutar 02-06 y Accuracy_LLM_Claude
+uno por uno: lee cada Excel una sola vez (model_predictions), alinea las
+predicciones de todos los modelos con la muestra de referencia y obtiene
+todas las matrices de confusión (general y por entropy_band, para cada
+modelo) con un bincount agrupado (metrics_kernel).
+
+Salidas:
+- model_comparison_summary.csv con, para cada modelo, las mismas secciones
+  que excel_files/model_evaluation_summary.csv (accuracy, accuracy por
+  banda, precision / recall / F1 y precision / recall / F1 por banda),
+  precedidas de una tabla comparativa de todos los modelos.
+- model_evaluation_metrics.xlsx (report_writer) con la tabla comparativa y
+  una hoja por modelo y banda (all / low / mid / high): métricas por
+  etiqueta, MACRO_AVERAGE y matriz de confusión.
+
+Añadir un modelo = añadir una línea a MODELS (si está en un Excel ya
+listado, solo se lee una columna más).
+"""
+
+from pathlib import Path
+import csv
+import sys
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from metrics_kernel import encode_labels, confusion_counts, class_metrics, metric_rows
+from model_predictions import load_model_predictions
+from report_writer import ReportWriter
+
+
+# =========================
+# CONFIGURACIÓN
+# =========================
+
+COMPARISON_FILE = Path("sample_1000_sentences_for_manual_annotation_randomized_auto_label_gold_entropy_band_Comparsion.xlsx")
+CHATGPT_FILE = Path("LLM_prueba_anotation_CHATGPT.xlsx")
+CLAUDE_FILE = Path("LLM_prueba_anotation_Claude.xlsx")
+
+OUTPUT_CSV = Path("model_comparison_summary.csv")
+OUTPUT_XLSX = Path("model_evaluation_metrics.xlsx")
+
+FIRST_DATA_ROW = 2
+LAST_DATA_ROW = 960
+
+# (nombre, archivo, columna de predicción: papel de annotation_schema o
+# encabezado literal). El primer archivo aporta Gold Human Label, Word y
+# entropy_band.
+MODELS = [
+    ("pysentimiento", COMPARISON_FILE, "auto_label"),
+    ("cardiff", COMPARISON_FILE, "cardiff_label"),
+    ("chatgpt", CHATGPT_FILE, "chatgpt_label"),
+    ("claude", CLAUDE_FILE, "claude_label"),
+]
+
+LABELS = ["NEG", "NEU", "POS"]
+ENTROPY_BANDS = ["low", "mid", "high"]
+
+
+# =========================
+# FUNCIONES
+# =========================
+
+def percentage(correct, total):
+    if total == 0:
+        return 0.0
+    return (correct / total) * 100
+
+
+def evaluate_models(gold, bands, predictions):
+    """
+    Matrices de confusión de todos los modelos: (modelos, L, L) en general y
+    (modelos, bandas, L, L) por banda, cada una con un solo bincount sobre la
+    clave modelo / banda.
+    """
+    n_models = len(predictions)
+    n_rows = len(gold)
+    n_labels = len(LABELS)
+    n_bands = len(ENTROPY_BANDS)
+
+    gold_codes = np.tile(encode_labels(gold, LABELS), n_models)
+    band_codes = np.tile(encode_labels(bands, ENTROPY_BANDS), n_models)
+    pred_codes = np.concatenate([encode_labels(labels, LABELS) for labels in predictions.values()])
+    model_codes = np.repeat(np.arange(n_models), n_rows)
+
+    overall = confusion_counts(
+        gold_codes,
+        pred_codes,
+        n_labels,
+        group_codes=model_codes,
+        n_groups=n_models
+    )
+
+    band_keys = np.where(band_codes >= 0, model_codes * n_bands + band_codes, -1)
+
+    by_band = confusion_counts(
+        gold_codes,
+        pred_codes,
+        n_labels,
+        group_codes=band_keys,
+        n_groups=n_models * n_bands
+    ).reshape(n_models, n_bands, n_labels, n_labels)
+
+    return overall, by_band
+
+
+def accuracy_row(confusion):
+    total = int(confusion.sum())
+    correct = int(np.trace(confusion))
+    return total, correct, total - correct, round(percentage(correct, total), 2)
+
+
+def model_sections(name, n_rows_checked, overall, by_band):
+    """
+    Filas del CSV de un modelo, con las secciones del resumen publicado.
+    """
+    title = name.upper()
+    rows = []
+
+    total, correct, incorrect, accuracy = accuracy_row(overall)
+    rows += [
+        [f"ACCURACY GOLD HUMAN LABEL VS. {title}"],
+        ["metric", "value"],
+        ["total_rows_checked", n_rows_checked],
+        ["valid_cases", total],
+        ["correct_cases", correct],
+        ["incorrect_cases", incorrect],
+        ["accuracy %", accuracy],
+        [],
+    ]
+
+    rows += [
+        [f"ACCURACY BY ENTROPY BAND - {title}"],
+        ["entropy_band", "total_cases", "correct_cases", "incorrect_cases", "accuracy_percent %"],
+    ]
+    for band_index, band in enumerate(ENTROPY_BANDS):
+        rows.append([band, *accuracy_row(by_band[band_index])])
+    rows.append([])
+
+    metric_headers = [
+        "gold_support",
+        "predicted",
+        "true_positives",
+        "false_positives",
+        "false_negatives",
+        "true_negatives",
+        "precision",
+        "recall",
+        "f1",
+    ]
+
+    def label_values(item):
+        return [
+            item["gold_support"],
+            item["predicted"],
+            item["true_positives"],
+            item["false_positives"],
+            item["false_negatives"],
+            item["true_negatives"],
+            round(item["precision"], 4),
+            round(item["recall"], 4),
+            round(item["f1"], 4),
+        ]
+
+    def macro_values(confusion):
+        metrics = class_metrics(confusion)
+        return [
+            round(float(metrics["macro_precision"]), 4),
+            round(float(metrics["macro_recall"]), 4),
+            round(float(metrics["macro_f1"]), 4),
+        ]
+
+    rows += [
+        [f"PRECISION, RECALL, F1 - {title}"],
+        ["label"] + metric_headers,
+    ]
+    for item in metric_rows(overall, LABELS, predicted_key="predicted"):
+        rows.append([item["label"]] + label_values(item))
+    rows.append(["MACRO_AVERAGE", "", "", "", "", "", ""] + macro_values(overall))
+    rows.append([])
+
+    rows += [
+        [f"PRECISION, RECALL, F1 BY ENTROPY BAND - {title}"],
+        ["entropy_band", "label"] + metric_headers,
+    ]
+    for band_index, band in enumerate(ENTROPY_BANDS):
+        for item in metric_rows(by_band[band_index], LABELS, predicted_key="predicted"):
+            rows.append([band, item["label"]] + label_values(item))
+        rows.append([band, "MACRO_AVERAGE", "", "", "", "", "", ""] + macro_values(by_band[band_index]))
+    rows.append([])
+    rows.append([])
+
+    return rows
+
+
+def comparison_rows(model_names, overall, by_band):
+    """
+    Tabla con una fila por modelo: accuracy y macro-F1, general y por banda.
+    """
+    header = ["model", "valid_cases", "accuracy %", "macro_f1"]
+    for band in ENTROPY_BANDS:
+        header += [f"accuracy_{band} %", f"macro_f1_{band}"]
+
+    overall_metrics = class_metrics(overall)
+    band_metrics = class_metrics(by_band)
+
+    rows = [["MODEL COMPARISON VS. GOLD HUMAN LABEL"], header]
+
+    for i, name in enumerate(model_names):
+        row = [
+            name,
+            int(overall_metrics["total_cases"][i]),
+            round(float(overall_metrics["accuracy"][i]) * 100, 2),
+            round(float(overall_metrics["macro_f1"][i]), 4),
+        ]
+        for band_index in range(len(ENTROPY_BANDS)):
+            row += [
+                round(float(band_metrics["accuracy"][i, band_index]) * 100, 2),
+                round(float(band_metrics["macro_f1"][i, band_index]), 4),
+            ]
+        rows.append(row)
+
+    rows += [[], []]
+    return rows
+
+
+def metric_sheet(report, title, confusion):
+    """
+    Hoja de un modelo en una banda: métricas por etiqueta, MACRO_AVERAGE y
+    matriz de confusión debajo.
+    """
+    metrics = class_metrics(confusion)
+
+    rows = [[
+        "label",
+        "gold_support",
+        "predicted",
+        "true_positives",
+        "false_positives",
+        "false_negatives",
+        "true_negatives",
+        "precision",
+        "recall",
+        "f1",
+    ]]
+
+    for item in metric_rows(confusion, LABELS, predicted_key="predicted"):
+        rows.append([
+            item["label"],
+            item["gold_support"],
+            item["predicted"],
+            item["true_positives"],
+            item["false_positives"],
+            item["false_negatives"],
+            item["true_negatives"],
+            item["precision"],
+            item["recall"],
+            item["f1"],
+        ])
+
+    rows.append([
+        "MACRO_AVERAGE", "", "", "", "", "", "",
+        float(metrics["macro_precision"]),
+        float(metrics["macro_recall"]),
+        float(metrics["macro_f1"]),
+    ])
+    rows.append(["accuracy", float(metrics["accuracy"])])
+    rows += [[], []]
+
+    confusion_header_row = len(rows) + 1
+    rows.append(["Gold \\ Predicted"] + LABELS)
+
+    for i, gold_label in enumerate(LABELS):
+        rows.append([gold_label] + [int(n) for n in confusion[i]])
+
+    accuracy_cell = f"B{len(LABELS) + 3}"
+    number_formats = {"H": "0.0000", "I": "0.0000", "J": "0.0000", accuracy_cell: "0.0000"}
+
+    report.add_sheet(
+        title,
+        rows,
+        header_rows=[1, confusion_header_row],
+        number_formats=number_formats
+    )
+
+
+# =========================
+# LEER EXCEL
+# =========================
+
+reference, predictions = load_model_predictions(
+    MODELS,
+    first_data_row=FIRST_DATA_ROW,
+    last_data_row=LAST_DATA_ROW
+)
+
+model_names = list(predictions)
+n_rows_checked = len(reference)
+
+
+# =========================
+# CALCULAR MÉTRICAS
+# =========================
+
+overall, by_band = evaluate_models(reference["gold_label"], reference["entropy_band"], predictions)
+
+
+# =========================
+# GUARDAR CSV
+# =========================
+
+output_rows = comparison_rows(model_names, overall, by_band)
+
+for i, name in enumerate(model_names):
+    output_rows += model_sections(name, n_rows_checked, overall[i], by_band[i])
+
+with open(OUTPUT_CSV, mode="w", newline="", encoding="utf-8-sig") as f:
+    writer = csv.writer(f, delimiter=";")
+    writer.writerows(output_rows)
+
+
+# =========================
+# GUARDAR EXCEL
+# =========================
+
+report = ReportWriter()
+
+report.add_sheet(
+    "model_comparison",
+    comparison_rows(model_names, overall, by_band)[1:-2],
+    number_formats={"D": "0.0000", "F": "0.0000", "H": "0.0000", "J": "0.0000"}
+)
+
+for i, name in enumerate(model_names):
+    metric_sheet(report, f"{name}_all", overall[i])
+
+    for band_index, band in enumerate(ENTROPY_BANDS):
+        metric_sheet(report, f"{name}_{band}", by_band[i, band_index])
+
+report.save(OUTPUT_XLSX)
+
+
+# =========================
+# RESULTADOS EN CONSOLA
+# =========================
+
+print("EVALUACIÓN DE MODELOS VS GOLD HUMAN LABEL")
+print("=========================================")
+print(f"Archivo de referencia: {COMPARISON_FILE}")
+print(f"Filas analizadas: {FIRST_DATA_ROW}-{LAST_DATA_ROW}")
+print()
+
+overall_metrics = class_metrics(overall)
+band_metrics = class_metrics(by_band)
+
+for i, name in enumerate(model_names):
+    bands_text = ", ".join(
+        f"{band}={band_metrics['accuracy'][i, b] * 100:.2f}%"
+        for b, band in enumerate(ENTROPY_BANDS)
+    )
+    print(
+        f"{name}: accuracy={overall_metrics['accuracy'][i] * 100:.2f}% "
+        f"({int(np.trace(overall[i]))}/{int(overall[i].sum())}), "
+        f"macro-F1={overall_metrics['macro_f1'][i]:.4f} | {bands_text}"
+    )
+
+print()
+print(f"Archivo creado: {OUTPUT_CSV}")
+print(f"Archivo creado: {OUTPUT_XLSX}")
@@ -0,0 +1,148 @@
+"""
+Predicciones de varios modelos alineadas con la muestra de referencia.
+
+Cada modelo se describe como (nombre, archivo, columna), donde columna es
+un papel de annotation_schema.VARIANTES ("auto_label", "cardiff_label"...)
+o el encabezado literal de la columna de etiquetas. Cada archivo se lee una
+sola vez aunque contenga varios modelos, así que un modelo nuevo en el
+mismo Excel solo añade una columna a la lectura.
+
+Las filas se alinean con el archivo de referencia (el del primer modelo,
+que aporta Gold Human Label, Word y entropy_band):
+- por sample_sentence_id si los dos archivos lo tienen;
+- si no (los Excel de los LLM), por posición, comprobando que Word coincide
+  fila a fila.
+"""
+
+import numpy as np
+
+from annotation_loader import load_columns
+from annotation_schema import normalize_header, clean_label
+
+
+# =========================
+# CONFIGURACIÓN
+# =========================
+
+REFERENCE_ROLES = ["word", "gold_label", "entropy_band"]
+OPTIONAL_ROLES = ["sample_sentence_id"]
+
+
+# =========================
+# ALINEACIÓN
+# =========================
+
+def sentence_ids(columns):
+    """
+    sample_sentence_id como texto, o None si la columna no existe o está vacía.
+    """
+    if "sample_sentence_id" not in columns:
+        return None
+
+    ids = [None if value is None else str(value).strip() for value in columns.raw("sample_sentence_id")]
+
+    if all(value in (None, "") for value in ids):
+        return None
+
+    return ids
+
+
+def align_rows(reference, columns, path):
+    """
+    Índice, en columns, de cada fila de la referencia (-1 si falta).
+    """
+    reference_ids = sentence_ids(reference)
+    ids = sentence_ids(columns)
+
+    if reference_ids is not None and ids is not None:
+        position = {}
+
+        for i, value in enumerate(ids):
+            if value in (None, ""):
+                continue
+            if value in position:
+                raise ValueError(f"{path}: sample_sentence_id repetido: {value}")
+            position[value] = i
+
+        return np.array([position.get(value, -1) for value in reference_ids], dtype=np.int64)
+
+    reference_words = [normalize_header(w) for w in reference.raw("word")]
+    words = [normalize_header(w) for w in columns.raw("word")]
+
+    mismatched = [
+        int(row)
+        for row, word, reference_word in zip(columns.excel_row, words, reference_words)
+        if word != reference_word
+    ]
+
+    if len(words) != len(reference_words) or mismatched:
+        raise ValueError(
+            f"{path}: sin sample_sentence_id y las filas no coinciden con la referencia "
+            f"({len(words)} frente a {len(reference_words)} filas; "
+            f"Word distinta en las filas {mismatched[:10]})"
+        )
+
+    return np.arange(len(words), dtype=np.int64)
+
+
+# =========================
+# CARGA
+# =========================
+
+def load_model_predictions(models, first_data_row=2, last_data_row=None, sheet_name=None, extra_roles=()):
+    """
+    Devuelve (referencia, {modelo: etiquetas}). referencia es el
+    AnnotationColumns del primer archivo (gold_label, entropy_band, word y
+    extra_roles, p. ej. las probabilidades); las etiquetas de cada modelo
+    son un array (POS / NEU / NEG o None) alineado con sus filas.
+    """
+    models = [(name, str(path), column) for name, path, column in models]
+    reference_file = models[0][1]
+
+    # Columnas que hay que leer de cada archivo
+    columns_by_file = {}
+    for name, path, column in models:
+        columns_by_file.setdefault(path, [])
+        if column not in columns_by_file[path]:
+            columns_by_file[path].append(column)
+
+    loaded = {}
+
+    for path, model_columns in columns_by_file.items():
+        roles = list(model_columns)
+
+        if path == reference_file:
+            reference_roles = REFERENCE_ROLES + [role for role in extra_roles if role not in REFERENCE_ROLES]
+            roles = reference_roles + [role for role in roles if role not in reference_roles]
+        else:
+            roles = ["word"] + [role for role in roles if role != "word"]
+
+        loaded[path] = load_columns(
+            path,
+            roles,
+            optional_roles=OPTIONAL_ROLES,
+            sheet_name=sheet_name,
+            first_data_row=first_data_row,
+            last_data_row=last_data_row
+        )
+
+    reference = loaded[reference_file]
+    alignments = {
+        path: align_rows(reference, columns, path)
+        for path, columns in loaded.items()
+    }
+
+    predictions = {}
+
+    for name, path, column in models:
+        if name in predictions:
+            raise ValueError(f"Modelo repetido: {name}")
+
+        labels = np.array([clean_label(v) for v in loaded[path].raw(column)], dtype=object)
+        rows = alignments[path]
+
+        aligned = np.full(len(rows), None, dtype=object)
+        aligned[rows >= 0] = labels[rows[rows >= 0]]
+        predictions[name] = aligned
+
+    return reference, predictions
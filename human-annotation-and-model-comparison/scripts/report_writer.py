@@ -0,0 +1,164 @@
+"""
+Escritura de los Excel de métricas en modo write_only.
+
+Los scripts de métricas construían cada hoja celda a celda y después
+llamaban a apply_basic_style(), que recorre otra vez todas las celdas para
+poner bordes y alineación y mide la longitud de cada valor para ajustar el
+ancho de las columnas. Con hojas de miles de filas (desgloses por oración o
+por palabra) ese segundo recorrido y los objetos Cell del modo normal son
+lo que más tarda.
+
+ReportWriter escribe con Workbook(write_only=True): las filas de cada hoja
+se reciben ya completas, los anchos se calculan en la misma pasada en que
+se preparan las celdas y el formato se aplica con estilos con nombre
+(registrados una sola vez en el libro) en lugar de objetos Font / Border /
+Alignment por celda. El aspecto es el mismo que con apply_basic_style:
+borde gris fino y alineación vertical centrada en todo el rango usado,
+encabezados en negrita con fondo azul claro y ancho = longitud máxima + 3
+(con un máximo por hoja).
+"""
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import NamedStyle, Font, Alignment, PatternFill, Border, Side
+from openpyxl.utils import get_column_letter, column_index_from_string
+
+
+# =========================
+# CONFIGURACIÓN
+# =========================
+
+HEADER_FILL = "D9EAF7"
+BORDER_COLOR = "CCCCCC"
+
+DEFAULT_MAX_WIDTH = 28
+
+
+# =========================
+# ESTILOS
+# =========================
+
+def make_style(name, bold=False, fill=False, number_format="General"):
+    thin = Side(style="thin", color=BORDER_COLOR)
+
+    style = NamedStyle(name=name)
+    style.font = Font(bold=bold)
+    style.border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    style.alignment = Alignment(vertical="center")
+    style.number_format = number_format
+
+    if fill:
+        style.fill = PatternFill("solid", fgColor=HEADER_FILL)
+
+    return style
+
+
+# =========================
+# LIBRO DE SALIDA
+# =========================
+
+class ReportWriter:
+    """
+    report = ReportWriter()
+    report.add_sheet("summary", rows, header_rows=[1], number_formats={"B": "0.0000"})
+    report.save(OUTPUT_FILE)
+
+    rows: lista de filas (listas de valores; [] = fila en blanco).
+    """
+
+    def __init__(self):
+        self.wb = Workbook(write_only=True)
+        self.styles = set()
+
+    def style_name(self, kind, number_format):
+        """
+        Registra (una vez) y devuelve el estilo con nombre de un tipo de
+        celda: "header", "bold" o "body", con su formato numérico.
+        """
+        name = f"report_{kind}" if number_format == "General" else f"report_{kind}_{number_format}"
+
+        if name not in self.styles:
+            self.wb.add_named_style(make_style(
+                name,
+                bold=kind in ("header", "bold"),
+                fill=kind == "header",
+                number_format=number_format
+            ))
+            self.styles.add(name)
+
+        return name
+
+    def add_sheet(
+        self,
+        title,
+        rows,
+        header_rows=(1,),
+        bold_cells=(),
+        number_formats=None,
+        max_width=DEFAULT_MAX_WIDTH
+    ):
+        """
+        Añade una hoja con las filas dadas.
+
+        header_rows:    números de fila (base 1) con estilo de encabezado.
+        bold_cells:     celdas ("A1", "B1"...) en negrita sin fondo.
+        number_formats: {"H": "0.0000"} aplica el formato a la columna en
+                        todas las filas salvo la 1; {"B8": "0.0000"} solo a
+                        esa celda.
+        """
+        ws = self.wb.create_sheet(title)
+
+        header_rows = set(header_rows)
+        bold_cells = {cell.upper() for cell in bold_cells}
+
+        column_formats = {}
+        cell_formats = {}
+
+        for key, number_format in (number_formats or {}).items():
+            key = key.upper()
+            if key.isalpha():
+                column_formats[column_index_from_string(key)] = number_format
+            else:
+                cell_formats[key] = number_format
+
+        n_columns = max((len(row) for row in rows), default=0)
+        max_lengths = [0] * n_columns
+
+        for row in rows:
+            for i, value in enumerate(row):
+                if value is not None:
+                    max_lengths[i] = max(max_lengths[i], len(str(value)))
+
+        for i, max_length in enumerate(max_lengths, start=1):
+            ws.column_dimensions[get_column_letter(i)].width = min(max_length + 3, max_width)
+
+        letters = [get_column_letter(i) for i in range(1, n_columns + 1)]
+
+        for row_number, row in enumerate(rows, start=1):
+            cells = []
+
+            for column, letter in enumerate(letters, start=1):
+                value = row[column - 1] if column <= len(row) else None
+                coordinate = f"{letter}{row_number}"
+
+                if row_number in header_rows:
+                    kind = "header"
+                elif coordinate in bold_cells:
+                    kind = "bold"
+                else:
+                    kind = "body"
+
+                number_format = cell_formats.get(coordinate)
+                if number_format is None and row_number > 1:
+                    number_format = column_formats.get(column)
+
+                cell = WriteOnlyCell(ws, value=value)
+                cell.style = self.style_name(kind, number_format or "General")
+                cells.append(cell)
+
+            ws.append(cells)
+
+        return ws
+
+    def save(self, path):
+        self.wb.save(path)
@@ -0,0 +1,175 @@
+import hashlib
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import sentence_sample_selection as selection
+
+
+# =========================
+# CONFIGURACIÓN
+# =========================
+
+# Usa los mismos archivos y la misma semilla que sentence_sample_selection.py
+SELECTED_ADJECTIVES_FILE = selection.SELECTED_ADJECTIVES_FILE
+CORPUS_FILE = selection.CORPUS_FILE
+
+# También comprueba la lectura por trozos (con un tamaño de trozo pequeño
+# para que los adjetivos queden repartidos entre varios trozos).
+CHECK_CHUNKED_READER = True
+CHECK_CHUNK_SIZE = 5_000
+
+
+# =========================
+# FUNCIONES
+# =========================
+
+def legacy_sample(corpus_df, selected_adjectives, selected_keys):
+    """
+    Implementación de referencia: el muestreo original, con un filtro sobre
+    todo el corpus por adjetivo y selected_keys.index() por oración.
+    """
+
+    corpus_df = corpus_df.copy()
+    corpus_df["source_corpus_row"] = corpus_df.index + 2
+    corpus_df["_word_key"] = corpus_df["palabra"].apply(selection.normalize_word)
+
+    rng = np.random.default_rng(selection.RANDOM_SEED)
+
+    sampled_parts = []
+
+    for adjective, key in zip(selected_adjectives, selected_keys):
+
+        adjective_rows = corpus_df[corpus_df["_word_key"] == key].copy()
+
+        n_available = len(adjective_rows)
+        n_to_sample = selection.n_to_sample_for(adjective, n_available)
+
+        adjective_rows = adjective_rows.sort_values(
+            ["palabra", "oracion", "source_corpus_row"],
+            kind="mergesort"
+        )
+
+        chosen_indices = rng.choice(
+            adjective_rows.index.to_numpy(),
+            size=n_to_sample,
+            replace=False
+        )
+
+        sampled = corpus_df.loc[chosen_indices].copy()
+
+        sampled["selected_adjective"] = adjective
+        sampled["n_available_for_adjective"] = n_available
+
+        sampled_parts.append(sampled)
+
+    sample_df = pd.concat(sampled_parts, axis=0)
+
+    sample_df["_selected_order"] = sample_df["selected_adjective"].apply(
+        lambda x: selected_keys.index(selection.normalize_word(x))
+    )
+
+    sample_df = sample_df.sort_values(
+        ["_selected_order", "source_corpus_row"],
+        kind="mergesort"
+    ).reset_index(drop=True)
+
+    sample_df.insert(
+        0,
+        "sample_sentence_id",
+        [f"S{i:04d}" for i in range(1, len(sample_df) + 1)]
+    )
+
+    sample_df.insert(
+        1,
+        "sentence_number_for_adjective",
+        sample_df.groupby("selected_adjective").cumcount() + 1
+    )
+
+    return sample_df.drop(columns=["_word_key", "_selected_order"])
+
+
+def indexed_sample(selected_adjectives, selected_keys):
+    """
+    Muestreo en memoria con el índice palabra -> filas. Se llama
+    directamente (no con build_sample) para que la comprobación no dependa
+    de USE_HASH_SAMPLING ni de USE_CHUNKED_READER: el muestreo por hash es
+    otro modo y no reproduce la muestra de referencia.
+    """
+    return selection.order_sample(
+        selection.sample_in_memory(
+            selection.read_corpus(CORPUS_FILE),
+            selected_adjectives,
+            selected_keys
+        ),
+        selected_keys
+    )
+
+
+def sha256_of(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+# =========================
+# COMPROBACIÓN
+# =========================
+
+def main():
+    selected_adjectives, _, _ = selection.read_selected_adjectives(SELECTED_ADJECTIVES_FILE)
+    selected_keys = [selection.normalize_word(w) for w in selected_adjectives]
+
+    samples = {
+        "legacy": legacy_sample(
+            selection.read_corpus(CORPUS_FILE),
+            selected_adjectives,
+            selected_keys
+        ),
+        "indexed": indexed_sample(selected_adjectives, selected_keys),
+        "indexed_second_run": indexed_sample(selected_adjectives, selected_keys),
+    }
+
+    if CHECK_CHUNKED_READER:
+        samples["chunked"] = selection.order_sample(
+            selection.sample_chunked(
+                CORPUS_FILE,
+                selected_adjectives,
+                selected_keys,
+                CHECK_CHUNK_SIZE
+            ),
+            selected_keys
+        )
+
+    hashes = {}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, sample_df in samples.items():
+            path = Path(tmp_dir) / f"{name}.xlsx"
+            selection.write_sample(sample_df, path)
+            hashes[name] = sha256_of(path)
+
+    print("REPRODUCIBILIDAD DE LA MUESTRA DE ORACIONES")
+    print("===========================================")
+    print(f"Corpus: {CORPUS_FILE}")
+    print(f"Adjetivos seleccionados: {len(selected_adjectives)}")
+    print(f"Oraciones en la muestra: {len(samples['legacy'])}")
+    print()
+
+    for name, digest in hashes.items():
+        print(f"{name}: {digest}")
+
+    different = [name for name, digest in hashes.items() if digest != hashes["legacy"]]
+
+    if different:
+        raise AssertionError(
+            "Los archivos no son idénticos byte a byte al muestreo de referencia: "
+            f"{different}"
+        )
+
+    print()
+    print("OK: todas las variantes producen un Excel idéntico byte a byte.")
+
+
+if __name__ == "__main__":
+    main()
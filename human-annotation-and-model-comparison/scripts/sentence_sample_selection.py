@@ -1,6 +1,10 @@
 import pandas as pd
 import numpy as np
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import re
+import zipfile
 
 
 # =========================
@@ -20,6 +24,31 @@ N_SENTENCES_PER_ADJECTIVE = 5
 # True = tomar las que haya disponibles
 ALLOW_FEWER_THAN_5 = False
 
+# Lectura del corpus por trozos (para corpus que no caben en memoria).
+# Con la misma semilla selecciona exactamente las mismas filas que la
+# lectura completa: una primera pasada construye el índice
+# palabra -> filas, y una segunda recupera solo las filas elegidas.
+USE_CHUNKED_READER = False
+CHUNK_SIZE = 200_000
+
+# Muestreo por hash para corpus repartidos en varios archivos (shards).
+# Cada oración recibe un rango = hash con clave (RANDOM_SEED) de
+# (palabra, id de fila) y se eligen las N de menor rango por adjetivo.
+# El resultado no depende del orden de los archivos ni del tamaño de los
+# trozos; cada shard se procesa por separado (en paralelo si N_WORKERS > 1)
+# y una fusión final se queda con las N menores por adjetivo.
+# No reproduce la muestra de rng.choice: es un modo de muestreo distinto.
+USE_HASH_SAMPLING = False
+CORPUS_SHARDS = []  # vacío = solo CORPUS_FILE
+# Columna que identifica cada oración de forma estable entre shards.
+# None = se usa el texto de la oración ("oracion").
+HASH_ROW_ID_COL = None
+N_WORKERS = 1
+
+# Fecha fija para los metadatos del Excel de salida: así el mismo
+# muestreo produce siempre un archivo idéntico byte a byte.
+REPRODUCIBLE_TIMESTAMP = "2026-04-23T00:00:00Z"
+
 
 # =========================
 # FUNCIONES AUXILIARES
@@ -96,68 +125,95 @@ def read_corpus(path):
     return df
 
 
-# =========================
-# LECTURA DE ARCHIVOS
-# =========================
+def iter_corpus_chunks(path, chunk_size=CHUNK_SIZE):
+    """
+    Lee el corpus por trozos con el mismo formato que read_corpus
+    y añade source_corpus_row con la misma numeración que la lectura completa.
+    """
 
-selected_adjectives, selected_df, selected_word_col = read_selected_adjectives(
-    SELECTED_ADJECTIVES_FILE
-)
+    next_row = 2
 
-corpus_df = read_corpus(CORPUS_FILE)
+    for chunk in pd.read_csv(
+        path,
+        sep=";",
+        encoding="utf-8-sig",
+        decimal=",",
+        chunksize=chunk_size
+    ):
+        if "palabra" not in chunk.columns:
+            raise ValueError(
+                "No se encontró la columna 'palabra' en el corpus. "
+                f"Columnas disponibles: {list(chunk.columns)}"
+            )
 
+        chunk["source_corpus_row"] = np.arange(next_row, next_row + len(chunk))
+        next_row += len(chunk)
 
-# =========================
-# PREPARACIÓN DEL CORPUS
-# =========================
+        yield chunk
 
-# Guarda la fila original del corpus.
-# +2 porque en el CSV la fila 1 es el encabezado y los datos empiezan en la fila 2.
-corpus_df["source_corpus_row"] = corpus_df.index + 2
 
-# Clave normalizada para hacer el cruce
-corpus_df["_word_key"] = corpus_df["palabra"].apply(normalize_word)
+def sort_key_for_row(palabra, oracion, source_corpus_row):
+    """
+    Reproduce el orden de sort_values(["palabra", "oracion", "source_corpus_row"])
+    de pandas, que deja los valores vacíos (NaN) al final.
+    """
+    oracion_missing = not isinstance(oracion, str) and pd.isna(oracion)
+    return (
+        palabra,
+        oracion_missing,
+        "" if oracion_missing else oracion,
+        source_corpus_row,
+    )
 
-selected_keys = [normalize_word(w) for w in selected_adjectives]
 
+def build_word_row_index(path, selected_keys, chunk_size=CHUNK_SIZE):
+    """
+    Primera pasada: construye el índice palabra -> filas candidatas.
 
-# =========================
-# COMPROBACIONES
-# =========================
+    Solo guarda, para las palabras seleccionadas, lo necesario para
+    ordenar y muestrear (palabra, oracion, source_corpus_row).
+    """
 
-available_words = set(corpus_df["_word_key"])
-
-missing_words = [
-    word for word, key in zip(selected_adjectives, selected_keys)
-    if key not in available_words
-]
-
-if missing_words:
-    raise ValueError(
-        "Hay adjetivos seleccionados que no aparecen en el corpus:\n"
-        + "\n".join(missing_words[:50])
-        + (
-            f"\n... y {len(missing_words) - 50} más."
-            if len(missing_words) > 50
-            else ""
-        )
-    )
+    wanted = set(selected_keys)
+    row_index = {key: [] for key in selected_keys}
 
+    for chunk in iter_corpus_chunks(path, chunk_size):
+        keys = chunk["palabra"].apply(normalize_word)
+        mask = keys.isin(wanted).to_numpy()
 
-# =========================
-# MUESTREO REPRODUCIBLE
-# =========================
+        if not mask.any():
+            continue
 
-rng = np.random.default_rng(RANDOM_SEED)
+        for key, palabra, oracion, source_row in zip(
+            keys[mask],
+            chunk.loc[mask, "palabra"],
+            chunk.loc[mask, "oracion"],
+            chunk.loc[mask, "source_corpus_row"]
+        ):
+            row_index[key].append(sort_key_for_row(palabra, oracion, int(source_row)))
 
-sampled_parts = []
+    return row_index
 
-for adjective, key in zip(selected_adjectives, selected_keys):
 
-    adjective_rows = corpus_df[corpus_df["_word_key"] == key].copy()
+def check_missing_words(selected_adjectives, selected_keys, available_words):
+    missing_words = [
+        word for word, key in zip(selected_adjectives, selected_keys)
+        if key not in available_words
+    ]
 
-    n_available = len(adjective_rows)
+    if missing_words:
+        raise ValueError(
+            "Hay adjetivos seleccionados que no aparecen en el corpus:\n"
+            + "\n".join(missing_words[:50])
+            + (
+                f"\n... y {len(missing_words) - 50} más."
+                if len(missing_words) > 50
+                else ""
+            )
+        )
 
+
+def n_to_sample_for(adjective, n_available):
     if n_available < N_SENTENCES_PER_ADJECTIVE:
         message = (
             f"El adjetivo '{adjective}' solo tiene {n_available} oraciones "
@@ -166,94 +222,407 @@ for adjective, key in zip(selected_adjectives, selected_keys):
 
         if not ALLOW_FEWER_THAN_5:
             raise ValueError(message)
-        else:
-            print("Advertencia:", message)
-            n_to_sample = n_available
-    else:
-        n_to_sample = N_SENTENCES_PER_ADJECTIVE
+
+        print("Advertencia:", message)
+        return n_available
+
+    return N_SENTENCES_PER_ADJECTIVE
+
+
+def sample_in_memory(corpus_df, selected_adjectives, selected_keys):
+    """
+    Muestreo con el corpus completo cargado en memoria.
+
+    El corpus se ordena una sola vez y se agrupa por palabra normalizada;
+    cada grupo conserva el orden global, que coincide con el de ordenar
+    solo las filas de ese adjetivo. Así cada adjetivo es una búsqueda en
+    un diccionario en lugar de un filtro sobre todo el corpus.
+    """
+
+    # Guarda la fila original del corpus.
+    # +2 porque en el CSV la fila 1 es el encabezado y los datos empiezan en la fila 2.
+    corpus_df["source_corpus_row"] = corpus_df.index + 2
+
+    # Clave normalizada para hacer el cruce
+    corpus_df["_word_key"] = corpus_df["palabra"].apply(normalize_word)
 
     # Orden estable antes del muestreo.
     # Esto ayuda a que la selección sea reproducible incluso si cambia el orden interno.
-    adjective_rows = adjective_rows.sort_values(
+    sorted_df = corpus_df.sort_values(
         ["palabra", "oracion", "source_corpus_row"],
         kind="mergesort"
     )
 
-    chosen_indices = rng.choice(
-        adjective_rows.index.to_numpy(),
-        size=n_to_sample,
-        replace=False
+    sorted_labels = sorted_df.index.to_numpy()
+    positions_by_key = sorted_df.groupby("_word_key", sort=False).indices
+
+    check_missing_words(selected_adjectives, selected_keys, positions_by_key)
+
+    rng = np.random.default_rng(RANDOM_SEED)
+
+    chosen_labels = []
+    chosen_adjectives = []
+    chosen_n_available = []
+
+    for adjective, key in zip(selected_adjectives, selected_keys):
+
+        candidate_labels = sorted_labels[positions_by_key[key]]
+
+        n_available = len(candidate_labels)
+        n_to_sample = n_to_sample_for(adjective, n_available)
+
+        chosen = rng.choice(
+            candidate_labels,
+            size=n_to_sample,
+            replace=False
+        )
+
+        chosen_labels.extend(chosen)
+        chosen_adjectives.extend([adjective] * n_to_sample)
+        chosen_n_available.extend([n_available] * n_to_sample)
+
+    sample_df = corpus_df.loc[chosen_labels].copy()
+
+    sample_df["selected_adjective"] = chosen_adjectives
+    sample_df["n_available_for_adjective"] = chosen_n_available
+
+    return sample_df.drop(columns=["_word_key"])
+
+
+def sample_chunked(path, selected_adjectives, selected_keys, chunk_size=CHUNK_SIZE):
+    """
+    Muestreo por trozos, sin cargar el corpus completo.
+
+    rng.choice sin reemplazo solo depende del número de candidatos,
+    así que muestrear sobre las filas ordenadas del índice consume el
+    generador igual que sample_in_memory y devuelve las mismas filas.
+    """
+
+    row_index = build_word_row_index(path, selected_keys, chunk_size)
+
+    check_missing_words(
+        selected_adjectives,
+        selected_keys,
+        {key for key, rows in row_index.items() if rows}
     )
 
-    sampled = corpus_df.loc[chosen_indices].copy()
+    rng = np.random.default_rng(RANDOM_SEED)
 
-    sampled["selected_adjective"] = adjective
-    sampled["n_available_for_adjective"] = n_available
+    # fila del corpus -> (adjetivo seleccionado, n disponibles)
+    chosen_rows = {}
 
-    sampled_parts.append(sampled)
+    for adjective, key in zip(selected_adjectives, selected_keys):
 
+        candidates = sorted(row_index[key])
 
-sample_df = pd.concat(sampled_parts, axis=0)
+        n_available = len(candidates)
+        n_to_sample = n_to_sample_for(adjective, n_available)
 
+        chosen = rng.choice(
+            np.array([candidate[-1] for candidate in candidates]),
+            size=n_to_sample,
+            replace=False
+        )
 
-# =========================
-# ORDEN Y COLUMNAS DE CONTROL
-# =========================
+        for source_row in chosen:
+            chosen_rows[int(source_row)] = (adjective, n_available)
 
-sample_df["_selected_order"] = sample_df["selected_adjective"].apply(
-    lambda x: selected_keys.index(normalize_word(x))
-)
+    # Segunda pasada: recupera solo las filas elegidas
+    sampled_parts = []
 
-sample_df = sample_df.sort_values(
-    ["_selected_order", "source_corpus_row"],
-    kind="mergesort"
-).reset_index(drop=True)
+    for chunk in iter_corpus_chunks(path, chunk_size):
+        mask = chunk["source_corpus_row"].isin(chosen_rows).to_numpy()
 
-sample_df.insert(
-    0,
-    "sample_sentence_id",
-    [f"S{i:04d}" for i in range(1, len(sample_df) + 1)]
-)
+        if mask.any():
+            sampled_parts.append(chunk.loc[mask].copy())
 
-# Número de oración dentro de cada adjetivo: 1, 2, 3, 4, 5
-sample_df.insert(
-    1,
-    "sentence_number_for_adjective",
-    sample_df.groupby("selected_adjective").cumcount() + 1
-)
+    sample_df = pd.concat(sampled_parts, axis=0)
 
-# Elimina columnas técnicas internas
-sample_df = sample_df.drop(columns=["_word_key", "_selected_order"])
+    sample_df["selected_adjective"] = [
+        chosen_rows[row][0] for row in sample_df["source_corpus_row"]
+    ]
+    sample_df["n_available_for_adjective"] = [
+        chosen_rows[row][1] for row in sample_df["source_corpus_row"]
+    ]
 
+    return sample_df
 
-# =========================
-# EXPORTACIÓN A EXCEL
-# =========================
 
-with pd.ExcelWriter(OUTPUT_FILE, engine="openpyxl") as writer:
-    sample_df.to_excel(writer, index=False, sheet_name="sample_1000")
+def hash_rank(word_key, row_id, seed=RANDOM_SEED):
+    """
+    Rango pseudoaleatorio y reproducible de una oración para un adjetivo.
+    """
+    digest = hashlib.blake2b(
+        f"{word_key}\x1f{row_id}".encode("utf-8"),
+        digest_size=8,
+        key=str(seed).encode("utf-8")
+    ).digest()
+    return int.from_bytes(digest, "big")
+
+
+def shard_top_k(path, selected_keys, k=N_SENTENCES_PER_ADJECTIVE, chunk_size=CHUNK_SIZE):
+    """
+    Paso por shard: para cada adjetivo guarda las k oraciones de menor
+    rango y cuenta las oraciones disponibles.
+
+    Devuelve (top_k, counts), con top_k[key] = [(rango, desempate, fila), ...].
+    """
+
+    wanted = set(selected_keys)
+    shard_name = Path(path).name
+    buckets = {key: [] for key in selected_keys}
+    counts = {key: 0 for key in selected_keys}
+
+    def sort_key(item):
+        return item[:2]
+
+    for chunk in iter_corpus_chunks(path, chunk_size):
+        keys = chunk["palabra"].apply(normalize_word)
+        mask = keys.isin(wanted).to_numpy()
+
+        if not mask.any():
+            continue
+
+        rows = chunk.loc[mask]
+        id_col = HASH_ROW_ID_COL or "oracion"
+
+        for key, row_id, record in zip(
+            keys[mask],
+            rows[id_col],
+            rows.to_dict(orient="records")
+        ):
+            counts[key] += 1
 
-    # También guardamos una hoja de resumen para control metodológico
-    summary = (
-        sample_df
-        .groupby("selected_adjective")
-        .agg(
-            n_sentences_selected=("oracion", "count"),
-            n_available_for_adjective=("n_available_for_adjective", "first")
+            record["source_shard"] = shard_name
+            tie_break = (shard_name, int(record["source_corpus_row"]))
+
+            bucket = buckets[key]
+            bucket.append((hash_rank(key, row_id), tie_break, record))
+
+            # Recorta de vez en cuando para no guardar más de 4k filas por adjetivo
+            if len(bucket) >= 4 * k:
+                bucket.sort(key=sort_key)
+                del bucket[k:]
+
+    top_k = {}
+    for key, bucket in buckets.items():
+        bucket.sort(key=sort_key)
+        top_k[key] = bucket[:k]
+
+    return top_k, counts
+
+
+def _shard_top_k_task(args):
+    return shard_top_k(*args)
+
+
+def merge_top_k(shard_results, selected_keys, k=N_SENTENCES_PER_ADJECTIVE):
+    """
+    Fusión: une los resultados de todos los shards y se queda con las
+    k oraciones de menor rango por adjetivo.
+    """
+
+    merged = {key: [] for key in selected_keys}
+    counts = {key: 0 for key in selected_keys}
+
+    for top_k, shard_counts in shard_results:
+        for key in selected_keys:
+            merged[key].extend(top_k[key])
+            counts[key] += shard_counts[key]
+
+    for key in selected_keys:
+        merged[key] = sorted(merged[key], key=lambda item: item[:2])[:k]
+
+    return merged, counts
+
+
+def sample_hashed(paths, selected_adjectives, selected_keys, chunk_size=CHUNK_SIZE):
+    """
+    Muestreo por hash sobre uno o varios archivos del corpus.
+    """
+
+    tasks = [
+        (path, selected_keys, N_SENTENCES_PER_ADJECTIVE, chunk_size)
+        for path in paths
+    ]
+
+    if N_WORKERS > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=N_WORKERS) as executor:
+            shard_results = list(executor.map(_shard_top_k_task, tasks))
+    else:
+        shard_results = [_shard_top_k_task(task) for task in tasks]
+
+    merged, counts = merge_top_k(shard_results, selected_keys)
+
+    check_missing_words(
+        selected_adjectives,
+        selected_keys,
+        {key for key, n in counts.items() if n > 0}
+    )
+
+    records = []
+
+    for adjective, key in zip(selected_adjectives, selected_keys):
+        n_available = counts[key]
+        n_to_sample = n_to_sample_for(adjective, n_available)
+
+        for _, _, record in merged[key][:n_to_sample]:
+            records.append({
+                **record,
+                "selected_adjective": adjective,
+                "n_available_for_adjective": n_available,
+            })
+
+    return pd.DataFrame(records)
+
+
+def order_sample(sample_df, selected_keys):
+    """
+    Ordena la muestra según el orden de los adjetivos seleccionados y
+    añade los identificadores de control.
+    """
+
+    # Diccionario palabra -> posición (en lugar de buscar en la lista)
+    selected_order = {}
+    for position, key in enumerate(selected_keys):
+        selected_order.setdefault(key, position)
+
+    sample_df["_selected_order"] = (
+        sample_df["selected_adjective"]
+        .map(normalize_word)
+        .map(selected_order)
+    )
+
+    sample_df = sample_df.sort_values(
+        ["_selected_order", "source_corpus_row"],
+        kind="mergesort"
+    ).reset_index(drop=True)
+
+    sample_df.insert(
+        0,
+        "sample_sentence_id",
+        [f"S{i:04d}" for i in range(1, len(sample_df) + 1)]
+    )
+
+    # Número de oración dentro de cada adjetivo: 1, 2, 3, 4, 5
+    sample_df.insert(
+        1,
+        "sentence_number_for_adjective",
+        sample_df.groupby("selected_adjective").cumcount() + 1
+    )
+
+    # Elimina columnas técnicas internas
+    return sample_df.drop(columns=["_selected_order"])
+
+
+def make_xlsx_reproducible(path, timestamp=REPRODUCIBLE_TIMESTAMP):
+    """
+    openpyxl guarda la fecha de creación/modificación y la hora de cada
+    entrada del zip. Las fija para que dos ejecuciones con la misma
+    muestra produzcan exactamente el mismo archivo.
+    """
+
+    with zipfile.ZipFile(path) as zin:
+        entries = [(info, zin.read(info.filename)) for info in zin.infolist()]
+
+    with zipfile.ZipFile(path, mode="w") as zout:
+        for info, data in entries:
+            if info.filename == "docProps/core.xml":
+                data = re.sub(
+                    rb"(<dcterms:(?:created|modified)[^>]*>)[^<]*(</dcterms:)",
+                    rb"\g<1>" + timestamp.encode("ascii") + rb"\g<2>",
+                    data
+                )
+
+            fixed = zipfile.ZipInfo(info.filename, date_time=(1980, 1, 1, 0, 0, 0))
+            fixed.compress_type = zipfile.ZIP_DEFLATED
+            fixed.external_attr = info.external_attr
+            zout.writestr(fixed, data)
+
+
+def write_sample(sample_df, path):
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        sample_df.to_excel(writer, index=False, sheet_name="sample_1000")
+
+        # También guardamos una hoja de resumen para control metodológico
+        summary = (
+            sample_df
+            .groupby("selected_adjective")
+            .agg(
+                n_sentences_selected=("oracion", "count"),
+                n_available_for_adjective=("n_available_for_adjective", "first")
+            )
+            .reset_index()
+        )
+
+        summary.to_excel(writer, index=False, sheet_name="summary")
+
+    make_xlsx_reproducible(path)
+
+
+def build_sample(selected_adjectives, use_chunked_reader=USE_CHUNKED_READER):
+    selected_keys = [normalize_word(w) for w in selected_adjectives]
+
+    if USE_HASH_SAMPLING:
+        sample_df = sample_hashed(
+            [Path(p) for p in CORPUS_SHARDS] or [CORPUS_FILE],
+            selected_adjectives,
+            selected_keys,
+            CHUNK_SIZE
         )
-        .reset_index()
+    elif use_chunked_reader:
+        sample_df = sample_chunked(
+            CORPUS_FILE,
+            selected_adjectives,
+            selected_keys,
+            CHUNK_SIZE
+        )
+    else:
+        sample_df = sample_in_memory(
+            read_corpus(CORPUS_FILE),
+            selected_adjectives,
+            selected_keys
+        )
+
+    return order_sample(sample_df, selected_keys)
+
+
+def main():
+
+    # =========================
+    # LECTURA DE ARCHIVOS
+    # =========================
+
+    selected_adjectives, selected_df, selected_word_col = read_selected_adjectives(
+        SELECTED_ADJECTIVES_FILE
     )
 
-    summary.to_excel(writer, index=False, sheet_name="summary")
 
+    # =========================
+    # MUESTREO REPRODUCIBLE
+    # =========================
+
+    sample_df = build_sample(selected_adjectives)
+
+
+    # =========================
+    # EXPORTACIÓN A EXCEL
+    # =========================
+
+    write_sample(sample_df, OUTPUT_FILE)
+
+
+    # =========================
+    # CONTROL FINAL
+    # =========================
+
+    print(f"Archivo creado correctamente: {OUTPUT_FILE}")
+    print(f"Adjetivos seleccionados: {len(selected_adjectives)}")
+    print(f"Oraciones extraídas: {len(sample_df)}")
+    print()
+    print("Distribución de oraciones por adjetivo:")
+    print(sample_df["selected_adjective"].value_counts().describe())
 
-# =========================
-# CONTROL FINAL
-# =========================
 
-print(f"Archivo creado correctamente: {OUTPUT_FILE}")
-print(f"Adjetivos seleccionados: {len(selected_adjectives)}")
-print(f"Oraciones extraídas: {len(sample_df)}")
-print()
-print("Distribución de oraciones por adjetivo:")
-print(sample_df["selected_adjective"].value_counts().describe())
\ No newline at end of file
+if __name__ == "__main__":
+    main()
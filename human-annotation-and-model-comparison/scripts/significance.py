@@ -0,0 +1,468 @@
+"""
+Incertidumbre y significación de las comparaciones modelo vs gold.
+
+Para pysentimiento, Cardiff, ChatGPT y Claude calcula, de forma general y
+por entropy_band:
+
+- intervalos bootstrap (percentil) de accuracy y macro-F1, estratificados
+  por entropy_band y por conglomerados de palabra (se remuestrean palabras
+  dentro de cada banda, no oraciones sueltas: las oraciones de una misma
+  palabra no son independientes);
+- para cada par de modelos, el intervalo bootstrap de la diferencia (las
+  mismas réplicas para los dos modelos), un test de permutación pareado
+  (intercambio aleatorio de las predicciones de los dos modelos en cada
+  oración) y el test de McNemar (binomial exacto y chi-cuadrado con
+  corrección de continuidad).
+
+Las réplicas no recorren filas: cada réplica es una fila de una matriz de
+índices (conglomerados sorteados), que se convierte en pesos con un
+bincount y se multiplica por las matrices de confusión de cada conglomerado
+(metrics_kernel). Las permutaciones se aplican igual, como una matriz de
+intercambios por las diferencias one-hot entre los dos modelos. Las réplicas
+se calculan por bloques, cada uno con su propia semilla derivada de
+RANDOM_SEED, así que el resultado no depende de N_JOBS.
+"""
+
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+import csv
+import math
+import os
+import time
+
+import numpy as np
+
+from annotation_schema import normalize_header
+from metrics_kernel import encode_labels, encode_groups, confusion_counts, class_metrics
+from model_predictions import load_model_predictions
+
+
+# =========================
+# CONFIGURACIÓN
+# =========================
+
+COMPARISON_FILE = Path("sample_1000_sentences_for_manual_annotation_randomized_auto_label_gold_entropy_band_Comparsion.xlsx")
+CHATGPT_FILE = Path("LLM_prueba_anotation_CHATGPT.xlsx")
+CLAUDE_FILE = Path("LLM_prueba_anotation_Claude.xlsx")
+
+OUTPUT_BOOTSTRAP_CSV = Path("model_bootstrap_ci.csv")
+OUTPUT_PAIRWISE_CSV = Path("model_pairwise_tests.csv")
+
+FIRST_DATA_ROW = 2
+LAST_DATA_ROW = 960
+
+# (nombre, archivo, columna de predicción). Gold Human Label, Word y
+# entropy_band se leen del primer archivo; los demás se unen por
+# sample_sentence_id o, si no lo tienen, por posición comprobando Word
+# (ver model_predictions).
+MODELS = [
+    ("pysentimiento", COMPARISON_FILE, "auto_label"),
+    ("cardiff", COMPARISON_FILE, "cardiff_label"),
+    ("chatgpt", CHATGPT_FILE, "chatgpt_label"),
+    ("claude", CLAUDE_FILE, "claude_label"),
+]
+
+LABELS = ["NEG", "NEU", "POS"]
+ENTROPY_BANDS = ["low", "mid", "high"]
+
+N_BOOTSTRAP = 10_000
+N_PERMUTATIONS = 10_000
+CONFIDENCE = 0.95
+
+# Conglomerados del bootstrap: "word" = palabra, None = cada oración
+CLUSTER_ROLE = "word"
+
+RANDOM_SEED = 20260423
+
+# Réplicas por bloque (cada bloque tiene su semilla)
+CHUNK_SIZE = 1_000
+
+# Procesos para los bloques (1 = sin procesos, None = todos los núcleos)
+N_JOBS = 1
+
+METRICS = ["accuracy", "macro_f1"]
+
+
+# =========================
+# BOOTSTRAP
+# =========================
+
+def bootstrap_weights(cluster_strata, n_replicates, rng):
+    """
+    Matriz (n_replicates, n_clusters): cuántas veces entra cada conglomerado
+    en cada réplica. En cada estrato se sortean, con reemplazo, tantos
+    conglomerados como tiene el estrato (una fila de índices por réplica).
+    """
+    n_clusters = len(cluster_strata)
+    weights = np.zeros((n_replicates, n_clusters), dtype=np.float64)
+
+    for stratum in np.unique(cluster_strata):
+        members = np.flatnonzero(cluster_strata == stratum)
+        k = len(members)
+
+        draws = rng.integers(0, k, size=(n_replicates, k))
+        offsets = np.arange(n_replicates)[:, None] * k
+        counts = np.bincount((draws + offsets).ravel(), minlength=n_replicates * k)
+
+        weights[:, members] = counts.reshape(n_replicates, k)
+
+    return weights
+
+
+def bootstrap_chunk(seed, n_replicates, cluster_strata, cluster_confusions, scope_masks):
+    """
+    Un bloque de réplicas. cluster_confusions: (modelos, conglomerados, L*L).
+    Devuelve {ámbito: {métrica: array (modelos, réplicas)}}.
+    """
+    rng = np.random.default_rng(seed)
+    weights = bootstrap_weights(cluster_strata, n_replicates, rng)
+
+    n_models, _, n_cells = cluster_confusions.shape
+    n_labels = int(round(math.sqrt(n_cells)))
+
+    results = {}
+
+    for scope, mask in scope_masks.items():
+        confusion = np.einsum("rk,mkc->mrc", weights[:, mask], cluster_confusions[:, mask])
+        metrics = class_metrics(confusion.reshape(n_models, n_replicates, n_labels, n_labels))
+        results[scope] = {metric: metrics[metric] for metric in METRICS}
+
+    return results
+
+
+def run_chunks(function, tasks, n_jobs=N_JOBS):
+    """
+    Ejecuta function(*task) para cada tarea, en procesos si n_jobs != 1.
+    """
+    if n_jobs == 1 or len(tasks) == 1:
+        return [function(*task) for task in tasks]
+
+    max_workers = os.cpu_count() if n_jobs is None else n_jobs
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(function, *zip(*tasks)))
+
+
+def chunk_sizes(n_total, chunk_size=CHUNK_SIZE):
+    return [min(chunk_size, n_total - start) for start in range(0, n_total, chunk_size)]
+
+
+def chunk_seeds(seed, n_chunks):
+    """
+    Una semilla independiente por bloque (seed: entero o SeedSequence).
+    """
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    return seed.spawn(n_chunks)
+
+
+def bootstrap_replicates(
+    gold_codes,
+    pred_codes,
+    band_codes,
+    cluster_codes,
+    n_replicates=N_BOOTSTRAP,
+    seed=RANDOM_SEED,
+    n_jobs=N_JOBS
+):
+    """
+    Réplicas bootstrap estratificadas por banda y por conglomerados.
+    Las filas sin entropy_band válida forman un estrato aparte: cuentan en
+    "overall" (como en la estimación puntual) y en ninguna banda.
+    pred_codes: (modelos, filas). Devuelve {ámbito: {métrica: (modelos, réplicas)}}.
+    """
+    n_labels = len(LABELS)
+
+    strata = np.where(band_codes >= 0, band_codes, len(ENTROPY_BANDS))
+
+    # Conglomerado = (estrato, palabra): así cada conglomerado cae en un solo estrato
+    keys = strata * (int(cluster_codes.max()) + 1) + cluster_codes
+    cluster_keys, row_cluster = np.unique(keys, return_inverse=True)
+    row_cluster = row_cluster.reshape(-1).astype(np.int64)
+
+    n_clusters = len(cluster_keys)
+    cluster_strata = cluster_keys // (int(cluster_codes.max()) + 1)
+
+    cluster_confusions = np.stack([
+        confusion_counts(
+            gold_codes,
+            codes,
+            n_labels,
+            group_codes=row_cluster,
+            n_groups=n_clusters
+        ).reshape(n_clusters, n_labels * n_labels)
+        for codes in pred_codes
+    ]).astype(np.float64)
+
+    scope_masks = {"overall": np.ones(n_clusters, dtype=bool)}
+    for band_index, band in enumerate(ENTROPY_BANDS):
+        scope_masks[band] = cluster_strata == band_index
+
+    sizes = chunk_sizes(n_replicates)
+    seeds = chunk_seeds(seed, len(sizes))
+
+    chunks = run_chunks(
+        bootstrap_chunk,
+        [(s, size, cluster_strata, cluster_confusions, scope_masks) for s, size in zip(seeds, sizes)],
+        n_jobs=n_jobs
+    )
+
+    return {
+        scope: {
+            metric: np.concatenate([chunk[scope][metric] for chunk in chunks], axis=1)
+            for metric in METRICS
+        }
+        for scope in scope_masks
+    }
+
+
+def percentile_interval(values, confidence=CONFIDENCE):
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(values, [alpha, 1 - alpha], axis=-1)
+    return low, high
+
+
+# =========================
+# TESTS PAREADOS
+# =========================
+
+def one_hot_cells(gold_codes, pred_codes, n_labels):
+    """
+    (filas, L*L): un 1 en la celda gold * L + pred de cada fila.
+    """
+    cells = np.zeros((len(gold_codes), n_labels * n_labels), dtype=np.float64)
+    cells[np.arange(len(gold_codes)), gold_codes * n_labels + pred_codes] = 1
+    return cells
+
+
+def statistics_from_cells(confusion, n_labels):
+    metrics = class_metrics(confusion.reshape(confusion.shape[:-1] + (n_labels, n_labels)))
+    return {metric: metrics[metric] for metric in METRICS}
+
+
+def permutation_chunk(seed, n_permutations, gold_codes, codes_a, codes_b, n_labels):
+    """
+    Un bloque de permutaciones: en cada una, cada oración intercambia (con
+    probabilidad 0,5) la predicción de A y la de B. Devuelve {métrica:
+    diferencias A - B por permutación}.
+    """
+    rng = np.random.default_rng(seed)
+
+    cells_a = one_hot_cells(gold_codes, codes_a, n_labels)
+    cells_b = one_hot_cells(gold_codes, codes_b, n_labels)
+    delta = cells_b - cells_a
+
+    swaps = rng.integers(0, 2, size=(n_permutations, len(gold_codes))).astype(np.float64)
+    moved = swaps @ delta
+
+    stats_a = statistics_from_cells(cells_a.sum(axis=0) + moved, n_labels)
+    stats_b = statistics_from_cells(cells_b.sum(axis=0) - moved, n_labels)
+
+    return {metric: stats_a[metric] - stats_b[metric] for metric in METRICS}
+
+
+def permutation_test(gold_codes, codes_a, codes_b, n_permutations=N_PERMUTATIONS, seed=RANDOM_SEED, n_jobs=N_JOBS):
+    """
+    Test de permutación pareado (bilateral) de la diferencia A - B en cada
+    métrica. Devuelve {métrica: (diferencia observada, p-valor)}.
+    """
+    n_labels = len(LABELS)
+
+    observed_a = statistics_from_cells(one_hot_cells(gold_codes, codes_a, n_labels).sum(axis=0), n_labels)
+    observed_b = statistics_from_cells(one_hot_cells(gold_codes, codes_b, n_labels).sum(axis=0), n_labels)
+
+    sizes = chunk_sizes(n_permutations)
+    seeds = chunk_seeds(seed, len(sizes))
+
+    chunks = run_chunks(
+        permutation_chunk,
+        [(s, size, gold_codes, codes_a, codes_b, n_labels) for s, size in zip(seeds, sizes)],
+        n_jobs=n_jobs
+    )
+
+    results = {}
+
+    for metric in METRICS:
+        observed = float(observed_a[metric] - observed_b[metric])
+        permuted = np.concatenate([chunk[metric] for chunk in chunks])
+
+        # Tolerancia para empates numéricos entre diferencias iguales
+        extreme = int(np.sum(np.abs(permuted) >= abs(observed) - 1e-12))
+        results[metric] = (observed, (extreme + 1) / (len(permuted) + 1))
+
+    return results
+
+
+def mcnemar_test(correct_a, correct_b):
+    """
+    McNemar sobre los pares discordantes: b = A acierta y B falla,
+    c = A falla y B acierta. Devuelve (b, c, p exacto, p chi-cuadrado con
+    corrección de continuidad).
+    """
+    b = int(np.sum(correct_a & ~correct_b))
+    c = int(np.sum(~correct_a & correct_b))
+    n = b + c
+
+    if n == 0:
+        return b, c, 1.0, 1.0
+
+    # Binomial exacto bilateral con p = 0,5 (aritmética entera)
+    tail = sum(math.comb(n, k) for k in range(min(b, c) + 1))
+    exact_p = min(1.0, 2 * tail / 2 ** n)
+
+    chi2 = (abs(b - c) - 1) ** 2 / n
+    chi2_p = math.erfc(math.sqrt(chi2 / 2))
+
+    return b, c, exact_p, chi2_p
+
+
+# =========================
+# ESCRITURA DE RESULTADOS
+# =========================
+
+def write_csv(path, fieldnames, rows):
+    with open(path, mode="w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, delimiter=";")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+# =========================
+# EJECUCIÓN
+# =========================
+
+def main():
+    start = time.perf_counter()
+
+    reference, predictions = load_model_predictions(
+        MODELS,
+        first_data_row=FIRST_DATA_ROW,
+        last_data_row=LAST_DATA_ROW
+    )
+    model_names = list(predictions)
+    words = reference.raw("word")
+
+    gold_codes = encode_labels(reference["gold_label"], LABELS)
+    band_codes = encode_labels(reference["entropy_band"], ENTROPY_BANDS)
+    pred_codes = np.stack([encode_labels(predictions[name], LABELS) for name in model_names])
+
+    if CLUSTER_ROLE is None:
+        cluster_codes = np.arange(len(gold_codes))
+    else:
+        cluster_codes, _ = encode_groups([normalize_header(word) for word in words])
+
+    replicates = bootstrap_replicates(gold_codes, pred_codes, band_codes, cluster_codes)
+
+    scopes = ["overall"] + ENTROPY_BANDS
+    scope_rows = {
+        "overall": np.ones(len(gold_codes), dtype=bool),
+        **{band: band_codes == i for i, band in enumerate(ENTROPY_BANDS)},
+    }
+
+    # Intervalos por modelo
+    bootstrap_rows = []
+
+    for scope in scopes:
+        rows = scope_rows[scope]
+
+        for model_index, name in enumerate(model_names):
+            confusion = confusion_counts(gold_codes[rows], pred_codes[model_index][rows], len(LABELS))
+            estimate = class_metrics(confusion)
+
+            for metric in METRICS:
+                low, high = percentile_interval(replicates[scope][metric][model_index])
+                bootstrap_rows.append({
+                    "model": name,
+                    "scope": scope,
+                    "metric": metric,
+                    "n_cases": int(confusion.sum()),
+                    "estimate": float(estimate[metric]),
+                    "ci_low": float(low),
+                    "ci_high": float(high),
+                    "bootstrap_se": float(np.std(replicates[scope][metric][model_index], ddof=1)),
+                })
+
+    # Comparaciones por pares
+    pairwise_rows = []
+    seeds = iter(chunk_seeds(
+        RANDOM_SEED + 1,
+        len(scopes) * len(model_names) * (len(model_names) - 1) // 2
+    ))
+
+    for scope in scopes:
+        for index_a, index_b in combinations(range(len(model_names)), 2):
+            codes_a = pred_codes[index_a]
+            codes_b = pred_codes[index_b]
+
+            rows = scope_rows[scope] & (gold_codes >= 0) & (codes_a >= 0) & (codes_b >= 0)
+
+            permutation = permutation_test(
+                gold_codes[rows],
+                codes_a[rows],
+                codes_b[rows],
+                seed=next(seeds)
+            )
+
+            b, c, exact_p, chi2_p = mcnemar_test(
+                codes_a[rows] == gold_codes[rows],
+                codes_b[rows] == gold_codes[rows]
+            )
+
+            for metric in METRICS:
+                difference = replicates[scope][metric][index_a] - replicates[scope][metric][index_b]
+                low, high = percentile_interval(difference)
+                observed, permutation_p = permutation[metric]
+
+                pairwise_rows.append({
+                    "model_a": model_names[index_a],
+                    "model_b": model_names[index_b],
+                    "scope": scope,
+                    "metric": metric,
+                    "n_cases": int(rows.sum()),
+                    "difference": observed,
+                    "diff_ci_low": float(low),
+                    "diff_ci_high": float(high),
+                    "permutation_p": permutation_p,
+                    "mcnemar_a_only_correct": b,
+                    "mcnemar_b_only_correct": c,
+                    "mcnemar_exact_p": exact_p,
+                    "mcnemar_chi2_p": chi2_p,
+                })
+
+    write_csv(OUTPUT_BOOTSTRAP_CSV, list(bootstrap_rows[0]), bootstrap_rows)
+    write_csv(OUTPUT_PAIRWISE_CSV, list(pairwise_rows[0]), pairwise_rows)
+
+    print("BOOTSTRAP Y TESTS DE SIGNIFICACIÓN")
+    print("==================================")
+    print(f"Modelos: {', '.join(model_names)}")
+    print(f"Réplicas bootstrap: {N_BOOTSTRAP} (estratos: entropy_band; conglomerados: {CLUSTER_ROLE or 'oración'})")
+    print(f"Permutaciones: {N_PERMUTATIONS}")
+    print()
+
+    for item in bootstrap_rows:
+        if item["scope"] == "overall":
+            print(
+                f"{item['model']} - {item['metric']}: {item['estimate']:.4f} "
+                f"[{item['ci_low']:.4f}, {item['ci_high']:.4f}]"
+            )
+
+    print()
+
+    for item in pairwise_rows:
+        if item["scope"] == "overall" and item["metric"] == "accuracy":
+            print(
+                f"{item['model_a']} vs {item['model_b']}: "
+                f"diferencia accuracy={item['difference']:+.4f} "
+                f"[{item['diff_ci_low']:+.4f}, {item['diff_ci_high']:+.4f}], "
+                f"p perm={item['permutation_p']:.4f}, "
+                f"p McNemar={item['mcnemar_exact_p']:.4g}"
+            )
+
+    print()
+    print(f"Tiempo total: {time.perf_counter() - start:.1f} s")
+    print(f"Archivos creados: {OUTPUT_BOOTSTRAP_CSV}, {OUTPUT_PAIRWISE_CSV}")
+
+
+if __name__ == "__main__":
+    main()